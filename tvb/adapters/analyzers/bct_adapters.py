@@ -29,11 +29,14 @@
 #
 
 import os
+import numpy
 from abc import abstractmethod
+from tvb.adapters.analyzers import bct_numpy
 from tvb.adapters.analyzers.matlab_worker import MatlabWorker
 from tvb.basic.filters.chain import FilterChain
 from tvb.basic.profile import TvbProfile
 from tvb.core.adapters.abcadapter import ABCAsynchronous
+from tvb.core.adapters.exceptions import LaunchException
 from tvb.core.entities.model import AlgorithmTransientGroup
 from tvb.core.utils import extract_matlab_doc_string
 from tvb.datatypes.connectivity import Connectivity
@@ -53,31 +56,71 @@ LABEL_CONNECTIVITY_BINARY = "Binary (directed/undirected) connection matrix"
 LABEL_CONN_WEIGHTED_DIRECTED = "Weighted directed connection matrix"
 LABEL_CONN_WEIGHTED_UNDIRECTED = "Weighted undirected connection matrix"
 
+BACKEND_NUMPY = "numpy"
+BACKEND_MATLAB = "matlab"
+
 
 def bct_description(mat_file_name):
     return extract_matlab_doc_string(os.path.join(BCT_PATH, mat_file_name))
 
 
+
+class _CollectedInputs(Exception):
+    """
+    Raised by `execute_bct` to stop `launch`, once the inputs for one connectivity are prepared.
+    """
+
+    def __init__(self, inputs):
+        super(_CollectedInputs, self).__init__()
+        self.inputs = inputs
+
+
 class BaseBCT(ABCAsynchronous):
     """
     Interface between Brain Connectivity Toolbox of Olaf Sporns and TVB Framework.
-    This adapter requires BCT deployed locally, and Matlab or Octave installed separately of TVB.
+    Algorithms implemented in bct_numpy are computed in the current process; for the others,
+    this adapter requires BCT deployed locally, and Matlab or Octave installed separately of TVB.
     """
     _ui_connectivity_label = "Connection matrix:"
+    _matlab_code = None
 
 
     def __init__(self):
         ABCAsynchronous.__init__(self)
         self.matlab_worker = MatlabWorker()
+        self._collect_inputs = False
+        self._batch_result = None
 
 
-    @staticmethod
-    def can_be_active():
-        return not not TvbProfile.current.MATLAB_EXECUTABLE
+    @classmethod
+    def can_be_active(cls):
+        return cls.has_numpy_backend() or not not TvbProfile.current.MATLAB_EXECUTABLE
+
+
+    @classmethod
+    def has_numpy_backend(cls):
+        return cls._matlab_code is not None and bct_numpy.supports(cls._matlab_code)
+
+
+    def _get_backend_inputs(self):
+        """
+        The computation backend can be chosen for algorithms available in bct_numpy (the default for those).
+        :returns: a list with the backend input, or an empty list when no backend is available for this algorithm
+        """
+        options = []
+        if self.has_numpy_backend():
+            options.append({'name': 'NumPy', 'value': BACKEND_NUMPY})
+        if TvbProfile.current.MATLAB_EXECUTABLE:
+            options.append({'name': 'MATLAB / Octave', 'value': BACKEND_MATLAB})
+        if not options:
+            return []
+        return [dict(name="backend", label="Computation backend", type="select", default=options[0]['value'],
+                     options=options)]
 
 
     def get_input_tree(self):
-        return [dict(name="connectivity", label=self._ui_connectivity_label, type=Connectivity, required=True)]
+        return [dict(name="connectivity", label=self._ui_connectivity_label, type=Connectivity,
+                     required=True)] + self._get_backend_inputs()
 
 
     def get_output(self):
@@ -93,6 +136,70 @@ class BaseBCT(ABCAsynchronous):
         return 0
 
 
+    def execute_bct(self, matlab_code, backend=None, **kwargs):
+        """
+        Execute BCT code, with NumPy when available (or when explicitly chosen) and with MATLAB otherwise.
+        """
+        if self._collect_inputs:
+            raise _CollectedInputs(kwargs)
+        if self._batch_result is not None:
+            result, self._batch_result = self._batch_result, None
+            return result
+        if backend is None:
+            backend = BACKEND_NUMPY if bct_numpy.supports(matlab_code) else BACKEND_MATLAB
+        if backend == BACKEND_NUMPY:
+            self.log.info("Starting NumPy execution of BCT code:" + matlab_code)
+            return bct_numpy.evaluate(matlab_code, kwargs)
+        if not TvbProfile.current.MATLAB_EXECUTABLE:
+            raise LaunchException("This BCT algorithm has no NumPy implementation, and requires MATLAB or Octave. "
+                                  "Please configure the MATLAB/Octave executable in TVB settings.")
+        return self.execute_matlab(matlab_code, **kwargs)
+
+
+    def launch_batch(self, connectivities):
+        """
+        Compute the current algorithm with NumPy for many connectivities at once (e.g. all the Connectivities
+        in a DataTypeGroup resulted from a PSE). The inputs prepared by `launch` are stacked for connectivities
+        with the same number of regions, and evaluated with one bct_numpy call per stack. Then `launch` builds
+        the results of every connectivity, as for a single operation.
+
+        :returns: list with the results of all connectivities
+        """
+        if not self.has_numpy_backend():
+            raise LaunchException("This BCT algorithm has no NumPy implementation, "
+                                  "thus it can not be computed for a group of connectivities at once.")
+        inputs = []
+        self._collect_inputs = True
+        try:
+            for connectivity in connectivities:
+                try:
+                    self.launch(connectivity)
+                except _CollectedInputs as collected:
+                    inputs.append(collected.inputs)
+        finally:
+            self._collect_inputs = False
+
+        stacks = {}
+        for idx, one_input in enumerate(inputs):
+            shapes = tuple(sorted((name, numpy.shape(value)) for name, value in one_input.items()))
+            stacks.setdefault(shapes, []).append(idx)
+
+        results = [None] * len(inputs)
+        for indices in stacks.values():
+            stacked = dict((name, numpy.array([inputs[idx][name] for idx in indices])) for name in inputs[indices[0]])
+            self.log.info("Starting NumPy execution of BCT code on %d connectivities: %s"
+                          % (len(indices), self._matlab_code))
+            evaluated = bct_numpy.evaluate(self._matlab_code, stacked)
+            for position, idx in enumerate(indices):
+                results[idx] = dict((name, value[position]) for name, value in evaluated.items())
+
+        outputs = []
+        for connectivity, result in zip(connectivities, results):
+            self._batch_result = result
+            outputs.extend(self.launch(connectivity))
+        return outputs
+
+
     def execute_matlab(self, matlab_code, **kwargs):
         self.matlab_worker.add_to_path(BCT_PATH)
         self.log.info("Starting execution of MATLAB code:" + matlab_code)
@@ -142,7 +249,7 @@ class BaseUndirected(BaseBCT):
     def get_input_tree(self):
         return [dict(name="connectivity", label=self._ui_connectivity_label, type=Connectivity, required=True,
                      conditions=FilterChain(fields=[FilterChain.datatype + '._undirected'],
-                                            operations=["=="], values=['1']))]
+                                            operations=["=="], values=['1']))] + self._get_backend_inputs()
 
 
     @abstractmethod
@@ -165,7 +272,7 @@ class ModularityOCSM(BaseBCT):
         # Prepare parameters
         kwargs['CW'] = connectivity.weights
         # Execute the matlab code
-        result = self.execute_matlab(self._matlab_code, **kwargs)
+        result = self.execute_bct(self._matlab_code, **kwargs)
         # Gather results
         measure = self.build_connectivity_measure(result, 'Ci', connectivity, "Optimal Community Structure")
         value = self.build_float_value_wrapper(result, 'Q', title="Maximized Modularity")
@@ -192,7 +299,7 @@ class DistanceDBIN(BaseBCT):
 
     def launch(self, connectivity, **kwargs):
         kwargs['A'] = connectivity.weights
-        result = self.execute_matlab(self._matlab_code, **kwargs)
+        result = self.execute_bct(self._matlab_code, **kwargs)
         measure = self.build_connectivity_measure(result, 'D', connectivity, "Distance matrix")
         return [measure]
 
@@ -216,7 +323,7 @@ class DistanceRDM(DistanceDBIN):
 
     def launch(self, connectivity, **kwargs):
         kwargs['A'] = connectivity.weights
-        result = self.execute_matlab(self._matlab_code, **kwargs)
+        result = self.execute_bct(self._matlab_code, **kwargs)
 
         measure1 = self.build_connectivity_measure(result, 'R', connectivity, "Reachability matrix")
         measure2 = self.build_connectivity_measure(result, 'D', connectivity, "Distance matrix")
@@ -241,7 +348,7 @@ class DistanceNETW(DistanceDBIN):
 
     def launch(self, connectivity, **kwargs):
         kwargs['A'] = connectivity.weights
-        result = self.execute_matlab(self._matlab_code, **kwargs)
+        result = self.execute_bct(self._matlab_code, **kwargs)
 
         measure1 = self.build_connectivity_measure(result, 'Wq', connectivity, "3D matrix")
         measure2 = self.build_connectivity_measure(result, 'wlq', connectivity, "Walk length distribution")
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+# Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+# Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+# The Virtual Brain: a simulator of primate brain network dynamics.
+# Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Compute one of the BCT algorithms available in NumPy, on all the Connectivities of a DataTypeGroup
+(e.g. resulted from a PSE), in a single operation.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import inspect
+from tvb.adapters.analyzers import bct_adapters, bct_centrality_adapters, bct_clustering_adapters
+from tvb.adapters.analyzers import bct_degree_adapters
+from tvb.adapters.analyzers.bct_adapters import BaseBCT
+from tvb.core.adapters.abcadapter import ABCAsynchronous
+from tvb.core.adapters.exceptions import LaunchException
+from tvb.core.entities import model
+from tvb.core.entities.model import AlgorithmTransientGroup
+from tvb.core.entities.storage import dao
+from tvb.datatypes.connectivity import Connectivity
+from tvb.datatypes.graph import ConnectivityMeasure
+from tvb.datatypes.mapped_values import ValueWrapper
+
+
+BCT_GROUP_BATCH = AlgorithmTransientGroup("Connectivity Group Algorithms", "Brain Connectivity Toolbox", "bctgroup")
+
+
+def _numpy_bct_algorithms():
+    """
+    :returns: dictionary {class name: BCT adapter class}, for the BCT adapters which can run with NumPy
+    """
+    algorithms = {}
+    for module in (bct_adapters, bct_centrality_adapters, bct_clustering_adapters, bct_degree_adapters):
+        for name, adapter_class in inspect.getmembers(module, inspect.isclass):
+            if (issubclass(adapter_class, BaseBCT) and not inspect.isabstract(adapter_class)
+                    and adapter_class.has_numpy_backend()):
+                algorithms[name] = adapter_class
+    return algorithms
+
+
+NUMPY_BCT_ALGORITHMS = _numpy_bct_algorithms()
+
+
+
+class BCTGroupAnalyzer(ABCAsynchronous):
+    """
+    Evaluate a BCT algorithm on all the Connectivities in a DataTypeGroup, by stacking their matrices.
+    The results are the same as when launching the algorithm on every Connectivity in part.
+    """
+    _ui_group = BCT_GROUP_BATCH
+    _ui_name = "BCT on a group of connectivities"
+    _ui_description = "Compute a Brain Connectivity Toolbox algorithm (NumPy implementation) " \
+                      "on all the connectivities in a group."
+
+
+    def get_input_tree(self):
+        options = [{'name': NUMPY_BCT_ALGORITHMS[name]._ui_name, 'value': name}
+                   for name in sorted(NUMPY_BCT_ALGORITHMS)]
+        return [{'name': 'datatype_group', 'label': 'Connectivity group', 'type': model.DataTypeGroup,
+                 'required': True},
+                {'name': 'algorithm', 'label': 'BCT algorithm', 'type': 'select', 'required': True,
+                 'default': options[0]['value'], 'options': options}]
+
+
+    def get_output(self):
+        return [ConnectivityMeasure, ValueWrapper]
+
+
+    def get_required_memory_size(self, **kwargs):
+        # We do not know how much memory is needed.
+        return -1
+
+
+    def get_required_disk_size(self, **kwargs):
+        return 0
+
+
+    def launch(self, datatype_group, algorithm):
+        if algorithm not in NUMPY_BCT_ALGORITHMS:
+            raise LaunchException("Unknown BCT algorithm %s." % algorithm)
+        connectivities = dao.get_datatypes_from_datatype_group(datatype_group.id)
+        if not connectivities or not all(isinstance(conn, Connectivity) for conn in connectivities):
+            raise LaunchException("The selected group should contain only Connectivities.")
+
+        bct_adapter = NUMPY_BCT_ALGORITHMS[algorithm]()
+        bct_adapter.storage_path = self.storage_path
+        return bct_adapter.launch_batch(connectivities)
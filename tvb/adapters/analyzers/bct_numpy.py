@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+NumPy implementation for part of the Brain Connectivity Toolbox functions used by the BCT adapters.
+
+Functions follow the MATLAB implementations (same names, inputs and outputs), but they work on stacks of
+matrices: an input of shape (..., N, N) produces node measures of shape (..., N) and global measures of
+shape (...), so a whole group of connectivities can be evaluated in one call.
+
+`evaluate` executes the BCT code declared by the adapters (e.g. "[id,od,deg] = degrees_dir(CIJ);")
+with these functions, without any MATLAB or Octave process.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import re
+import numpy
+
+
+STATEMENT_PATTERN = re.compile(r"^\s*(?:\[(?P<outputs>[\w\s,]*)\]|(?P<output>\w+))\s*=\s*"
+                               r"(?P<function>\w+)\s*\((?P<arguments>[\w\s,]*)\)\s*$")
+
+
+def _diagonal(matrices):
+    return numpy.diagonal(matrices, axis1=-2, axis2=-1)
+
+
+def _transpose(matrices):
+    return numpy.swapaxes(matrices, -1, -2)
+
+
+def _matmul(first, second):
+    return numpy.einsum('...ij,...jk->...ik', first, second)
+
+
+def _per_matrix(function, matrices, *arguments):
+    """
+    Apply a function which is not vectorized, on each matrix from a stack.
+    """
+    batch_shape = matrices.shape[:-2]
+    flat = matrices.reshape((-1,) + matrices.shape[-2:])
+    results = [function(matrix, *arguments) for matrix in flat]
+    return tuple(numpy.array(values).reshape(batch_shape + numpy.shape(values[0])) for values in zip(*results))
+
+
+
+###################### Degree, strength and density ######################
+
+def degrees_und(CIJ):
+    CIJ = numpy.asarray(CIJ)
+    return (CIJ != 0).sum(axis=-2).astype(float),
+
+
+def degrees_dir(CIJ):
+    CIJ = numpy.asarray(CIJ)
+    in_degree = (CIJ != 0).sum(axis=-2).astype(float)
+    out_degree = (CIJ != 0).sum(axis=-1).astype(float)
+    return in_degree, out_degree, in_degree + out_degree
+
+
+def strengths_und(CIJ):
+    return numpy.asarray(CIJ, dtype=float).sum(axis=-2),
+
+
+def strengths_dir(CIJ):
+    CIJ = numpy.asarray(CIJ, dtype=float)
+    in_strength = CIJ.sum(axis=-2)
+    out_strength = CIJ.sum(axis=-1)
+    return in_strength, out_strength, in_strength + out_strength
+
+
+def strengths_und_sign(W):
+    W = numpy.array(W, dtype=float)
+    nodes = W.shape[-1]
+    W[..., numpy.arange(nodes), numpy.arange(nodes)] = 0
+    positive = numpy.where(W > 0, W, 0).sum(axis=-2)
+    negative = -numpy.where(W < 0, W, 0).sum(axis=-2)
+    return positive, negative, positive.sum(axis=-1), negative.sum(axis=-1)
+
+
+def density_dir(CIJ):
+    CIJ = numpy.asarray(CIJ)
+    nodes = CIJ.shape[-1]
+    edges = (CIJ != 0).sum(axis=(-2, -1))
+    return edges / float(nodes ** 2 - nodes), numpy.full(edges.shape, nodes), edges
+
+
+def density_und(CIJ):
+    CIJ = numpy.asarray(CIJ)
+    nodes = CIJ.shape[-1]
+    edges = (numpy.triu(CIJ) != 0).sum(axis=(-2, -1))
+    return edges / ((nodes ** 2 - nodes) / 2.0), numpy.full(edges.shape, nodes), edges
+
+
+
+###################### Clustering and transitivity ######################
+
+def _ratio(numerator, denominator):
+    """
+    Element-wise division, where positions with a null numerator give 0 (as MATLAB code does by setting
+    the denominator to inf in those places).
+    """
+    denominator = numpy.where(numerator == 0, numpy.inf, denominator)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        return numerator / denominator
+
+
+def _directed_cycles(A, S):
+    """
+    :returns: tuple (number of closed triangles around each node, number of possible triangles)
+    """
+    K = (A + _transpose(A)).sum(axis=-1)
+    cycles = _diagonal(_matmul(_matmul(S, S), S)) / 2.0
+    possible = K * (K - 1) - 2 * _diagonal(_matmul(A, A))
+    return cycles, possible
+
+
+def clustering_coef_bu(G):
+    G = numpy.asarray(G, dtype=float)
+    B = (G != 0).astype(float)
+    neighbours = B.sum(axis=-1)
+    # Sum of the connections between the neighbours of each node
+    connections = numpy.einsum('...ui,...ij,...uj->...u', B, G, B)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        return numpy.where(neighbours >= 2, connections / (neighbours ** 2 - neighbours), 0),
+
+
+def clustering_coef_bd(A):
+    A = numpy.asarray(A, dtype=float)
+    cycles, possible = _directed_cycles(A, A + _transpose(A))
+    return _ratio(cycles, possible),
+
+
+def clustering_coef_wu(W):
+    W = numpy.asarray(W, dtype=float)
+    K = (W != 0).sum(axis=-1).astype(float)
+    root = numpy.power(W, 1 / 3.0)
+    cycles = _diagonal(_matmul(_matmul(root, root), root))
+    return _ratio(cycles, K * (K - 1)),
+
+
+def clustering_coef_wd(W):
+    W = numpy.asarray(W, dtype=float)
+    root = numpy.power(W, 1 / 3.0)
+    cycles, possible = _directed_cycles((W != 0).astype(float), root + _transpose(root))
+    return _ratio(cycles, possible),
+
+
+def transitivity_bu(A):
+    A = numpy.asarray(A, dtype=float)
+    square = _matmul(A, A)
+    trace_square = _diagonal(square).sum(axis=-1)
+    return _diagonal(_matmul(square, A)).sum(axis=-1) / (square.sum(axis=(-2, -1)) - trace_square),
+
+
+def transitivity_bd(A):
+    A = numpy.asarray(A, dtype=float)
+    cycles, possible = _directed_cycles(A, A + _transpose(A))
+    return cycles.sum(axis=-1) / possible.sum(axis=-1),
+
+
+def transitivity_wu(W):
+    W = numpy.asarray(W, dtype=float)
+    K = (W != 0).sum(axis=-1).astype(float)
+    root = numpy.power(W, 1 / 3.0)
+    cycles = _diagonal(_matmul(_matmul(root, root), root))
+    return cycles.sum(axis=-1) / (K * (K - 1)).sum(axis=-1),
+
+
+def transitivity_wd(W):
+    W = numpy.asarray(W, dtype=float)
+    root = numpy.power(W, 1 / 3.0)
+    cycles, possible = _directed_cycles((W != 0).astype(float), root + _transpose(root))
+    return cycles.sum(axis=-1) / possible.sum(axis=-1),
+
+
+
+###################### Distance and centrality ######################
+
+def distance_bin(A):
+    A = (numpy.asarray(A) != 0).astype(float)
+    nodes = A.shape[-1]
+    D = A.copy()
+    reached = A != 0
+    length = 1
+    new_paths = reached
+    while new_paths.any():
+        length += 1
+        reached = _matmul(reached.astype(float), A) != 0
+        new_paths = reached & (D == 0)
+        D[new_paths] = length
+    D[D == 0] = numpy.inf
+    D[..., numpy.arange(nodes), numpy.arange(nodes)] = 0
+    return D,
+
+
+def betweenness_bin(G):
+    G = numpy.asarray(G, dtype=float)
+    nodes = G.shape[-1]
+    identity = numpy.eye(nodes, dtype=bool)
+    paths_d = G.copy()
+    shortest_d = paths_d.copy()
+    shortest = shortest_d.copy()
+    shortest[..., identity] = 1
+    lengths = shortest_d.copy()
+    lengths[..., identity] = 1
+    length = 1
+    while numpy.count_nonzero(shortest_d):
+        length += 1
+        paths_d = _matmul(paths_d, G)
+        shortest_d = paths_d * (lengths == 0)
+        shortest += shortest_d
+        lengths += length * (shortest_d != 0)
+    lengths[lengths == 0] = numpy.inf
+    lengths[..., identity] = 0
+    shortest[shortest == 0] = 1
+
+    transposed = _transpose(G)
+    dependencies = numpy.zeros(G.shape)
+    for distance in range(length - 1, 1, -1):
+        dependencies += (_matmul((lengths == distance) * (1 + dependencies) / shortest, transposed)
+                         * ((lengths == distance - 1) * shortest))
+    return dependencies.sum(axis=-2),
+
+
+def eigenvector_centrality_und(CIJ):
+    values, vectors = numpy.linalg.eigh(numpy.asarray(CIJ, dtype=float))
+    is_leading = numpy.arange(values.shape[-1]) == numpy.argmax(values, axis=-1)[..., None]
+    return numpy.abs((vectors * is_leading[..., None, :]).sum(axis=-1)),
+
+
+def subgraph_centrality(CIJ):
+    values, vectors = numpy.linalg.eig(numpy.asarray(CIJ, dtype=float))
+    return numpy.real(numpy.einsum('...ij,...j->...i', vectors ** 2, numpy.exp(values))),
+
+
+
+###################### Modularity ######################
+
+def _modularity(B, normalization):
+    """
+    Spectral community detection (Newman 2006), with the fine-tuning step as in the BCT implementation.
+    :returns: tuple (community index for each node, starting at 1; modularity)
+    """
+    nodes = B.shape[0]
+    communities = numpy.ones(nodes, dtype=int)
+    last_community = 1
+    to_split = [1, 0]
+    indices = numpy.arange(nodes)
+    Bg = B.copy()
+    while to_split[0]:
+        values, vectors = numpy.linalg.eigh(Bg)
+        split = numpy.where(vectors[:, numpy.argmax(values)] < 0, -1.0, 1.0)
+        q = split.dot(Bg).dot(split)
+        if q > 1e-10:
+            q_max = q
+            numpy.fill_diagonal(Bg, 0)
+            untested = numpy.ones(len(split), dtype=bool)
+            split_iter = split.copy()
+            while untested.any():
+                q_iter = numpy.where(untested, q_max - 4 * split_iter * Bg.dot(split_iter), -numpy.inf)
+                node = numpy.argmax(q_iter)
+                q_max = q_iter[node]
+                split_iter[node] = -split_iter[node]
+                untested[node] = False
+                if q_max > q:
+                    q = q_max
+                    split = split_iter.copy()
+            if abs(split.sum()) == len(split):
+                to_split.pop(0)
+            else:
+                last_community += 1
+                communities[indices[split == 1]] = to_split[0]
+                communities[indices[split == -1]] = last_community
+                to_split.insert(0, last_community)
+        else:
+            to_split.pop(0)
+        indices = numpy.nonzero(communities == to_split[0])[0]
+        sub_matrix = B[numpy.ix_(indices, indices)]
+        Bg = sub_matrix - numpy.diag(sub_matrix.sum(axis=0))
+
+    same_community = communities[:, None] == communities[None, :]
+    return communities, (B * same_community).sum() / normalization
+
+
+def _modularity_und(A, gamma):
+    K = A.sum(axis=0)
+    m = K.sum()
+    return _modularity(A - gamma * numpy.outer(K, K) / m, m)
+
+
+def _modularity_dir(A, gamma):
+    K_in = A.sum(axis=0)
+    K_out = A.sum(axis=1)
+    m = K_in.sum()
+    b = A - gamma * numpy.outer(K_out, K_in) / m
+    return _modularity(b + b.T, 2 * m)
+
+
+def modularity_und(A, gamma=1):
+    return _per_matrix(_modularity_und, numpy.asarray(A, dtype=float), gamma)
+
+
+def modularity_dir(A, gamma=1):
+    return _per_matrix(_modularity_dir, numpy.asarray(A, dtype=float), gamma)
+
+
+def participation_coef(W, Ci):
+    W = numpy.asarray(W, dtype=float)
+    Ci = numpy.asarray(Ci, dtype=int)
+    K = W.sum(axis=-1)
+    membership = (Ci[..., None] == numpy.arange(1, Ci.max() + 1)).astype(float)
+    # Strength of each node towards each community
+    K_communities = _matmul(W, membership)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        P = 1 - (K_communities ** 2).sum(axis=-1) / K ** 2
+    return numpy.where(K == 0, 0, P),
+
+
+
+FUNCTIONS = dict((function.__name__, function) for function in [
+    degrees_und, degrees_dir, strengths_und, strengths_dir, strengths_und_sign, density_dir, density_und,
+    clustering_coef_bu, clustering_coef_bd, clustering_coef_wu, clustering_coef_wd,
+    transitivity_bu, transitivity_bd, transitivity_wu, transitivity_wd,
+    distance_bin, betweenness_bin, eigenvector_centrality_und, subgraph_centrality,
+    modularity_und, modularity_dir, participation_coef])
+
+
+
+def _parse(code):
+    """
+    :returns: list of tuples (output names, function name, argument names), or None when the code is not
+              made only of function calls with variable arguments.
+    """
+    statements = []
+    for statement in code.split(';'):
+        if not statement.strip():
+            continue
+        match = STATEMENT_PATTERN.match(statement)
+        if match is None:
+            return None
+        outputs = match.group('outputs') if match.group('output') is None else match.group('output')
+        statements.append(([name.strip() for name in outputs.split(',') if name.strip()],
+                           match.group('function'),
+                           [name.strip() for name in match.group('arguments').split(',') if name.strip()]))
+    return statements
+
+
+def supports(code):
+    """
+    :returns: True when all the functions called in the BCT code are available in this module
+    """
+    statements = _parse(code)
+    return bool(statements) and all(function in FUNCTIONS for _, function, _ in statements)
+
+
+def evaluate(code, workspace):
+    """
+    Execute BCT code, with the variables in `workspace` as inputs.
+    :returns: the workspace, extended with the outputs of the code
+    """
+    if not supports(code):
+        raise ValueError("BCT code can not be evaluated without MATLAB: %s" % code)
+    workspace = dict(workspace)
+    for outputs, function, arguments in _parse(code):
+        results = FUNCTIONS[function](*[workspace[name] for name in arguments])
+        workspace.update(zip(outputs, results))
+    return workspace
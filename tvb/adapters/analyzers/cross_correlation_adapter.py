@@ -38,6 +38,7 @@ Adapter that uses the traits module to generate interfaces for ... Analyzer.
 
 import numpy
 from tvb.core.adapters.abcadapter import ABCAsynchronous
+from tvb.core.adapters.block_pipeline import SlicePipeline
 from tvb.core.adapters.exceptions import LaunchException
 from tvb.basic.logger.builder import get_logger
 from tvb.basic.filters.chain import FilterChain
@@ -58,6 +59,9 @@ class CrossCorrelateAdapter(ABCAsynchronous):
     _ui_description = "Cross-correlate two one-dimensional arrays."
     _ui_subsection = "crosscorr"
 
+    # Number of threads computing state variables in parallel (None for the number of CPU cores)
+    SLICE_WORKERS = None
+
 
     def get_input_tree(self):
         """
@@ -88,17 +92,22 @@ class CrossCorrelateAdapter(ABCAsynchronous):
         
         ##-------------------- Fill Algorithm for Analysis -------------------##
         self.algorithm = CrossCorrelate()
+        self.pipeline = SlicePipeline(self.input_shape, self._get_slice_memory(), self.SLICE_WORKERS)
+
+
+    def _get_slice_memory(self):
+        used_shape = (self.input_shape[0], 1, self.input_shape[2], self.input_shape[3])
+        input_size = numpy.prod(used_shape) * 8.0
+        output_size = self.algorithm.result_size(used_shape)
+        return input_size + output_size
         
     
     def get_required_memory_size(self, **kwargs):
         """
         Returns the required memory to be able to run the adapter.
         """
-        #Not all the data is loaded into memory at one time here.
-        used_shape = (self.input_shape[0], 1, self.input_shape[2], self.input_shape[3])
-        input_size = numpy.prod(used_shape) * 8.0
-        output_size = self.algorithm.result_size(used_shape)
-        return input_size + output_size
+        #Not all the data is loaded into memory at one time here, only the state variables computed in parallel.
+        return self.pipeline.required_memory
 
 
     def get_required_disk_size(self, **kwargs):
@@ -121,24 +130,37 @@ class CrossCorrelateAdapter(ABCAsynchronous):
         cross_corr = CrossCorrelation(source=time_series,
                                       storage_path=self.storage_path)
         
-        node_slice = [slice(self.input_shape[0]), None, slice(self.input_shape[2]), slice(self.input_shape[3])]
-        ##---------- Iterate over slices and compose final result ------------##
-        small_ts = TimeSeries(use_storage=False)
-        small_ts.sample_period = time_series.sample_period
-        partial_cross_corr = None
-        for var in range(self.input_shape[1]):
-            node_slice[1] = slice(var, var + 1)
-            small_ts.data = time_series.read_data_slice(tuple(node_slice))
-            self.algorithm.time_series = small_ts
-            partial_cross_corr = self.algorithm.evaluate()
+        ##---------- Compute state variables in parallel and write results in order ------------##
+        partial_results = []
+
+        def write_slice(partial_cross_corr):
             cross_corr.write_data_slice(partial_cross_corr)
-        cross_corr.time = partial_cross_corr.time
+            partial_results[:] = [partial_cross_corr]
+
+        self.pipeline.run_slices(time_series,
+                                 lambda slice_data: self._compute_slice(slice_data, time_series.sample_period),
+                                 write_slice)
+        cross_corr.time = partial_results[0].time
         cross_corr.labels_ordering[1] = time_series.labels_ordering[2]
         cross_corr.labels_ordering[2] = time_series.labels_ordering[2]
         cross_corr.close_file()
         return cross_corr
 
 
+    @staticmethod
+    def _compute_slice(slice_data, sample_period):
+        """
+        Cross-correlate one state variable. Called from the pipeline worker threads,
+        thus each call uses its own algorithm instance.
+        """
+        small_ts = TimeSeries(use_storage=False)
+        small_ts.sample_period = sample_period
+        small_ts.data = slice_data
+        algorithm = CrossCorrelate()
+        algorithm.time_series = small_ts
+        return algorithm.evaluate()
+
+
 class PearsonCorrelationCoefficientAdapter(ABCAsynchronous):
     """ TVB adapter for calling the Pearson CrossCorrelation algorithm. """
 
@@ -37,7 +37,8 @@ Adapter that uses the traits module to generate interfaces for FCD Analyzer.
 """
 
 import numpy as np
-from tvb.analyzers.fcd_matrix import FcdCalculator
+from tvb.adapters.analyzers import fcd_numpy
+from tvb.analyzers.fcd_matrix import FcdCalculator, spectral_embedding, epochs_interval
 from tvb.basic.traits.util import log_debug_array
 from tvb.basic.filters.chain import FilterChain
 from tvb.core.adapters.abcadapter import ABCAsynchronous
@@ -54,6 +55,9 @@ class FunctionalConnectivityDynamicsAdapter(ABCAsynchronous):
     _ui_description = "Functional Connectivity Dynamics metric"
     _ui_subsection = "fcd_calculator"
 
+    # Number of eigenvectors extracted from the FC of each epoch of stability
+    NUM_EIG = 3
+
 
     def get_input_tree(self):
         """
@@ -66,6 +70,11 @@ class FunctionalConnectivityDynamicsAdapter(ABCAsynchronous):
         tree = algorithm.interface[self.INTERFACE_ATTRIBUTES]
         tree[0]['conditions'] = FilterChain(fields=[FilterChain.datatype + '._nr_dimensions'],
                                             operations=["=="], values=[4])
+        tree.append(dict(name="eigen_solver", label="Eigenvectors computation", type="select",
+                         default=fcd_numpy.SOLVER_FULL,
+                         options=[{'name': 'Full decomposition', 'value': fcd_numpy.SOLVER_FULL},
+                                  {'name': 'Lanczos (only the %d largest)' % self.NUM_EIG,
+                                   'value': fcd_numpy.SOLVER_LANCZOS}]))
         return tree
 
 
@@ -73,13 +82,14 @@ class FunctionalConnectivityDynamicsAdapter(ABCAsynchronous):
         return [Fcd, ConnectivityMeasure]
 
 
-    def configure(self, time_series, sw, sp):
+    def configure(self, time_series, sw, sp, eigen_solver=None):
         """
         Store the input shape to be later used to estimate memory usage. Also create the algorithm instance.
 
         :param time_series: the input time-series for which fcd matrix should be computed
         :param sw: length of the sliding window
         :param sp: spanning time: distance between two consecutive sliding window
+        :param eigen_solver: `fcd_numpy.SOLVER_FULL` or `fcd_numpy.SOLVER_LANCZOS`
         """
         """
         Store the input shape to be later used to estimate memory usage. Also create the algorithm instance.
@@ -102,28 +112,34 @@ class FunctionalConnectivityDynamicsAdapter(ABCAsynchronous):
 
 
     def get_required_memory_size(self, **kwargs):
-        # We do not know how much memory is needed.
-        return -1
+        """
+        Memory for one (state variable, mode) FCD computation, plus the FCD results of all of them.
+        """
+        result_shape = self.algorithm.result_shape(self.input_shape)
+        return (fcd_numpy.required_memory(self.input_shape[0], self.input_shape[2], result_shape[0]) +
+                2 * np.prod(result_shape) * 8.0)
 
 
     def get_required_disk_size(self, **kwargs):
         return 0
 
 
-    def launch(self, time_series, sw, sp):
+    def launch(self, time_series, sw, sp, eigen_solver=None):
         """
            Launch algorithm and build results.
 
            :param time_series: the input time-series for which correlation coefficient should be computed
            :param sw: length of the sliding window
            :param sp: spanning time: distance between two consecutive sliding window
+           :param eigen_solver: `fcd_numpy.SOLVER_FULL` or `fcd_numpy.SOLVER_LANCZOS`
            :returns: the fcd matrix for the given time-series, with that sw and that sp
            :rtype: `Fcd`,`ConnectivityMeasure` 
         """
 
         result = []  # where fcd, fcd_segmented (eventually), and connectivity measures will be stored
 
-        [fcd, fcd_segmented, eigvect_dict, eigval_dict, Connectivity] = self.algorithm.evaluate()
+        [fcd, fcd_segmented, eigvect_dict, eigval_dict] = self._evaluate(time_series, eigen_solver)
+        Connectivity = time_series.connectivity
 
         # Create a Fcd dataType object.
         result_fcd = Fcd(storage_path=self.storage_path, source=time_series, sw=sw, sp=sp)
@@ -137,7 +153,7 @@ class FunctionalConnectivityDynamicsAdapter(ABCAsynchronous):
         for mode in eigvect_dict.keys():
             for var in eigvect_dict[mode].keys():
                 for ep in eigvect_dict[mode][var].keys():
-                    for eig in range(3):
+                    for eig in range(len(eigvect_dict[mode][var][ep])):
                         result_eig = ConnectivityMeasure(storage_path=self.storage_path)
                         result_eig.connectivity = Connectivity
                         result_eig.array_data = eigvect_dict[mode][var][ep][eig]
@@ -147,3 +163,58 @@ class FunctionalConnectivityDynamicsAdapter(ABCAsynchronous):
                                            "mode = %s." % (ep, eigval_dict[mode][var][ep][eig], var, mode)
                         result.append(result_eig)
         return result
+
+
+    def _evaluate(self, time_series, eigen_solver=None):
+        """
+        Same results as FcdCalculator.evaluate, but vectorized over windows (see fcd_numpy).
+        Each (state variable, mode) is read once and starts its windows from the first time point.
+
+        :returns: fcd, fcd_segmented, eigenvectors and eigenvalues dictionaries (key1=mode, key2=var, key3=epoch)
+        """
+        sp = float(self.algorithm.sp) / time_series.sample_period
+        sw = float(self.algorithm.sw) / time_series.sample_period
+        result_shape = self.algorithm.result_shape(self.input_shape)
+        starts, ends = fcd_numpy.window_bounds(result_shape[0], sp, sw)
+
+        fcd = np.zeros(result_shape)
+        epochs = {}
+        eigvect_dict = {}
+        eigval_dict = {}
+        for mode in range(result_shape[3]):
+            eigvect_dict[mode] = {}
+            eigval_dict[mode] = {}
+            for var in range(result_shape[2]):
+                current_slice = (slice(self.input_shape[0]), slice(var, var + 1),
+                                 slice(self.input_shape[2]), slice(mode, mode + 1))
+                data = time_series.read_data_slice(current_slice)[:, 0, :, 0]
+                fcd[:, :, var, mode] = fcd_numpy.fcd_matrix(fcd_numpy.sliding_window_fc(data, starts, ends))
+                self.log.debug("FCD computed for mode %d, variable %d" % (mode, var))
+
+                [xir, xir_cutoff] = spectral_embedding(fcd[:, :, var, mode])
+                epochs_extremes = epochs_interval(xir, xir_cutoff, sp, sw)
+                if epochs_extremes.shape[0] <= 1:
+                    # means that there are no more than 1 epochs of stability, thus the eigenvectors of
+                    # the FC calculated over the entire TimeSeries will be calculated
+                    epochs_extremes = np.zeros((2, 2), dtype=float)
+                    epochs_extremes[1, 1] = self.input_shape[0]  # [0,0] set in order to skip the first epoch
+                else:
+                    # means that more than 1 epochs of stability is identified thus fcd_segmented is calculated
+                    epochs[(var, mode)] = xir > xir_cutoff
+
+                # FC over the epochs of stability, all decomposed in one call
+                epoch_fcs = np.array([np.corrcoef(data[int(start):int(end) + 1].T)
+                                      for start, end in epochs_extremes[1:]])
+                eigenvalues, eigenvectors = fcd_numpy.largest_eigenvectors(epoch_fcs, self.NUM_EIG,
+                                                                           eigen_solver or fcd_numpy.SOLVER_FULL)
+                eigvect_dict[mode][var] = {}
+                eigval_dict[mode][var] = {}
+                for ep in range(1, epochs_extremes.shape[0]):
+                    eigvect_dict[mode][var][ep] = list(eigenvectors[ep - 1].T)
+                    eigval_dict[mode][var][ep] = list(eigenvalues[ep - 1])
+
+        fcd_segmented = fcd.copy()
+        for (var, mode), outside_epochs in epochs.items():
+            fcd_segmented[outside_epochs, :, var, mode] = 1.1
+            fcd_segmented[:, outside_epochs, var, mode] = 1.1
+        return [fcd, fcd_segmented, eigvect_dict, eigval_dict]
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Vectorized NumPy computation of the Functional Connectivity Dynamics (FCD), used by the FCD adapter.
+
+The FC in every sliding window is obtained from cumulative sums of the signals and of their products
+(computed once over the whole time series), the FCD is the correlation matrix of all the FC vectors
+in one call, and the eigenvectors of several FC matrices are computed with one batched `eigh`,
+or with Lanczos iterations, when only the largest few are needed.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import numpy
+from scipy.sparse.linalg import eigsh
+
+
+SOLVER_FULL = "full"
+SOLVER_LANCZOS = "lanczos"
+
+
+
+def window_bounds(nr_windows, sp, sw):
+    """
+    :param sp: spanning between consecutive windows (in time points, not necessarily integer)
+    :param sw: sliding window length (in time points)
+    :returns: integer arrays (starts, ends) of the windows [start, end), as FcdCalculator slices them
+    """
+    # Accumulate the spanning like the FcdCalculator loop does, so that rounding happens at the same points
+    starts = numpy.cumsum(numpy.hstack(([0.0], numpy.repeat(float(sp), nr_windows - 1))))
+    ends = (starts + sw).astype(int) + 1
+    return starts.astype(int), ends
+
+
+def sliding_window_fc(data, starts, ends):
+    """
+    Pearson correlation between nodes, in each window.
+
+    :param data: array (time, nodes)
+    :returns: array (windows, nodes, nodes)
+    """
+    nr_samples, nr_nodes = data.shape
+    ends = numpy.minimum(ends, nr_samples)
+    data = data - data.mean(axis=0)
+
+    # Sums of the signals and of their products, from the first time point up to each window boundary
+    boundaries, boundary_index = numpy.unique(numpy.concatenate((starts, ends)), return_inverse=True)
+    sums = numpy.zeros((len(boundaries), nr_nodes))
+    products = numpy.zeros((len(boundaries), nr_nodes, nr_nodes))
+    segment = data[:boundaries[0]]
+    sums[0] = segment.sum(axis=0)
+    products[0] = numpy.dot(segment.T, segment)
+    for i in range(1, len(boundaries)):
+        segment = data[boundaries[i - 1]:boundaries[i]]
+        sums[i] = sums[i - 1] + segment.sum(axis=0)
+        products[i] = products[i - 1] + numpy.dot(segment.T, segment)
+
+    start_index, end_index = boundary_index[:len(starts)], boundary_index[len(starts):]
+    counts = (ends - starts).astype(float)[:, numpy.newaxis, numpy.newaxis]
+    window_sums = sums[end_index] - sums[start_index]
+    covariance = products[end_index] - products[start_index]
+    covariance -= window_sums[:, :, numpy.newaxis] * window_sums[:, numpy.newaxis, :] / counts
+    deviation = numpy.sqrt(numpy.diagonal(covariance, axis1=1, axis2=2))
+    return covariance / (deviation[:, :, numpy.newaxis] * deviation[:, numpy.newaxis, :])
+
+
+def fcd_matrix(fc_stack):
+    """
+    :param fc_stack: array (windows, nodes, nodes) of FC matrices
+    :returns: array (windows, windows) with the correlation between the upper triangles of each two FC matrices
+    """
+    triangular = numpy.triu_indices(fc_stack.shape[1], 1)
+    fc_stream = fc_stack[:, triangular[0], triangular[1]]
+    return numpy.atleast_2d(numpy.corrcoef(fc_stream))
+
+
+def largest_eigenvectors(fc_stack, nr_eigenvectors, solver=SOLVER_FULL):
+    """
+    Eigenvectors of the largest eigenvalues, for each FC matrix.
+    Eigenvalues are normalized with the sum of all absolute eigenvalues. With SOLVER_LANCZOS only the
+    requested eigenvalues are computed and the sum is taken as the trace, which is the same for the
+    positive semi-definite correlation matrices.
+
+    :param fc_stack: array (matrices, nodes, nodes) of symmetric matrices
+    :returns: arrays (matrices, nr_eigenvectors) of normalized eigenvalues, in decreasing order and
+              (matrices, nodes, nr_eigenvectors) of the absolute values of the corresponding eigenvectors
+    """
+    nr_nodes = fc_stack.shape[-1]
+    if solver == SOLVER_LANCZOS and nr_eigenvectors < nr_nodes - 1:
+        eigenvalues = numpy.zeros((len(fc_stack), nr_eigenvectors))
+        eigenvectors = numpy.zeros((len(fc_stack), nr_nodes, nr_eigenvectors))
+        for i, matrix in enumerate(fc_stack):
+            values, vectors = eigsh(matrix, k=nr_eigenvectors, which='LA')
+            order = numpy.argsort(values)[::-1]
+            eigenvalues[i] = values[order] / numpy.trace(matrix)
+            eigenvectors[i] = vectors[:, order]
+    else:
+        # eigh returns the eigenvalues in ascending order
+        values, vectors = numpy.linalg.eigh(fc_stack)
+        eigenvalues = values[:, ::-1][:, :nr_eigenvectors] / numpy.abs(values).sum(axis=1)[:, numpy.newaxis]
+        eigenvectors = vectors[:, :, ::-1][:, :, :nr_eigenvectors]
+    return eigenvalues, numpy.abs(eigenvectors)
+
+
+def required_memory(nr_samples, nr_nodes, nr_windows):
+    """
+    :returns: memory (in bytes) needed by the computations above, for one (state variable, mode)
+    """
+    data_size = nr_samples * nr_nodes * 8.0
+    boundaries_size = 2 * nr_windows * nr_nodes * (nr_nodes + 1) * 8.0
+    windows_size = 3 * nr_windows * nr_nodes * nr_nodes * 8.0
+    fcd_size = 2 * nr_windows * nr_windows * 8.0
+    return 2 * data_size + boundaries_size + windows_size + fcd_size
@@ -31,6 +31,9 @@
 """
 Adapter that uses the traits module to generate interfaces for BalloonModel Analyzer.
 
+The balloon equations are integrated for a whole block of nodes at once, as BalloonModel
+works element-wise over the nodes axis.
+
 .. moduleauthor:: Paula Sanz Leon <Paula@tvb.invalid>
 
 """
@@ -40,6 +43,7 @@ from tvb.analyzers.fmri_balloon import BalloonModel
 from tvb.datatypes.time_series import TimeSeries
 from tvb.datatypes.time_series import TimeSeriesRegion
 from tvb.core.adapters.abcadapter import ABCAsynchronous
+from tvb.core.adapters.block_pipeline import get_block_length
 from tvb.basic.traits.util import log_debug_array
 from tvb.basic.filters.chain import FilterChain
 from tvb.basic.logger.builder import get_logger
@@ -102,16 +106,25 @@ class BalloonModelAdapter(ABCAsynchronous):
         
         self.algorithm = algorithm
         self.algorithm.time_series = time_series
+        self.block_nodes = get_block_length(self._get_node_memory(), self.input_shape[2])
 
 
-    def get_required_memory_size(self, **kwargs):
+    def _get_node_memory(self):
         """
-        Return the required memory to run this algorithm.
+        Memory needed for one node: its input, the 4 balloon state variables integrated and the BOLD signal.
         """
-        used_shape = self.input_shape
+        used_shape = (self.input_shape[0], self.input_shape[1], 1, self.input_shape[3])
         input_size = numpy.prod(used_shape) * 8.0
+        state_size = 4 * self.input_shape[0] * self.input_shape[3] * 8.0
         output_size = self.algorithm.result_size(used_shape)
-        return input_size + output_size   
+        return input_size + state_size + output_size
+
+
+    def get_required_memory_size(self, **kwargs):
+        """
+        Return the required memory to run this algorithm, for one block of nodes.
+        """
+        return self._get_node_memory() * self.block_nodes
 
 
     def get_required_disk_size(self, **kwargs):
@@ -136,13 +149,13 @@ class BalloonModelAdapter(ABCAsynchronous):
                                        start_time=time_series.start_time,
                                        connectivity=time_series.connectivity)
 
-        ##---------- Iterate over slices and compose final result ------------##
+        ##---------- Iterate over node blocks and compose final result ------------##
 
         node_slice = [slice(self.input_shape[0]), slice(self.input_shape[1]), None, slice(self.input_shape[3])]
         small_ts = TimeSeries(use_storage=False, sample_period=time_series.sample_period, time=time_line)
         
-        for node in range(self.input_shape[2]):
-            node_slice[2] = slice(node, node + 1)
+        for start_node in range(0, self.input_shape[2], self.block_nodes):
+            node_slice[2] = slice(start_node, min(start_node + self.block_nodes, self.input_shape[2]))
             small_ts.data = time_series.read_data_slice(tuple(node_slice))
             self.algorithm.time_series = small_ts
             partial_bold = self.algorithm.evaluate()
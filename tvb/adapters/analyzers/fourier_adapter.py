@@ -44,6 +44,7 @@ import tvb.basic.filters.chain as entities_filter
 import tvb.datatypes.time_series as datatypes_time_series
 import tvb.datatypes.spectral as spectral
 from tvb.basic.logger.builder import get_logger
+from tvb.core.adapters.block_pipeline import BlockPipeline, MAX_MEMORY_RATIO
 
 LOG = get_logger(__name__)
 
@@ -54,6 +55,9 @@ class FourierAdapter(abcadapter.ABCAsynchronous):
     _ui_name = "Fourier Spectral Analysis"
     _ui_description = "Calculate the FFT of a TimeSeries entity."
     _ui_subsection = "fourier"
+
+    # Number of threads computing FFT on node blocks in parallel (None for the number of CPU cores)
+    BLOCK_WORKERS = None
     
     def get_input_tree(self):
         """
@@ -80,6 +84,7 @@ class FourierAdapter(abcadapter.ABCAsynchronous):
         super(FourierAdapter, self).__init__()
         self.algorithm = fft.FFT()
         self.memory_factor = 1
+        self.pipeline = BlockPipeline(self.BLOCK_WORKERS)
         
     
     def configure(self, time_series, segment_length=None, window_function=None, detrend=None):
@@ -116,6 +121,8 @@ class FourierAdapter(abcadapter.ABCAsynchronous):
     def get_required_memory_size(self, **kwargs):
         """
         Returns the required memory to be able to run the adapter.
+        Nodes are split in at least one block per pipeline worker, and in more (smaller) blocks
+        when the blocks in flight would not fit in the free memory.
         """
         input_shape = self.algorithm.time_series.read_data_shape()
         input_size = numpy.prod(input_shape) * 8.0
@@ -123,9 +130,19 @@ class FourierAdapter(abcadapter.ABCAsynchronous):
                                                  self.algorithm.time_series.sample_period)
         total_free_memory = psutil.virtual_memory().free + psutil.swap_memory().free
         total_required_memory = input_size + output_size
-        while total_required_memory / self.memory_factor / total_free_memory > 0.8:
-            self.memory_factor += 1
-        return total_required_memory / self.memory_factor
+        # Each of the blocks in flight needs total_required_memory / memory_factor
+        memory_blocks = math.ceil(total_required_memory * self.pipeline.max_in_flight /
+                                  (total_free_memory * MAX_MEMORY_RATIO))
+        self.memory_factor = int(max(1, min(input_shape[2], max(self.pipeline.workers, memory_blocks))))
+        return self._in_flight_memory(total_required_memory)
+
+
+    def _in_flight_memory(self, total_required_memory):
+        """ Memory needed by the blocks read, but not yet written, at any moment. """
+        in_flight_blocks = 1
+        if self.pipeline.workers > 1:
+            in_flight_blocks = min(self.pipeline.max_in_flight, self.memory_factor)
+        return total_required_memory / self.memory_factor * in_flight_blocks
 
 
     def get_required_disk_size(self, **kwargs):
@@ -152,35 +169,58 @@ class FourierAdapter(abcadapter.ABCAsynchronous):
 
         """
         shape = time_series.read_data_shape()
-        block_size = int(math.floor(time_series.read_data_shape()[2] / self.memory_factor))
-        blocks = int(math.ceil(time_series.read_data_shape()[2] / block_size))
-        
+        block_size = int(math.ceil(shape[2] / float(self.memory_factor)))
+        blocks = int(math.ceil(shape[2] / float(block_size)))
+
         ##----------- Prepare a FourierSpectrum object for result ------------##
         spectra = spectral.FourierSpectrum(source=time_series,
                                            segment_length=self.algorithm.segment_length,
                                            windowing_function=str(window_function),
                                            storage_path=self.storage_path)
-        
+
         ##------------- NOTE: Assumes 4D, Simulator timeSeries. --------------##
-        node_slice = [slice(shape[0]), slice(shape[1]), None, slice(shape[3])]
-        
+        node_slices = [(slice(shape[0]), slice(shape[1]),
+                        slice(block * block_size, min([(block + 1) * block_size, shape[2]]), 1),
+                        slice(shape[3])) for block in range(blocks)]
+
         ##---------- Iterate over slices and compose final result ------------##
-        small_ts = datatypes_time_series.TimeSeries(use_storage=False)
-        small_ts.sample_period = time_series.sample_period
-        for block in range(blocks):
-            node_slice[2] = slice(block * block_size, min([(block+1) * block_size, shape[2]]), 1)
-            small_ts.data = time_series.read_data_slice(tuple(node_slice))
-            self.algorithm.time_series = small_ts
-            partial_result = self.algorithm.evaluate()
-            if blocks <= 1 and len(partial_result.array_data) == 0:
-                self.add_operation_additional_info(
-                    "Fourier produced empty result (most probably due to a very short input TimeSeries).")
-                return None
+        ## Next blocks are read and computed in parallel, while results are written in order.
+        partial_results = []
+
+        def write_block(_, partial_result):
+            if len(partial_result.array_data) == 0:
+                return
             spectra.write_data_slice(partial_result)
-        
+            partial_results[:] = [partial_result]
+
+        self.pipeline.run(node_slices, time_series.read_data_slice,
+                          lambda block_data: self._compute_block(block_data, time_series.sample_period),
+                          write_block)
+        if not partial_results:
+            self.add_operation_additional_info(
+                "Fourier produced empty result (most probably due to a very short input TimeSeries).")
+            return None
+
+        partial_result = partial_results[0]
         LOG.debug("partial segment_length is %s" % (str(partial_result.segment_length)))
         spectra.segment_length = partial_result.segment_length
         spectra.close_file()
         return spectra
 
 
+    def _compute_block(self, block_data, sample_period):
+        """
+        Compute FFT on one block of nodes. Called from the pipeline worker threads,
+        thus each call uses its own algorithm instance.
+        """
+        small_ts = datatypes_time_series.TimeSeries(use_storage=False)
+        small_ts.sample_period = sample_period
+        small_ts.data = block_data
+        algorithm = fft.FFT()
+        algorithm.segment_length = self.algorithm.segment_length
+        algorithm.window_function = self.algorithm.window_function
+        algorithm.detrend = self.algorithm.detrend
+        algorithm.time_series = small_ts
+        return algorithm.evaluate()
+
+
@@ -38,6 +38,7 @@ Adapter that uses the traits module to generate interfaces for ICA Analyzer.
 import numpy
 from tvb.analyzers.ica import fastICA
 from tvb.core.adapters.abcadapter import ABCAsynchronous
+from tvb.core.adapters.block_pipeline import SlicePipeline
 from tvb.datatypes.time_series import TimeSeries
 from tvb.datatypes.mode_decompositions import IndependentComponents
 from tvb.basic.traits.util import log_debug_array
@@ -52,6 +53,9 @@ class ICAAdapter(ABCAsynchronous):
     _ui_name = "Independent Component Analysis"
     _ui_description = "ICA for a TimeSeries input DataType."
     _ui_subsection = "ica"
+
+    # Number of threads computing state variables in parallel (None for the number of CPU cores)
+    SLICE_WORKERS = None
     
     
     def get_input_tree(self):
@@ -88,15 +92,19 @@ class ICAAdapter(ABCAsynchronous):
             ## It will only work for Simulator results.
             algorithm.n_components = self.input_shape[2]
         self.algorithm = algorithm
-        
-    def get_required_memory_size(self, **kwargs):
-        """
-        Return the required memory to run this algorithm.
-        """
+        self.pipeline = SlicePipeline(self.input_shape, self._get_slice_memory(), self.SLICE_WORKERS)
+
+    def _get_slice_memory(self):
         used_shape = (self.input_shape[0], 1, self.input_shape[2], self.input_shape[3])
         input_size = numpy.prod(used_shape) * 8.0
         output_size = self.algorithm.result_size(used_shape)
-        return input_size + output_size  
+        return input_size + output_size
+
+    def get_required_memory_size(self, **kwargs):
+        """
+        Return the required memory to run this algorithm, for all the state variables computed in parallel.
+        """
+        return self.pipeline.required_memory
     
     def get_required_disk_size(self, **kwargs):
         """
@@ -115,17 +123,21 @@ class ICAAdapter(ABCAsynchronous):
                                            storage_path=self.storage_path)
         
         ##------------- NOTE: Assumes 4D, Simulator timeSeries. --------------##
-        node_slice = [slice(self.input_shape[0]), None, slice(self.input_shape[2]), slice(self.input_shape[3])]
-        
-        ##---------- Iterate over slices and compose final result ------------##
-        small_ts = TimeSeries(use_storage=False)
-        for var in range(self.input_shape[1]):
-            node_slice[1] = slice(var, var + 1)
-            small_ts.data = time_series.read_data_slice(tuple(node_slice))
-            self.algorithm.time_series = small_ts 
-            partial_ica = self.algorithm.evaluate()
-            ica_result.write_data_slice(partial_ica)
+        ##---------- Compute state variables in parallel and write results in order ------------##
+        self.pipeline.run_slices(time_series, self._compute_slice, ica_result.write_data_slice)
         ica_result.close_file()
         return ica_result
 
+    def _compute_slice(self, slice_data):
+        """
+        Compute ICA for one state variable. Called from the pipeline worker threads,
+        thus each call uses its own algorithm instance.
+        """
+        small_ts = TimeSeries(use_storage=False)
+        small_ts.data = slice_data
+        algorithm = fastICA()
+        algorithm.n_components = self.algorithm.n_components
+        algorithm.time_series = small_ts
+        return algorithm.evaluate()
+
 
@@ -34,81 +34,224 @@ This module implements a class for executing arbitray MATLAB code
 Conversion between Python types and MATLAB types is handled and dependent
 on scipy.io's loadmat and savemat function.
 
+Code is executed in a MATLAB/Octave interpreter which stays resident between calls (see MatlabSession),
+so the interpreter start-up is paid only once per process.
+
 .. moduleauthor:: Marmaduke Woodman <Marmaduke@tvb.invalid>
 .. moduleauthor:: Stuart A. Knock <Stuart@tvb.invalid>
 """
 
 import os
 import time
+import atexit
 import random
+import shutil
 import tempfile
+import threading
+import subprocess
+import Queue as queue
 from scipy.io import loadmat, savemat
+from tvb.basic.logger.builder import get_logger
 from tvb.basic.profile import TvbProfile
-from tvb.core.utils import MATLAB, OCTAVE, matlab_cmd
+from tvb.core.adapters.exceptions import LaunchException
+from tvb.core.utils import OCTAVE
 
 
 
-class MatlabWorker(object):
+class MatlabSession(object):
     """
-    MatlabAnalyzer is an helper class for calling arbitrary MATLAB code with
-    arbitrary parameters.
+    A MATLAB/Octave interpreter process, which reads the code to execute on its standard input.
 
-    Specific analyzers should derive from this class and implement the
-    interface and launch methods inherited from Asynchronous Adapter.
+    Input and output data are exchanged through .mat files in a private temporary folder, and the end of
+    each call is signalled by a marker line on the interpreter standard output (no polling for files).
+    When the interpreter crashes or a call exceeds its timeout, the process is killed and a new
+    one gets started for the next call.
     """
 
-    matlab_paths = []
+    DEFAULT_TIMEOUT = 3600
+    _SESSIONS = {}
+    _SESSIONS_LOCK = threading.Lock()
 
 
-    def __init__(self):
-        self.mlab_exe = TvbProfile.current.MATLAB_EXECUTABLE
-        self.hex = hex(random.randint(0, 2 ** 32))
-        self.script_name = "script%s" % self.hex
-        self.script_fname = self.script_name + '.m'
-        self.wkspc_name = "wkspc%s" % self.hex
-        self.wkspc_fname = self.wkspc_name + '.mat'
-        self.done_name = "done%s" % self.hex
-        self.done_fname = self.done_name + '.mat'
-        self.log_fname = "log%s" % self.hex
+    def __init__(self, executable, timeout=DEFAULT_TIMEOUT):
+        self.executable = executable
+        self.timeout = timeout
+        self.is_octave = OCTAVE in os.path.basename(executable)
+        self.logger = get_logger(self.__class__.__module__)
+        self.work_folder = tempfile.mkdtemp(prefix="tvb_matlab_")
+        self.added_paths = []
+        self._process = None
+        self._output = None
+        self._lock = threading.Lock()
 
 
-    def _matlab_pre(self):
+    @classmethod
+    def get_instance(cls, executable):
         """
-        Called to obtain the pre operation code for MATLAB. Current, we
-        1. add paths to the MATLAB path
-        2. enter a try clause
+        :returns: the session shared inside the current process, for the given executable
         """
-        paths = "".join(["addpath('" + p + "');\n" for p in self.matlab_paths])
-        return paths + "\ntry\n"
+        with cls._SESSIONS_LOCK:
+            if executable not in cls._SESSIONS:
+                cls._SESSIONS[executable] = cls(executable)
+            return cls._SESSIONS[executable]
+
+
+    @classmethod
+    def close_all(cls):
+        with cls._SESSIONS_LOCK:
+            for session in cls._SESSIONS.values():
+                session.close()
+            cls._SESSIONS.clear()
+
+
+    def _build_command(self):
+        if self.is_octave:
+            return [self.executable, "--quiet", "--norc", "--no-history", "--no-window-system"]
+        return [self.executable, "-nodesktop", "-nojvm", "-nosplash"]
+
+
+    def is_alive(self):
+        return self._process is not None and self._process.poll() is None
 
 
-    def _matlab_post(self):
+    def _start(self):
         """
-        Called to obtain the post operation code for MATLAB. Currently, we
-        1. catch exception if one was raised
-        2. set the hexstamp variable in MATLAB
-        3. save all working files
+        Start the interpreter, and a thread forwarding its output lines into a queue.
         """
-        catch = "\ncatch e\nexception%s = e\nend\n" % self.hex
-        save_clause = ""
-        if MATLAB in self.mlab_exe:
-            save_clause = "hexstamp = '%s'\nsave %s -V7\nsave %s -V7 hexstamp\nquit"
-        if OCTAVE in self.mlab_exe:
-            save_clause = "hexstamp = '%s'\nsave %s.mat -V7\nsave %s.mat -V7 hexstamp\nquit"
-        return catch + save_clause % (self.hex, self.wkspc_name, self.done_name)
+        self.logger.debug("Starting MATLAB session: %s" % self.executable)
+        self._process = subprocess.Popen(self._build_command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.STDOUT, cwd=self.work_folder, bufsize=1,
+                                         universal_newlines=True)
+        self._output = queue.Queue()
+        self.added_paths = []
+        reader = threading.Thread(target=self._read_output, args=(self._process.stdout, self._output))
+        reader.daemon = True
+        reader.start()
 
 
-    def cleanup(self):
+    @staticmethod
+    def _read_output(stream, output):
+        for line in iter(stream.readline, ''):
+            output.put(line)
+        # End of stream: the interpreter exited
+        output.put(None)
+
+
+    def _stop(self):
+        if self.is_alive():
+            self._process.kill()
+        if self._process is not None:
+            self._process.wait()
+        self._process = None
+
+
+    def close(self):
+        """
+        Stop the interpreter and remove the exchange folder.
+        """
+        with self._lock:
+            if self.is_alive():
+                try:
+                    self._process.stdin.write("exit\n")
+                    self._process.stdin.close()
+                except IOError:
+                    pass
+            self._stop()
+            shutil.rmtree(self.work_folder, True)
+
+
+    def execute(self, code, data=None, paths=None, work_dir=None):
         """
-        Make sure Matlab is closed after execution.
+        :param code: MATLAB code in a string
+        :param data: a dict of data that scipy.io.savemat knows how to deal with
+        :param paths: folders to be added on the MATLAB path
+        :param work_dir: working directory to be used by MATLAB
+        :returns: tuple (code executed by MATLAB, log produced by MATLAB, dict of data from MATLAB's workspace)
+        :raises LaunchException: when the interpreter crashed or the call did not finish before the timeout
         """
-        time.sleep(0.5)  # wait for MATLAB to close
-        for file_ref in [self.script_fname, self.wkspc_fname,
-                         self.done_fname, self.log_fname]:
+        with self._lock:
+            if not self.is_alive():
+                self._start()
+
+            stamp = hex(random.randint(0, 2 ** 32))
+            input_file = os.path.join(self.work_folder, "input%s.mat" % stamp)
+            output_file = os.path.join(self.work_folder, "output%s.mat" % stamp)
+            marker = "done%s" % stamp
+
+            pre = "clear;\n"
+            if work_dir is not None:
+                pre += "cd('%s');\n" % work_dir
+            for path in paths or []:
+                if path not in self.added_paths:
+                    pre += "addpath('%s');\n" % path
+                    self.added_paths.append(path)
+            pre += "try\n"
+            if data:
+                savemat(input_file, data, format="5")
+                pre += "load('%s');\n" % input_file
+            code = ("success%s = 0;\n" + code + "\nsuccess%s = 1;\n") % (stamp, stamp)
+            post = "catch e\nexception%s = e\nend\n" % stamp
+            post += "save('%s', '-v7');\ndisp('%s');\n" % (output_file, marker)
+            if self.is_octave:
+                post += "fflush(stdout);\n"
+
             try:
-                os.remove(file_ref)
-            except Exception:
-                pass
+                try:
+                    self._process.stdin.write(pre + code + post)
+                    self._process.stdin.flush()
+                except IOError:
+                    # Broken pipe: the interpreter died meanwhile; the reader thread will report it
+                    pass
+                log_text = self._wait_for(marker)
+                result = loadmat(output_file, squeeze_me=True)
+            finally:
+                for file_path in (input_file, output_file):
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+            return pre + code + post, log_text, result
+
+
+    def _wait_for(self, marker):
+        """
+        Collect the interpreter output until the marker line.
+        """
+        lines = []
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                line = self._output.get(timeout=max(deadline - time.time(), 0))
+            except queue.Empty:
+                self._stop()
+                raise LaunchException("MATLAB call did not finish in %s seconds. Session restarted. Log: %s"
+                                      % (self.timeout, "".join(lines)))
+            if line is None:
+                self._stop()
+                raise LaunchException("MATLAB session exited unexpectedly. Log: %s" % "".join(lines))
+            # The interpreter prompt (e.g. ">> ") can precede the marker, on the same line
+            if line.rstrip().endswith(marker):
+                return "".join(lines)
+            lines.append(line)
+
+
+
+atexit.register(MatlabSession.close_all)
+
+
+
+class MatlabWorker(object):
+    """
+    MatlabAnalyzer is an helper class for calling arbitrary MATLAB code with
+    arbitrary parameters.
+
+    Specific analyzers should derive from this class and implement the
+    interface and launch methods inherited from Asynchronous Adapter.
+    """
+
+    matlab_paths = []
+
+
+    def __init__(self):
+        self.mlab_exe = TvbProfile.current.MATLAB_EXECUTABLE
 
 
     def add_to_path(self, path_to_add):
@@ -116,17 +259,17 @@ class MatlabWorker(object):
         Add a path to the list of paths that will be added to the path
         in the MATLAB session
         """
-        self.matlab_paths.append(path_to_add)
+        if path_to_add not in self.matlab_paths:
+            self.matlab_paths.append(path_to_add)
 
 
-    def matlab(self, code, data=None, work_dir=None, cleanup=True):
+    def matlab(self, code, data=None, work_dir=None):
         """
         method matlab takes as arguments:
 
             code: MATLAB code in a string
             data: a dict of data that scipy.io.savemat knows how to deal with
             work_dir: working directory to be used by MATLAB
-            cleanup: set to False to keep files
 
         and returns a tuple:
 
@@ -134,28 +277,5 @@ class MatlabWorker(object):
             [1] string of log produced by MATLAB
             [2] dict of data from MATLAB's workspace
         """
-        wdir = tempfile.tempdir or os.getcwd()
-        os.chdir(wdir)
-        os.chdir(work_dir or os.getcwd())
-
-        pre, post = self._matlab_pre(), self._matlab_post()
-        code = ("\nsuccess%s = 0\n" + code + "\nsuccess%s = 1\n") % (self.hex, self.hex)
-
-        if data:
-            pre += "\nload %s\n" % self.wkspc_name
-            savemat(self.wkspc_fname, data, format="5")
-        with open(self.script_fname, 'w') as file_data:
-            file_data.write(pre + code + post)
-
-        matlab_cmd(self.mlab_exe, self.script_name, self.log_fname)
-        while not os.path.exists(self.done_fname):
-            time.sleep(0.1)
-
-        with open(self.log_fname, 'r') as file_data:
-            logtext = file_data.read()
-        retdata = loadmat(self.wkspc_fname, squeeze_me=True)
-
-        if cleanup:
-            self.cleanup()
-        return pre + code + post, logtext, retdata
-
+        session = MatlabSession.get_instance(self.mlab_exe)
+        return session.execute(code, data, self.matlab_paths, work_dir)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Streaming versions of the TimeSeries metrics (tvb.analyzers.metric_*), for TimeseriesMetricsAdapter.
+Each accumulator gives the same value as the `evaluate` of its algorithm, but it receives the TimeSeries
+in chunks of time points (see tvb.core.adapters.time_series_stream), instead of the whole data in memory.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import numpy
+from tvb.core.adapters.time_series_stream import ChunkAccumulator, MomentsAccumulator
+
+
+
+def get_start_time_point(algorithm, nr_time_points):
+    """
+    First time point used by a metric algorithm, as computed in its `evaluate`.
+    """
+    start_tpt = 0
+    if algorithm.start_point != 0.0:
+        start_tpt = algorithm.start_point / algorithm.time_series.sample_period
+    if start_tpt > nr_time_points:
+        # The time-series is shorter than the starting point: use the last segment
+        start_tpt = int((algorithm.segment - 1) * (nr_time_points // algorithm.segment))
+    return int(start_tpt)
+
+
+
+class _MetricAccumulator(ChunkAccumulator):
+    """
+    Accumulate values computed on the time points starting with the algorithm's start point.
+    """
+
+
+    def __init__(self, algorithm, shape):
+        self.shape = shape
+        self.start = get_start_time_point(algorithm, shape[0])
+        self.moments = MomentsAccumulator()
+
+
+    def _used_data(self, start, data):
+        return data[max(0, self.start - start):]
+
+
+    def merge(self, partial):
+        self.moments.merge(partial)
+
+
+
+class GlobalVarianceAccumulator(_MetricAccumulator):
+    """
+    GlobalVariance: variance of all the zero-centred time-series, i.e. the mean of their variances.
+    """
+
+
+    def compute_chunk(self, start, data):
+        return MomentsAccumulator.compute(self._used_data(start, data), axis=0)
+
+
+    def result(self):
+        return self.moments.variance.mean()
+
+
+
+class VarianceNodeVarianceAccumulator(GlobalVarianceAccumulator):
+    """
+    VarianceNodeVariance: variance over nodes, of the variance of the zero-centred time-series of each node.
+    """
+
+
+    def result(self):
+        # Variances have the shape (state variable, node, mode), and all have the same number of time points
+        node_variance = self.moments.variance.mean(axis=2).mean(axis=0)
+        return node_variance.var()
+
+
+
+class ProxyMetastabilitySynchronyAccumulator(_MetricAccumulator):
+    """
+    ProxyMetastabilitySynchrony: standard deviation and inverse of the mean of the mean (over nodes)
+    absolute deviation from the mean activity of all nodes.
+    """
+
+
+    def compute_chunk(self, start, data):
+        data = self._used_data(start, data)
+        deviations = abs(data - data.mean(axis=2)[:, :, numpy.newaxis, :]).mean(axis=2)
+        return MomentsAccumulator.compute(deviations, axis=None)
+
+
+    def result(self):
+        return {"Metastability": numpy.sqrt(self.moments.variance),
+                "Synchrony": 1. / self.moments.mean}
+
+
+
+class KuramotoIndexAccumulator(ChunkAccumulator):
+    """
+    KuramotoIndex: mean over time of the phase coherence of the nodes, with the phases given by
+    the first two state variables. All the time points are used (no start point).
+    """
+
+
+    def __init__(self, algorithm, shape):
+        if shape[1] < 2:
+            raise Exception(" The number of state variables should be at least 2.")
+        self.nr_nodes = shape[2]
+        self.count = 0
+        self.total = 0.0
+
+
+    def compute_chunk(self, start, data):
+        phases = numpy.angle(data[:, 0, :, 0] + 1j * data[:, 1, :, 0])
+        coherence = abs(numpy.exp(1j * phases).sum(axis=1) / self.nr_nodes)
+        return len(coherence), coherence.sum()
+
+
+    def merge(self, partial):
+        self.count += partial[0]
+        self.total += partial[1]
+
+
+    def result(self):
+        return self.total / self.count
+
+
+
+# Accumulators for the metric algorithms, by the algorithm class name
+ACCUMULATORS = {"GlobalVariance": GlobalVarianceAccumulator,
+                "VarianceNodeVariance": VarianceNodeVarianceAccumulator,
+                "ProxyMetastabilitySynchrony": ProxyMetastabilitySynchronyAccumulator,
+                "KuramotoIndex": KuramotoIndexAccumulator}
+
+
+def get_accumulator(algorithm, shape):
+    """
+    :returns: accumulator computing the same metric as `algorithm`, or None when the metric can not be streamed
+    """
+    accumulator_class = ACCUMULATORS.get(algorithm.__class__.__name__)
+    if accumulator_class is None:
+        return None
+    return accumulator_class(algorithm, shape)
@@ -32,6 +32,9 @@
 Adapter that uses the traits module to generate interfaces for group of 
 Analyzer used to calculate a single measure for TimeSeries.
 
+All the selected metrics are computed in a single pass over the TimeSeries, read in chunks
+(see tvb.adapters.analyzers.metric_accumulators).
+
 .. moduleauthor:: Paula Sanz Leon <pau.sleon@gmail.com>
 .. moduleauthor:: Bogdan Neacsa <bogdan.neacsa@codemart.ro>
 .. moduleauthor:: Stuart A. Knock <Stuart@tvb.invalid>
@@ -40,12 +43,14 @@ Analyzer used to calculate a single measure for TimeSeries.
 """
 
 import numpy
+from tvb.adapters.analyzers import metric_accumulators
 from tvb.analyzers.metrics_base import BaseTimeseriesMetricAlgorithm
 from tvb.basic.traits.util import log_debug_array
 from tvb.basic.traits.parameters_factory import get_traited_subclasses
 from tvb.basic.filters.chain import FilterChain
 from tvb.basic.logger.builder import get_logger
 from tvb.core.adapters.abcadapter import ABCAsynchronous, ABCAdapter
+from tvb.core.adapters.time_series_stream import TimeSeriesStream
 from tvb.datatypes.time_series import TimeSeries
 from tvb.datatypes.mapped_values import DatatypeMeasure
 
@@ -90,19 +95,27 @@ class TimeseriesMetricsAdapter(ABCAsynchronous):
         return [DatatypeMeasure]
 
 
-    def configure(self, time_series, **kwargs):
+    def configure(self, time_series, algorithms=None, **kwargs):
         """
         Store the input shape to be later used to estimate memory usage.
         """
         self.input_shape = time_series.read_data_shape()
+        self.stream = TimeSeriesStream(time_series)
+        if algorithms is None:
+            algorithms = self.available_algorithms.keys()
+        self.streamed_only = all(self.available_algorithms[name].__name__ in metric_accumulators.ACCUMULATORS
+                                 for name in algorithms)
 
 
     def get_required_memory_size(self, **kwargs):
         """
-        Return the required memory to run this algorithm.
+        Return the required memory to run this algorithm: the chunks in flight, and the whole input
+        only when some metric can not be computed on chunks.
         """
+        if self.streamed_only:
+            return self.stream.required_memory
         input_size = numpy.prod(self.input_shape) * 8.0
-        return input_size
+        return input_size + self.stream.required_memory
 
 
     def get_required_disk_size(self, **kwargs):
@@ -128,16 +141,10 @@ class TimeseriesMetricsAdapter(ABCAsynchronous):
         shape = time_series.read_data_shape()
         log_debug_array(LOG, time_series, "time_series")
 
-        metrics_results = {}
+        unstored_ts = TimeSeries(use_storage=False)
+        accumulators = []
+        evaluated_algorithms = []
         for algorithm_name in algorithms:
-            ##------------- NOTE: Assumes 4D, Simulator timeSeries. --------------##
-            node_slice = [slice(shape[0]), slice(shape[1]), slice(shape[2]), slice(shape[3])]
-
-            ##---------- Iterate over slices and compose final result ------------##
-            unstored_ts = TimeSeries(use_storage=False)
-
-            unstored_ts.data = time_series.read_data_slice(tuple(node_slice))
-
             ##-------------------- Fill Algorithm for Analysis -------------------##
             algorithm = self.available_algorithms[algorithm_name](time_series=unstored_ts)
             if segment is not None:
@@ -154,7 +161,26 @@ class TimeseriesMetricsAdapter(ABCAsynchronous):
             else:
                 LOG.debug("Applying measure: " + str(algorithm_name))
 
-            unstored_result = algorithm.evaluate()
+            accumulator = metric_accumulators.get_accumulator(algorithm, shape)
+            if accumulator is None:
+                evaluated_algorithms.append((algorithm_name, algorithm))
+            else:
+                accumulators.append((algorithm_name, accumulator))
+
+        ##---------- Stream the TimeSeries once, through all the metrics ------------##
+        stream = TimeSeriesStream(time_series)
+        unstored_results = stream.run([accumulator for _, accumulator in accumulators])
+        unstored_results = list(zip([algorithm_name for algorithm_name, _ in accumulators], unstored_results))
+
+        if evaluated_algorithms:
+            ##------------- NOTE: Assumes 4D, Simulator timeSeries. --------------##
+            node_slice = [slice(shape[0]), slice(shape[1]), slice(shape[2]), slice(shape[3])]
+            unstored_ts.data = time_series.read_data_slice(tuple(node_slice))
+            for algorithm_name, algorithm in evaluated_algorithms:
+                unstored_results.append((algorithm_name, algorithm.evaluate()))
+
+        metrics_results = {}
+        for algorithm_name, unstored_result in unstored_results:
             ##----------------- Prepare a Float object(s) for result ----------------##
             if isinstance(unstored_result, dict):
                 metrics_results.update(unstored_result)
@@ -39,6 +39,7 @@ Adapter that uses the traits module to generate interfaces for FFT Analyzer.
 import numpy
 from tvb.analyzers.node_coherence import NodeCoherence
 from tvb.core.adapters.abcadapter import ABCAsynchronous
+from tvb.core.adapters.block_pipeline import SlicePipeline
 from tvb.datatypes.time_series import TimeSeries
 from tvb.datatypes.spectral import CoherenceSpectrum
 from tvb.basic.traits.util import log_debug_array
@@ -54,6 +55,9 @@ class NodeCoherenceAdapter(ABCAsynchronous):
     _ui_name = "Cross coherence of nodes"
     _ui_description = "Compute Node Coherence for a TimeSeries input DataType."
     _ui_subsection = "coherence"
+
+    # Number of threads computing state variables in parallel (None for the number of CPU cores)
+    SLICE_WORKERS = None
     
     
     def get_input_tree(self):
@@ -88,16 +92,21 @@ class NodeCoherenceAdapter(ABCAsynchronous):
         self.algorithm = NodeCoherence()
         if nfft is not None:
             self.algorithm.nfft = nfft
+        self.pipeline = SlicePipeline(self.input_shape, self._get_slice_memory(), self.SLICE_WORKERS)
 
 
-    def get_required_memory_size(self, **kwargs):
-        """
-        Return the required memory to run this algorithm.
-        """
+    def _get_slice_memory(self):
         used_shape = (self.input_shape[0], 1, self.input_shape[2], self.input_shape[3])
         input_size = numpy.prod(used_shape) * 8.0
         output_size = self.algorithm.result_size(used_shape)
-        return input_size + output_size    
+        return input_size + output_size
+
+
+    def get_required_memory_size(self, **kwargs):
+        """
+        Return the required memory to run this algorithm, for all the state variables computed in parallel.
+        """
+        return self.pipeline.required_memory
 
 
     def get_required_disk_size(self, **kwargs):
@@ -118,20 +127,32 @@ class NodeCoherenceAdapter(ABCAsynchronous):
                                       storage_path=self.storage_path)
         
         ##------------- NOTE: Assumes 4D, Simulator timeSeries. --------------##
-        node_slice = [slice(self.input_shape[0]), None, slice(self.input_shape[2]), slice(self.input_shape[3])]
-        
-        ##---------- Iterate over slices and compose final result ------------##
-        small_ts = TimeSeries(use_storage=False)
-        small_ts.sample_rate = time_series.sample_rate
-        partial_coh = None
-        for var in range(self.input_shape[1]):
-            node_slice[1] = slice(var, var + 1)
-            small_ts.data = time_series.read_data_slice(tuple(node_slice))
-            self.algorithm.time_series = small_ts
-            partial_coh = self.algorithm.evaluate()
+        ##---------- Compute state variables in parallel and write results in order ------------##
+        partial_results = []
+
+        def write_slice(partial_coh):
             coherence.write_data_slice(partial_coh)
-        coherence.frequency = partial_coh.frequency
+            partial_results[:] = [partial_coh]
+
+        self.pipeline.run_slices(time_series,
+                                 lambda slice_data: self._compute_slice(slice_data, time_series.sample_rate),
+                                 write_slice)
+        coherence.frequency = partial_results[0].frequency
         coherence.close_file()
         return coherence
 
 
+    def _compute_slice(self, slice_data, sample_rate):
+        """
+        Compute coherence for one state variable. Called from the pipeline worker threads,
+        thus each call uses its own algorithm instance.
+        """
+        small_ts = TimeSeries(use_storage=False)
+        small_ts.sample_rate = sample_rate
+        small_ts.data = slice_data
+        algorithm = NodeCoherence()
+        algorithm.nfft = self.algorithm.nfft
+        algorithm.time_series = small_ts
+        return algorithm.evaluate()
+
+
@@ -37,8 +37,10 @@ Adapter that uses the traits module to generate interfaces for FFT Analyzer.
 """
 
 import numpy
+from scipy import signal as sp_signal
 from tvb.analyzers.node_complex_coherence import NodeComplexCoherence
 from tvb.core.adapters.abcadapter import ABCAsynchronous
+from tvb.core.adapters.time_series_stream import ChunkAccumulator, TimeSeriesStream
 from tvb.datatypes.time_series import TimeSeries
 from tvb.datatypes.spectral import ComplexCoherenceSpectrum
 from tvb.basic.filters.chain import FilterChain
@@ -48,6 +50,112 @@ LOG = get_logger(__name__)
 
 
 
+class ComplexCoherenceAccumulator(ChunkAccumulator):
+    """
+    Compute the same result as NodeComplexCoherence.evaluate (for npat == 1), with the TimeSeries
+    received in chunks of whole epochs: the cross spectra of the segments in each chunk are summed,
+    and the coherence is computed once all the epochs were merged.
+    """
+
+
+    def __init__(self, algorithm, shape, sample_period):
+        self.algorithm = algorithm
+        nr_nodes = shape[2]
+        tpts = shape[0]
+        time_series_length = tpts * sample_period
+
+        # Divide time-series into epochs, no overlapping
+        if algorithm.epoch_length > 0.0:
+            self.nepochs = int(numpy.floor(time_series_length / algorithm.epoch_length))
+            self.epoch_tpts = int(algorithm.epoch_length / sample_period)
+            time_series_length = algorithm.epoch_length
+            tpts = self.epoch_tpts
+        else:
+            algorithm.epoch_length = time_series_length
+            self.nepochs = 1
+            self.epoch_tpts = tpts
+
+        # Segment epochs, overlapping if necessary
+        self.nseg = int(numpy.floor(time_series_length / algorithm.segment_length))
+        if self.nseg > 1:
+            self.seg_tpts = int(algorithm.segment_length / sample_period)
+            self.seg_shift_tpts = int(algorithm.segment_shift / sample_period)
+            self.nseg = int(numpy.floor((tpts - self.seg_tpts) / self.seg_shift_tpts) + 1)
+        else:
+            algorithm.segment_length = time_series_length
+            self.nseg = 1
+            self.seg_tpts = tpts
+            self.seg_shift_tpts = tpts
+
+        self.nfreq = int(numpy.min([algorithm.max_freq, numpy.floor((self.seg_tpts + algorithm.zeropad) / 2.0) + 1]))
+        if algorithm.window_function is not None:
+            self.window = getattr(numpy, algorithm.window_function)(self.seg_tpts)
+        else:
+            self.window = numpy.ones(self.seg_tpts)
+
+        if algorithm.average_segments:
+            self.cs = numpy.zeros((nr_nodes, nr_nodes, self.nfreq), dtype=numpy.complex128)
+            self.av = numpy.zeros((nr_nodes, self.nfreq), dtype=numpy.complex128)
+        else:
+            self.cs = numpy.zeros((nr_nodes, nr_nodes, self.nfreq, self.nseg), dtype=numpy.complex128)
+            self.av = numpy.zeros((nr_nodes, self.nfreq, self.nseg), dtype=numpy.complex128)
+
+
+    @property
+    def used_time_points(self):
+        return self.nepochs * self.epoch_tpts
+
+
+    def compute_chunk(self, start, data):
+        # Average over state variables and modes
+        time_series_data = data.mean(axis=-1).mean(axis=1)
+        nr_epochs = time_series_data.shape[0] // self.epoch_tpts
+        epochs = time_series_data[:nr_epochs * self.epoch_tpts].reshape((nr_epochs, self.epoch_tpts, -1))
+        # Segments of all epochs: (segment, epoch, time, node)
+        segments = numpy.array([epochs[:, i * self.seg_shift_tpts: i * self.seg_shift_tpts + self.seg_tpts]
+                                for i in range(self.nseg)])
+        if self.algorithm.detrend_ts:
+            segments = sp_signal.detrend(segments, axis=2)
+        spectra = numpy.fft.fft(segments * self.window[:, numpy.newaxis], axis=2)[:, :, :self.nfreq]
+
+        if self.algorithm.average_segments:
+            cross_spectrum = numpy.einsum('sefa,sefb->abf', spectra, spectra.conj())
+            average = spectra.sum(axis=0).sum(axis=0).T
+        else:
+            cross_spectrum = numpy.einsum('sefa,sefb->abfs', spectra, spectra.conj())
+            average = spectra.sum(axis=1).transpose((2, 1, 0))
+        return cross_spectrum, average
+
+
+    def merge(self, partial):
+        self.cs += partial[0]
+        self.av += partial[1]
+
+
+    def result(self):
+        """
+        :returns: tuple (complex coherence, cross spectrum)
+        """
+        nave = float(self.nepochs)
+        if self.algorithm.average_segments:
+            nave *= self.nseg
+        cs = self.cs / nave
+        av = self.av / nave
+
+        # Subtract average
+        if self.algorithm.subtract_epoch_average:
+            if self.algorithm.average_segments:
+                cs -= numpy.einsum('af,bf->abf', av, av.conj())
+            else:
+                cs -= numpy.einsum('afs,bfs->abfs', av, av.conj())
+
+        # Compute Complex Coherence
+        diagonal = numpy.rollaxis(numpy.diagonal(cs, axis1=0, axis2=1), -1)
+        coh = cs / numpy.sqrt(diagonal.conj()[:, numpy.newaxis] * diagonal[numpy.newaxis, :])
+        return coh, cs
+
+
+
 class NodeComplexCoherenceAdapter(ABCAsynchronous):
     """ TVB adapter for calling the NodeComplexCoherence algorithm. """
     
@@ -89,8 +197,11 @@ class NodeComplexCoherenceAdapter(ABCAsynchronous):
                                                  self.algorithm.time_series.sample_period,
                                                  self.algorithm.zeropad,
                                                  self.algorithm.average_segments)
-                                                 
-        return input_size + output_size
+        if self.algorithm.npat != 1:
+            return input_size + output_size
+        # Chunks in flight, their partial cross spectra, the accumulated and the final results
+        stream = TimeSeriesStream(self.algorithm.time_series)
+        return stream.required_memory + (stream.pipeline.max_in_flight + 4) * output_size
         
 
     def get_required_disk_size(self, **kwargs):
@@ -126,6 +237,9 @@ class NodeComplexCoherenceAdapter(ABCAsynchronous):
 
         :returns: the `ComplexCoherenceSpectrum` built with the given time-series
         """
+        if self.algorithm.npat == 1:
+            return self._launch_streamed(time_series)
+
         shape = time_series.read_data_shape()
         
         ##------- Prepare a ComplexCoherenceSpectrum object for result -------##
@@ -157,4 +271,32 @@ class NodeComplexCoherenceAdapter(ABCAsynchronous):
         return spectra
     
     
-    
\ No newline at end of file
+    
+
+
+    def _launch_streamed(self, time_series):
+        """
+        Read the TimeSeries once, in chunks of whole epochs, instead of loading it all in memory.
+        """
+        shape = time_series.read_data_shape()
+        # Parameters are computed on a TimeSeries without storage, as NodeComplexCoherence.evaluate sees it
+        small_ts = TimeSeries(use_storage=False)
+        small_ts.sample_rate = time_series.sample_rate
+        accumulator = ComplexCoherenceAccumulator(self.algorithm, shape, small_ts.sample_period)
+
+        stream = TimeSeriesStream(time_series, chunk_alignment=accumulator.epoch_tpts)
+        [(coh, cs)] = stream.run([accumulator], end=accumulator.used_time_points)
+        LOG.debug("got streamed result, of shape %s" % str(coh.shape))
+
+        partial_result = ComplexCoherenceSpectrum(source=time_series, array_data=coh, cross_spectrum=cs,
+                                                  epoch_length=self.algorithm.epoch_length,
+                                                  segment_length=self.algorithm.segment_length,
+                                                  windowing_function=self.algorithm.window_function,
+                                                  use_storage=False)
+        spectra = ComplexCoherenceSpectrum(source=time_series, storage_path=self.storage_path)
+        spectra.write_data_slice(partial_result)
+        spectra.segment_length = partial_result.segment_length
+        spectra.epoch_length = partial_result.epoch_length
+        spectra.windowing_function = partial_result.windowing_function
+        spectra.close_file()
+        return spectra
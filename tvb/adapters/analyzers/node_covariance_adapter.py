@@ -39,6 +39,7 @@ Adapter that uses the traits module to generate interfaces for FFT Analyzer.
 import numpy
 from tvb.analyzers.node_covariance import NodeCovariance
 from tvb.core.adapters.abcadapter import ABCAsynchronous
+from tvb.core.adapters.block_pipeline import SlicePipeline
 from tvb.datatypes.time_series import TimeSeries
 from tvb.datatypes.graph import Covariance
 from tvb.basic.traits.util import log_debug_array
@@ -56,6 +57,9 @@ class NodeCovarianceAdapter(ABCAsynchronous):
     _ui_description = "Compute Temporal Node Covariance for a TimeSeries input DataType."
     _ui_subsection = "covariance"
 
+    # Number of threads computing (mode, state variable) slices in parallel (None for the number of CPU cores)
+    SLICE_WORKERS = None
+
 
     def get_input_tree(self):
         """
@@ -83,16 +87,22 @@ class NodeCovarianceAdapter(ABCAsynchronous):
         
         ##-------------------- Fill Algorithm for Analysis -------------------##
         self.algorithm = NodeCovariance()
+        self.pipeline = SlicePipeline(self.input_shape, self._get_slice_memory(), self.SLICE_WORKERS,
+                                      split_modes=True)
 
 
-    def get_required_memory_size(self, **kwargs):
-        """
-        Return the required memory to run this algorithm.
-        """
+    def _get_slice_memory(self):
         used_shape = (self.input_shape[0], 1, self.input_shape[2], 1)
         input_size = numpy.prod(used_shape) * 8.0
         output_size = self.algorithm.result_size(used_shape)
-        return input_size + output_size    
+        return input_size + output_size
+
+
+    def get_required_memory_size(self, **kwargs):
+        """
+        Return the required memory to run this algorithm, for all the slices computed in parallel.
+        """
+        return self.pipeline.required_memory
 
 
     def get_required_disk_size(self, **kwargs):
@@ -114,18 +124,22 @@ class NodeCovarianceAdapter(ABCAsynchronous):
         covariance = Covariance(source=time_series, storage_path=self.storage_path)
         
         #NOTE: Assumes 4D, Simulator timeSeries.
-        node_slice = [slice(self.input_shape[0]), None, slice(self.input_shape[2]), None]
-        
-        for mode in range(self.input_shape[3]):
-            for var in range(self.input_shape[1]):
-                small_ts = TimeSeries(use_storage=False)
-                node_slice[1] = slice(var, var + 1)
-                node_slice[3] = slice(mode, mode + 1)
-                small_ts.data = time_series.read_data_slice(tuple(node_slice))
-                self.algorithm.time_series = small_ts 
-                partial_cov = self.algorithm.evaluate()
-                covariance.write_data_slice(partial_cov.array_data)
+        #Slices are computed in parallel, and written in the (mode, state variable) order.
+        self.pipeline.run_slices(time_series, self._compute_slice, covariance.write_data_slice)
         covariance.close_file()
         return covariance
 
 
+    @staticmethod
+    def _compute_slice(slice_data):
+        """
+        Compute covariance for one (mode, state variable) slice. Called from the pipeline worker threads,
+        thus each call uses its own algorithm instance.
+        """
+        small_ts = TimeSeries(use_storage=False)
+        small_ts.data = slice_data
+        algorithm = NodeCovariance()
+        algorithm.time_series = small_ts
+        return algorithm.evaluate().array_data
+
+
@@ -32,6 +32,9 @@
 Adapter that uses the traits module to generate interfaces for
 ContinuousWaveletTransform Analyzer.
 
+Nodes are transformed in blocks: the Morlet wavelets are convolved with all the signals of a block at once,
+in the frequency domain, instead of one scipy.signal.convolve call per (frequency, state variable, node, mode).
+
 .. moduleauthor:: Stuart A. Knock <Stuart@tvb.invalid>
 .. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
 
@@ -39,9 +42,11 @@ ContinuousWaveletTransform Analyzer.
 
 import numpy
 from tvb.analyzers.wavelet import ContinuousWaveletTransform
-from tvb.datatypes.time_series import TimeSeries
 from tvb.datatypes.spectral import WaveletCoefficients
+from tvb.simulator.common import iround
 from tvb.core.adapters.abcadapter import ABCAsynchronous
+from tvb.core.adapters.block_pipeline import get_block_length
+from tvb.core.adapters.exceptions import LaunchException
 from tvb.basic.traits.types_basic import Range
 from tvb.basic.traits.util import log_debug_array
 from tvb.basic.filters.chain import FilterChain
@@ -109,15 +114,28 @@ class ContinuousWaveletTransformAdapter(ABCAsynchronous):
         self.algorithm = algorithm
         self.algorithm.time_series = time_series
 
+        self.wavelets = self._build_wavelets(time_series.sample_rate)
+        self.fft_length = self._get_fft_length(self.input_shape[0], self.wavelets)
+        self.block_nodes = get_block_length(self._get_node_memory(), self.input_shape[2])
 
-    def get_required_memory_size(self, **kwargs):
+
+    def _get_node_memory(self):
         """
-        Return the required memory to run this algorithm.
+        Memory needed for transforming one node: its input, its spectrum, the spectrum of one frequency
+        multiplied by the wavelet (and its inverse transform), plus the result coefficients.
         """
         used_shape = (self.input_shape[0], self.input_shape[1], 1, self.input_shape[3])
         input_size = numpy.prod(used_shape) * 8.0
+        spectrum_size = self.fft_length * self.input_shape[1] * self.input_shape[3] * 16.0
         output_size = self.algorithm.result_size(used_shape)
-        return input_size + output_size   
+        return input_size + 3 * spectrum_size + output_size
+
+
+    def get_required_memory_size(self, **kwargs):
+        """
+        Return the required memory to run this algorithm, for one block of nodes.
+        """
+        return self._get_node_memory() * self.block_nodes
 
 
     def get_required_disk_size(self, **kwargs):
@@ -143,19 +161,87 @@ class ContinuousWaveletTransformAdapter(ABCAsynchronous):
         
         ##------------- NOTE: Assumes 4D, Simulator timeSeries. --------------##
         node_slice = [slice(self.input_shape[0]), slice(self.input_shape[1]), None, slice(self.input_shape[3])]
-        
-        ##---------- Iterate over slices and compose final result ------------##
-        small_ts = TimeSeries(use_storage=False)
-        small_ts.sample_rate = time_series.sample_rate
-        small_ts.sample_period = time_series.sample_period
-        for node in range(self.input_shape[2]):
-            node_slice[2] = slice(node, node + 1)
-            small_ts.data = time_series.read_data_slice(tuple(node_slice))
-            self.algorithm.time_series = small_ts
-            partial_wavelet = self.algorithm.evaluate()
-            wavelet.write_data_slice(partial_wavelet)
+        temporal_step = max((1, iround(self.algorithm.sample_period / time_series.sample_period)))
+
+        ##---------- Iterate over node blocks and compose final result ------------##
+        for start_node in range(0, self.input_shape[2], self.block_nodes):
+            node_slice[2] = slice(start_node, min(start_node + self.block_nodes, self.input_shape[2]))
+            block_data = time_series.read_data_slice(tuple(node_slice))
+            coefficients = self._transform_block(block_data, self.wavelets, self.fft_length, temporal_step)
+            # Results are still stored node by node, as the per node evaluation did
+            for node in range(coefficients.shape[3]):
+                partial_wavelet = WaveletCoefficients(array_data=coefficients[:, :, :, node:node + 1],
+                                                      use_storage=False)
+                wavelet.write_data_slice(partial_wavelet)
         
         wavelet.close_file()
         return wavelet
 
 
+    def _build_wavelets(self, sample_rate):
+        """
+        Build the Morlet wavelet for each frequency, exactly as ContinuousWaveletTransform.evaluate does.
+        """
+        frequencies = self.algorithm.frequencies
+        if frequencies.step == 0:
+            LOG.warning("Frequency step can't be 0! Trying default step, 2e-3.")
+            frequencies.step = 0.002
+        freqs = numpy.arange(frequencies.lo, frequencies.hi, frequencies.step)
+
+        if freqs.size == 0 or any(freqs <= 0.0):
+            LOG.warning("Invalid frequency range! Falling back to default.")
+            self.algorithm.frequencies = Range(lo=0.008, hi=0.060, step=0.002)
+            freqs = numpy.arange(self.algorithm.frequencies.lo, self.algorithm.frequencies.hi,
+                                 self.algorithm.frequencies.step)
+
+        q_ratio = self.algorithm.q_ratio * numpy.ones(len(freqs))
+        if numpy.nanmin(q_ratio) < 5:
+            raise LaunchException("Q_ratio must be not lower than 5 !")
+        if numpy.nanmax(freqs) > sample_rate / 2.0:
+            raise LaunchException("Sampling rate is too low for the requested frequency range !")
+
+        sigma_t = 1.0 / (2.0 * numpy.pi * (freqs / q_ratio))
+        if self.algorithm.normalisation == 'energy':
+            amplitudes = 1.0 / numpy.sqrt(sample_rate * numpy.sqrt(numpy.pi) * sigma_t)
+        else:
+            amplitudes = numpy.sqrt(2.0 / numpy.pi) / sample_rate / sigma_t
+
+        wavelets = []
+        for f0, sd_t, amplitude in zip(freqs, sigma_t, amplitudes):
+            x = numpy.arange(0, 4.0 * sd_t * sample_rate, 1) / sample_rate
+            wvlt = amplitude * numpy.exp(-x ** 2 / (2.0 * sd_t ** 2)) * numpy.exp(2j * numpy.pi * f0 * x)
+            wavelets.append(numpy.hstack((numpy.conjugate(wvlt[-1:0:-1]), wvlt)))
+        return wavelets
+
+
+    @staticmethod
+    def _get_fft_length(nr_samples, wavelets):
+        """
+        Power of 2 long enough for the full (linear, not circular) convolution with the longest wavelet.
+        """
+        full_length = nr_samples + max(len(wvlt) for wvlt in wavelets) - 1
+        return 2 ** int(numpy.ceil(numpy.log2(full_length)))
+
+
+    @staticmethod
+    def _transform_block(block_data, wavelets, fft_length, temporal_step):
+        """
+        Convolve every signal in `block_data` (time, state variable, node, mode) with every wavelet.
+        The signals are transformed once, and each wavelet is applied as a product in the frequency domain.
+
+        :returns: complex array (frequency, time, state variable, node, mode), equal (within FFT round-off)
+                  to the 'same' mode scipy.signal.convolve, sub-sampled with `temporal_step`
+        """
+        nr_samples = block_data.shape[0]
+        nt = int(numpy.ceil(nr_samples / temporal_step))
+        data_spectrum = numpy.fft.fft(block_data, n=fft_length, axis=0)
+        broadcast_shape = (fft_length,) + (1,) * (block_data.ndim - 1)
+
+        coefficients = numpy.empty((len(wavelets), nt) + block_data.shape[1:], dtype=numpy.complex128)
+        for i, wvlt in enumerate(wavelets):
+            wvlt_spectrum = numpy.fft.fft(wvlt, n=fft_length).reshape(broadcast_shape)
+            transformed = numpy.fft.ifft(data_spectrum * wvlt_spectrum, axis=0)
+            # Central part of the full convolution, with the length of the input
+            start = (len(wvlt) - 1) // 2
+            coefficients[i] = transformed[start:start + nr_samples:temporal_step][:nt]
+        return coefficients
@@ -55,6 +55,7 @@ from tvb.datatypes.simulation_state import SimulationState
 from tvb.datatypes import noise_framework
 import tvb.datatypes.time_series as time_series
 import tvb.datatypes.region_mapping as region_mapping
+from tvb.adapters.simulator.time_series_writer import BackgroundWriter, TimeSeriesWriter
 
 
 
@@ -75,6 +76,9 @@ class SimulatorAdapter(ABCAsynchronous):
     # We exclude from this for example EEG, MEG or Bold which return 
     HAVE_STATE_VARIABLES = ["GlobalAverage", "SpatialAverage", "Raw", "SubSample", "TemporalAverage"]
 
+    # Memory budget (in bytes) for monitor samples not yet written into the result TimeSeries.
+    WRITE_BUFFER_SIZE = 2 ** 24
+
 
     def __init__(self):
         super(SimulatorAdapter, self).__init__()
@@ -292,11 +296,17 @@ class SimulatorAdapter(ABCAsynchronous):
 
         ### Run simulation
         self.log.debug("%s: Starting simulation..." % str(self))
-        for result in self.algorithm(simulation_length=simulation_length):
-            for j, monitor in enumerate(monitors):
-                if result[j] is not None:
-                    result_datatypes[monitor].write_time_slice([result[j][0]])
-                    result_datatypes[monitor].write_data_slice([result[j][1]])
+        buffer_size = self.WRITE_BUFFER_SIZE // len(result_datatypes)
+        # A failure of the simulation loop is not masked by a write error raised when closing the writer
+        with BackgroundWriter() as background_writer:
+            writers = dict((m_name, TimeSeriesWriter(ts, buffer_size, background_writer))
+                           for m_name, ts in result_datatypes.iteritems())
+            for result in self.algorithm(simulation_length=simulation_length):
+                for j, monitor in enumerate(monitors):
+                    if result[j] is not None:
+                        writers[monitor].write(result[j][0], result[j][1])
+            for writer in writers.values():
+                writer.flush()
 
         self.log.debug("%s: Completed simulation, starting to store simulation state " % str(self))
         ### Populate H5 file for simulator state. This step could also be done while running sim, in background.
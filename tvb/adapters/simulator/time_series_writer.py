@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Write-behind batching of the samples produced by the simulator monitors.
+
+Samples are accumulated in preallocated arrays, sized by a memory budget, and stored in the TimeSeries
+as a single chunk. The chunks can be stored by a BackgroundWriter thread, so that integration and
+H5 I/O overlap.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import Queue as queue
+import threading
+import numpy
+from tvb.basic.logger.builder import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+
+
+class BackgroundWriter(threading.Thread):
+    """
+    Thread executing write tasks in the order they were submitted.
+    At most `max_pending` tasks wait in the queue, thus limiting the memory kept by unwritten batches.
+    The first error raised by a task is raised again in the submitting thread, on the following call.
+    Used as a context manager, the thread is started on enter and closed on exit.
+    """
+
+
+    def __init__(self, max_pending=2):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self._tasks = queue.Queue(max_pending)
+        self.error = None
+
+
+    def run(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            if self.error is not None:
+                # Skip the remaining writes, the operation will fail anyway.
+                continue
+            function, args = task
+            try:
+                function(*args)
+            except Exception as excep:
+                LOGGER.exception(excep)
+                self.error = excep
+
+
+    def submit(self, function, *args):
+        """
+        Queue `function(*args)` for execution. Blocks while `max_pending` tasks are already waiting.
+        """
+        self._check_error()
+        self._tasks.put((function, args))
+
+
+    def close(self):
+        """
+        Wait for all submitted tasks to be executed, then stop the thread.
+        """
+        self._tasks.put(None)
+        self.join()
+        self._check_error()
+
+
+    def __enter__(self):
+        self.start()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Close the writer. When the block already raised, an error from closing is only logged,
+        for the original exception to be the one propagated.
+        """
+        if exc_type is None:
+            self.close()
+            return
+        try:
+            self.close()
+        except Exception:
+            LOGGER.exception("Could not close the background writer, while handling another error.")
+
+
+    def _check_error(self):
+        if self.error is not None:
+            raise self.error
+
+
+
+class TimeSeriesWriter(object):
+    """
+    Accumulate (time, data) samples of one monitor and write them in batches into a TimeSeries,
+    through `write_time_slice` and `write_data_slice`.
+    """
+
+
+    def __init__(self, time_series, buffer_size, background_writer=None):
+        """
+        :param time_series: TimeSeries where to store the samples
+        :param buffer_size: memory budget (in bytes) for the batch of data samples
+        :param background_writer: BackgroundWriter to store batches with, or None to store them directly
+        """
+        self.time_series = time_series
+        self.buffer_size = buffer_size
+        self.background_writer = background_writer
+        self._times = None
+        self._data = None
+        self._length = 0
+
+
+    def write(self, sample_time, sample_data):
+        """
+        Add one sample to the current batch, and store the batch when it gets full.
+        """
+        if self._data is None:
+            self._allocate(sample_data)
+        self._times[self._length] = sample_time
+        self._data[self._length] = sample_data
+        self._length += 1
+        if self._length == self._data.shape[0]:
+            self.flush()
+
+
+    def flush(self):
+        """
+        Store the samples accumulated so far.
+        """
+        if self._length == 0:
+            return
+        times = self._times[:self._length]
+        data = self._data[:self._length]
+        self._length = 0
+        if self.background_writer is None:
+            self._store(times, data)
+        else:
+            # The arrays are now owned by the writer thread, new ones get allocated for the next batch.
+            self._times = None
+            self._data = None
+            self.background_writer.submit(self._store, times, data)
+
+
+    def _allocate(self, sample_data):
+        sample_data = numpy.asarray(sample_data)
+        capacity = max(1, self.buffer_size // max(1, sample_data.nbytes))
+        self._times = numpy.empty((capacity,))
+        self._data = numpy.empty((capacity,) + sample_data.shape, dtype=sample_data.dtype)
+
+
+    def _store(self, times, data):
+        self.time_series.write_time_slice(times)
+        self.time_series.write_data_slice(data)
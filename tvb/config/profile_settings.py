@@ -47,6 +47,28 @@ class WebSettingsProfile(BaseSettingsProfile):
     """
     LOGGER_CONFIG_FILE_NAME = "logger_config.conf"
 
+    # Operations are executed in long-lived worker processes, which get recycled after this many operations,
+    # or when their memory grows over the limit (in bytes). Use 1 operation for a new process per operation.
+    OPERATION_WORKER_MAX_OPERATIONS = 100
+    OPERATION_WORKER_MAX_MEMORY = 2 * 1024 ** 3
+
+    # Number of processes upgrading H5 files in parallel, when the data version changes
+    FILES_UPGRADE_WORKERS = 4
+
+    # Seconds between corrections of the per-user disk usage counters, from the DataTypes stored in DB
+    DISK_USAGE_RECONCILE_INTERVAL = 3600
+
+    # Seconds between DB checks for burst status changes, pushed to the pages waiting for status events
+    BURST_STATUS_CHECK_INTERVAL = 5
+
+    # Last script in tvb.core.entities.model.db_update_scripts
+    DB_STRUCTURE_VERSION = 20
+
+
+    def __init__(self):
+        super(WebSettingsProfile, self).__init__()
+        self.version.DB_STRUCTURE_VERSION = max(self.version.DB_STRUCTURE_VERSION, self.DB_STRUCTURE_VERSION)
+
 
     def initialize_profile(self, change_logger_in_dev=True):
         """
@@ -167,6 +167,8 @@ class ABCAdapter(object):
         # Will be populate with current running operation's identifier
         self.operation_id = None
         self.user_id = None
+        # DataTypes stored as results of the current operation, in the order they were stored
+        self.stored_results = []
         self.log = get_logger(self.__class__.__module__)
         self.tree_manager = InputTreeManager()
 
@@ -365,12 +367,17 @@ class ABCAdapter(object):
                 associated_file = os.path.join(res.storage_path, res.get_storage_file_name())
                 res.close_file()
                 res.disk_size = self.file_handler.compute_size_on_disk(associated_file)
-            res = dao.store_entity(res)
+                if os.path.exists(associated_file):
+                    ## Files are created by the current code, with the current data version
+                    res._data_version = TvbProfile.current.version.DATA_VERSION
+            # Store, and add the size to the disk usage of the user, in one transaction
+            res = dao.store_datatype(res)
             # Write metaData
             res.persist_full_metadata()
             results_to_store.append(res)
         del result[0:len(result)]
         result.extend(results_to_store)
+        self.stored_results.extend(results_to_store)
 
         if len(result) and self._is_group_launch():
             ## Update the operation group name
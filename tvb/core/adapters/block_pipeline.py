@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Bounded producer / consumer pipeline, for analyzers which process their input in independent blocks.
+
+One thread reads the next blocks (e.g. from H5) while a pool of worker threads computes the
+already read ones, and the results are written in the blocks order, by the calling thread.
+Computations are expected to spend most of their time in NumPy routines, which release the GIL.
+
+SlicePipeline applies the same scheme over the independent (state variable, mode) slices of a 4D TimeSeries,
+with as many workers as the free memory allows.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import threading
+import Queue as queue
+from multiprocessing.pool import ThreadPool
+import psutil
+from tvb.basic.logger.builder import get_logger
+
+
+LOGGER = get_logger(__name__)
+MAX_DEFAULT_WORKERS = 8
+# Part of the free memory (RAM and swap) which the slices in flight are allowed to use
+MAX_MEMORY_RATIO = 0.8
+
+
+
+def get_default_workers():
+    return min(psutil.cpu_count() or 1, MAX_DEFAULT_WORKERS)
+
+
+def get_block_length(item_memory, nr_items):
+    """
+    :param item_memory: memory (in bytes) needed to process one item (e.g. one node)
+    :returns: how many items to process at once, such that one block fits in the free memory
+    """
+    free_memory = psutil.virtual_memory().free + psutil.swap_memory().free
+    if item_memory <= 0:
+        return max(1, nr_items)
+    return int(max(1, min(nr_items, free_memory * MAX_MEMORY_RATIO // item_memory)))
+
+
+
+class BlockPipeline(object):
+    """
+    At most `max_in_flight` blocks (read, but not yet written) exist at any moment,
+    so the memory needed is bounded by `max_in_flight` times the memory of one block (input and result).
+    """
+
+
+    def __init__(self, workers=None):
+        if not workers:
+            workers = get_default_workers()
+        self.workers = workers
+        # One more block is read, while all the workers are busy
+        self.max_in_flight = workers + 1
+
+
+    def run(self, blocks, read_block, compute_block, write_block):
+        """
+        :param blocks: list of block descriptions (e.g. slices)
+        :param read_block: function(block) -> data, called from the reader thread
+        :param compute_block: function(data) -> result, called from the worker threads
+        :param write_block: function(block, result), called from the current thread in the `blocks` order
+        """
+        if len(blocks) <= 1 or self.workers <= 1:
+            for block in blocks:
+                write_block(block, compute_block(read_block(block)))
+            return
+
+        pool = ThreadPool(self.workers)
+        slots = threading.Semaphore(self.max_in_flight)
+        pending = queue.Queue()
+        stop = threading.Event()
+        reader_errors = []
+
+        def read_all():
+            try:
+                for block in blocks:
+                    slots.acquire()
+                    if stop.is_set():
+                        break
+                    data = read_block(block)
+                    pending.put((block, pool.apply_async(compute_block, (data,))))
+            except Exception as excep:
+                LOGGER.exception(excep)
+                reader_errors.append(excep)
+            finally:
+                pending.put(None)
+
+        reader = threading.Thread(target=read_all)
+        reader.daemon = True
+        reader.start()
+        try:
+            while True:
+                item = pending.get()
+                if item is None:
+                    break
+                block, result = item
+                write_block(block, result.get())
+                slots.release()
+        finally:
+            stop.set()
+            # Unblock the reader, in case it waits for a free slot
+            slots.release()
+            reader.join()
+            pool.close()
+            pool.join()
+        if reader_errors:
+            raise reader_errors[0]
+
+
+
+class SlicePipeline(BlockPipeline):
+    """
+    Pipeline over the slices of a 4D (time, state variable, node, mode) TimeSeries, which analyzers compute
+    independently: one slice per state variable, or per (mode, state variable) when `split_modes` is set.
+    The number of workers is reduced, when the slices in flight would not fit in the free memory.
+    """
+
+
+    def __init__(self, input_shape, slice_memory, workers=None, split_modes=False):
+        """
+        :param input_shape: shape of the input TimeSeries data
+        :param slice_memory: memory (in bytes) needed for one slice (input and result),
+                             as estimated by the adapter `get_required_memory_size`
+        """
+        self.slices = self.get_slices(input_shape, split_modes)
+        self.slice_memory = slice_memory
+        workers = workers or get_default_workers()
+        if slice_memory > 0:
+            free_memory = psutil.virtual_memory().free + psutil.swap_memory().free
+            fitting_slices = int(free_memory * MAX_MEMORY_RATIO / slice_memory)
+            # With N workers, N + 1 slices are in flight
+            workers = min(workers, fitting_slices - 1)
+        workers = max(1, min(workers, len(self.slices)))
+        super(SlicePipeline, self).__init__(workers)
+
+
+    @staticmethod
+    def get_slices(input_shape, split_modes=False):
+        """
+        :returns: list of tuples of slices, to be passed to TimeSeries.read_data_slice, in the order results are written
+        """
+        if not split_modes:
+            return [(slice(input_shape[0]), slice(var, var + 1), slice(input_shape[2]), slice(input_shape[3]))
+                    for var in range(input_shape[1])]
+        return [(slice(input_shape[0]), slice(var, var + 1), slice(input_shape[2]), slice(mode, mode + 1))
+                for mode in range(input_shape[3]) for var in range(input_shape[1])]
+
+
+    @property
+    def required_memory(self):
+        """
+        Memory needed by all the slices in flight, to be reported by the adapter as its required memory.
+        """
+        if self.workers <= 1:
+            return self.slice_memory
+        return self.slice_memory * min(self.max_in_flight, len(self.slices))
+
+
+    def run_slices(self, time_series, compute_slice, write_slice):
+        """
+        :param time_series: input TimeSeries, read slice by slice from the reader thread
+        :param compute_slice: function(slice_data) -> result, called from the worker threads
+        :param write_slice: function(result), called from the current thread, in the slices order
+        """
+        self.run(self.slices, time_series.read_data_slice, compute_slice,
+                 lambda _, result: write_slice(result))
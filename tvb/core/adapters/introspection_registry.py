@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Persisted result of the adapters introspection.
+
+On an unchanged tree (same code version, DB and adapter files) the application start can reuse the
+previous introspection, and skip importing every adapter module. Adapters are anyway built lazily
+from their stored Algorithm rows (see ABCAdapter.build_adapter).
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import os
+import imp
+import json
+import hashlib
+from tvb.basic.logger.builder import get_logger
+from tvb.basic.profile import TvbProfile
+
+
+KEY_FINGERPRINT = "fingerprint"
+KEY_REMOVERS = "removers"
+INTROSPECTED_EXTENSIONS = ('.py', '.xml')
+
+
+
+class IntrospectionRegistry(object):
+    """
+    Stores in TVB_STORAGE a fingerprint of the introspected modules, and the removers found for them.
+    The fingerprint is a hash of the code version, DB url, and the names, mtimes and sizes of
+    all the files from the packages declared for introspection (adapters, datatypes, removers, portlets).
+    """
+    REGISTRY_FILE_NAME = "introspection_registry.json"
+
+
+    def __init__(self, registry_file=None):
+        self.logger = get_logger(self.__class__.__module__)
+        if registry_file is None:
+            registry_file = os.path.join(TvbProfile.current.TVB_STORAGE, self.REGISTRY_FILE_NAME)
+        self.registry_file = registry_file
+
+
+    def compute_fingerprint(self, introspected_modules):
+        """
+        :param introspected_modules: list of python modules names, holding the introspection declarations
+        :returns: a string, which changes as soon as any of the introspected files changes
+        """
+        md5 = hashlib.md5()
+        for value in (TvbProfile.current.version.BASE_VERSION, TvbProfile.current.version.SVN_VERSION,
+                      TvbProfile.current.db.DB_URL, TvbProfile.current.MATLAB_EXECUTABLE):
+            md5.update(str(value).encode('utf-8'))
+
+        for module_name in introspected_modules:
+            module = __import__(module_name, globals(), locals(), ["__init__"])
+            md5.update(self._describe_file(module.__file__))
+            for folder in self._get_introspected_folders(module):
+                for file_path in self._list_files(folder):
+                    md5.update(self._describe_file(file_path))
+        return md5.hexdigest()
+
+
+    def get_removers(self, fingerprint):
+        """
+        :returns: dictionary {DataType class name: full remover class name}, as stored at the previous
+                  introspection, or None when the registry does not exist or it was computed on a different tree.
+        """
+        if not os.path.exists(self.registry_file):
+            return None
+        try:
+            with open(self.registry_file) as registry:
+                content = json.load(registry)
+        except (IOError, ValueError):
+            self.logger.exception("Could not read introspection registry %s" % self.registry_file)
+            return None
+
+        if content.get(KEY_FINGERPRINT) != fingerprint:
+            return None
+        return content.get(KEY_REMOVERS)
+
+
+    def store(self, fingerprint, removers):
+        """
+        Persist the current introspection result.
+        """
+        content = {KEY_FINGERPRINT: fingerprint, KEY_REMOVERS: removers}
+        try:
+            with open(self.registry_file, 'w') as registry:
+                json.dump(content, registry)
+        except IOError:
+            self.logger.exception("Could not write introspection registry %s" % self.registry_file)
+
+
+    def clear(self):
+        """
+        Force a full introspection at the next start.
+        """
+        if os.path.exists(self.registry_file):
+            os.remove(self.registry_file)
+
+
+    @staticmethod
+    def _get_introspected_folders(module):
+        """
+        Packages declared in the introspected module are located without importing them
+        (only their parent packages get imported, and those are expected to be light).
+        """
+        packages = []
+        for category_details in getattr(module, 'ADAPTERS', {}).values():
+            packages.extend(category_details.get('modules', []))
+        for variable_name in ('DATATYPES_PATH', 'REMOVERS_PATH', 'PORTLETS_PATH'):
+            packages.extend(getattr(module, variable_name, []))
+
+        folders = []
+        for package_name in sorted(set(packages)):
+            parent_name, _, short_name = package_name.rpartition('.')
+            try:
+                parent = __import__(parent_name, globals(), locals(), ["__init__"])
+                _, folder, _ = imp.find_module(short_name, parent.__path__)
+            except ImportError:
+                # Introspection will log the invalid declaration; it is enough to have it part of the fingerprint
+                folder = package_name
+            folders.append(folder)
+        return folders
+
+
+    @staticmethod
+    def _list_files(folder):
+        if not os.path.isdir(folder):
+            return [folder]
+        result = []
+        for dir_path, _, file_names in os.walk(folder):
+            for file_name in file_names:
+                if file_name.endswith(INTROSPECTED_EXTENSIONS):
+                    result.append(os.path.join(dir_path, file_name))
+        return sorted(result)
+
+
+    @staticmethod
+    def _describe_file(file_path):
+        if file_path.endswith('.pyc'):
+            file_path = file_path[:-1]
+        if not os.path.exists(file_path):
+            return ("%s:missing;" % file_path).encode('utf-8')
+        stat = os.stat(file_path)
+        return ("%s:%d:%d;" % (file_path, stat.st_mtime, stat.st_size)).encode('utf-8')
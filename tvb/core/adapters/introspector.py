@@ -68,6 +68,7 @@ class Introspector:
 
     def __init__(self, introspected_module):
         self.module_name = introspected_module
+        self.removers_path = []
         self.logger = get_logger(self.__class__.__module__)
 
 
@@ -86,6 +87,22 @@ class Introspector:
         return result
 
 
+    def get_removers_names(self):
+        """
+        :returns: the removers of the current introspected module, as full class names (to be persisted).
+        """
+        return dict((key, remover.__module__ + '.' + remover.__name__)
+                    for key, remover in self.get_removers_dict().items())
+
+
+    @staticmethod
+    def register_removers(removers_names):
+        """
+        Register removers restored from a previous introspection; their modules get imported only on first use.
+        """
+        removers.update_dictionary(removers_names)
+
+
     def introspect(self, do_create):
         """
         Introspect a given module to: 
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Single pass, out-of-core reading of a 4D TimeSeries, for analyzers which reduce the whole data
+(e.g. metrics computing one number, or spectra averaged over epochs).
+
+The TimeSeries is read once, in chunks of consecutive time points, and every chunk is given to all the
+registered accumulators. Chunks are computed in parallel (see BlockPipeline), while the partial results
+are merged into each accumulator in the time order. The working memory is bounded by the chunks in flight,
+and not by the TimeSeries size.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import numpy
+import psutil
+from tvb.core.adapters.block_pipeline import BlockPipeline, MAX_MEMORY_RATIO
+
+
+# Upper bound for the memory of one chunk, such that the work is split in enough chunks to be parallel
+MAX_CHUNK_MEMORY = 256 * 2 ** 20
+# Copies of a chunk which accumulators might need at once (the chunk itself and their temporary arrays)
+CHUNK_COPIES = 4
+
+
+
+class ChunkAccumulator(object):
+    """
+    Base class for computations fed by TimeSeriesStream.
+    """
+
+
+    def compute_chunk(self, start, data):
+        """
+        Called from the worker threads, thus it should not change the accumulator state.
+
+        :param start: index of the first time point in `data`
+        :param data: array (time, state variable, node, mode)
+        :returns: partial result for this chunk, given later to `merge`
+        """
+        raise NotImplementedError()
+
+
+    def merge(self, partial):
+        """
+        Merge one partial result (called in the time order of the chunks, from a single thread).
+        """
+        raise NotImplementedError()
+
+
+    def result(self):
+        raise NotImplementedError()
+
+
+
+class TimeSeriesStream(object):
+    """
+    Feed the chunks of one TimeSeries, read once, to several accumulators.
+    """
+
+
+    def __init__(self, time_series, workers=None, chunk_alignment=1):
+        """
+        :param chunk_alignment: chunks will have a multiple of this number of time points
+                                (e.g. the epoch length, for accumulators computing on whole epochs)
+        """
+        self.time_series = time_series
+        self.shape = time_series.read_data_shape()
+        self.pipeline = BlockPipeline(workers)
+        self.chunk_length = self.get_chunk_length(self.shape, self.pipeline.max_in_flight, chunk_alignment)
+
+
+    @staticmethod
+    def get_chunk_length(shape, max_in_flight, chunk_alignment=1):
+        """
+        :returns: number of time points in a chunk, such that the chunks in flight fit in the free memory
+        """
+        time_point_memory = numpy.prod(shape[1:]) * 8.0 * CHUNK_COPIES
+        free_memory = psutil.virtual_memory().free + psutil.swap_memory().free
+        chunk_memory = min(MAX_CHUNK_MEMORY, free_memory * MAX_MEMORY_RATIO / max_in_flight)
+        aligned_memory = time_point_memory * chunk_alignment
+        return int(max(1, chunk_memory // aligned_memory)) * chunk_alignment
+
+
+    @property
+    def required_memory(self):
+        """
+        Memory needed for the chunks in flight (the accumulators results are not included).
+        """
+        return numpy.prod(self.shape[1:]) * 8.0 * CHUNK_COPIES * self.chunk_length * self.pipeline.max_in_flight
+
+
+    def run(self, accumulators, start=0, end=None):
+        """
+        Read the time points [start, end) and feed all of them to every accumulator.
+        """
+        if not accumulators:
+            return []
+        end = self.shape[0] if end is None else min(end, self.shape[0])
+        chunks = [(chunk_start, min(chunk_start + self.chunk_length, end))
+                  for chunk_start in range(start, end, self.chunk_length)]
+
+        def read_chunk(chunk):
+            data_slice = (slice(chunk[0], chunk[1]), slice(self.shape[1]), slice(self.shape[2]), slice(self.shape[3]))
+            return chunk[0], self.time_series.read_data_slice(data_slice)
+
+        def compute_chunk(chunk_data):
+            return [accumulator.compute_chunk(chunk_data[0], chunk_data[1]) for accumulator in accumulators]
+
+        def merge_chunk(_, partials):
+            for accumulator, partial in zip(accumulators, partials):
+                accumulator.merge(partial)
+
+        self.pipeline.run(chunks, read_chunk, compute_chunk, merge_chunk)
+        return [accumulator.result() for accumulator in accumulators]
+
+
+
+class MomentsAccumulator(object):
+    """
+    Count, mean and sum of squared deviations of values (per position, when arrays are given),
+    merged with the pairwise formulas of Chan et al., which stay accurate for long streams.
+    """
+
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.squares = 0.0
+
+
+    @staticmethod
+    def compute(values, axis=0):
+        """
+        :returns: moments (count, mean, sum of squared deviations) of `values` along `axis`
+        """
+        count = values.shape[axis] if axis is not None else values.size
+        if count == 0:
+            return 0, 0.0, 0.0
+        mean = values.mean(axis=axis)
+        deviations = values - (numpy.expand_dims(mean, axis) if axis is not None else mean)
+        return count, mean, (deviations ** 2).sum(axis=axis)
+
+
+    def merge(self, moments):
+        count, mean, squares = moments
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / float(total)
+        self.squares = self.squares + squares + delta ** 2 * self.count * count / float(total)
+        self.count = total
+
+
+    @property
+    def variance(self):
+        """
+        Population variance (as numpy.var with the default ddof=0).
+        """
+        return self.squares / self.count
@@ -44,7 +44,9 @@ from tvb.core.utils import string2date, date2string, string2bool
 from tvb.core.entities.file.exceptions import FileVersioningException
 
 PYTHON_EXE_PATH = TvbProfile.current.PYTHON_INTERPRETER_PATH
-DATA_BUFFER_SIZE = 50000000 / 8  # 500 MB maximum read at once (just assume worst case float64)
+# Maximum bytes read at once from a node. Several files get upgraded in parallel (one process each),
+# so keep this bounded, and stream larger nodes through it, slice by slice.
+DATA_BUFFER_SIZE = 64 * 1024 * 1024
 
 # ---------------------- TVB 1.0 Specific constants and functions start here --------------------------
 # We duplicate these constants here since they were the ones used in TVB 1.0 and 
@@ -150,11 +152,11 @@ def __upgrade_file(input_file_name, output_file_name):
             # than sub-groups.
             h5py_node = h5py_h5_file.create_dataset(node_path, (1,))
         else:
-            # We have a standard node (Carray), compute based on the shape if it will
+            # We have a standard node (Carray), compute based on the shape and item size if it will
             # fit in the DATA_BUFFER_SIZE we set or we need to read/write by chunks.
             node_shape = tables_node.shape
             max_dimension = 0
-            total_size = 1
+            total_size = tables_node.dtype.itemsize
             for idx, val in enumerate(node_shape):
                 if val > node_shape[max_dimension]:
                     max_dimension = idx
@@ -165,19 +167,17 @@ def __upgrade_file(input_file_name, output_file_name):
                 h5py_node = h5py_h5_file.create_dataset(node_path, data=node_data, 
                                                         shape=node_data.shape, dtype=node_data.dtype)
             else:
-                # We need to read in chunks. Set the dimension that is growable to None
+                # We need to read in chunks, along the largest dimension. Set that dimension growable (None)
                 node_shape_list = list(node_shape)
                 node_shape_list[max_dimension] = None
-                h5py_node = h5py_h5_file.create_dataset(node_path, shape=node_shape, maxshape=tuple(node_shape_list))
+                h5py_node = h5py_h5_file.create_dataset(node_path, shape=node_shape, maxshape=tuple(node_shape_list),
+                                                        dtype=tables_node.dtype)
                 slice_size = max(int(DATA_BUFFER_SIZE * node_shape[max_dimension] / total_size), 1)
                 full_slice = slice(None, None, None)
                 data_slice = [full_slice for _ in node_shape]
                 for idx in range(0, node_shape[max_dimension], slice_size):
-                    specific_slice = slice(idx, idx + slice_size, 1)
-                    data_slice[max_dimension] = specific_slice
-                    tables_data = tables_node[tuple(data_slice)]
-                    h5py_node = h5py_h5_file[node_path]
-                    h5py_node[tuple(data_slice)] = tables_data
+                    data_slice[max_dimension] = slice(idx, idx + slice_size, 1)
+                    h5py_node[tuple(data_slice)] = tables_node[tuple(data_slice)]
         for meta_key in node_metadata:
             processed_value = _serialize_value(node_metadata[meta_key])
             h5py_node.attrs[meta_key] = processed_value
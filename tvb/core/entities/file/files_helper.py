@@ -42,6 +42,7 @@ from tvb.core.decorators import synchronized
 from tvb.core.entities.transient.structure_entities import DataTypeMetaData, GenericMetaData
 from tvb.core.entities.file.xml_metadata_handlers import XMLReader, XMLWriter
 from tvb.core.entities.file.exceptions import FileStructureException
+from tvb.core.entities.file.hdf5_file_pool import H5_FILE_POOL
 
 
 from threading import Lock
@@ -112,6 +113,7 @@ class FilesHelper():
             if os.path.exists(new_full_name):
                 raise IOError("Path exists %s " % new_full_name)
 
+            H5_FILE_POOL.close_files_in_folder(path)
             os.rename(path, new_full_name)
             return path, new_full_name
         except Exception:
@@ -123,6 +125,7 @@ class FilesHelper():
         """ Remove all folders for project or THROW FileStructureException. """
         try:
             complete_path = self.get_project_folder(project_name)
+            H5_FILE_POOL.close_files_in_folder(complete_path)
             if os.path.exists(complete_path):
                 if os.path.isdir(complete_path):
                     shutil.rmtree(complete_path)
@@ -236,6 +239,7 @@ class FilesHelper():
         try:
             complete_path = self.get_operation_folder(project_name, operation_id)
             self.logger.debug("Removing: " + str(complete_path))
+            H5_FILE_POOL.close_files_in_folder(complete_path)
             if os.path.isdir(complete_path):
                 shutil.rmtree(complete_path)
             elif os.path.exists(complete_path):
@@ -251,6 +255,7 @@ class FilesHelper():
         Remove H5 storage fully.
         """
         try:
+            H5_FILE_POOL.close_file(datatype.get_storage_file_path())
             if os.path.exists(datatype.get_storage_file_path()):
                 os.remove(datatype.get_storage_file_path())
             else:
@@ -268,6 +273,7 @@ class FilesHelper():
             full_path = datatype.get_storage_file_path()
             folder = self.get_project_folder(new_project_name, str(new_op_id))
             full_new_file = os.path.join(folder, os.path.split(full_path)[1])
+            H5_FILE_POOL.close_file(full_path)
             os.rename(full_path, full_new_file)
         except Exception:
             self.logger.exception("Could not move file")
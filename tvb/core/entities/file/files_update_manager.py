@@ -37,16 +37,23 @@ Manager for the file storage version updates.
 """
 
 import os
+import json
+import time
+import threading
+import Queue as queue
+from subprocess import Popen, PIPE
 import tvb.core.entities.file.file_update_scripts as file_update_scripts
-from datetime import datetime
 from tvb.basic.config import stored
 from tvb.basic.profile import TvbProfile
-from tvb.basic.traits.types_mapped import MappedType
+from tvb.basic.logger.builder import get_logger
 from tvb.core.code_versions.base_classes import UpdateManager
 from tvb.core.entities.file.hdf5_storage_manager import HDF5StorageManager
+from tvb.core.entities.file.hdf5_file_pool import H5_FILE_POOL
 from tvb.core.entities.file.files_helper import FilesHelper
 from tvb.core.entities.file.exceptions import MissingDataFileException, FileStructureException
+from tvb.core.entities.file import files_update_worker
 from tvb.core.entities.storage import dao
+from tvb.core.utils import build_process_environment
 
 
 FILE_STORAGE_VALID = 'valid'
@@ -60,7 +67,6 @@ class FilesUpdateManager(UpdateManager):
 
     UPDATE_SCRIPTS_SUFFIX = "_update_files"
     PROJECTS_PAGE_SIZE = 20
-    DATA_TYPES_PAGE_SIZE = 500
     STATUS = True
     MESSAGE = "Done"
 
@@ -114,102 +120,55 @@ class FilesUpdateManager(UpdateManager):
         """
         if self.is_file_up_to_date(input_file_name):
             # Avoid running the DB update of size, when H5 is not being changed, to speed-up
+            if datatype is not None and datatype._data_version != TvbProfile.current.version.DATA_VERSION:
+                datatype._data_version = TvbProfile.current.version.DATA_VERSION
+                dao.store_entity(datatype)
             return False
 
         file_version = self.get_file_data_version(input_file_name)
         self.log.info("Updating from version %s , file: %s " % (file_version, input_file_name))
+        # Update scripts might rewrite the file, so pooled handles should not outlive the old content
+        H5_FILE_POOL.close_file(input_file_name)
         for script_name in self.get_update_scripts(file_version):
             self.run_update_script(script_name, input_file=input_file_name)
 
         if datatype:
-            # Compute and update the disk_size attribute of the DataType in DB:
+            # Compute and update the disk_size and data version attributes of the DataType in DB:
             datatype.disk_size = self.files_helper.compute_size_on_disk(input_file_name)
+            datatype._data_version = self.get_file_data_version(input_file_name)
             dao.store_entity(datatype)
 
         return True
 
 
-    def __upgrade_datatype_list(self, datatypes):
-        """
-        Upgrade a list of DataTypes to the current version.
-        
-        :param datatypes: The list of DataTypes that should be upgraded.
-
-        :returns: (nr_of_dts_upgraded_fine, nr_of_dts_upgraded_fault) a two-tuple of integers representing
-            the number of DataTypes for which the upgrade worked fine, and the number of DataTypes for which
-            some kind of fault occurred
-        """
-        nr_of_dts_upgraded_fine = 0
-        nr_of_dts_upgraded_fault = 0
-        no_of_dts_ignored = 0
-
-        for datatype in datatypes:
-            try:
-                specific_datatype = dao.get_datatype_by_gid(datatype.gid, load_lazy=False)
-
-                if specific_datatype is None:
-                    datatype.invalid = True
-                    dao.store_entity(datatype)
-                    nr_of_dts_upgraded_fault += 1
-                elif isinstance(specific_datatype, MappedType):
-                    update_was_needed = self.upgrade_file(specific_datatype.get_storage_file_path(), specific_datatype)
-                    if update_was_needed:
-                        nr_of_dts_upgraded_fine += 1
-                    else:
-                        no_of_dts_ignored += 1
-                else:
-                    # Ignore DataTypeGroups
-                    self.log.debug("We will ignore, due to type: " + str(specific_datatype))
-                    no_of_dts_ignored += 1
-
-            except Exception as ex:
-                # The file/class is missing for some reason. Just mark the DataType as invalid.
-                datatype.invalid = True
-                dao.store_entity(datatype)
-                nr_of_dts_upgraded_fault += 1
-                self.log.exception(ex)
-
-        return nr_of_dts_upgraded_fine, nr_of_dts_upgraded_fault, no_of_dts_ignored
-
-
     def run_all_updates(self):
         """
         Upgrades all the data types from TVB storage to the latest data version.
-        
+        Files are upgraded in parallel, by FILES_UPGRADE_WORKERS processes. The data version of each file is
+        recorded in DB (in batches) as soon as the file is done, so that a job interrupted by a crash
+        resumes with the files not yet done, the next time TVB starts.
+
         :returns: a two entry tuple (status, message) where status is a boolean that is True in case
             the upgrade was successfully for all DataTypes and False otherwise, and message is a status
             update message.
         """
         if TvbProfile.current.version.DATA_CHECKED_TO_VERSION < TvbProfile.current.version.DATA_VERSION:
-            total_count = dao.count_all_datatypes()
+            data_version = TvbProfile.current.version.DATA_VERSION
+            total_count = dao.count_datatypes_to_upgrade(data_version)
 
             self.log.info("Starting to run H5 file updates from version %d to %d, for %d datatypes" % (
-                TvbProfile.current.version.DATA_CHECKED_TO_VERSION,
-                TvbProfile.current.version.DATA_VERSION, total_count))
-
-            # Keep track of how many DataTypes were properly updated and how many 
-            # were marked as invalid due to missing files or invalid manager.
-            no_ok = 0
-            no_error = 0
-            no_ignored = 0
-            start_time = datetime.now()
-
-            # Read DataTypes in pages to limit the memory consumption
-            for current_idx in range(0, total_count, self.DATA_TYPES_PAGE_SIZE):
-                datatypes_for_page = dao.get_all_datatypes(current_idx, self.DATA_TYPES_PAGE_SIZE)
-                count_ok, count_error, count_ignored = self.__upgrade_datatype_list(datatypes_for_page)
-                no_ok += count_ok
-                no_error += count_error
-                no_ignored += count_ignored
-
-                self.log.info("Updated H5 files so far: %d [fine:%d, error:%d, ignored:%d of total:%d, in: %s min]" % (
-                    current_idx + len(datatypes_for_page), no_ok, no_error, no_ignored, total_count,
-                    int((datetime.now() - start_time).seconds / 60)))
+                TvbProfile.current.version.DATA_CHECKED_TO_VERSION, data_version, total_count))
+
+            progress = FilesUpgradeProgress(total_count)
+            FilesUpgradeRunner(TvbProfile.current.FILES_UPGRADE_WORKERS, progress).run(data_version)
+            self.log.info(progress.message)
+            # Upgraded files might have changed in size
+            dao.reconcile_users_disk_size()
 
             # Now update the configuration file since update was done
-            config_file_update_dict = {stored.KEY_LAST_CHECKED_FILE_VERSION: TvbProfile.current.version.DATA_VERSION}
+            config_file_update_dict = {stored.KEY_LAST_CHECKED_FILE_VERSION: data_version}
 
-            if no_error == 0:
+            if progress.error == 0:
                 # Everything went fine
                 config_file_update_dict[stored.KEY_FILE_STORAGE_UPDATE_STATUS] = FILE_STORAGE_VALID
                 FilesUpdateManager.STATUS = True
@@ -221,10 +180,11 @@ class FilesUpdateManager(UpdateManager):
                 config_file_update_dict[stored.KEY_FILE_STORAGE_UPDATE_STATUS] = FILE_STORAGE_INVALID
                 FilesUpdateManager.STATUS = False
                 FilesUpdateManager.MESSAGE = ("Out of %s stored DataTypes, %s were upgraded successfully, but %s had "
-                                              "faults and were marked invalid" % (total_count, no_ok, no_error))
+                                              "faults and were marked invalid" % (total_count, progress.upgraded,
+                                                                                  progress.error))
                 self.log.warning(FilesUpdateManager.MESSAGE)
 
-            TvbProfile.current.version.DATA_CHECKED_TO_VERSION = TvbProfile.current.version.DATA_VERSION
+            TvbProfile.current.version.DATA_CHECKED_TO_VERSION = data_version
             TvbProfile.current.manager.add_entries_to_config_file(config_file_update_dict)
 
 
@@ -235,3 +195,197 @@ class FilesUpdateManager(UpdateManager):
         """
         folder, file_name = os.path.split(file_path)
         return HDF5StorageManager(folder, file_name)
+
+
+
+class FilesUpgradeProgress(object):
+    """
+    Counters of an ongoing files upgrade, with the estimated time until it finishes.
+    """
+
+    def __init__(self, total_count):
+        self.total_count = total_count
+        self.upgraded = 0
+        self.ignored = 0
+        self.error = 0
+        self.start_time = time.time()
+
+
+    @property
+    def done(self):
+        return self.upgraded + self.ignored + self.error
+
+
+    def add(self, status):
+        if status == files_update_worker.STATUS_UPGRADED:
+            self.upgraded += 1
+        elif status == files_update_worker.STATUS_ERROR:
+            self.error += 1
+        else:
+            self.ignored += 1
+
+
+    @property
+    def eta(self):
+        """
+        :returns: estimated seconds until all DataTypes are done, or None when nothing is done yet
+        """
+        if self.done == 0:
+            return None
+        elapsed = time.time() - self.start_time
+        return max(self.total_count - self.done, 0) * elapsed / self.done
+
+
+    @property
+    def message(self):
+        eta = self.eta
+        return "Updated H5 files so far: %d [fine:%d, error:%d, ignored:%d of total:%d, in: %d min, ETA: %s min]" % (
+            self.done, self.upgraded, self.error, self.ignored, self.total_count,
+            int((time.time() - self.start_time) / 60), "-" if eta is None else int(eta / 60))
+
+
+
+class FilesUpgradeWorker(object):
+    """
+    Handle towards a Python process (see tvb.core.entities.file.files_update_worker), which upgrades
+    the files of DataTypes, as their GIDs are sent to its stdin.
+    """
+
+    def __init__(self):
+        run_params = [TvbProfile.current.PYTHON_INTERPRETER_PATH, '-m', files_update_worker.__name__,
+                      TvbProfile.CURRENT_PROFILE_NAME]
+        self.process = Popen(run_params, stdin=PIPE, stdout=PIPE, env=build_process_environment())
+
+
+    def upgrade(self, gid):
+        """
+        :returns: the result dictionary written by the worker, or None when the worker process ended
+            in the meantime (e.g. crashed on this file)
+        """
+        try:
+            self.process.stdin.write("%s\n" % gid)
+            self.process.stdin.flush()
+            result_line = self.process.stdout.readline()
+        except IOError:
+            return None
+        if not result_line:
+            return None
+        return json.loads(result_line)
+
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except IOError:
+            pass
+        return self.process.wait()
+
+
+
+class FilesUpgradeRunner(object):
+    """
+    Upgrade the files of all DataTypes not yet at the current data version, in parallel worker processes.
+
+    A feeder thread pages through the DataTypes to upgrade, one thread per worker process sends them to its
+    worker, and the calling thread records the results in DB, in batches (a crash loses at most one batch,
+    whose files are simply checked again, as already upgraded files are left unchanged).
+    """
+
+    PAGE_SIZE = 500
+    DB_BATCH_SIZE = 100
+    DB_BATCH_INTERVAL = 10
+    PROGRESS_INTERVAL = 60
+
+
+    def __init__(self, workers, progress):
+        self.workers = max(1, workers)
+        self.progress = progress
+        self.log = get_logger(self.__class__.__module__)
+        self._tasks = queue.Queue(2 * self.workers)
+        self._results = queue.Queue()
+
+
+    def run(self, data_version):
+        threads = [threading.Thread(target=self._feed_tasks, args=(data_version,))]
+        threads.extend(threading.Thread(target=self._process_tasks) for _ in range(self.workers))
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        checked, failed = [], []
+        last_commit = last_report = time.time()
+        running_workers = self.workers
+        while running_workers > 0:
+            try:
+                result = self._results.get(timeout=self.DB_BATCH_INTERVAL)
+            except queue.Empty:
+                result = False
+            if result is None:
+                running_workers -= 1
+            elif result:
+                datatype_id, outcome = result
+                self.progress.add(outcome['status'])
+                if outcome['status'] == files_update_worker.STATUS_ERROR:
+                    failed.append(datatype_id)
+                else:
+                    checked.append((datatype_id, outcome.get('data_version', data_version), outcome.get('disk_size')))
+
+            now = time.time()
+            if len(checked) + len(failed) >= self.DB_BATCH_SIZE or now - last_commit >= self.DB_BATCH_INTERVAL:
+                self._commit(checked, failed)
+                last_commit = now
+            if now - last_report >= self.PROGRESS_INTERVAL:
+                self.log.info(self.progress.message)
+                FilesUpdateManager.MESSAGE = self.progress.message
+                last_report = now
+
+        self._commit(checked, failed)
+
+
+    @staticmethod
+    def _commit(checked, failed):
+        if checked or failed:
+            dao.update_datatypes_after_upgrade(checked, failed)
+            del checked[:]
+            del failed[:]
+
+
+    def _feed_tasks(self, data_version):
+        """
+        Page through DataTypes by id, and queue them for the workers (blocking while the queue is full).
+        """
+        last_id = 0
+        try:
+            while True:
+                page = dao.get_datatypes_to_upgrade(data_version, last_id, self.PAGE_SIZE)
+                if not page:
+                    break
+                for datatype_id, gid in page:
+                    self._tasks.put((datatype_id, gid))
+                last_id = page[-1][0]
+        finally:
+            for _ in range(self.workers):
+                self._tasks.put(None)
+
+
+    def _process_tasks(self):
+        """
+        Send queued DataTypes to a worker process, and pass its results back. A worker which dies
+        (e.g. on a file crashing HDF5) gets replaced, and the DataType it was processing marked as failed.
+        """
+        worker = None
+        try:
+            for datatype_id, gid in iter(self._tasks.get, None):
+                if worker is None:
+                    worker = FilesUpgradeWorker()
+                outcome = worker.upgrade(gid)
+                if outcome is None:
+                    self.log.error("Files upgrade worker ended unexpectedly, on DataType %s" % gid)
+                    worker.close()
+                    worker = None
+                    outcome = dict(status=files_update_worker.STATUS_ERROR)
+                self._results.put((datatype_id, outcome))
+        finally:
+            if worker is not None:
+                worker.close()
+            self._results.put(None)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Worker process for upgrading H5 files, started by the FilesUpdateManager (one per parallel upgrade slot).
+Example: python -m tvb.core.entities.file.files_update_worker profile_name
+
+TVB gets imported and the profile initialized only once; afterwards DataType GIDs are read one per line
+from stdin, the H5 file of each DataType is upgraded, and a JSON line with the outcome is written back
+on the original stdout. DB updates (data version, disk size, invalid flag) are left to the parent process,
+which commits them in batches.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import os
+import sys
+import json
+from tvb.basic.profile import TvbProfile
+if __name__ == '__main__':
+    TvbProfile.set_profile(sys.argv[1], True)
+
+from tvb.basic.logger.builder import get_logger
+
+
+STATUS_UPGRADED = "upgraded"
+STATUS_UP_TO_DATE = "up-to-date"
+STATUS_IGNORED = "ignored"
+STATUS_ERROR = "error"
+
+
+
+def upgrade_datatype(files_update_manager, gid):
+    """
+    Upgrade the H5 file of one DataType.
+
+    :returns: a dictionary with the status, and for DataTypes with files, their data version and disk size
+    """
+    # Imported here, as this module is also imported by the FilesUpdateManager, for the status constants.
+    from tvb.core.entities.storage import dao
+    from tvb.core.traits.types_mapped import MappedType
+
+    datatype = dao.get_datatype_by_gid(gid, load_lazy=False)
+    if datatype is None:
+        return dict(status=STATUS_ERROR)
+    if not isinstance(datatype, MappedType):
+        # DataTypeGroups have no file
+        return dict(status=STATUS_IGNORED)
+
+    file_path = datatype.get_storage_file_path()
+    result = dict(status=STATUS_UP_TO_DATE)
+    if files_update_manager.upgrade_file(file_path):
+        result = dict(status=STATUS_UPGRADED,
+                      disk_size=files_update_manager.files_helper.compute_size_on_disk(file_path))
+    result['data_version'] = files_update_manager.get_file_data_version(file_path)
+    return result
+
+
+def serve(input_stream, output_stream):
+    """
+    Upgrade files of DataTypes, as their GIDs are read from `input_stream`, until the stream gets closed.
+    """
+    from tvb.core.entities.file.files_update_manager import FilesUpdateManager
+
+    logger = get_logger('tvb.core.entities.file.files_update_worker')
+    files_update_manager = FilesUpdateManager()
+
+    for line in iter(input_stream.readline, ''):
+        gid = line.strip()
+        if not gid:
+            continue
+        try:
+            result = upgrade_datatype(files_update_manager, gid)
+        except Exception as excep:
+            # The file/class is missing for some reason. The parent will mark the DataType as invalid.
+            logger.exception(excep)
+            result = dict(status=STATUS_ERROR)
+        result['gid'] = gid
+        output_stream.write(json.dumps(result) + "\n")
+        output_stream.flush()
+
+
+
+if __name__ == '__main__':
+
+    ## Keep the original stdout only for talking with the parent process
+    STATUS_STREAM = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    serve(sys.stdin, STATUS_STREAM)
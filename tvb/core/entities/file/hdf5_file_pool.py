@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Process-wide pool of open H5 files, to share one handle between the concurrent users of the same file.
+
+Rules:
+    - there is at most one open handle per file path (HDF5 does not allow the same file to be opened
+      twice by a process with different access flags);
+    - read-only handles are shared between threads (under SWMR when the HDF5 library supports it);
+    - a handle is closed as soon as its last user released it. An open handle holds the HDF5 file lock,
+      so keeping idle handles would make other processes (e.g. operations) fail to open the file for write;
+    - a write request promotes the handle: it waits for the current readers to finish (new readers wait
+      meanwhile), then re-opens the file in append mode. A handle still in use is never closed for this.
+"""
+
+import os
+import time
+import atexit
+import threading
+import h5py as hdf5
+from tvb.basic.logger.builder import get_logger
+from tvb.core.entities.file.exceptions import FileStructureException
+
+
+LOG = get_logger(__name__)
+
+MODE_READ = 'r'
+MODE_APPEND = 'a'
+MODE_WRITE = 'w'
+
+
+
+class PooledH5File(object):
+    """
+    Book-keeping for one open h5py.File in the pool.
+    """
+
+    def __init__(self, path, h5_file, mode):
+        self.path = path
+        self.h5_file = h5_file
+        self.mode = mode
+        self.ref_count = 0
+        self.promoting = False
+
+
+    @property
+    def is_read_only(self):
+        return self.mode == MODE_READ
+
+
+    @property
+    def is_valid(self):
+        return self.h5_file.id.valid
+
+
+    def close(self):
+        try:
+            if self.is_valid:
+                self.h5_file.close()
+        except Exception as excep:
+            ### The file is correctly closed, but the list of open files on HDF5 is not updated in a synch manner.
+            LOG.exception(excep)
+
+
+
+class H5FilePool(object):
+    """
+    Pool of the h5py.File handles currently in use, with reference counting.
+    All public methods are thread safe.
+    """
+
+    PROMOTION_TIMEOUT = 60
+
+
+    def __init__(self):
+        self._entries = {}
+        ## Re-entrant, as handles can also be released from a garbage collected HDF5StorageManager
+        self._condition = threading.Condition(threading.RLock())
+        self.use_swmr = hdf5.version.hdf5_version_tuple >= (1, 9, 178)
+
+
+    def acquire(self, path, mode=MODE_APPEND, on_create=None):
+        """
+        Get an open handle for a file, and increment its reference count.
+        Every call should be paired with a call to `release`.
+
+        :param path: full path towards the H5 file
+        :param mode: 'r' for read-only access, 'a' or 'w' for write access
+        :param on_create: callback receiving the h5py.File, when the file did not exist and got created now
+        :returns: an open h5py.File instance
+        :raises FileStructureException: when the file can not be opened, or write access is requested
+                                        while readers keep the file in use for longer than PROMOTION_TIMEOUT
+        """
+        write_access = mode != MODE_READ
+        with self._condition:
+            entry = self._entries.get(path)
+
+            while entry is not None and not write_access and entry.promoting:
+                ## A writer waits for the current readers to finish: do not keep the file busy meanwhile
+                self._condition.wait()
+                entry = self._entries.get(path)
+            if entry is not None and write_access and entry.is_read_only:
+                entry = self._promote(entry)
+            if entry is not None and not entry.is_valid:
+                self._remove(entry)
+                entry = None
+
+            if entry is None:
+                entry = self._open(path, mode, on_create)
+                self._entries[path] = entry
+
+            entry.ref_count += 1
+            return entry.h5_file
+
+
+    def release(self, path, h5_file):
+        """
+        Give back a handle received from `acquire`. The handle is closed when nobody uses it anymore.
+        """
+        with self._condition:
+            entry = self._entries.get(path)
+            if entry is None or entry.h5_file is not h5_file:
+                ## It was closed forcibly in the meantime (e.g. file removed).
+                return
+            entry.ref_count = max(0, entry.ref_count - 1)
+            if entry.ref_count == 0:
+                self._remove(entry)
+
+
+    def close_file(self, path):
+        """
+        Close the handle for a file, no matter if still in use or not.
+        To be called before the file is removed, moved or rewritten outside of the pool.
+        """
+        with self._condition:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._remove(entry, force=True)
+
+
+    def close_files_in_folder(self, folder):
+        """
+        Close all handles for files under a given folder (e.g. a project or operation folder being removed).
+        """
+        prefix = os.path.join(folder, '')
+        with self._condition:
+            for entry in list(self._entries.values()):
+                if entry.path.startswith(prefix):
+                    self._remove(entry, force=True)
+
+
+    def close_all(self):
+        """
+        Close every handle in the pool.
+        """
+        with self._condition:
+            for entry in list(self._entries.values()):
+                self._remove(entry, force=True)
+
+
+    @property
+    def open_files_count(self):
+        with self._condition:
+            return len(self._entries)
+
+
+    # -------------- Private methods (called with the pool lock held) --------------
+    def _open(self, path, mode, on_create):
+        """
+        Open the file in h5py. A missing file gets created, when write access is requested.
+        """
+        file_exists = os.path.exists(path)
+        # bug in some versions of hdf5 on windows prevent creating file with mode='a'
+        if not file_exists and mode == MODE_APPEND:
+            mode = MODE_WRITE
+        LOG.debug("Opening file: %s in mode: %s" % (path, mode))
+        try:
+            if mode == MODE_READ:
+                h5_file = self._open_read_only(path)
+            else:
+                h5_file = hdf5.File(path, mode, libver='latest')
+        except (IOError, OSError) as err:
+            LOG.exception("Could not open storage file.")
+            raise FileStructureException("Could not open storage file. %s" % err)
+
+        if not file_exists and on_create is not None:
+            on_create(h5_file)
+        return PooledH5File(path, h5_file, MODE_READ if mode == MODE_READ else MODE_APPEND)
+
+
+    def _open_read_only(self, path):
+        """
+        Read-only handles are shared between threads, so prefer SWMR where the file format allows it.
+        """
+        if self.use_swmr:
+            try:
+                return hdf5.File(path, MODE_READ, libver='latest', swmr=True)
+            except (IOError, OSError, ValueError):
+                ### Files written by older versions of HDF5 can not be read in SWMR mode
+                LOG.debug("Could not open %s in SWMR mode." % path)
+        return hdf5.File(path, MODE_READ, libver='latest')
+
+
+    def _promote(self, entry):
+        """
+        Wait until nobody reads from a file (the handle is closed by the last reader), to be re-opened for write.
+        :returns: the entry to be used for writing, or None when the file needs to be re-opened
+        """
+        path = entry.path
+        deadline = time.time() + self.PROMOTION_TIMEOUT
+        while entry is not None and entry.is_read_only:
+            entry.promoting = True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                ## Let the waiting readers in again
+                entry.promoting = False
+                self._condition.notify_all()
+                raise FileStructureException("Could not open %s for writing, as it is still being read "
+                                             "by %d users" % (path, entry.ref_count))
+            self._condition.wait(remaining)
+            ## Somebody else might have closed or promoted the file in the meantime
+            entry = self._entries.get(path)
+        return entry
+
+
+    def _remove(self, entry, force=False):
+        if force and entry.ref_count > 0:
+            LOG.warning("Closing file %s while still in use by %d users." % (entry.path, entry.ref_count))
+        if self._entries.get(entry.path) is entry:
+            del self._entries[entry.path]
+        LOG.debug("Closing file: %s" % entry.path)
+        entry.close()
+        self._condition.notify_all()
+
+
+
+H5_FILE_POOL = H5FilePool()
+atexit.register(H5_FILE_POOL.close_all)
@@ -36,8 +36,6 @@ Persistence of data in HDF5 format.
 """
 
 import os
-import copy
-import threading
 import h5py as hdf5
 import numpy as numpy
 import tvb.core.utils as utils
@@ -46,14 +44,13 @@ from tvb.basic.logger.builder import get_logger
 from tvb.basic.profile import TvbProfile
 from tvb.core.entities.file.exceptions import FileStructureException, MissingDataSetException
 from tvb.core.entities.file.exceptions import IncompatibleFileManagerException, MissingDataFileException
+from tvb.core.entities.file.hdf5_file_pool import H5_FILE_POOL
 from tvb.core.entities.transient.structure_entities import GenericMetaData
 
 
 # Create logger for this module
 LOG = get_logger(__name__)
 
-LOCK_OPEN_FILE = threading.Lock()
-
 
 class HDF5StorageManager(object):
     """
@@ -68,7 +65,6 @@ class HDF5StorageManager(object):
     BOOL_VALUE_PREFIX = "bool:"
     DATETIME_VALUE_PREFIX = "datetime:"
     DATE_TIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
-    LOCKS = {}
 
 
     def __init__(self, storage_folder, file_name, buffer_size=600000):
@@ -97,13 +93,15 @@ class HDF5StorageManager(object):
             return False
 
 
-    def store_data(self, dataset_name, data_list, where=ROOT_NODE_PATH):
+    def store_data(self, dataset_name, data_list, where=ROOT_NODE_PATH, storage_policy=None):
         """
         This method stores provided data list into a data set in the H5 file.
         
         :param dataset_name: Name of the data set where to store data
         :param data_list: Data to be stored
         :param where: represents the path where to store our dataset (e.g. /data/info)
+        :param storage_policy: StoragePolicy for chunking and filters, used when the data set gets created.
+            When None, data is stored contiguously and uncompressed.
         """
         if dataset_name is None:
             dataset_name = ''
@@ -119,7 +117,8 @@ class HDF5StorageManager(object):
 
             full_dataset_name = where + dataset_name
             if full_dataset_name not in hdf5File:
-                hdf5File.create_dataset(full_dataset_name, data=data_to_store)
+                options = self._get_dataset_options(storage_policy, data_to_store)
+                hdf5File.create_dataset(full_dataset_name, data=data_to_store, **options)
 
             elif hdf5File[full_dataset_name].shape == data_to_store.shape:
                 hdf5File[full_dataset_name][...] = data_to_store[...]
@@ -133,7 +132,8 @@ class HDF5StorageManager(object):
             self.close_file()
 
 
-    def append_data(self, dataset_name, data_list, grow_dimension=-1, close_file=True, where=ROOT_NODE_PATH):
+    def append_data(self, dataset_name, data_list, grow_dimension=-1, close_file=True, where=ROOT_NODE_PATH,
+                    storage_policy=None):
         """
         This method appends data to an existing data set. If the data set does not exists, create it first.
         
@@ -143,6 +143,8 @@ class HDF5StorageManager(object):
         :param close_file: Specify if the file should be closed automatically after write operation. If not, 
             you have to close file by calling method close_file()
         :param where: represents the path where to store our dataset (e.g. /data/info)
+        :param storage_policy: StoragePolicy for chunking and filters, used when the data set gets created.
+            When None, h5py will choose the chunk shape.
         
         """
         if dataset_name is None:
@@ -165,8 +167,9 @@ class HDF5StorageManager(object):
                 data_shape_list = list(data_to_store.shape)
                 data_shape_list[grow_dimension] = None
                 data_shape = tuple(data_shape_list)
+                options = self._get_dataset_options(storage_policy, data_to_store, grow_dimension)
                 dataset = hdf5File.create_dataset(where + dataset_name, data=data_to_store, shape=data_to_store.shape,
-                                                  dtype=data_to_store.dtype, maxshape=data_shape)
+                                                  dtype=data_to_store.dtype, maxshape=data_shape, **options)
                 self.data_buffers[datapath] = HDF5StorageManager.H5pyStorageBuffer(dataset,
                                                                                    buffer_size=self.__buffer_size,
                                                                                    buffered_data=None,
@@ -479,113 +482,67 @@ class HDF5StorageManager(object):
         return value
 
 
-    def __aquire_lock(self):
-        """
-        Aquire a unique lock for each different file path on the system.
-        """
-        lock = self.LOCKS.get(self.__storage_full_name, None)
-        if lock is None:
-            lock = threading.Lock()
-            self.LOCKS[self.__storage_full_name] = lock
-        lock.acquire()
-
-
-    def __release_lock(self):
-        """
-        Aquire a unique lock for each different file path on the system.
-        """
-        lock = self.LOCKS.get(self.__storage_full_name, None)
-        if lock is None:
-            raise Exception("Some lock was deleted without being released beforehand.")
-        lock.release()
-
-
     def close_file(self):
         """
-        The synchronization of open/close doesn't seem to be needed anymore for h5py in
-        contrast to PyTables for concurrent reads. However since it shouldn't add that
-        much overhead in most situation we'll leave it like this for now since in case
-        of concurrent writes(metadata) this provides extra safety.
+        Flush buffered data, then give the file handle back to the pool of open H5 files.
+        The pool closes the handle once no other user of the same file holds it.
         """
+        hdf5_file = self.__hfd5_file
+        if hdf5_file is None:
+            return
         try:
-            self.__aquire_lock()
-            self.__close_file()
+            if hdf5_file.id.valid:
+                for h5py_buffer in self.data_buffers.values():
+                    h5py_buffer.flush_buffered_data()
+        except Exception as excep:
+            LOG.exception(excep)
         finally:
-            self.__release_lock()
+            self.data_buffers = {}
+            self.__hfd5_file = None
+            H5_FILE_POOL.release(self.__storage_full_name, hdf5_file)
 
 
     def _open_h5_file(self, mode='a'):
         """
-        The synchronization of open/close doesn't seem to be needed anymore for h5py in
-        contrast to PyTables for concurrent reads. However since it shouldn't add that
-        much overhead in most situation we'll leave it like this for now since in case
-        of concurrent writes(metadata) this provides extra safety.
-        """
-        try:
-            self.__aquire_lock()
-            file_obj = self.__open_h5_file(mode)
-        finally:
-            self.__release_lock()
-        return file_obj
+        Open file for reading, writing or append. Handles are taken from the process-wide pool
+        of open H5 files, which also takes care of synchronizing concurrent access to the same file.
 
+        :param mode: Mode to open file (possible values are w / r / a).
+                    Default value is 'a', to allow adding multiple data to the same file.
+        :returns: returns the file which stores data in HDF5 format opened for read / write according to mode param
 
-    def __close_file(self):
-        """
-        Close file used to store data.
         """
+        if self.__storage_full_name is None:
+            raise FileStructureException("Invalid storage file. Please provide a valid path.")
+
+        # Check if file is still open from previous writes.
         hdf5_file = self.__hfd5_file
+        if hdf5_file is not None:
+            if hdf5_file.id.valid and (mode == 'r' or hdf5_file.mode != 'r'):
+                return hdf5_file
+            # Read-only (or closed) handle, while write access is needed now: give it back before promoting.
+            self.close_file()
 
-        # Try to close file only if it was opened before
-        if hdf5_file is not None and hdf5_file.fid.valid:
-            LOG.debug("Closing file: %s" % self.__storage_full_name)
-            try:
-                for h5py_buffer in self.data_buffers.values():
-                    h5py_buffer.flush_buffered_data()
-                self.data_buffers = {}
-                hdf5_file.close()
-            except Exception as excep:
-                ### Do nothing is this situation.
-                ### The file is correctly closed, but the list of open files on HDF5 is not updated in a synch manner.
-                ### del _open_files[filename] might throw KeyError
-                LOG.exception(excep)
-            if not hdf5_file.fid.valid:
-                self.__hfd5_file = None
+        self.__hfd5_file = H5_FILE_POOL.acquire(self.__storage_full_name, mode, self.__on_file_created)
+        return self.__hfd5_file
 
 
-    # -------------- Private methods  --------------
-    def __open_h5_file(self, mode='a'):
+    def __on_file_created(self, hdf5_file):
         """
-        Open file for reading, writing or append. 
-        
-        :param mode: Mode to open file (possible values are w / r / a).
-                    Default value is 'a', to allow adding multiple data to the same file.
-        :returns: returns the file which stores data in HDF5 format opened for read / write according to mode param
-        
+        If this is the first time we access file, write data version.
         """
-        if self.__storage_full_name is None:
-            raise FileStructureException("Invalid storage file. Please provide a valid path.")
-        try:
-            # Check if file is still open from previous writes.
-            if self.__hfd5_file is None or not self.__hfd5_file.fid.valid:
-                file_exists = os.path.exists(self.__storage_full_name)
-
-                # bug in some versions of hdf5 on windows prevent creating file with mode='a'
-                if not file_exists and mode == 'a':
-                    mode = 'w'
-
-                LOG.debug("Opening file: %s in mode: %s" % (self.__storage_full_name, mode))
-                self.__hfd5_file = hdf5.File(self.__storage_full_name, mode, libver='latest')
-
-                # If this is the first time we access file, write data version
-                if not file_exists:
-                    os.chmod(self.__storage_full_name, TvbProfile.current.ACCESS_MODE_TVB_FILES)
-                    self.__hfd5_file['/'].attrs[self.TVB_ATTRIBUTE_PREFIX +
-                                                TvbProfile.current.version.DATA_VERSION_ATTRIBUTE] = TvbProfile.current.version.DATA_VERSION
-        except (IOError, OSError) as err:
-            LOG.exception("Could not open storage file.")
-            raise FileStructureException("Could not open storage file. %s" % err)
+        os.chmod(self.__storage_full_name, TvbProfile.current.ACCESS_MODE_TVB_FILES)
+        hdf5_file['/'].attrs[self.TVB_ATTRIBUTE_PREFIX + TvbProfile.current.version.DATA_VERSION_ATTRIBUTE] = \
+            TvbProfile.current.version.DATA_VERSION
 
-        return self.__hfd5_file
+
+    def __del__(self):
+        """
+        Do not keep a pooled file in use, for managers which were never explicitly closed.
+        """
+        hdf5_file = self.__hfd5_file
+        if hdf5_file is not None and H5_FILE_POOL is not None:
+            H5_FILE_POOL.release(self.__storage_full_name, hdf5_file)
 
 
     def _check_data(self, data_list):
@@ -606,20 +563,43 @@ class HDF5StorageManager(object):
         return data_to_store
 
 
-    class H5pyStorageBuffer():
+    @staticmethod
+    def _get_dataset_options(storage_policy, data_to_store, grow_dimension=None):
+        """
+        Compute the chunking and filters arguments for h5py create_dataset.
+        """
+        if storage_policy is None or isinstance(data_to_store, hdf5.Empty):
+            return {}
+        return storage_policy.get_dataset_options(data_to_store.shape, data_to_store.dtype, grow_dimension)
+
+
+    class H5pyStorageBuffer(object):
         """
         Helper class in order to buffer data for append operations, to limit the number of actual
         HDD I/O operations.
+
+        Appended slices are copied once, into a preallocated array which grows geometrically up to
+        `buffer_size` bytes. Flushes are sized so that they end on a chunk boundary of the dataset (along the
+        grow dimension), thus after the first flush every chunk gets written completely, in a single operation.
         """
 
+        INITIAL_CAPACITY = 16
+
+
         def __init__(self, h5py_dataset, buffer_size=300, buffered_data=None, grow_dimension=-1):
-            self.buffered_data = buffered_data
             self.buffer_size = buffer_size
             if h5py_dataset is None:
                 raise MissingDataSetException("A H5pyStorageBuffer instance must have a h5py dataset for which the"
                                               "buffering is done. Please supply one to the 'h5py_dataset' parameter.")
             self.h5py_dataset = h5py_dataset
             self.grow_dimension = grow_dimension
+            self._axis = grow_dimension % len(h5py_dataset.shape)
+            self._buffer = None
+            self._buffered_length = 0
+            self._flush_length = None
+            if buffered_data is not None:
+                self.buffer_data(buffered_data)
+
 
         def buffer_data(self, data_list):
             """
@@ -627,30 +607,61 @@ class HDF5StorageManager(object):
             :returns: True if buffer is still fine, \
                       False if a flush is necessary since the buffer is full
             """
-            if self.buffered_data is None:
-                self.buffered_data = data_list
-            else:
-                self.buffered_data = self.__custom_numpy_append(self.buffered_data, data_list)
-            if self.buffered_data.nbytes > self.buffer_size:
-                return False
-            else:
-                return True
+            added_length = data_list.shape[self._axis]
+            if self._flush_length is None:
+                self._flush_length = self.__compute_flush_length(data_list)
+            self.__reserve(data_list, self._buffered_length + added_length)
+            new_length = self._buffered_length + added_length
+            self._buffer[self.__grow_slice(self._buffered_length, new_length)] = data_list
+            self._buffered_length = new_length
+            return self._buffered_length < self._flush_length
 
 
-        def __custom_numpy_append(self, array1, array2):
-            array_1_shape = numpy.array(array1.shape)
-            array_2_shape = numpy.array(array2.shape)
-            result_shape = copy.deepcopy(array_1_shape)
-            result_shape[self.grow_dimension] += array_2_shape[self.grow_dimension]
-            result_array = numpy.empty(shape=tuple(result_shape), dtype=array1.dtype)
+        def __compute_flush_length(self, data_list):
+            """
+            Number of entries (on the grow dimension) to accumulate before writing to file: as many as fit
+            in `buffer_size`, rounded to whole chunks, minus what is needed to align the dataset end to a chunk.
+            """
+            entry_bytes = max(1, data_list.nbytes // max(1, data_list.shape[self._axis]))
+            flush_length = max(1, self.buffer_size // entry_bytes)
+            chunks = self.h5py_dataset.chunks
+            chunk_length = chunks[self._axis] if chunks else 1
+            if flush_length < chunk_length:
+                return flush_length
+            flush_length -= flush_length % chunk_length
+            misalignment = self.h5py_dataset.shape[self._axis] % chunk_length
+            if misalignment:
+                flush_length -= misalignment
+            return flush_length
+
+
+        def __reserve(self, data_list, required_length):
+            """
+            Make sure the internal buffer has room for `required_length` entries, growing it geometrically.
+            """
+            capacity = 0 if self._buffer is None else self._buffer.shape[self._axis]
+            if required_length <= capacity:
+                return
+            new_capacity = max(required_length, min(max(2 * capacity, self.INITIAL_CAPACITY), self._flush_length))
+            new_shape = list(data_list.shape)
+            new_shape[self._axis] = new_capacity
+            new_buffer = numpy.empty(shape=tuple(new_shape), dtype=data_list.dtype)
+            if self._buffered_length > 0:
+                new_buffer[self.__grow_slice(0, self._buffered_length)] = \
+                    self._buffer[self.__grow_slice(0, self._buffered_length)]
+            self._buffer = new_buffer
+
+
+        def __grow_slice(self, start, stop):
+            """
+            Create the required slice to address entries [start:stop] on the grow dimension.
+            For example for the 3nd dimension of a 4D datashape (74, 1, 100, 1),
+            we want to get the slice (:, :, 100:200, :) in order to add 100 new entries
+            """
             full_slice = slice(None, None, None)
-            full_index = [full_slice for _ in array_1_shape]
-            full_index[self.grow_dimension] = slice(0, array_1_shape[self.grow_dimension], None)
-            result_array[tuple(full_index)] = array1
-            full_index[self.grow_dimension] = slice(array_1_shape[self.grow_dimension],
-                                                    result_shape[self.grow_dimension], None)
-            result_array[tuple(full_index)] = array2
-            return result_array
+            address = [full_slice for _ in self.h5py_dataset.shape]
+            address[self._axis] = slice(start, stop, None)
+            return tuple(address)
 
 
         def flush_buffered_data(self):
@@ -658,18 +669,14 @@ class HDF5StorageManager(object):
             Append the data buffered so far to the input dataset using :param grow_dimension: as the dimension that
             will be expanded. 
             """
-            if self.buffered_data is not None:
-                current_shape = self.h5py_dataset.shape
-                new_shape = list(current_shape)
-                new_shape[self.grow_dimension] += self.buffered_data.shape[self.grow_dimension]
-                ## Create the required slice to which the new data will be added.
-                ## For example if the 3nd dimension of a 4D datashape (74, 1, 100, 1)
-                ## we want to get the slice (:, :, 100:200, :) in order to add 100 new entries
-                full_slice = slice(None, None, None)
-                slice_to_add = slice(current_shape[self.grow_dimension], new_shape[self.grow_dimension], None)
-                appendTo_address = [full_slice for _ in new_shape]
-                appendTo_address[self.grow_dimension] = slice_to_add
-                ## Do the data reshape and copy the new data
-                self.h5py_dataset.resize(tuple(new_shape))
-                self.h5py_dataset[tuple(appendTo_address)] = self.buffered_data
-                self.buffered_data = None
+            if self._buffered_length == 0:
+                return
+            current_length = self.h5py_dataset.shape[self._axis]
+            new_shape = list(self.h5py_dataset.shape)
+            new_shape[self._axis] += self._buffered_length
+            ## Do the data reshape and copy the new data
+            self.h5py_dataset.resize(tuple(new_shape))
+            self.h5py_dataset[self.__grow_slice(current_length, new_shape[self._axis])] = \
+                self._buffer[self.__grow_slice(0, self._buffered_length)]
+            self._buffered_length = 0
+            self._flush_length = None
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Physical layout of arrays in H5 files: chunk shape and filters (compression, shuffle).
+
+A policy is selected per MappedType attribute (either with the `storage_policy` keyword on the traited
+Array, or through the MappedType.STORAGE_POLICIES class dictionary, or else from DATATYPE_STORAGE_POLICIES)
+and passed by MappedType.store_data and store_data_chunk down to HDF5StorageManager, where it is applied
+when the H5 dataset gets created.
+"""
+
+import numpy
+from tvb.core.entities.file.exceptions import FileStructureException
+
+
+KWARG_STORAGE_POLICY = "storage_policy"
+
+GZIP = "gzip"
+LZF = "lzf"
+SUPPORTED_COMPRESSIONS = (None, GZIP, LZF)
+
+
+
+class StoragePolicy(object):
+    """
+    Compute the h5py dataset creation options for an array.
+
+    Chunks are sized to approximately `chunk_bytes`. The `major_dimension` is the one along which
+    the array is usually read in long runs (time for TimeSeries, vertex index for Surfaces).
+    All other dimensions are capped at `minor_extent` elements, so that reading a few channels does not
+    pull the full width of the array, and the remaining byte budget goes to the major dimension.
+    When `major_dimension` is None, the dimension on which the array grows is used (or the first one).
+    """
+
+    DEFAULT_CHUNK_BYTES = 256 * 1024
+    DEFAULT_MINOR_EXTENT = 64
+
+
+    def __init__(self, major_dimension=0, chunk_bytes=DEFAULT_CHUNK_BYTES, minor_extent=DEFAULT_MINOR_EXTENT,
+                 compression=None, compression_opts=None, shuffle=False):
+        # Integer values are ids of HDF5 filters registered as plugins.
+        if compression not in SUPPORTED_COMPRESSIONS and not isinstance(compression, int):
+            raise FileStructureException("Unsupported H5 compression filter: %s" % str(compression))
+        if chunk_bytes <= 0 or minor_extent <= 0:
+            raise FileStructureException("Chunk size and minor extent should be positive numbers.")
+        self.major_dimension = major_dimension
+        self.chunk_bytes = chunk_bytes
+        self.minor_extent = minor_extent
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.shuffle = shuffle
+
+
+    def with_filters(self, compression=None, compression_opts=None, shuffle=False):
+        """
+        :returns: a copy of the current policy (same chunking), but with different filters.
+        """
+        return self.__class__(self.major_dimension, self.chunk_bytes, self.minor_extent,
+                              compression, compression_opts, shuffle)
+
+
+    def compute_chunk_shape(self, shape, itemsize, grow_dimension=None):
+        """
+        :param shape: current shape of the array to be stored
+        :param itemsize: size in bytes of one array element
+        :param grow_dimension: dimension on which the dataset will be extended, or None for fixed size datasets
+        :returns: a chunk shape tuple, or None when the array should be stored contiguously
+        """
+        ndim = len(shape)
+        if ndim == 0:
+            return None
+        if grow_dimension is not None:
+            grow_dimension %= ndim
+        elif (0 in shape) or numpy.prod(shape) * itemsize <= self.chunk_bytes:
+            # Fixed size, and at most one chunk: the chunk index would only add overhead.
+            return None
+
+        major = self.major_dimension
+        if major is None:
+            major = grow_dimension if grow_dimension is not None else 0
+        major %= ndim
+
+        chunk = []
+        for dim, extent in enumerate(shape):
+            if dim == major:
+                chunk.append(1)
+            elif dim == grow_dimension:
+                chunk.append(self.minor_extent)
+            else:
+                chunk.append(max(1, min(int(extent), self.minor_extent)))
+
+        major_length = max(1, self.chunk_bytes // (max(itemsize, 1) * int(numpy.prod(chunk))))
+        if major != grow_dimension:
+            major_length = min(major_length, max(1, int(shape[major])))
+        chunk[major] = int(major_length)
+        return tuple(chunk)
+
+
+    def get_dataset_options(self, shape, dtype, grow_dimension=None):
+        """
+        :returns: dictionary with keyword arguments for h5py `create_dataset`
+        """
+        chunks = self.compute_chunk_shape(shape, numpy.dtype(dtype).itemsize, grow_dimension)
+        if chunks is None:
+            return {}
+        options = {'chunks': chunks}
+        if self.compression is not None:
+            options['compression'] = self.compression
+            if self.compression_opts is not None:
+                options['compression_opts'] = self.compression_opts
+        if self.shuffle:
+            options['shuffle'] = True
+        return options
+
+
+
+### Read time windows for a few channels at a time, for arrays like TimeSeries.data (time is first dimension).
+TIME_MAJOR = StoragePolicy(major_dimension=0)
+
+### Read ranges of vertices with all their coordinates, for arrays like Surface.vertices or triangles.
+VERTEX_MAJOR = StoragePolicy(major_dimension=0, minor_extent=16)
+
+### Chunk along the dimension on which the array grows. Default for arrays written with store_data_chunk.
+GROW_MAJOR = StoragePolicy(major_dimension=None)
+
+
+
+### Policies for arrays of the DataTypes defined in tvb-library: {DataType class name: {attribute name: policy}}.
+### Classes are referenced by name, as tvb-library can not depend on the framework. Subclasses inherit the entries.
+DATATYPE_STORAGE_POLICIES = {
+    "TimeSeries": {"data": TIME_MAJOR},
+    "Surface": {"vertices": VERTEX_MAJOR, "triangles": VERTEX_MAJOR,
+                "vertex_normals": VERTEX_MAJOR, "triangle_normals": VERTEX_MAJOR},
+}
+
+
+
+def get_datatype_storage_policy(datatype_class, attribute_name):
+    """
+    :param datatype_class: DataType class, looked up (with its base classes) in DATATYPE_STORAGE_POLICIES
+    :param attribute_name: name of the traited array attribute
+    :returns: the StoragePolicy for the attribute, or None for the default H5 layout
+    """
+    for cls in datatype_class.__mro__:
+        policies = DATATYPE_STORAGE_POLICIES.get(cls.__name__, {})
+        if attribute_name in policies:
+            return policies[attribute_name]
+    return None
@@ -32,6 +32,9 @@
 Higher level entity loading.
 .. moduleauthor:: Mihai Andrei <mihai.andrei@codemart.ro>
 """
+import threading
+from contextlib import contextmanager
+from tvb.basic.profile import TvbProfile
 from tvb.basic.logger.builder import get_logger
 from tvb.core.entities.file.exceptions import FileVersioningException
 from tvb.core.entities.file.files_update_manager import FilesUpdateManager
@@ -40,6 +43,29 @@ from tvb.core.traits.types_mapped import MappedType
 
 LOGGER = get_logger(__name__)
 
+
+class _KnownEntities(threading.local):
+    """ DataTypes already loaded in the current thread, by GID. """
+    by_gid = None
+
+
+_KNOWN_ENTITIES = _KnownEntities()
+
+
+@contextmanager
+def known_entities(entities_by_gid):
+    """
+    While in this context, load_entity_by_gid answers from the given dictionary {gid: DataType},
+    for the DataTypes found in it, instead of loading them again from DB.
+    """
+    previous = _KNOWN_ENTITIES.by_gid
+    _KNOWN_ENTITIES.by_gid = entities_by_gid
+    try:
+        yield
+    finally:
+        _KNOWN_ENTITIES.by_gid = previous
+
+
 def get_class_by_name(fqname):
     '''
     get_class_by_name("package.module.class")
@@ -57,8 +83,11 @@ def load_entity_by_gid(data_gid):
     """
     Load a generic DataType, specified by GID.
     """
+    if _KNOWN_ENTITIES.by_gid and data_gid in _KNOWN_ENTITIES.by_gid:
+        return _KNOWN_ENTITIES.by_gid[data_gid]
     datatype = dao.get_datatype_by_gid(data_gid)
-    if isinstance(datatype, MappedType):
+    if isinstance(datatype, MappedType) and datatype._data_version != TvbProfile.current.version.DATA_VERSION:
+        ## Only when the version recorded in DB is stale (or missing), read it from the H5 file
         datatype_path = datatype.get_storage_file_path()
         files_update_manager = FilesUpdateManager()
         if not files_update_manager.is_file_up_to_date(datatype_path):
@@ -66,6 +95,8 @@ def load_entity_by_gid(data_gid):
             dao.store_entity(datatype)
             raise FileVersioningException("Encountered DataType with an incompatible storage or data version. "
                                           "The DataType was marked as invalid.")
+        datatype._data_version = TvbProfile.current.version.DATA_VERSION
+        dao.store_entity(datatype)
     return datatype
 
 
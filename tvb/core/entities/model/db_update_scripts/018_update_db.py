@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+# Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+# Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Create indexes on the foreign keys and status columns of DATA_TYPES, DATA_TYPES_GROUPS and OPERATIONS,
+which are used for filtering by the project tree, PSE viewers and disk size computations.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+from sqlalchemy.engine import reflection
+from tvb.basic.logger.builder import get_logger
+from tvb.core.entities import model
+
+
+meta = model.Base.metadata
+
+LOGGER = get_logger(__name__)
+
+INDEXED_TABLES = ["DATA_TYPES", "DATA_TYPES_GROUPS", "OPERATIONS"]
+
+
+
+def upgrade(migrate_engine):
+    """
+    Create the indexes declared in the model, when not already present in DB (e.g. OPERATIONS.status).
+    """
+    meta.bind = migrate_engine
+    inspector = reflection.Inspector.from_engine(migrate_engine)
+
+    for table_name in INDEXED_TABLES:
+        existing = set(index['name'] for index in inspector.get_indexes(table_name))
+        for index in meta.tables[table_name].indexes:
+            if index.name in existing:
+                continue
+            try:
+                index.create(migrate_engine)
+                LOGGER.info("Created index %s" % index.name)
+            except Exception as excep:
+                LOGGER.exception(excep)
+
+
+
+def downgrade(_):
+    """
+    Downgrade currently not supported
+    """
+    pass
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+# Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+# Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Add DATA_TYPES.data_version, to record the data version of the H5 file of each DataType in DB.
+Existing rows are left empty, and get filled the first time their H5 file is checked.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+from sqlalchemy import Column, Integer
+from migrate.changeset.schema import create_column, drop_column
+from tvb.core.entities import model
+
+
+meta = model.Base.metadata
+COL_DATA_VERSION = Column('data_version', Integer)
+
+
+
+def upgrade(migrate_engine):
+    """
+    Upgrade operations go here.
+    Don't create your own engine; bind migrate_engine to your metadata.
+    """
+    meta.bind = migrate_engine
+    table = meta.tables['DATA_TYPES']
+    create_column(COL_DATA_VERSION, table)
+
+
+
+def downgrade(migrate_engine):
+    """
+    Operations to reverse the above upgrade go here.
+    """
+    meta.bind = migrate_engine
+    table = meta.tables['DATA_TYPES']
+    drop_column(COL_DATA_VERSION, table)
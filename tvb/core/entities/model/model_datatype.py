@@ -100,19 +100,22 @@ class DataType(Base):
     user_tag_3 = Column(String)
     user_tag_4 = Column(String)
     user_tag_5 = Column(String)
+    # Data version of the H5 file, recorded when the file got written or checked, to avoid opening it on every load.
+    # Prefixed with underscore, to be kept out of the H5 meta-data (which has its own Data_version attribute)
+    _data_version = Column('data_version', Integer)
 
     # ID of a burst in which current dataType was generated
     # Native burst-results are referenced from a workflowSet as well
     # But we also have results generated afterwards from TreeBurst tab.
-    fk_parent_burst = Column(Integer, ForeignKey('BURST_CONFIGURATIONS.id', ondelete="SET NULL"))
+    fk_parent_burst = Column(Integer, ForeignKey('BURST_CONFIGURATIONS.id', ondelete="SET NULL"), index=True)
     _parent_burst = relationship(BurstConfiguration)
 
     #it should be a reference to a DataTypeGroup, but we can not create that FK
     #because this two tables (DATA_TYPES, DATA_TYPES_GROUPS) will reference each
     #other mutually and SQL-Alchemy complains about that.
-    fk_datatype_group = Column(Integer, ForeignKey('DATA_TYPES.id'))
+    fk_datatype_group = Column(Integer, ForeignKey('DATA_TYPES.id'), index=True)
 
-    fk_from_operation = Column(Integer, ForeignKey('OPERATIONS.id', ondelete="CASCADE"))
+    fk_from_operation = Column(Integer, ForeignKey('OPERATIONS.id', ondelete="CASCADE"), index=True)
     parent_operation = relationship(Operation, backref=backref("DATA_TYPES", order_by=id, cascade="all,delete"))
 
 
@@ -192,7 +195,7 @@ class DataTypeGroup(DataType):
     id = Column('id', Integer, ForeignKey('DATA_TYPES.id', ondelete="CASCADE"), primary_key=True)
     count_results = Column(Integer)
     no_of_ranges = Column(Integer, default=0)               # Number of ranged parameters
-    fk_operation_group = Column(Integer, ForeignKey('OPERATION_GROUPS.id', ondelete="CASCADE"))
+    fk_operation_group = Column(Integer, ForeignKey('OPERATION_GROUPS.id', ondelete="CASCADE"), index=True)
 
     parent_operation_group = relationship(OperationGroup, backref=backref("DATA_TYPES_GROUPS", cascade="delete"))
 
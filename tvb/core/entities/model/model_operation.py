@@ -274,10 +274,11 @@ class Operation(Base, Exportable):
 
     id = Column(Integer, primary_key=True)
     fk_launched_by = Column(Integer, ForeignKey('USERS.id'))
-    fk_launched_in = Column(Integer, ForeignKey('PROJECTS.id', ondelete="CASCADE"))
+    fk_launched_in = Column(Integer, ForeignKey('PROJECTS.id', ondelete="CASCADE"), index=True)
     fk_from_algo = Column(Integer, ForeignKey('ALGORITHMS.id'))
-    fk_operation_group = Column(Integer, ForeignKey('OPERATION_GROUPS.id', ondelete="CASCADE"), default=None)
-    gid = Column(String)
+    fk_operation_group = Column(Integer, ForeignKey('OPERATION_GROUPS.id', ondelete="CASCADE"), default=None,
+                                index=True)
+    gid = Column(String, index=True)
     parameters = Column(String)
     meta_data = Column(String)
     create_date = Column(DateTime)       # Date at which the user generated this entity
@@ -40,7 +40,7 @@ import datetime
 from sqlalchemy.orm import relationship, backref
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm.collections import attribute_mapped_collection
-from sqlalchemy import Boolean, Integer, String, DateTime, Column, ForeignKey, Float
+from sqlalchemy import Boolean, Integer, BigInteger, String, DateTime, Column, ForeignKey, Float
 from tvb.core import utils
 from tvb.core.entities.exportable import Exportable
 from tvb.core.entities.model.model_base import Base
@@ -73,6 +73,9 @@ class User(Base):
     role = Column(String)
     validated = Column(Boolean)
     selected_project = Column(Integer)
+    # Running SUM of DATA_TYPES.disk_size (kB) generated by this user, maintained when DataTypes are stored
+    # or removed, and periodically reconciled. NULL until first computed.
+    used_disk_size = Column(BigInteger)
 
     preferences = association_proxy('user_preferences', 'value',
                                     creator=lambda k, v: UserPreferences(key=k, value=v))
@@ -35,10 +35,11 @@ DAO operations related to generic DataTypes are defined here.
 .. moduleauthor:: Bogdan Neacsa <bogdan.neacsa@codemart.ro>
 """
 
+import six
 from sqlalchemy import func, or_, not_, and_
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.sql import text
-from sqlalchemy.orm import aliased
+from sqlalchemy.orm import aliased, contains_eager
 from sqlalchemy.sql.expression import desc, cast
 from sqlalchemy.types import Text
 from sqlalchemy.orm.exc import NoResultFound
@@ -117,6 +118,29 @@ class DatatypeDAO(RootDAO):
             return None
 
 
+    def store_datatype(self, datatype):
+        """
+        Store a DataType, and account for the change of its disk size in the disk usage counter
+        of the user who launched its operation, in the same commit. A DataType moved to another operation
+        (e.g. of the system user) moves its size to the counter of the new user.
+        """
+        if not isinstance(datatype, model.DataTypeGroup):
+            previous_size, previous_operation = None, None
+            if datatype.id is not None:
+                previous = self.session.query(model.DataType.disk_size, model.DataType.fk_from_operation
+                                              ).filter_by(id=datatype.id).first()
+                if previous is not None:
+                    previous_size, previous_operation = previous
+            if previous_operation is not None and previous_operation != datatype.fk_from_operation:
+                self._update_user_disk_size(self.session, previous_operation, -(previous_size or 0))
+                previous_size = None
+            self._update_user_disk_size(self.session, datatype.fk_from_operation,
+                                        (datatype.disk_size or 0) - (previous_size or 0))
+        self.session.add(datatype)
+        self.session.commit()
+        return self.session.query(datatype.__class__).filter_by(id=datatype.id).one()
+
+
     def get_disk_size_for_operation(self, operation_id):
         """
         Return the disk size for the operation by summing over the disk space of the resulting DataTypes.
@@ -228,6 +252,70 @@ class DatatypeDAO(RootDAO):
         return resulted_data
 
 
+    @staticmethod
+    def _filter_datatypes_to_upgrade(query, data_version):
+        """
+        Valid DataTypes whose file was not yet recorded (in DATA_TYPES.data_version) as being at `data_version`.
+        """
+        return query.filter(or_(model.DataType._data_version == None,
+                                model.DataType._data_version != data_version)
+                            ).filter(model.DataType.invalid == False)
+
+
+    def count_datatypes_to_upgrade(self, data_version):
+        """
+        Count the DataTypes which still need their file checked (and maybe upgraded) to `data_version`.
+        """
+        try:
+            query = self._filter_datatypes_to_upgrade(self.session.query(model.DataType.id), data_version)
+            count = query.count()
+        except SQLAlchemyError as excep:
+            self.logger.exception(excep)
+            count = 0
+        return count
+
+
+    def get_datatypes_to_upgrade(self, data_version, after_id=0, page_size=500):
+        """
+        Page through the DataTypes which still need their file checked (and maybe upgraded) to `data_version`.
+        Pages are delimited by id (and not by offset), as the rows already processed leave the result set.
+
+        :returns: a list of (id, gid) tuples, ordered by id, with ids greater than `after_id`
+        """
+        resulted_data = []
+        try:
+            query = self.session.query(model.DataType.id, model.DataType.gid).filter(model.DataType.id > after_id)
+            resulted_data = self._filter_datatypes_to_upgrade(query, data_version
+                                                              ).order_by(model.DataType.id).limit(page_size).all()
+        except SQLAlchemyError as excep:
+            self.logger.exception(excep)
+        return resulted_data
+
+
+    def update_datatypes_after_upgrade(self, checked, failed):
+        """
+        Record in a single transaction the outcome of a batch of file upgrades.
+
+        :param checked: list of (id, data_version, disk_size) tuples, for the DataTypes whose file is now at
+            `data_version`. The disk size is None when it did not change.
+        :param failed: list of ids for the DataTypes to be marked as invalid
+        """
+        try:
+            for datatype_id, data_version, disk_size in checked:
+                values = {model.DataType._data_version: data_version}
+                if disk_size is not None:
+                    values[model.DataType.disk_size] = disk_size
+                self.session.query(model.DataType).filter(model.DataType.id == datatype_id
+                                                          ).update(values, synchronize_session=False)
+            if failed:
+                self.session.query(model.DataType).filter(model.DataType.id.in_(failed)
+                                                          ).update({model.DataType.invalid: True},
+                                                                   synchronize_session=False)
+            self.session.commit()
+        except SQLAlchemyError as excep:
+            self.logger.exception(excep)
+
+
     def count_datatypes_generated_from(self, datatype_gid):
         """
         Returns a count of all the datatypes that were generated by an operation
@@ -275,68 +363,72 @@ class DatatypeDAO(RootDAO):
         return query.all()
 
 
-    def get_data_in_project(self, project_id, visibility_filter=None, filter_value=None):
+    def _query_data_in_project(self, project_id, visibility_filter, filter_value, *entities):
         """
-        Get all the DataTypes for a given project, including Linked Entities and DataType Groups.
+        Build the queries selecting `entities` for all the DataTypes in a project:
+        first DT, DT_gr, Lk_DT and Lk_DT_gr, then what is not covered by the first:
+        Links of DT which are part of a group, but the entire group is not linked.
 
         :param visibility_filter: when not None, will filter by DataTye fields
         :param filter_value: when not None, will filter with ilike multiple DataType string attributes
+        :returns: list of two queries
         """
-        resulted_data = []
-        try:
-            ## First Query DT, DT_gr, Lk_DT and Lk_DT_gr
-            query = self.session.query(model.DataType
-                        ).join((model.Operation, model.Operation.id == model.DataType.fk_from_operation)
-                        ).join(model.Algorithm).join(model.AlgorithmCategory
-                        ).outerjoin((model.Links, and_(model.Links.fk_from_datatype == model.DataType.id,
-                                                       model.Links.fk_to_project == project_id))
-                        ).outerjoin(model.BurstConfiguration,
-                                    model.DataType.fk_parent_burst == model.BurstConfiguration.id
-                        ).filter(model.DataType.fk_datatype_group == None
-                        ).filter(or_(model.Operation.fk_launched_in == project_id,
-                                     model.Links.fk_to_project == project_id))
+        query = self.session.query(*entities
+                    ).join((model.Operation, model.Operation.id == model.DataType.fk_from_operation)
+                    ).join(model.Algorithm).join(model.AlgorithmCategory
+                    ).outerjoin((model.Links, and_(model.Links.fk_from_datatype == model.DataType.id,
+                                                   model.Links.fk_to_project == project_id))
+                    ).outerjoin(model.BurstConfiguration,
+                                model.DataType.fk_parent_burst == model.BurstConfiguration.id
+                    ).filter(model.DataType.fk_datatype_group == None
+                    ).filter(or_(model.Operation.fk_launched_in == project_id,
+                                 model.Links.fk_to_project == project_id))
 
+        links = aliased(model.Links)
+        query2 = self.session.query(*entities
+                    ).join((model.Operation, model.Operation.id == model.DataType.fk_from_operation)
+                    ).join(model.Algorithm).join(model.AlgorithmCategory
+                    ).join((model.Links, and_(model.Links.fk_from_datatype == model.DataType.id,
+                                              model.Links.fk_to_project == project_id))
+                    ).outerjoin(links, and_(links.fk_from_datatype == model.DataType.fk_datatype_group,
+                                            links.fk_to_project == project_id)
+                    ).outerjoin(model.BurstConfiguration,
+                                model.DataType.fk_parent_burst == model.BurstConfiguration.id
+                    ).filter(model.DataType.fk_datatype_group != None
+                    ).filter(links.id == None)
+
+        result = []
+        for query in [query, query2]:
             if visibility_filter:
                 filter_str = visibility_filter.get_sql_filter_equivalent()
                 if filter_str is not None:
                     query = query.filter(eval(filter_str))
             if filter_value is not None:
                 query = query.filter(self._compose_filter_datatype_ilike(filter_value))
+            result.append(query)
+        return result
 
-            resulted_data = query.all()
-
-            ## Now query what it was not covered before:
-            ## Links of DT which are part of a group, but the entire group is not linked
-            links = aliased(model.Links)
-            query2 = self.session.query(model.DataType
-                        ).join((model.Operation, model.Operation.id == model.DataType.fk_from_operation)
-                        ).join(model.Algorithm).join(model.AlgorithmCategory
-                        ).join((model.Links, and_(model.Links.fk_from_datatype == model.DataType.id,
-                                                  model.Links.fk_to_project == project_id))
-                        ).outerjoin(links, and_(links.fk_from_datatype == model.DataType.fk_datatype_group,
-                                                links.fk_to_project == project_id)
-                        ).outerjoin(model.BurstConfiguration,
-                                    model.DataType.fk_parent_burst == model.BurstConfiguration.id
-                        ).filter(model.DataType.fk_datatype_group != None
-                        ).filter(links.id == None)
-
-            if visibility_filter:
-                filter_str = visibility_filter.get_sql_filter_equivalent()
-                if filter_str is not None:
-                    query2 = query2.filter(eval(filter_str))
-            if filter_value is not None:
-                query2 = query2.filter(self._compose_filter_datatype_ilike(filter_value))
 
-            resulted_data.extend(query2.all())
+    def get_data_in_project(self, project_id, visibility_filter=None, filter_value=None):
+        """
+        Get all the DataTypes for a given project, including Linked Entities and DataType Groups.
+        The parent operation (with its algorithm, category, project, group and user) and burst
+        are loaded by the same queries.
 
-            # Load lazy fields for future usage
-            for dt in resulted_data:
-                dt._parent_burst
-                dt.parent_operation.algorithm
-                dt.parent_operation.algorithm.algorithm_category
-                dt.parent_operation.project
-                dt.parent_operation.operation_group
-                dt.parent_operation.user
+        :param visibility_filter: when not None, will filter by DataTye fields
+        :param filter_value: when not None, will filter with ilike multiple DataType string attributes
+        """
+        resulted_data = []
+        try:
+            for query in self._query_data_in_project(project_id, visibility_filter, filter_value, model.DataType):
+                query = query.options(
+                    contains_eager(model.DataType.parent_operation).contains_eager(model.Operation.algorithm
+                                                                ).contains_eager(model.Algorithm.algorithm_category),
+                    contains_eager(model.DataType.parent_operation).joinedload(model.Operation.project),
+                    contains_eager(model.DataType.parent_operation).joinedload(model.Operation.operation_group),
+                    contains_eager(model.DataType.parent_operation).joinedload(model.Operation.user),
+                    contains_eager(model.DataType._parent_burst))
+                resulted_data.extend(query.all())
 
         except Exception as excep:
             self.logger.exception(excep)
@@ -344,6 +436,80 @@ class DatatypeDAO(RootDAO):
         return resulted_data
 
 
+    def get_data_in_project_columns(self, project_id, visibility_filter=None, filter_value=None):
+        """
+        Same DataTypes as `get_data_in_project`, but only with the columns needed for displaying the project tree,
+        read through a single projection query (per sub-query), plus one query for each DataType class which
+        computes its own `display_name`.
+
+        :returns: list of dictionaries {column label: value}, including a `display_name` entry. DataTypes
+                  whose class can no longer be found (e.g. removed DT class) are not returned.
+        """
+        columns = [model.DataType.id, model.DataType.gid, model.DataType.type, model.DataType.module,
+                   model.DataType.state, model.DataType.subject, model.DataType.visible, model.DataType.invalid,
+                   model.DataType.user_tag_1, model.DataType.user_tag_2, model.DataType.user_tag_3,
+                   model.DataType.user_tag_4, model.DataType.user_tag_5,
+                   model.Operation.fk_launched_in, model.Operation.user_group, model.Operation.completion_date,
+                   model.Algorithm.displayname.label('algorithm_name'),
+                   model.AlgorithmCategory.displayname.label('category_name'),
+                   model.User.username.label('author'),
+                   model.OperationGroup.id.label('operation_group_id'),
+                   model.OperationGroup.name.label('operation_group_name'),
+                   model.BurstConfiguration.name.label('burst_name')]
+        result = []
+        try:
+            queries = self._query_data_in_project(project_id, visibility_filter, filter_value, *columns)
+            rows = []
+            for query in queries:
+                query = query.join((model.User, model.User.id == model.Operation.fk_launched_by)
+                            ).outerjoin((model.OperationGroup,
+                                         model.OperationGroup.id == model.Operation.fk_operation_group))
+                rows.extend(query.all())
+
+            display_names = self._get_display_names(rows, project_id, visibility_filter, filter_value)
+            for row in rows:
+                if row.id in display_names:
+                    values = row._asdict()
+                    values['display_name'] = display_names[row.id]
+                    result.append(values)
+
+        except Exception as excep:
+            self.logger.exception(excep)
+
+        return result
+
+
+    def _get_display_names(self, rows, project_id, visibility_filter, filter_value):
+        """
+        :returns: dictionary {datatype id: display_name} for the given projection rows. DataType classes which
+                  do not overwrite `display_name` get it computed from the row, the others are loaded from DB.
+        """
+        display_names = {}
+        rows_by_class = {}
+        for row in rows:
+            rows_by_class.setdefault((row.module, row.type), []).append(row)
+
+        for (module, classname), class_rows in six.iteritems(rows_by_class):
+            try:
+                data_class = getattr(__import__(module, globals(), locals(), [classname]), classname)
+            except Exception:
+                self.logger.warning("Ignored entities of (possibly removed) DT class %s.%s" % (module, classname))
+                continue
+
+            if data_class.display_name is model.DataType.display_name:
+                for row in class_rows:
+                    display_names[row.id] = model.DataType.display_name.fget(row)
+                continue
+
+            ids_queries = self._query_data_in_project(project_id, visibility_filter, filter_value, model.DataType.id)
+            query = self.session.query(data_class).filter(or_(*[data_class.id.in_(ids_query.subquery())
+                                                                for ids_query in ids_queries]))
+            for entity in query.all():
+                display_names[entity.id] = entity.display_name
+
+        return display_names
+
+
     def _compose_filter_datatype_ilike(self, filter_string):
         """
         :param filter_string: String to be search for with ilike.
@@ -408,6 +574,20 @@ class DatatypeDAO(RootDAO):
         return None
 
 
+    def get_datatype_operation_status(self, gid):
+        """
+        Retrieve the status of the operation which created the DataType with the given GID,
+        without loading the DataType. None is returned when the DataType does not exist.
+        """
+        try:
+            return self.session.query(model.Operation.status
+                                      ).join(model.DataType, model.DataType.fk_from_operation == model.Operation.id
+                                      ).filter(model.DataType.gid == gid).scalar()
+        except SQLAlchemyError as excep:
+            self.logger.exception(excep)
+            return None
+
+
     def get_links_for_datatype(self, data_id):
         """Get the links to a specific datatype"""
         try:
@@ -63,6 +63,18 @@ class OperationDAO(RootDAO):
         return operation
 
 
+    def get_operations_by_ids(self, operation_ids):
+        """
+        Retrieve OPERATION entities (without lazy fields) for a list of Identifiers, in the same order.
+        """
+        operations = {}
+        for start in range(0, len(operation_ids), self.STORE_PAGE_SIZE):
+            page_ids = operation_ids[start:start + self.STORE_PAGE_SIZE]
+            for operation in self.session.query(model.Operation).filter(model.Operation.id.in_(page_ids)):
+                operations[operation.id] = operation
+        return [operations[operation_id] for operation_id in operation_ids]
+
+
     def try_get_operation_by_id(self, operation_id):
         """
         Try to call self.get_operation_by_id, but when operation was not found, instead of failing, return None.
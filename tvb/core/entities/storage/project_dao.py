@@ -154,19 +154,58 @@ class CaseDAO(RootDAO):
         return None
 
 
+    @staticmethod
+    def _query_user_generated_disk_size(session, user_id):
+        """
+        Build the SUM on DATA_TYPES column DISK_SIZE (kB) for the DataTypes generated by a user, 0 when none.
+        DataTypeGroups are not counted, as their size is the sum of the DataTypes in the group.
+
+        :param user_id: a user id, or the USERS.id column for a sub-query correlated with USERS
+        """
+        return session.query(func.coalesce(func.sum(model.DataType.disk_size), 0)).join(model.Operation
+                             ).filter(model.Operation.fk_launched_by == user_id
+                             ).filter(model.DataType.type != model.DataTypeGroup.__name__)
+
+
     def compute_user_generated_disk_size(self, user_id):
         """
-        Do a SUM on DATA_TYPES table column DISK_SIZE, for the current user.
+        Do a SUM on DATA_TYPES table column DISK_SIZE, for the current user (the rule of the disk usage counter).
         :returns 0 when no DT are found, or SUM from DB.
         """
         try:
-            total_size = self.session.query(func.sum(model.DataType.disk_size)).join(model.Operation
-                                        ).filter(model.Operation.fk_launched_by == user_id).scalar()
-            return total_size or 0
+            return self._query_user_generated_disk_size(self.session, user_id).scalar() or 0
         except SQLAlchemyError as excep:
             self.logger.exception(excep)
             return -1
 
+
+    def get_user_disk_size(self, user_id):
+        """
+        Read the running counter of disk space (kB) used by the DataTypes generated by a user.
+        A counter not computed yet gets initialized here, with a SUM on DATA_TYPES.
+        """
+        used_disk_size = self.session.query(model.User.used_disk_size).filter(model.User.id == user_id).scalar()
+        if used_disk_size is None:
+            used_disk_size = self._query_user_generated_disk_size(self.session, user_id).scalar() or 0
+            self.session.query(model.User).filter(model.User.id == user_id).update(
+                {model.User.used_disk_size: used_disk_size}, synchronize_session=False)
+            self.session.commit()
+        return used_disk_size
+
+
+    def reconcile_users_disk_size(self):
+        """
+        Correct the disk usage counters of all users, from a SUM on DATA_TYPES (e.g. after files got upgraded),
+        in a single UPDATE statement.
+        :returns: the number of users updated
+        """
+        used_disk_size = self._query_user_generated_disk_size(self.session, model.User.id
+                                                              ).correlate(model.User).as_scalar()
+        updated = self.session.query(model.User).update({model.User.used_disk_size: used_disk_size},
+                                                        synchronize_session=False)
+        self.session.commit()
+        return updated
+
     #
     # PROJECT RELATED METHODS
     #
@@ -190,6 +229,8 @@ class CaseDAO(RootDAO):
     def delete_project(self, project_id):
         """Remove PROJECT entity by ID."""
         project = self.session.query(model.Project).filter_by(id=project_id).one()
+        # DataTypes still in the project are removed in cascade, so no longer counted in the disk usage
+        self._discount_user_disk_size(self.session, model.Operation.fk_launched_in == project_id)
         self.session.delete(project)
         linked_users = self.session.query(model.User
                                           ).filter_by(selected_project=project_id).all()
@@ -35,6 +35,7 @@ Base DAO behavior.
 .. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
 """
 
+from sqlalchemy import func
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm.exc import NoResultFound
 from tvb.basic.logger.builder import get_logger
@@ -55,6 +56,8 @@ class RootDAO(object):
 
     EXCEPTION_DATATYPE_GROUP = "DataTypeGroup"
     EXCEPTION_DATATYPE_SIMULATION = SIMULATION_DATATYPE_CLASS
+    # Maximum ids in one "IN" clause (SQLite limits the number of bound parameters per statement)
+    STORE_PAGE_SIZE = 500
 
 
     def store_entity(self, entity, merge=False):
@@ -77,15 +80,24 @@ class RootDAO(object):
 
     def store_entities(self, entities_list):
         """
-        Store in DB a list of generic entities.
+        Store in DB a list of generic entities, in a single commit.
+        Stored entities are read back with one query per entity class (and page of ids), not one per entity.
+
+        :returns: the stored entities, in the same order as `entities_list`
         """
         self.session.add_all(entities_list)
         self.session.commit()
 
-        stored_entities = []
+        ids_per_class = {}
         for entity in entities_list:
-            stored_entities.append(self.session.query(entity.__class__).filter_by(id=entity.id).one())
-        return stored_entities
+            ids_per_class.setdefault(entity.__class__, []).append(entity.id)
+        stored_per_class = {}
+        for entity_class, entity_ids in ids_per_class.items():
+            for start in range(0, len(entity_ids), self.STORE_PAGE_SIZE):
+                page_ids = entity_ids[start:start + self.STORE_PAGE_SIZE]
+                for stored in self.session.query(entity_class).filter(entity_class.id.in_(page_ids)):
+                    stored_per_class[(entity_class, stored.id)] = stored
+        return [stored_per_class[(entity.__class__, entity.id)] for entity in entities_list]
 
 
     def get_generic_entity(self, entity_type, filter_value, select_field="id"):
@@ -114,6 +126,13 @@ class RootDAO(object):
         """
         try:
             entity = self.session.query(entity_class).filter_by(id=entity_id).one()
+            # DataTypes removed in cascade are no longer counted in the disk usage of their users
+            if issubclass(entity_class, model.DataType):
+                self._discount_user_disk_size(self.session, model.DataType.id == entity_id)
+            elif issubclass(entity_class, model.Operation):
+                self._discount_user_disk_size(self.session, model.Operation.id == entity_id)
+            elif issubclass(entity_class, model.OperationGroup):
+                self._discount_user_disk_size(self.session, model.Operation.fk_operation_group == entity_id)
             self.session.delete(entity)
             self.session.commit()
             return True
@@ -136,10 +155,43 @@ class RootDAO(object):
         data = self.session.query(model.DataType).filter(model.DataType.gid == gid).all()
         for entity in data:
             extended_ent = self.get_generic_entity(entity.module + "." + entity.type, entity.id)
+            if entity.type != model.DataTypeGroup.__name__:
+                self._update_user_disk_size(self.session, entity.fk_from_operation, -(entity.disk_size or 0))
             self.session.delete(extended_ent[0])
         self.session.commit()
 
 
+    @staticmethod
+    def _update_user_disk_size(session, operation_id, delta):
+        """
+        Add `delta` kB to the disk usage counter of the user who launched an operation, without committing,
+        so that the counter changes in the same transaction as the DataTypes it accounts for.
+        Counters not computed yet stay NULL.
+        """
+        if not delta or operation_id is None:
+            return
+        launched_by = session.query(model.Operation.fk_launched_by).filter(model.Operation.id == operation_id)
+        session.query(model.User).filter(model.User.id == launched_by.as_scalar()).update(
+            {model.User.used_disk_size: model.User.used_disk_size + delta}, synchronize_session=False)
+
+
+    @staticmethod
+    def _discount_user_disk_size(session, *criteria):
+        """
+        Subtract from the disk usage counters of their users the DataTypes (joined with their Operations) which
+        match the given criteria, before they get removed in cascade with an Operation, OperationGroup or Project.
+        Nothing is committed here.
+        """
+        removed_sizes = session.query(model.Operation.fk_launched_by, func.sum(model.DataType.disk_size)
+                                      ).join(model.DataType, model.DataType.fk_from_operation == model.Operation.id
+                                      ).filter(model.DataType.type != model.DataTypeGroup.__name__
+                                      ).filter(*criteria).group_by(model.Operation.fk_launched_by).all()
+        for user_id, disk_size in removed_sizes:
+            if disk_size:
+                session.query(model.User).filter(model.User.id == user_id).update(
+                    {model.User.used_disk_size: model.User.used_disk_size - disk_size}, synchronize_session=False)
+
+
     def get_datatype_by_id(self, data_id):
         """
         Retrieve DataType entity by ID.
@@ -127,6 +127,21 @@ class WorkflowDAO(RootDAO):
         return burst
 
 
+    def get_bursts_by_ids(self, burst_ids):
+        """Get the BurstConfiguration entities with the given ids (the ones still existing), with one query."""
+        if not burst_ids:
+            return []
+        return self.session.query(model.BurstConfiguration
+                                  ).filter(model.BurstConfiguration.id.in_(burst_ids)).all()
+
+
+    def get_running_burst_ids(self):
+        """Get the ids of all bursts currently running."""
+        result = self.session.query(model.BurstConfiguration.id
+                                    ).filter(model.BurstConfiguration.status == model.BurstConfiguration.BURST_RUNNING)
+        return [row[0] for row in result.all()]
+
+
     def get_visualization_steps(self, workflow_id):
         """Retrieve all the visualization steps for a workflow."""
         try:
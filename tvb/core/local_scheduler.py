@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Stand-in for a cluster job scheduler (OAR, SLURM), running the jobs on the local machine, so that
+the ClusterSchedulerClient can be exercised and benchmarked without a cluster:
+
+    python -m tvb.core.local_scheduler serve STATE_FOLDER PROFILE [SLOTS]
+    python tvb/core/local_scheduler.py submit STATE_FOLDER OPERATION_ID USER_LABEL WALLTIME
+    python tvb/core/local_scheduler.py status STATE_FOLDER JOB_ID
+    python tvb/core/local_scheduler.py cancel STATE_FOLDER JOB_ID
+
+Every job is kept as a JSON file in STATE_FOLDER/jobs. The submit, status and cancel commands only work
+on these files (under a lock), thus jobs can be submitted before the scheduler gets started. They only
+use the standard library, and are called by the script path, to need no TVB environment in the shell.
+The scheduler (serve) executes the queued jobs in submission order, at most SLOTS at a time, each one
+as an operation_async_launcher process, and kills the jobs running longer than their walltime.
+Use configure_cluster_settings, for the ClusterSchedulerClient to submit and stop jobs through here.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import errno
+import signal
+import socket
+from collections import deque
+from contextlib import contextmanager
+from subprocess import Popen, STDOUT
+
+CMD_SERVE = "serve"
+CMD_SUBMIT = "submit"
+CMD_STATUS = "status"
+CMD_CANCEL = "cancel"
+
+JOB_ID_STRING = "JOB_ID="
+
+STATE_QUEUED = "QUEUED"
+STATE_RUNNING = "RUNNING"
+STATE_FINISHED = "FINISHED"
+STATE_FAILED = "FAILED"
+STATE_CANCELED = "CANCELED"
+STATE_TIMEOUT = "TIMEOUT"
+
+if __name__ == '__main__' and len(sys.argv) > 3 and sys.argv[1] == CMD_SERVE:
+    from tvb.basic.profile import TvbProfile
+    TvbProfile.set_profile(sys.argv[3])
+
+
+
+def parse_walltime(walltime):
+    """
+    :param walltime: string as "HH:MM:SS", "MM:SS" or "SS" (fields are not necessarily zero padded)
+    :returns: number of seconds
+    """
+    seconds = 0
+    for field in str(walltime).split(':'):
+        seconds = seconds * 60 + int(field)
+    return seconds
+
+
+def configure_cluster_settings(cluster_settings, state_folder, python_path=sys.executable):
+    """
+    Point the commands of the given cluster settings (TvbProfile.current.cluster) to this local scheduler.
+    """
+    script = os.path.splitext(os.path.abspath(__file__))[0] + ".py"
+    command = '"%s" "%s" %%s "%s"' % (python_path, script, state_folder)
+    cluster_settings.SCHEDULE_COMMAND = (command % CMD_SUBMIT) + ' %s "%s" %s'
+    cluster_settings.STOP_COMMAND = (command % CMD_CANCEL) + ' %s'
+    cluster_settings.STATUS_COMMAND = (command % CMD_STATUS) + ' %s'
+    cluster_settings.JOB_ID_STRING = JOB_ID_STRING
+
+
+
+class JobStore(object):
+    """
+    Jobs of the local scheduler, as one JSON file each, shared between the scheduler and the commands.
+    """
+
+    def __init__(self, state_folder):
+        self.state_folder = state_folder
+        self.jobs_folder = os.path.join(state_folder, "jobs")
+        if not os.path.isdir(self.jobs_folder):
+            try:
+                os.makedirs(self.jobs_folder)
+            except OSError as excep:
+                if excep.errno != errno.EEXIST:
+                    raise
+        self._lock_path = os.path.join(state_folder, "lock")
+        self._last_id_path = os.path.join(state_folder, "last_job_id")
+
+
+    @contextmanager
+    def lock(self):
+        """ Exclusive access to the jobs, between processes. """
+        with open(self._lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+    def last_job_id(self):
+        if not os.path.exists(self._last_id_path):
+            return 0
+        with open(self._last_id_path) as id_file:
+            return int(id_file.read().strip() or 0)
+
+
+    def job_path(self, job_id, extension=".json"):
+        return os.path.join(self.jobs_folder, "%s%s" % (job_id, extension))
+
+
+    def read(self, job_id):
+        """
+        :returns: dictionary with the job fields, or None for an unknown job
+        """
+        try:
+            with open(self.job_path(job_id)) as job_file:
+                return json.load(job_file)
+        except (IOError, ValueError):
+            return None
+
+
+    def write(self, job):
+        """ Replace the job file at once, so that readers never find it half written. """
+        temp_path = self.job_path(job['id'], ".tmp")
+        with open(temp_path, 'w') as job_file:
+            json.dump(job, job_file)
+        os.rename(temp_path, self.job_path(job['id']))
+
+
+    def submit(self, operation_id, user_label, walltime):
+        """
+        Queue a new job.
+        :returns: the id of the new job
+        """
+        with self.lock():
+            job_id = self.last_job_id() + 1
+            self.write({'id': job_id, 'operation_id': str(operation_id), 'user': user_label,
+                        'walltime': parse_walltime(walltime), 'state': STATE_QUEUED, 'submit_time': time.time(),
+                        'start_time': None, 'end_time': None, 'pid': None, 'exit_code': None})
+            with open(self._last_id_path, 'w') as id_file:
+                id_file.write(str(job_id))
+        return job_id
+
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued job, or terminate a running one.
+        :returns: False when the job is unknown or has already ended
+        """
+        with self.lock():
+            job = self.read(job_id)
+            if job is None or job['state'] not in (STATE_QUEUED, STATE_RUNNING):
+                return False
+            was_running = job['state'] == STATE_RUNNING
+            job['state'] = STATE_CANCELED
+            job['end_time'] = time.time()
+            self.write(job)
+        if was_running:
+            kill_job(job, signal.SIGTERM)
+        return True
+
+
+
+def kill_job(job, signal_number):
+    """ Send a signal to all the processes started by a job. """
+    try:
+        os.killpg(job['pid'], signal_number)
+    except OSError as excep:
+        if excep.errno != errno.ESRCH:
+            raise
+
+
+
+class LocalScheduler(object):
+    """
+    Executes the jobs from a JobStore, in submission order, with a limited number of slots.
+    """
+
+    POLL_INTERVAL = 0.2
+    # Seconds a canceled or timed out job has to terminate, before being killed
+    KILL_GRACE = 10
+
+
+    def __init__(self, store, slots, job_command, env=None):
+        """
+        :param job_command: function receiving a job dictionary, and returning the arguments list to execute it
+        """
+        self.store = store
+        self.slots = slots
+        self.job_command = job_command
+        self.env = env
+        self.stopped = False
+        self._queue = deque()
+        self._running = {}
+        self._next_job_id = 1
+        self._recover()
+
+
+    def _recover(self):
+        """ Jobs left running by a former scheduler can not be followed anymore. """
+        with self.store.lock():
+            for job_id in range(1, self.store.last_job_id() + 1):
+                job = self.store.read(job_id)
+                if job is not None and job['state'] == STATE_RUNNING:
+                    job['state'] = STATE_FAILED
+                    job['end_time'] = time.time()
+                    self.store.write(job)
+
+
+    def serve(self):
+        """ Schedule jobs until stopped. """
+        while not self.stopped:
+            self.check()
+            time.sleep(self.POLL_INTERVAL)
+
+
+    def check(self):
+        """
+        Pick up new jobs, follow the running ones and start queued jobs in the free slots.
+        """
+        last_job_id = self.store.last_job_id()
+        self._queue.extend(range(self._next_job_id, last_job_id + 1))
+        self._next_job_id = max(self._next_job_id, last_job_id + 1)
+
+        for job_id, process in list(self._running.items()):
+            exit_code = process.poll()
+            with self.store.lock():
+                job = self.store.read(job_id)
+                if exit_code is not None:
+                    del self._running[job_id]
+                    if job['state'] == STATE_RUNNING:
+                        job['state'] = STATE_FINISHED if exit_code == 0 else STATE_FAILED
+                        job['end_time'] = time.time()
+                    job['exit_code'] = exit_code
+                    self.store.write(job)
+                elif job['state'] == STATE_RUNNING and time.time() - job['start_time'] > job['walltime']:
+                    job['state'] = STATE_TIMEOUT
+                    job['end_time'] = time.time()
+                    self.store.write(job)
+                    kill_job(job, signal.SIGTERM)
+                elif job['state'] != STATE_RUNNING and time.time() - job['end_time'] > self.KILL_GRACE:
+                    kill_job(job, signal.SIGKILL)
+
+        while self._queue and len(self._running) < self.slots:
+            job_id = self._queue.popleft()
+            with self.store.lock():
+                job = self.store.read(job_id)
+                if job is None or job['state'] != STATE_QUEUED:
+                    continue
+                with open(self.store.job_path(job_id, ".log"), 'w') as log_file:
+                    process = Popen(self.job_command(job), stdout=log_file, stderr=STDOUT,
+                                    env=self.env, preexec_fn=os.setsid)
+                self._running[job_id] = process
+                job['state'] = STATE_RUNNING
+                job['pid'] = process.pid
+                job['start_time'] = time.time()
+                self.store.write(job)
+
+
+
+def _serve(state_folder, slots):
+    from tvb.basic.profile import TvbProfile
+    from tvb.basic.logger.builder import get_logger
+    from tvb.core.utils import build_process_environment
+
+    logger = get_logger('tvb.core.local_scheduler')
+    env = build_process_environment()
+    # Jobs see the local machine as the cluster node they run on
+    env[TvbProfile.current.cluster.NODE_ENV] = socket.gethostname()
+
+    def _launcher_command(job):
+        return [TvbProfile.current.PYTHON_INTERPRETER_PATH, '-m', 'tvb.core.operation_async_launcher',
+                job['operation_id'], TvbProfile.CURRENT_PROFILE_NAME]
+
+    scheduler = LocalScheduler(JobStore(state_folder), slots, _launcher_command, env)
+
+    def _stop(*_):
+        scheduler.stopped = True
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    logger.info("Local scheduler with %d slots, on %s" % (slots, state_folder))
+    scheduler.serve()
+
+
+
+if __name__ == '__main__':
+
+    COMMAND, STATE_FOLDER = sys.argv[1], sys.argv[2]
+    EXIT_CODE = 0
+
+    if COMMAND == CMD_SERVE:
+        _serve(STATE_FOLDER, int(sys.argv[4]) if len(sys.argv) > 4 else 4)
+    elif COMMAND == CMD_SUBMIT:
+        print("%s%d" % (JOB_ID_STRING, JobStore(STATE_FOLDER).submit(sys.argv[3], sys.argv[4], sys.argv[5])))
+    elif COMMAND == CMD_STATUS:
+        JOB = JobStore(STATE_FOLDER).read(sys.argv[3])
+        if JOB is None:
+            print("Unknown job %s" % sys.argv[3])
+            EXIT_CODE = 1
+        else:
+            print("%(id)s %(state)s operation=%(operation_id)s user=%(user)s walltime=%(walltime)ss" % JOB)
+    elif COMMAND == CMD_CANCEL:
+        EXIT_CODE = 0 if JobStore(STATE_FOLDER).cancel(sys.argv[3]) else 1
+    else:
+        print(__doc__)
+        EXIT_CODE = 2
+
+    sys.exit(EXIT_CODE)
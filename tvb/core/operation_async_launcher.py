@@ -81,7 +81,7 @@ def do_operation_launch(operation_id):
         LOGGER.debug("Successfully finished operation " + str(operation_id))
 
     except Exception as excep:
-        LOGGER.error("Could not execute operation " + str(sys.argv[1]))
+        LOGGER.error("Could not execute operation " + str(operation_id))
         LOGGER.exception(excep)
         parent_burst = dao.get_burst_for_operation_id(operation_id)
         if parent_burst is not None:
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Long-lived worker process, started by the WorkerPoolClient in backend_client.
+Example: python -m tvb.core.operation_async_worker profile_name 100 2147483648
+
+TVB gets imported and the profile initialized only once; afterwards operation ids are read one per line
+from stdin and each operation is executed with do_operation_launch. After every operation, the process-global
+state it might have left behind gets reset (see reset_process_state), and a line is written back on the original
+stdout, telling whether the worker will continue to accept operations or is retiring, because it has executed
+the maximum number of operations or has grown over the memory limit.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import os
+import sys
+from tvb.basic.profile import TvbProfile
+if __name__ == '__main__':
+    TvbProfile.set_profile(sys.argv[1], True)
+
+import psutil
+from tvb.basic.logger.builder import get_logger
+
+
+STATUS_DONE = "done"
+STATUS_RETIRE = "retire"
+
+
+
+def _used_memory():
+    """
+    :returns: the resident memory of the current process, in bytes
+    """
+    return psutil.Process(os.getpid()).memory_info().rss
+
+
+def reset_process_state():
+    """
+    Release the process-global state an operation might leave behind, so that the next operation executed
+    by the same worker starts as in a new process: pooled H5 file handles, resident MATLAB/Octave sessions
+    and cached payloads.
+    """
+    # Imported here, as this module is also imported by the backend_client, for the status constants.
+    from tvb.adapters.analyzers.matlab_worker import MatlabSession
+    from tvb.core.entities.file.hdf5_file_pool import H5_FILE_POOL
+    from tvb.core.services.payload_cache import PAYLOAD_CACHE
+
+    H5_FILE_POOL.close_all()
+    MatlabSession.close_all()
+    PAYLOAD_CACHE.clear()
+
+
+def serve(input_stream, output_stream, max_operations, max_memory, cleanup=reset_process_state):
+    """
+    Execute operations, as their ids are read from `input_stream`, until the stream gets closed,
+    `max_operations` have been executed or the process uses more than `max_memory` bytes.
+    `cleanup` gets called after each operation, no matter how the operation ended.
+    """
+    # Imported here, as this module is also imported by the backend_client, for the status constants.
+    from tvb.core.operation_async_launcher import do_operation_launch
+
+    logger = get_logger('tvb.core.operation_async_worker')
+    executed = 0
+
+    for line in iter(input_stream.readline, ''):
+        operation_id = line.strip()
+        if not operation_id:
+            continue
+
+        try:
+            do_operation_launch(operation_id)
+        finally:
+            try:
+                cleanup()
+            except Exception:
+                logger.exception("Could not reset the worker state after operation %s" % operation_id)
+        executed += 1
+
+        retire = executed >= max_operations or _used_memory() > max_memory
+        output_stream.write("%s %s\n" % (STATUS_RETIRE if retire else STATUS_DONE, operation_id))
+        output_stream.flush()
+        if retire:
+            logger.debug("Worker %s retires after %d operations." % (os.getpid(), executed))
+            break
+
+
+
+if __name__ == '__main__':
+
+    ## Keep the original stdout only for talking with the parent process,
+    ## anything printed by the adapters will end on stderr.
+    STATUS_STREAM = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    serve(sys.stdin, STATUS_STREAM, int(sys.argv[2]), int(sys.argv[3]))
@@ -30,6 +30,9 @@
 """
 Created on Nov 1, 2011
 
+Values in the factory are remover classes, or their full names (as restored from the introspection registry),
+in which case the class gets imported on first use.
+
 .. moduleauthor:: Bogdan Neacsa <bogdan.neacsa@codemart.ro>
 """
 
@@ -46,10 +49,16 @@ def get_remover(datatype_name):
     else:
         datatype_name = datatype_name.__name__
     
-    if datatype_name in FACTORY_DICTIONARY:
-        return FACTORY_DICTIONARY[datatype_name]
-    else:
-        return FACTORY_DICTIONARY['default']
+    if datatype_name not in FACTORY_DICTIONARY:
+        datatype_name = 'default'
+
+    remover = FACTORY_DICTIONARY[datatype_name]
+    if isinstance(remover, basestring):
+        module_name, class_name = remover.rsplit('.', 1)
+        module = __import__(module_name, globals(), locals(), [class_name])
+        remover = getattr(module, class_name)
+        FACTORY_DICTIONARY[datatype_name] = remover
+    return remover
     
     
 def update_dictionary(new_dict):
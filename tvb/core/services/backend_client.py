@@ -36,16 +36,18 @@
 
 import os
 import sys
+import atexit
 import signal
 import Queue as queue
 import threading
 from subprocess import Popen, PIPE
 from tvb.basic.profile import TvbProfile
 from tvb.basic.logger.builder import get_logger
-from tvb.core.utils import parse_json_parameters
+from tvb.core.utils import parse_json_parameters, build_process_environment
 from tvb.core.entities import model
 from tvb.core.entities.storage import dao
 from tvb.core.services.workflow_service import WorkflowService
+from tvb.core.operation_async_worker import STATUS_RETIRE
 
 
 LOGGER = get_logger(__name__)
@@ -67,14 +69,22 @@ class OperationExecutor(threading.Thread):
         threading.Thread.__init__(self)
         self.operation_id = op_id
         self._stop = threading.Event()
+        # Set when the spot in LOCKS_QUEUE was taken before starting this thread (see start_in_free_spots)
+        self.has_spot = False
+
+
+    def _wait_for_spot(self):
+        """ Try to get a spot to launch own operation. """
+        if not self.has_spot:
+            LOCKS_QUEUE.get(True)
+            self.has_spot = True
 
 
     def run(self):
         """
         Get the required data from the operation queue and launch the operation.
         """
-        # Try to get a spot to launch own operation.
-        LOCKS_QUEUE.get(True)
+        self._wait_for_spot()
         operation_id = self.operation_id
         run_params = [TvbProfile.current.PYTHON_INTERPRETER_PATH, '-m', 'tvb.core.operation_async_launcher',
                       str(operation_id), TvbProfile.CURRENT_PROFILE_NAME]
@@ -83,11 +93,7 @@ class OperationExecutor(threading.Thread):
         # We should no longer launch the operation.
         if self.stopped() is False:
 
-            env = os.environ.copy()
-            env['PYTHONPATH'] = os.pathsep.join(sys.path)
-            # anything that was already in $PYTHONPATH should have been reproduced in sys.path
-
-            launched_process = Popen(run_params, stdout=PIPE, stderr=PIPE, env=env)
+            launched_process = Popen(run_params, stdout=PIPE, stderr=PIPE, env=build_process_environment())
 
             LOGGER.debug("Storing pid=%s for operation id=%s launched on local machine." % (operation_id,
                                                                                             launched_process.pid))
@@ -105,18 +111,7 @@ class OperationExecutor(threading.Thread):
 
             if returned != 0 and not self.stopped():
                 # Process did not end as expected. (e.g. Segmentation fault)
-                workflow_service = WorkflowService()
-                operation = dao.get_operation_by_id(self.operation_id)
-                LOGGER.error("Operation suffered fatal failure! Exit code: %s Exit message: %s" % (returned,
-                                                                                                   subprocess_result))
-
-                workflow_service.persist_operation_state(operation, model.STATUS_ERROR,
-                                                         "Operation failed unexpectedly! Please check the log files.")
-
-                burst_entity = dao.get_burst_for_operation_id(self.operation_id)
-                if burst_entity:
-                    message = "Error in operation process! Possibly segmentation fault."
-                    workflow_service.mark_burst_finished(burst_entity, error_message=message)
+                self._mark_fatal_failure(returned, subprocess_result)
 
             del launched_process
 
@@ -125,6 +120,23 @@ class OperationExecutor(threading.Thread):
         LOCKS_QUEUE.put(1)
 
 
+    def _mark_fatal_failure(self, returned, exit_message):
+        """
+        Mark current operation (and its burst) as failed, after the process executing it ended unexpectedly.
+        """
+        workflow_service = WorkflowService()
+        operation = dao.get_operation_by_id(self.operation_id)
+        LOGGER.error("Operation suffered fatal failure! Exit code: %s Exit message: %s" % (returned, exit_message))
+
+        workflow_service.persist_operation_state(operation, model.STATUS_ERROR,
+                                                 "Operation failed unexpectedly! Please check the log files.")
+
+        burst_entity = dao.get_burst_for_operation_id(self.operation_id)
+        if burst_entity:
+            message = "Error in operation process! Possibly segmentation fault."
+            workflow_service.mark_burst_finished(burst_entity, error_message=message)
+
+
     def stop(self):
         """ Mark current thread for stop"""
         self._stop.set()
@@ -160,11 +172,25 @@ class OperationExecutor(threading.Thread):
         return True
 
 
+def start_in_free_spots(executors):
+    """
+    Start the given executor threads one after the other, each as soon as a spot in LOCKS_QUEUE becomes free.
+    Used for batches of operations (e.g. PSE ranges), to avoid keeping a waiting thread for each queued operation.
+    """
+    for executor in executors:
+        LOCKS_QUEUE.get(True)
+        executor.has_spot = True
+        executor.start()
+
+
+
 class StandAloneClient(object):
     """
     Instead of communicating with a back-end cluster, fire locally a new thread.
     """
 
+    EXECUTOR_CLASS = OperationExecutor
+
 
     @staticmethod
     def execute(operation_id, user_name_label, adapter_instance):
@@ -174,6 +200,19 @@ class StandAloneClient(object):
         thread.start()
 
 
+    @classmethod
+    def execute_batch(cls, operation_ids, user_name_label, adapter_instance):
+        """
+        Queue a batch of operations locally. Executors are registered immediately (so they can be stopped
+        while still queued), but their threads are only started when spots become available.
+        """
+        executors = [cls.EXECUTOR_CLASS(operation_id) for operation_id in operation_ids]
+        CURRENT_ACTIVE_THREADS.extend(executors)
+        dispatcher = threading.Thread(target=start_in_free_spots, args=(executors,))
+        dispatcher.daemon = True
+        dispatcher.start()
+
+
     @staticmethod
     def stop_operation(operation_id):
         """
@@ -209,6 +248,182 @@ class StandAloneClient(object):
         return stopped
 
 
+class OperationWorker(object):
+    """
+    Handle towards a long-lived Python process (see tvb.core.operation_async_worker), which has TVB already
+    imported and executes operations one after the other, as their ids are sent to its stdin.
+    Idle workers are kept in a pool, to be reused by the following operations.
+    """
+
+    IDLE_WORKERS = queue.LifoQueue(0)
+
+
+    def __init__(self):
+        self.process = Popen(self.build_command(), stdin=PIPE, stdout=PIPE, env=build_process_environment())
+        self.retired = False
+        LOGGER.debug("Started operation worker with pid=%s" % self.process.pid)
+
+
+    @staticmethod
+    def build_command():
+        """
+        :returns: the command line starting a worker process
+        """
+        return [TvbProfile.current.PYTHON_INTERPRETER_PATH, '-m', 'tvb.core.operation_async_worker',
+                TvbProfile.CURRENT_PROFILE_NAME, str(TvbProfile.current.OPERATION_WORKER_MAX_OPERATIONS),
+                str(TvbProfile.current.OPERATION_WORKER_MAX_MEMORY)]
+
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+
+    def is_alive(self):
+        return not self.retired and self.process.poll() is None
+
+
+    @classmethod
+    def acquire(cls):
+        """
+        :returns: an idle worker from the pool, or a freshly started one when none is available.
+        """
+        while True:
+            try:
+                worker = cls.IDLE_WORKERS.get_nowait()
+            except queue.Empty:
+                return cls()
+            if worker.is_alive():
+                return worker
+            worker.close()
+
+
+    def release(self):
+        """
+        Give the worker back to the pool, unless it has retired or died meanwhile.
+        """
+        if self.is_alive():
+            self.IDLE_WORKERS.put(self)
+        else:
+            self.close()
+
+
+    def launch(self, operation_id):
+        """
+        Execute an operation in this worker, and wait for it to finish.
+        :returns: True when the operation was executed, \
+                  False when the worker process ended in the meantime (e.g. killed or crashed)
+        """
+        try:
+            self.process.stdin.write("%s\n" % operation_id)
+            self.process.stdin.flush()
+            status_line = self.process.stdout.readline()
+        except IOError:
+            status_line = None
+        if not status_line:
+            # The process might not be reaped yet, but it must not be given back to the pool
+            self.retired = True
+            return False
+
+        if status_line.split()[0] == STATUS_RETIRE:
+            self.retired = True
+        return True
+
+
+    def close(self):
+        """
+        Ask the worker process to end (by closing its input) and wait for it.
+        :returns: process exit code
+        """
+        try:
+            self.process.stdin.close()
+        except IOError:
+            pass
+        return self.process.wait()
+
+
+    @classmethod
+    def shutdown(cls):
+        """
+        Close all the idle workers in the pool (workers still executing an operation are not in the pool).
+        :returns: the number of workers closed
+        """
+        closed = 0
+        while True:
+            try:
+                worker = cls.IDLE_WORKERS.get_nowait()
+            except queue.Empty:
+                return closed
+            worker.close()
+            closed += 1
+
+
+
+atexit.register(OperationWorker.shutdown)
+
+
+
+class PooledOperationExecutor(OperationExecutor):
+    """
+    Thread in charge for executing an operation in a pooled OperationWorker, instead of a new process.
+    """
+
+
+    def run(self):
+        """
+        Get a worker and launch the operation in it, when a spot becomes available.
+        """
+        self._wait_for_spot()
+
+        try:
+            # In the exceptional case where the user pressed stop while the Thread startup is done,
+            # We should no longer launch the operation.
+            if self.stopped() is False:
+                worker = OperationWorker.acquire()
+
+                LOGGER.debug("Storing pid=%s for operation id=%s launched on local worker." % (worker.pid,
+                                                                                               self.operation_id))
+                op_ident = model.OperationProcessIdentifier(self.operation_id, pid=worker.pid)
+                dao.store_entity(op_ident)
+
+                if self.stopped():
+                    # Stop was requested concurrently, the worker gets killed as a separate process would have.
+                    self.stop_pid(worker.pid)
+
+                if worker.launch(self.operation_id):
+                    LOGGER.info("Finished with launch of operation %s" % self.operation_id)
+                    worker.release()
+                else:
+                    returned = worker.close()
+                    if not self.stopped():
+                        self._mark_fatal_failure(returned, "Operation worker process ended unexpectedly.")
+        finally:
+            # Give back empty spot now that you finished your operation
+            CURRENT_ACTIVE_THREADS.remove(self)
+            LOCKS_QUEUE.put(1)
+
+
+
+class WorkerPoolClient(StandAloneClient):
+    """
+    Execute operations locally, in a pool of long-lived worker processes, thus avoiding the cost
+    of importing TVB and initializing the profile for every operation.
+    Workers are recycled after a number of operations, or when their memory grows over a limit.
+    Stopping an operation kills the worker executing it.
+    """
+
+    EXECUTOR_CLASS = PooledOperationExecutor
+
+
+    @staticmethod
+    def execute(operation_id, user_name_label, adapter_instance):
+        """Start asynchronous operation in a pooled worker"""
+        thread = PooledOperationExecutor(operation_id)
+        CURRENT_ACTIVE_THREADS.append(thread)
+        thread.start()
+
+
+
 class ClusterSchedulerClient(object):
     """
     Simple class, to mimic the same behavior we are expecting from StandAloneClient, but firing behind
@@ -260,6 +475,24 @@ class ClusterSchedulerClient(object):
         thread.start()
 
 
+    @staticmethod
+    def execute_batch(operation_ids, user_name_label, adapter_instance):
+        """Submit a batch of jobs to the cluster, one after the other, from a single thread."""
+
+        def _run_cluster_jobs():
+            for operation_id in operation_ids:
+                try:
+                    ClusterSchedulerClient._run_cluster_job(operation_id, user_name_label, adapter_instance)
+                except Exception:
+                    LOGGER.exception("Could not submit cluster job for operation %s" % operation_id)
+                    operation = dao.get_operation_by_id(operation_id)
+                    WorkflowService().persist_operation_state(operation, model.STATUS_ERROR,
+                                                              "Could not submit job to the cluster!")
+
+        thread = threading.Thread(target=_run_cluster_jobs)
+        thread.start()
+
+
     @staticmethod
     def stop_operation(operation_id):
         """
@@ -279,7 +512,7 @@ class ClusterSchedulerClient(object):
             result = os.system(stop_command)
             if result != 0:
                 LOGGER.error("Stopping cluster operation was unsuccessful. Try following status with '" +
-                             TvbProfile.current.cluster.STATUS_COMMAND + "'" % operation_process.job_id)
+                             TvbProfile.current.cluster.STATUS_COMMAND % operation_process.job_id + "'")
 
         WorkflowService().persist_operation_state(operation, model.STATUS_CANCELED)
 
@@ -289,6 +522,9 @@ class ClusterSchedulerClient(object):
 if TvbProfile.current.cluster.IS_DEPLOY:
     # Return an entity capable to submit jobs to the cluster.
     BACKEND_CLIENT = ClusterSchedulerClient()
+elif TvbProfile.current.OPERATION_WORKER_MAX_OPERATIONS > 1:
+    # Return a launcher using a pool of worker processes.
+    BACKEND_CLIENT = WorkerPoolClient()
 else:
-    # Return a thread launcher.
+    # Return a thread launcher, with a new process for each operation.
     BACKEND_CLIENT = StandAloneClient()
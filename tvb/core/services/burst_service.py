@@ -429,17 +429,9 @@ class BurstService(object):
         try:
             operation_ids = self._prepare_operations(burst_config, simulator_index, simulator_id, user_id)
             self.logger.debug("Starting a total of %s workflows" % (len(operation_ids, )))
-            wf_errs = 0
-            for operation_id in operation_ids:
-                try:
-                    OperationService().launch_operation(operation_id, True)
-                except Exception as excep:
-                    self.logger.error(excep)
-                    wf_errs += 1
-                    self.workflow_service.mark_burst_finished(burst_config, error_message=str(excep))
-
-            self.logger.debug("Finished launching workflows. " + str(len(operation_ids) - wf_errs) +
-                              " were launched successfully, " + str(wf_errs) + " had error on pre-launch steps")
+            # All simulations of a burst are queued in the backend with a single call
+            OperationService().launch_operations(operation_ids)
+            self.logger.debug("Finished launching %s workflows." % len(operation_ids))
         except Exception as excep:
             self.logger.error(excep)
             self.workflow_service.mark_burst_finished(burst_config, error_message=str(excep))
@@ -487,12 +479,15 @@ class BurstService(object):
     def update_history_status(self, id_list):
         """
         For each burst_id received in the id_list read new status from DB and return a list [id, new_status] pair.
+        All bursts are read with a single query. Pages get status changes pushed (see status_events),
+        so this is only used as a fallback, e.g. to refresh the running times.
         """
         result = []
+        bursts = dict((burst.id, burst) for burst in dao.get_bursts_by_ids([int(b_id) for b_id in id_list]))
         for b_id in id_list:
-            burst = dao.get_burst_by_id(b_id)
-            burst.prepare_after_load()
+            burst = bursts.get(int(b_id))
             if burst is not None:
+                burst.prepare_after_load()
                 if burst.status == burst.BURST_RUNNING:
                     running_time = datetime.now() - burst.start_time
                 else:
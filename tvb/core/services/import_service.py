@@ -493,7 +493,7 @@ class ImportService(object):
         """This method stores data type into DB"""
         try:
             self.logger.debug("Store datatype: %s with Gid: %s" % (datatype.__class__.__name__, datatype.gid))
-            return dao.store_entity(datatype)
+            return dao.store_datatype(datatype)
         except MissingDataSetException:
             self.logger.error("Datatype %s has missing data and could not be imported properly." % (datatype,))
             os.remove(datatype.get_storage_file_path())
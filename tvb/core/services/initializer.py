@@ -37,6 +37,7 @@ import datetime
 import threading
 from tvb.basic.profile import TvbProfile
 from tvb.core.adapters.introspector import Introspector
+from tvb.core.adapters.introspection_registry import IntrospectionRegistry
 from tvb.core.code_versions.code_update_manager import CodeUpdateManager
 from tvb.core.entities import model
 from tvb.core.entities.file.files_update_manager import FilesUpdateManager
@@ -56,25 +57,27 @@ def reset():
 
 
 
-def initialize(introspected_modules, skip_import=False):
+def introspect_modules(introspected_modules, force=False):
     """
-    Initialize when Application is starting.
-    Check for new algorithms or new DataTypes.
+    Introspect the given modules and persist the result in the IntrospectionRegistry.
+    When the registry was computed on the same tree, adapters are no longer imported here,
+    but only when first used (from their stored Algorithm rows).
+    :returns: True when a full introspection was done
     """
-    SettingsService().check_db_url(TvbProfile.current.db.DB_URL)
-
-    # Initialize DB
-    is_db_empty = initialize_startup()
+    registry = IntrospectionRegistry()
+    fingerprint = registry.compute_fingerprint(introspected_modules)
+    cached_removers = None if force else registry.get_removers(fingerprint)
+    if cached_removers is not None:
+        Introspector.register_removers(cached_removers)
+        return False
 
-    # Create Projects storage root in case it does not exist.
-    initialize_storage()
-
-    # Populate DB algorithms, by introspection
     start_introspection_time = datetime.datetime.now()
+    all_removers = {}
     for module in introspected_modules:
         introspector = Introspector(module)
-        # Introspection is always done, even if DB was not empty.
+        # Introspection is always done when the registry is missing or outdated, even if DB was not empty.
         introspector.introspect(True)
+        all_removers.update(introspector.get_removers_names())
 
     # Now remove or mark as removed any unverified Algorithm, Algo-Category or Portlet
     to_invalidate, to_remove = dao.get_non_validated_entities(start_introspection_time)
@@ -84,6 +87,27 @@ def initialize(introspected_modules, skip_import=False):
     for entity in to_remove:
         dao.remove_entity(entity.__class__, entity.id)
 
+    registry.store(fingerprint, all_removers)
+    return True
+
+
+
+def initialize(introspected_modules, skip_import=False):
+    """
+    Initialize when Application is starting.
+    Check for new algorithms or new DataTypes.
+    """
+    SettingsService().check_db_url(TvbProfile.current.db.DB_URL)
+
+    # Initialize DB
+    is_db_empty = initialize_startup()
+
+    # Create Projects storage root in case it does not exist.
+    initialize_storage()
+
+    # Populate DB algorithms, by introspection, unless nothing changed since the previous start.
+    introspect_modules(introspected_modules, force=is_db_empty)
+
     if not TvbProfile.is_first_run():
         # Create default users.
         if is_db_empty:
@@ -54,10 +54,11 @@ from tvb.core.adapters import constants
 from tvb.core.adapters.abcadapter import ABCAdapter, ABCSynchronous
 from tvb.core.adapters.exceptions import LaunchException
 from tvb.core.entities import model
+from tvb.core.entities.load import known_entities
 from tvb.core.entities.storage import dao
 from tvb.core.entities.transient.structure_entities import DataTypeMetaData
 from tvb.core.entities.file.files_helper import FilesHelper
-from tvb.core.services.workflow_service import WorkflowService
+from tvb.core.services.workflow_service import WorkflowService, WorkflowChain
 from tvb.core.services.backend_client import BACKEND_CLIENT
 
 try:
@@ -199,8 +200,7 @@ class OperationService:
         algorithm = dao.get_algorithm_by_id(algorithm_id)
         ops, _ = self.prepare_operations(user_id, project_id, algorithm, category, {},
                                          existing_dt_group=existing_dt_group, **kwargs)
-        for operation in ops:
-            self.launch_operation(operation.id, True)
+        self.launch_operations([operation.id for operation in ops])
 
 
     def prepare_operations(self, user_id, project_id, algorithm, category, metadata,
@@ -275,6 +275,8 @@ class OperationService:
             if algo_category is not None:
                 algo_category = algo_category.algorithm_category
 
+            operations = []
+            cloned_steps = []
             for wf_idx, workflow in enumerate(workflows):
                 cloned_w_step = step.clone()
                 cloned_w_step.fk_workflow = workflow.id
@@ -295,10 +297,15 @@ class OperationService:
                                                 meta=json.dumps(metadata),
                                                 op_group_id=group_id, range_values=range_values, user_group=user_group)
                     operation.visible = step.step_visible
-                    operation = dao.store_entity(operation)
-                    cloned_w_step.fk_operation = operation.id
+                    operations.append(operation)
+                cloned_steps.append(cloned_w_step)
 
-                dao.store_entity(cloned_w_step)
+            # Store the operations and steps of all workflows at once, instead of a commit for each of them
+            if operations:
+                operations = dao.store_entities(operations)
+                for cloned_w_step, operation in zip(cloned_steps, operations):
+                    cloned_w_step.fk_operation = operation.id
+            dao.store_entities(cloned_steps)
 
             if operation_group is not None and operation is not None:
                 datatype_group = model.DataTypeGroup(operation_group, operation_id=operation.id,
@@ -311,6 +318,27 @@ class OperationService:
         """
         Public method.
         This should be the common point in calling an adapter- method.
+        When the operation is a workflow step, the next steps of its workflow are executed afterwards, in the
+        same process, with the results of the former steps passed along, already loaded (see WorkflowChain).
+        """
+        workflow_chain = WorkflowChain()
+        result_msg = self._execute_operation(operation, adapter_instance, temp_files, workflow_chain, **kwargs)
+
+        ### Try to find next workflow Step. It might throw WorkflowException
+        next_op_id = self.workflow_service.prepare_next_step(operation.id, workflow_chain)
+        while next_op_id is not None:
+            operation = dao.get_operation_by_id(next_op_id)
+            adapter_instance = ABCAdapter.build_adapter(operation.algorithm)
+            parsed_params = utils.parse_json_parameters(operation.parameters)
+            with known_entities(workflow_chain.entities):
+                self._execute_operation(operation, adapter_instance, {}, workflow_chain, **parsed_params)
+            next_op_id = self.workflow_service.prepare_next_step(operation.id, workflow_chain)
+        return result_msg
+
+
+    def _execute_operation(self, operation, adapter_instance, temp_files, workflow_chain, **kwargs):
+        """
+        Execute a single operation, and keep its results in the `workflow_chain`.
         """
         result_msg = ""
         try:
@@ -327,10 +355,11 @@ class OperationService:
 
             disk_space_per_user = TvbProfile.current.MAX_DISK_SPACE
             pending_op_disk_space = dao.compute_disk_size_for_started_ops(operation.fk_launched_by)
-            user_disk_space = dao.compute_user_generated_disk_size(operation.fk_launched_by)    # From kB to Bytes
+            user_disk_space = dao.get_user_disk_size(operation.fk_launched_by)
             available_space = disk_space_per_user - pending_op_disk_space - user_disk_space
 
             result_msg, nr_datatypes = adapter_instance._prelaunch(operation, unique_id, available_space, **params)
+            workflow_chain.add_results(operation.id, adapter_instance.stored_results)
             operation = dao.get_operation_by_id(operation.id)
             ## Update DB stored kwargs for search purposes, to contain only valuable params (no unselected options)
             operation.parameters = json.dumps(kwargs)
@@ -354,23 +383,36 @@ class OperationService:
             msg = "Could not launch Operation with the given input data!"
             self._handle_exception(excep1, temp_files, msg, operation)
 
-        ### Try to find next workflow Step. It might throw WorkflowException
-        next_op_id = self.workflow_service.prepare_next_step(operation.id)
-        self.launch_operation(next_op_id)
         return result_msg
 
 
     def _send_to_cluster(self, operations, adapter_instance, current_username="unknown"):
-        """ Initiate operation on cluster"""
-        for operation in operations:
-            try:
-                BACKEND_CLIENT.execute(str(operation.id), current_username, adapter_instance)
-            except Exception as excep:
-                self._handle_exception(excep, {}, "Could not start operation!", operation)
+        """ Initiate operations on cluster, all of them in one batch"""
+        try:
+            BACKEND_CLIENT.execute_batch([str(operation.id) for operation in operations],
+                                         current_username, adapter_instance)
+        except Exception as excep:
+            for operation in operations[:-1]:
+                self.workflow_service.persist_operation_state(operation, model.STATUS_ERROR, unicode(excep))
+                self.workflow_service.update_executed_workflow_state(operation)
+            self._handle_exception(excep, {}, "Could not start operation!", operations[-1])
 
         return operations
 
 
+    def launch_operations(self, operation_ids):
+        """
+        Send a batch of already prepared operations (e.g. the range of a PSE) to the backend, at once.
+        All operations are expected to share the algorithm and the user who launched them.
+        """
+        if not operation_ids:
+            return
+        operations = dao.get_operations_by_ids(operation_ids)
+        first_operation = dao.get_operation_by_id(operation_ids[0])
+        adapter_instance = ABCAdapter.build_adapter(first_operation.algorithm)
+        self._send_to_cluster(operations, adapter_instance, first_operation.user.username)
+
+
     def launch_operation(self, operation_id, send_to_cluster=False, adapter_instance=None):
         """
         Method exposed for Burst-Workflow related calls.
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Process-wide cache of serialized DataType payloads (e.g. JSON or binary attributes sent to visualizers).
+
+DataTypes do not change once the operation which created them has finished, so a payload computed
+for a given (DataType GID, attribute, parameters) key stays valid until the DataType gets removed.
+The cache is a bounded LRU: most recently used payloads are kept in memory, older ones are spilled
+to files in the TVB temporary folder, and the least recently used are dropped when the disk budget
+is exceeded as well.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import os
+import shutil
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+from tvb.basic.profile import TvbProfile
+from tvb.basic.logger.builder import get_logger
+
+
+LOG = get_logger(__name__)
+
+
+
+class CachedPayload(object):
+    """
+    One serialized payload, with the response headers which go with it.
+    The payload is None when it was spilled to disk.
+    """
+
+    def __init__(self, key, gids, payload, headers):
+        self.key = key
+        self.gids = gids
+        self.payload = payload
+        self.headers = headers
+        self.size = len(payload)
+
+
+
+class PayloadCache(object):
+    """
+    LRU cache of payloads, bounded both in memory and on disk. All public methods are thread safe.
+    """
+
+    MAX_MEMORY = 256 * 1024 ** 2
+    MAX_DISK = 2 * 1024 ** 3
+
+
+    def __init__(self, max_memory=MAX_MEMORY, max_disk=MAX_DISK, spill_folder=None):
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self._spill_folder = spill_folder
+        self._entries = OrderedDict()
+        self._keys_by_gid = {}
+        self._memory_size = 0
+        self._disk_size = 0
+        self._lock = threading.RLock()
+
+
+    @staticmethod
+    def make_key(*parts):
+        """
+        Build a key (also used as strong ETag) from the DataType GID, attribute name and parameters.
+        """
+        return '"%s"' % hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+    @property
+    def spill_folder(self):
+        if self._spill_folder is None:
+            self._spill_folder = os.path.join(TvbProfile.current.TVB_TEMP_FOLDER, "payload_cache_%d" % os.getpid())
+        return self._spill_folder
+
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+
+    def get(self, key):
+        """
+        :returns: a tuple (payload, headers), or None when the key is not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            del self._entries[key]
+            self._entries[key] = entry
+            if entry.payload is not None:
+                return entry.payload, entry.headers
+            try:
+                with open(self._spill_path(key), "rb") as spill_file:
+                    return spill_file.read(), entry.headers
+            except IOError:
+                LOG.warning("Spilled payload %s could not be read." % key)
+                self._remove(entry)
+                return None
+
+
+    def put(self, key, gids, payload, headers=None):
+        """
+        Store a payload, computed from the DataTypes with the given GIDs.
+        """
+        entry = CachedPayload(key, list(gids), payload, dict(headers or {}))
+        if entry.size > self.max_disk:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(self._entries[key])
+            self._entries[key] = entry
+            for gid in entry.gids:
+                self._keys_by_gid.setdefault(gid, set()).add(key)
+            self._memory_size += entry.size
+            self._make_room()
+
+
+    def invalidate(self, gid):
+        """
+        Drop all the payloads computed from a DataType (to be called when the DataType gets removed).
+        """
+        with self._lock:
+            for key in list(self._keys_by_gid.get(gid, [])):
+                if key in self._entries:
+                    self._remove(self._entries[key])
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_gid.clear()
+            self._memory_size = 0
+            self._disk_size = 0
+            if self._spill_folder is not None and os.path.exists(self._spill_folder):
+                shutil.rmtree(self._spill_folder, ignore_errors=True)
+
+
+    @property
+    def memory_size(self):
+        return self._memory_size
+
+
+    @property
+    def disk_size(self):
+        return self._disk_size
+
+
+    # -------------- Private methods (called with the cache lock held) --------------
+    def _spill_path(self, key):
+        return os.path.join(self.spill_folder, key.strip('"'))
+
+
+    def _spill(self, entry):
+        """
+        Move a payload from memory to disk. When it can not be written, it is dropped.
+        """
+        try:
+            if not os.path.exists(self.spill_folder):
+                os.makedirs(self.spill_folder)
+            with open(self._spill_path(entry.key), "wb") as spill_file:
+                spill_file.write(entry.payload)
+        except (IOError, OSError):
+            LOG.exception("Could not spill payload %s on disk." % entry.key)
+            self._remove(entry)
+            return
+        entry.payload = None
+        self._memory_size -= entry.size
+        self._disk_size += entry.size
+
+
+    def _remove(self, entry):
+        if self._entries.get(entry.key) is entry:
+            del self._entries[entry.key]
+        for gid in entry.gids:
+            keys = self._keys_by_gid.get(gid)
+            if keys is not None:
+                keys.discard(entry.key)
+                if not keys:
+                    del self._keys_by_gid[gid]
+        if entry.payload is not None:
+            self._memory_size -= entry.size
+        else:
+            self._disk_size -= entry.size
+            try:
+                os.remove(self._spill_path(entry.key))
+            except OSError:
+                pass
+
+
+    def _make_room(self):
+        """
+        Spill least recently used payloads while over the memory budget, then drop the least
+        recently used spilled ones while over the disk budget.
+        """
+        for entry in list(self._entries.values()):
+            if self._memory_size <= self.max_memory:
+                break
+            if entry.payload is not None:
+                self._spill(entry)
+        for entry in list(self._entries.values()):
+            if self._disk_size <= self.max_disk:
+                break
+            if entry.payload is None:
+                self._remove(entry)
+
+
+
+PAYLOAD_CACHE = PayloadCache()
+atexit.register(PAYLOAD_CACHE.clear)
@@ -56,6 +56,7 @@ from tvb.core.entities.file.exceptions import FileStructureException
 from tvb.core.services.exceptions import StructureException, ProjectServiceException
 from tvb.core.services.exceptions import RemoveDataTypeException
 from tvb.core.services.user_service import UserService
+from tvb.core.services.payload_cache import PAYLOAD_CACHE
 from tvb.core.adapters.abcadapter import ABCAdapter
 from tvb.core.adapters.exceptions import IntrospectionException
 
@@ -463,58 +464,48 @@ class ProjectService:
         In case of a problem, will return an empty list.
         """
         metadata_list = []
-        dt_list = dao.get_data_in_project(project.id, visibility_filter, filter_value)
+        dt_list = dao.get_data_in_project_columns(project.id, visibility_filter, filter_value)
 
         for dt in dt_list:
             # Prepare the DT results from DB, for usage in controller, by converting into DataTypeMetaData objects
             data = {}
-            is_group = False
-            group_op = None
-            dt_entity = dao.get_datatype_by_gid(dt.gid)
-            if dt_entity is None:
-                self.logger.warning("Ignored entity (possibly removed DT class)" + str(dt))
-                continue
             ## Filter by dt.type, otherwise Links to individual DT inside a group will be mistaken
-            if dt.type == "DataTypeGroup" and dt.parent_operation.operation_group is not None:
-                is_group = True
-                group_op = dt.parent_operation.operation_group
+            is_group = dt['type'] == "DataTypeGroup" and dt['operation_group_id'] is not None
 
             # All these fields are necessary here for dynamic Tree levels.
-            data[DataTypeMetaData.KEY_DATATYPE_ID] = dt.id
-            data[DataTypeMetaData.KEY_GID] = dt.gid
-            data[DataTypeMetaData.KEY_NODE_TYPE] = dt.type
-            data[DataTypeMetaData.KEY_STATE] = dt.state
-            data[DataTypeMetaData.KEY_SUBJECT] = str(dt.subject)
-            data[DataTypeMetaData.KEY_TITLE] = dt_entity.display_name
-            data[DataTypeMetaData.KEY_RELEVANCY] = dt.visible
-            data[DataTypeMetaData.KEY_LINK] = dt.parent_operation.fk_launched_in != project.id
-
-            data[DataTypeMetaData.KEY_TAG_1] = dt.user_tag_1 if dt.user_tag_1 else ''
-            data[DataTypeMetaData.KEY_TAG_2] = dt.user_tag_2 if dt.user_tag_2 else ''
-            data[DataTypeMetaData.KEY_TAG_3] = dt.user_tag_3 if dt.user_tag_3 else ''
-            data[DataTypeMetaData.KEY_TAG_4] = dt.user_tag_4 if dt.user_tag_4 else ''
-            data[DataTypeMetaData.KEY_TAG_5] = dt.user_tag_5 if dt.user_tag_5 else ''
+            data[DataTypeMetaData.KEY_DATATYPE_ID] = dt['id']
+            data[DataTypeMetaData.KEY_GID] = dt['gid']
+            data[DataTypeMetaData.KEY_NODE_TYPE] = dt['type']
+            data[DataTypeMetaData.KEY_STATE] = dt['state']
+            data[DataTypeMetaData.KEY_SUBJECT] = str(dt['subject'])
+            data[DataTypeMetaData.KEY_TITLE] = dt['display_name']
+            data[DataTypeMetaData.KEY_RELEVANCY] = dt['visible']
+            data[DataTypeMetaData.KEY_LINK] = dt['fk_launched_in'] != project.id
+
+            data[DataTypeMetaData.KEY_TAG_1] = dt['user_tag_1'] if dt['user_tag_1'] else ''
+            data[DataTypeMetaData.KEY_TAG_2] = dt['user_tag_2'] if dt['user_tag_2'] else ''
+            data[DataTypeMetaData.KEY_TAG_3] = dt['user_tag_3'] if dt['user_tag_3'] else ''
+            data[DataTypeMetaData.KEY_TAG_4] = dt['user_tag_4'] if dt['user_tag_4'] else ''
+            data[DataTypeMetaData.KEY_TAG_5] = dt['user_tag_5'] if dt['user_tag_5'] else ''
 
             # Operation related fields:
-            operation_name = CommonDetails.compute_operation_name(
-                dt.parent_operation.algorithm.algorithm_category.displayname,
-                dt.parent_operation.algorithm.displayname)
+            operation_name = CommonDetails.compute_operation_name(dt['category_name'], dt['algorithm_name'])
             data[DataTypeMetaData.KEY_OPERATION_TYPE] = operation_name
-            data[DataTypeMetaData.KEY_OPERATION_ALGORITHM] = dt.parent_operation.algorithm.displayname
-            data[DataTypeMetaData.KEY_AUTHOR] = dt.parent_operation.user.username
-            data[DataTypeMetaData.KEY_OPERATION_TAG] = group_op.name if is_group else dt.parent_operation.user_group
-            data[DataTypeMetaData.KEY_OP_GROUP_ID] = group_op.id if is_group else None
+            data[DataTypeMetaData.KEY_OPERATION_ALGORITHM] = dt['algorithm_name']
+            data[DataTypeMetaData.KEY_AUTHOR] = dt['author']
+            data[DataTypeMetaData.KEY_OPERATION_TAG] = dt['operation_group_name'] if is_group else dt['user_group']
+            data[DataTypeMetaData.KEY_OP_GROUP_ID] = dt['operation_group_id'] if is_group else None
 
-            completion_date = dt.parent_operation.completion_date
+            completion_date = dt['completion_date']
             string_year = completion_date.strftime(MONTH_YEAR_FORMAT) if completion_date is not None else ""
             string_month = completion_date.strftime(DAY_MONTH_YEAR_FORMAT) if completion_date is not None else ""
             data[DataTypeMetaData.KEY_DATE] = date2string(completion_date) if (completion_date is not None) else ''
             data[DataTypeMetaData.KEY_CREATE_DATA_MONTH] = string_year
             data[DataTypeMetaData.KEY_CREATE_DATA_DAY] = string_month
 
-            data[DataTypeMetaData.KEY_BURST] = dt._parent_burst.name if dt._parent_burst is not None else '-None-'
+            data[DataTypeMetaData.KEY_BURST] = dt['burst_name'] if dt['burst_name'] is not None else '-None-'
 
-            metadata_list.append(DataTypeMetaData(data, dt.invalid))
+            metadata_list.append(DataTypeMetaData(data, dt['invalid']))
 
         return StructureNode.metadata2tree(metadata_list, first_level, second_level, project.id, project.name)
 
@@ -574,7 +565,8 @@ class ProjectService:
                     self.structure_helper.move_datatype(datatype, to_project, str(new_op.id))
                     datatype.set_operation_id(new_op.id)
                     datatype.parent_operation = new_op
-                    dao.store_entity(datatype)
+                    # The size of the DataType moves to the disk usage of the system user
+                    dao.store_datatype(datatype)
                     dao.remove_entity(model.Links, links[0].id)
             else:
                 specific_remover = get_remover(datatype.type)(datatype)
@@ -632,6 +624,7 @@ class ProjectService:
             data_list = dao.get_datatypes_from_datatype_group(datatype.id)
             for adata in data_list:
                 self._remove_project_node_files(project_id, adata.gid, skip_validation)
+                PAYLOAD_CACHE.invalidate(adata.gid)
                 if adata.fk_from_operation not in operations_set:
                     operations_set.append(adata.fk_from_operation)
 
@@ -641,6 +634,7 @@ class ProjectService:
         else:
             self.logger.debug("Removing datatype %s" % datatype)
             self._remove_project_node_files(project_id, datatype.gid, skip_validation)
+        PAYLOAD_CACHE.invalidate(datatype.gid)
 
         ## Remove Operation entity in case no other DataType needs them.
         project = dao.get_project_by_id(project_id)
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Channel of burst status changes, which browser pages wait on (long-poll), instead of asking
+for the status of every displayed burst, every few seconds.
+
+Only burst events reach the pages, each with the project of its burst, for a page to receive only the
+events of its project. Burst transitions happening in the web process are published directly, by the
+WorkflowService. Operations (and thus most bursts) finish in backend processes, which can not publish here,
+so the BurstStatusWatcher checks the running bursts in DB (with one query for all of them, and only while
+some page is listening), and publishes their transitions.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import threading
+from time import time
+from collections import deque
+from tvb.basic.logger.builder import get_logger
+from tvb.core.entities.storage import dao
+
+
+KIND_BURST = "burst"
+
+
+
+class StatusEvents(object):
+    """
+    Bounded log of status events, numbered in sequence, which listeners can wait on.
+    """
+
+    def __init__(self, max_events=1000, max_listeners=8):
+        """
+        :param max_events: number of most recent events retained, for listeners to catch up with
+        :param max_listeners: maximum number of requests waiting at the same time; each of them holds
+            a server thread, thus further listeners are answered immediately
+        """
+        self.max_listeners = max_listeners
+        self._events = deque(maxlen=max_events)
+        self._last_seq = 0
+        self._listeners = 0
+        self._last_listen_time = 0
+        self._condition = threading.Condition()
+
+
+    @property
+    def last_seq(self):
+        return self._last_seq
+
+
+    def publish(self, kind, entity_id, status, **details):
+        """
+        Record a status change, and wake up the listeners waiting for it.
+        """
+        with self._condition:
+            self._last_seq += 1
+            event = dict(details, seq=self._last_seq, kind=kind, id=entity_id, status=status)
+            self._events.append(event)
+            self._condition.notify_all()
+        return event
+
+
+    def is_listened(self, within=60):
+        """
+        :returns: True when a listener waits now, or asked for events in the last `within` seconds
+        """
+        return self._listeners > 0 or time() - self._last_listen_time < within
+
+
+    def wait(self, after_seq, timeout, project_id=None):
+        """
+        Wait until events newer than `after_seq` get published, or `timeout` seconds pass.
+
+        :param project_id: when given, only events published with this project_id are returned (and waited for)
+        :returns: tuple (last_seq, events), with events None when the listener should reload the full status
+            instead, because `after_seq` is negative (first call), comes from before a restart, or refers
+            to events no longer retained
+        """
+        with self._condition:
+            self._last_listen_time = time()
+            events = self._events_after(after_seq, project_id)
+            if events == [] and timeout > 0 and self._listeners < self.max_listeners:
+                self._listeners += 1
+                try:
+                    end_time = time() + timeout
+                    while events == [] and time() < end_time:
+                        self._condition.wait(end_time - time())
+                        events = self._events_after(after_seq, project_id)
+                finally:
+                    self._listeners -= 1
+                    self._last_listen_time = time()
+            return self._last_seq, events
+
+
+    def _events_after(self, after_seq, project_id=None):
+        if after_seq < 0 or after_seq > self._last_seq:
+            return None
+        if after_seq == self._last_seq:
+            return []
+        if after_seq < self._events[0]['seq'] - 1:
+            return None
+        return [event for event in self._events if event['seq'] > after_seq and
+                (project_id is None or event.get('project_id') == project_id)]
+
+
+
+class BurstStatusWatcher(object):
+    """
+    Publish the status transitions of bursts, as found in DB, by comparing the running bursts between checks.
+    """
+
+    def __init__(self, events):
+        self.events = events
+        self.logger = get_logger(self.__class__.__module__)
+        self._running_ids = None
+
+
+    def check(self):
+        """
+        To be called periodically. Costs one query when nothing changed, and nothing when nobody listens.
+        """
+        if not self.events.is_listened():
+            # Transitions are not tracked while nobody listens, start fresh afterwards
+            self._running_ids = None
+            return
+        try:
+            running_ids = set(dao.get_running_burst_ids())
+            if self._running_ids is not None:
+                # Bursts which started, or left the running state since the last check
+                changed_ids = running_ids.symmetric_difference(self._running_ids)
+                for burst in dao.get_bursts_by_ids(list(changed_ids)):
+                    self.events.publish(KIND_BURST, burst.id, burst.status, project_id=burst.fk_project)
+            self._running_ids = running_ids
+        except Exception:
+            self.logger.exception("Could not check the status of running bursts")
+
+
+
+STATUS_EVENTS = StatusEvents()
+BURST_STATUS_WATCHER = BurstStatusWatcher(STATUS_EVENTS)
@@ -312,5 +312,8 @@ class UserService:
         return dao.get_user_by_id(user_id)
 
     @staticmethod
-    def compute_user_generated_disk_size(user_id):
-        return dao.compute_user_generated_disk_size(user_id)
+    def get_user_disk_size(user_id):
+        """
+        :returns: disk space (kB) used by the DataTypes generated by a user, as counted for the disk quota
+        """
+        return dao.get_user_disk_size(user_id)
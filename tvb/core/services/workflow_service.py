@@ -40,6 +40,7 @@ from tvb.core.entities.file.files_helper import FilesHelper
 from tvb.core.entities.storage import dao
 from tvb.core.entities import model
 from tvb.core.services.exceptions import WorkflowInterStepsException
+from tvb.core.services.status_events import STATUS_EVENTS, KIND_BURST
 from tvb.core.entities.transient.burst_configuration_entities import WorkflowStepConfiguration
 from types import IntType
 
@@ -49,6 +50,72 @@ STATIC_PARAMS_KEY = "static_params"
 EMPTY_OPTION = "empty"
 
 
+
+class WorkflowChain(object):
+    """
+    State kept while the steps of a workflow are executed one after the other, in the same process:
+    the steps of the workflow, loaded once, and the DataTypes resulted from the steps already executed,
+    which are passed to the next steps without loading them again from DB and H5 files.
+    Each step is still executed and recorded as a separate Operation.
+    """
+
+    def __init__(self):
+        self._steps = None
+        self._results = {}
+        # DataTypes resulted from the executed steps, by GID (see tvb.core.entities.load.known_entities)
+        self.entities = {}
+
+
+    def get_steps(self, operation_id):
+        """
+        :returns: the WorkflowStep executed by the operation with the given id, and the next WorkflowStep
+            from the same workflow (any of them can be None)
+        """
+        executed_step = None
+        if self._steps is not None:
+            executed_step = next((step for step in self._steps if step.fk_operation == operation_id), None)
+        if executed_step is None:
+            executed_step = dao.get_workflow_step_for_operation(operation_id)
+            if executed_step is None:
+                return None, None
+            self._steps = dao.get_workflow_steps(executed_step.fk_workflow) or []
+        return executed_step, self.get_step(executed_step.fk_workflow, executed_step.step_index + 1)
+
+
+    def get_step(self, workflow_id, step_index):
+        """
+        :returns: WorkflowStep entity or None.
+        """
+        for step in self._steps or []:
+            if step.fk_workflow == workflow_id and step.step_index == step_index:
+                return step
+        return dao.get_workflow_step_by_step_index(workflow_id, step_index)
+
+
+    def add_results(self, operation_id, datatypes):
+        """
+        Keep the DataTypes stored by an executed operation, for the next steps.
+        As dao.get_results_for_operation, leave out SimulationState and DataTypeGroup entities, thus a
+        dynamic parameter with index 0 on a simulator step still gets the first TimeSeries.
+        """
+        excluded_types = (dao.EXCEPTION_DATATYPE_GROUP, dao.EXCEPTION_DATATYPE_SIMULATION)
+        # A DataType can be stored more than once (e.g. SimulationState), keep its last version
+        by_id = dict((datatype.id, datatype) for datatype in datatypes if datatype.type not in excluded_types)
+        self._results[operation_id] = [by_id[dt_id] for dt_id in sorted(by_id)]
+        for datatype in by_id.values():
+            self.entities[datatype.gid] = datatype
+
+
+    def get_results(self, operation_id):
+        """
+        :returns: the DataTypes resulted from an operation, ordered as dao.get_results_for_operation does
+        """
+        if operation_id in self._results:
+            return self._results[operation_id]
+        return dao.get_results_for_operation(operation_id)
+
+
+
 class WorkflowService:
     """
     service layer for work-flow entity.
@@ -90,15 +157,14 @@ class WorkflowService:
         :param simulator_id: the id of the simulator adapter
         :param operations: a list with the operations created for the simulator steps
         """
-        workflows = []
-        for operation in operations:
-            new_workflow = model.Workflow(project_id, burst_id)
-            new_workflow = dao.store_entity(new_workflow)
-            workflows.append(new_workflow)
-            simulation_step = model.WorkflowStep(algorithm_id=simulator_id, workflow_id=new_workflow.id,
+        workflows = dao.store_entities([model.Workflow(project_id, burst_id) for _ in operations])
+        simulation_steps = []
+        for operation, workflow in zip(operations, workflows):
+            simulation_step = model.WorkflowStep(algorithm_id=simulator_id, workflow_id=workflow.id,
                                                  step_index=simulator_index, static_param=operation.parameters)
             simulation_step.fk_operation = operation.id
-            dao.store_entity(simulation_step)
+            simulation_steps.append(simulation_step)
+        dao.store_entities(simulation_steps)
         return workflows
         
 
@@ -116,14 +182,18 @@ class WorkflowService:
         workflow_step.dynamic_param = dynamic_params
 
 
-    def prepare_next_step(self, last_executed_op_id):
+    def prepare_next_step(self, last_executed_op_id, chain=None):
         """
         If the operation with id 'last_executed_op_id' resulted after
         the execution of a workflow step then this method will launch
         the operation corresponding to the next step from the workflow.
+
+        :param chain: WorkflowChain with the steps and results already loaded, when steps are executed in sequence
         """
+        if chain is None:
+            chain = WorkflowChain()
         try:
-            current_step, next_workflow_step = self._get_data(last_executed_op_id)
+            current_step, next_workflow_step = chain.get_steps(last_executed_op_id)
             if next_workflow_step is not None:
                 operation = dao.get_operation_by_id(next_workflow_step.fk_operation)
                 dynamic_param_names = next_workflow_step.dynamic_workflow_param_names
@@ -131,11 +201,10 @@ class WorkflowService:
                     op_params = json.loads(operation.parameters)
                     for param_name in dynamic_param_names:
                         dynamic_param = op_params[param_name]
-                        former_step = dao.get_workflow_step_by_step_index(next_workflow_step.fk_workflow,
-                                                                          dynamic_param[
-                                                                              WorkflowStepConfiguration.STEP_INDEX_KEY])
+                        former_step = chain.get_step(next_workflow_step.fk_workflow,
+                                                     dynamic_param[WorkflowStepConfiguration.STEP_INDEX_KEY])
                         if type(dynamic_param[WorkflowStepConfiguration.DATATYPE_INDEX_KEY]) is IntType:
-                            datatypes = dao.get_results_for_operation(former_step.fk_operation)
+                            datatypes = chain.get_results(former_step.fk_operation)
                             op_params[param_name] = datatypes[
                                 dynamic_param[WorkflowStepConfiguration.DATATYPE_INDEX_KEY]].gid
                         else:
@@ -239,3 +308,4 @@ class WorkflowService:
             burst_entity.error_message = "Error when updating Burst Status"
             burst_entity.finish_time = datetime.now()
             dao.store_entity(burst_entity)
+        STATUS_EVENTS.publish(KIND_BURST, burst_entity.id, burst_status, project_id=burst_entity.fk_project)
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Statistics about arrays stored in H5 (min, max, mean, variance, NaN count, histogram), computed by reducer
+objects which are updated chunk by chunk. Thus arrays written with `store_data_chunk` get the same
+meta-data as if the full array had been available at once, without ever reading it back.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import numpy
+from tvb.basic.logger.builder import get_logger
+from tvb.basic.traits.types_mapped_light import MappedTypeLight
+
+
+LOGGER = get_logger(__name__)
+
+METADATA_ARRAY_STD = "Standard deviation"
+METADATA_ARRAY_NAN_COUNT = "NaN count"
+METADATA_ARRAY_HISTOGRAM = "Histogram"
+METADATA_ARRAY_HISTOGRAM_RANGE = "Histogram range"
+
+
+
+class ArrayReducer(object):
+    """
+    Base class for a statistic, computed incrementally over the chunks of an array.
+    Reducers get as input the (flattened) numeric values of every chunk, NaNs included.
+    When `non_zero` is set, only the values different from zero are given.
+    """
+
+    def __init__(self, key, non_zero=False):
+        self.key = key
+        self.non_zero = non_zero
+
+
+    @property
+    def name(self):
+        """
+        Meta-data key to be used in log messages about this reducer.
+        """
+        return self.key
+
+
+    def update(self, values):
+        """
+        Merge the statistic over `values` with the result of the previous chunks.
+        """
+        raise NotImplementedError()
+
+
+    def results(self):
+        """
+        :returns: dictionary {meta-data key: value}, empty while no value was seen
+        """
+        raise NotImplementedError()
+
+
+
+class MinReducer(ArrayReducer):
+    """
+    Minimum of the array. As with numpy.min, it is NaN when the array holds any NaN.
+    """
+
+    def __init__(self, key, non_zero=False):
+        super(MinReducer, self).__init__(key, non_zero)
+        self.value = None
+
+
+    def update(self, values):
+        if values.size:
+            chunk_min = values.min()
+            self.value = chunk_min if self.value is None else numpy.minimum(self.value, chunk_min)
+
+
+    def results(self):
+        return {} if self.value is None else {self.key: self.value}
+
+
+
+class MaxReducer(MinReducer):
+
+    def update(self, values):
+        if values.size:
+            chunk_max = values.max()
+            self.value = chunk_max if self.value is None else numpy.maximum(self.value, chunk_max)
+
+
+
+class MomentsReducer(ArrayReducer):
+    """
+    Count, mean and variance, merged between chunks with the parallel form of Welford's algorithm.
+    Results are given for the mean, variance and standard deviation keys which are not None.
+    As with numpy.mean, results are NaN when the array holds any NaN.
+    """
+
+    def __init__(self, mean_key, var_key=None, std_key=None, non_zero=False):
+        super(MomentsReducer, self).__init__(mean_key, non_zero)
+        self.var_key = var_key
+        self.std_key = std_key
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+
+    @property
+    def name(self):
+        return self.key or self.var_key or self.std_key
+
+
+    def update(self, values):
+        chunk_count = values.size
+        if chunk_count == 0:
+            return
+        chunk_mean = values.mean(dtype=numpy.result_type(values.dtype, numpy.float64))
+        chunk_m2 = numpy.square(numpy.abs(values - chunk_mean)).sum(dtype=numpy.float64)
+
+        total = self.count + chunk_count
+        delta = chunk_mean - self.mean
+        self.mean += delta * chunk_count / total
+        self.m2 += chunk_m2 + numpy.abs(delta) ** 2 * self.count * chunk_count / total
+        self.count = total
+
+
+    def results(self):
+        if self.count == 0:
+            return {}
+        result = {}
+        variance = self.m2 / self.count
+        if self.key is not None:
+            result[self.key] = self.mean
+        if self.var_key is not None:
+            result[self.var_key] = variance
+        if self.std_key is not None:
+            result[self.std_key] = numpy.sqrt(variance)
+        return result
+
+
+
+class HistogramReducer(ArrayReducer):
+    """
+    Histogram sketch with a fixed number of equal bins. When new values fall outside the current range,
+    the bin width is doubled (merging pairs of neighbour bins), until the range covers all values.
+    NaN values are not counted in any bin.
+    """
+
+    def __init__(self, key, range_key, bins=32):
+        super(HistogramReducer, self).__init__(key)
+        self.range_key = range_key
+        self.bins = bins + bins % 2
+        self.low = None
+        self.width = None
+        self.counts = numpy.zeros(self.bins, dtype=numpy.int64)
+
+
+    def update(self, values):
+        if values.dtype.kind in 'fc':
+            values = values[~numpy.isnan(values)]
+        if values.size == 0:
+            return
+        values_min, values_max = values.min(), values.max()
+        if self.low is None:
+            self.low = float(values_min)
+            self.width = float(values_max - values_min) / self.bins or 1.0 / self.bins
+
+        half = self.bins // 2
+        while values_min < self.low or values_max > self.high:
+            merged = self.counts.reshape(half, 2).sum(axis=1)
+            if values_min < self.low:
+                self.low -= self.width * self.bins
+                self.counts = numpy.concatenate((numpy.zeros(half, dtype=numpy.int64), merged))
+            else:
+                self.counts = numpy.concatenate((merged, numpy.zeros(half, dtype=numpy.int64)))
+            self.width *= 2
+
+        self.counts += numpy.histogram(values, bins=self.bins, range=(self.low, self.high))[0]
+
+
+    @property
+    def high(self):
+        return self.low + self.width * self.bins
+
+
+    def results(self):
+        if self.low is None:
+            return {}
+        return {self.key: self.counts, self.range_key: numpy.array([self.low, self.high])}
+
+
+
+class ArrayStatistics(object):
+    """
+    Set of reducers, selected from the meta-data keys required for one array.
+    Only numeric arrays get statistics; for other arrays (e.g. strings) no meta-data is computed.
+    """
+
+    NUMERIC_KINDS = 'biufc'
+
+    def __init__(self, metadata_keys):
+        self.reducers = []
+        self.nan_count = 0
+        self.count_nans = METADATA_ARRAY_NAN_COUNT in metadata_keys
+        self._add_reducers(metadata_keys)
+        self._needs_non_zero = any(reducer.non_zero for reducer in self.reducers)
+
+
+    def _add_reducers(self, keys):
+        mapped = MappedTypeLight
+
+        def _key(key):
+            return key if key in keys else None
+
+        if mapped.METADATA_ARRAY_MIN in keys:
+            self.reducers.append(MinReducer(mapped.METADATA_ARRAY_MIN))
+        if mapped.METADATA_ARRAY_MAX in keys:
+            self.reducers.append(MaxReducer(mapped.METADATA_ARRAY_MAX))
+        if mapped.METADATA_ARRAY_MIN_NON_ZERO in keys:
+            self.reducers.append(MinReducer(mapped.METADATA_ARRAY_MIN_NON_ZERO, non_zero=True))
+        if mapped.METADATA_ARRAY_MAX_NON_ZERO in keys:
+            self.reducers.append(MaxReducer(mapped.METADATA_ARRAY_MAX_NON_ZERO, non_zero=True))
+
+        moments = (_key(mapped.METADATA_ARRAY_MEAN), _key(mapped.METADATA_ARRAY_VAR), _key(METADATA_ARRAY_STD))
+        if any(moments):
+            self.reducers.append(MomentsReducer(*moments))
+        moments = (_key(mapped.METADATA_ARRAY_MEAN_NON_ZERO), _key(mapped.METADATA_ARRAY_VAR_NON_ZERO))
+        if any(moments):
+            self.reducers.append(MomentsReducer(*moments, non_zero=True))
+
+        if METADATA_ARRAY_HISTOGRAM in keys:
+            self.reducers.append(HistogramReducer(METADATA_ARRAY_HISTOGRAM, METADATA_ARRAY_HISTOGRAM_RANGE))
+
+
+    def update(self, data):
+        """
+        Update all statistics with a new chunk of the array.
+        """
+        values = numpy.asarray(data).ravel()
+        if values.dtype.kind not in self.NUMERIC_KINDS:
+            if self.reducers or self.count_nans:
+                LOGGER.debug("No statistics computed on array of type %s" % values.dtype)
+            self.reducers = []
+            self.count_nans = False
+            return
+        if self.count_nans and values.dtype.kind in 'fc':
+            self.nan_count += numpy.count_nonzero(numpy.isnan(values))
+        non_zero_values = values[values != 0] if self._needs_non_zero else None
+
+        for reducer in list(self.reducers):
+            try:
+                reducer.update(non_zero_values if reducer.non_zero else values)
+            except Exception:
+                ## Drop the statistic, as its state is no longer valid.
+                LOGGER.exception("Could not compute %s on array of type %s" % (reducer.name, values.dtype))
+                self.reducers.remove(reducer)
+
+
+    def to_metadata(self):
+        """
+        :returns: dictionary {meta-data key: value} to be stored in H5 for the array
+        """
+        result = {}
+        for reducer in self.reducers:
+            result.update(reducer.results())
+        if self.count_nans:
+            result[METADATA_ARRAY_NAN_COUNT] = self.nan_count
+        return result
@@ -49,10 +49,13 @@ from tvb.basic.traits.exceptions import ValidationException, MissingEntityExcept
 from tvb.basic.logger.builder import get_logger
 from tvb.basic.profile import TvbProfile
 from tvb.core.traits.core import compute_table_name
+from tvb.core.traits.array_statistics import ArrayStatistics, METADATA_ARRAY_STD, METADATA_ARRAY_NAN_COUNT
+from tvb.core.traits.array_statistics import METADATA_ARRAY_HISTOGRAM
 from tvb.core.entities import model
 from tvb.core.entities.storage import dao
 from tvb.core.entities.file.files_helper import FilesHelper
 from tvb.core.entities.file.hdf5_storage_manager import HDF5StorageManager
+from tvb.core.entities.file.hdf5_storage_policy import KWARG_STORAGE_POLICY, GROW_MAJOR, get_datatype_storage_policy
 from tvb.core.entities.file.exceptions import MissingDataSetException
 
 
@@ -68,6 +71,10 @@ class MappedType(model.DataType, mapped.MappedTypeLight):
     logger = get_logger(__name__)
     _ui_complex_datatype = False
 
+    METADATA_ARRAY_STD = METADATA_ARRAY_STD
+    METADATA_ARRAY_NAN_COUNT = METADATA_ARRAY_NAN_COUNT
+    METADATA_ARRAY_HISTOGRAM = METADATA_ARRAY_HISTOGRAM
+
 
     def __init__(self, **kwargs):
         """
@@ -186,6 +193,10 @@ class MappedType(model.DataType, mapped.MappedTypeLight):
     # ---------------------------- FILE STORAGE -------------------------------
     ROOT_NODE_PATH = "/"
 
+    ### Overwrite in subclasses as {attribute name: StoragePolicy}, to control chunking and compression
+    ### of arrays in H5. A `storage_policy` keyword on the traited Array has the same effect.
+    STORAGE_POLICIES = {}
+
 
     def store_data(self, data_name, data, where=ROOT_NODE_PATH):
         """
@@ -196,7 +207,7 @@ class MappedType(model.DataType, mapped.MappedTypeLight):
             :param where: represents the path where to store our dataset (e.g. /data/info)
         """
         store_manager = self._get_file_storage_mng()
-        store_manager.store_data(data_name, data, where)
+        store_manager.store_data(data_name, data, where, self.get_storage_policy(data_name))
         ### Also store Array specific meta-data.
         meta_dictionary = self.__retrieve_array_metadata(data, data_name)
         self.set_metadata(meta_dictionary, data_name, where=where)
@@ -217,15 +228,25 @@ class MappedType(model.DataType, mapped.MappedTypeLight):
         if isinstance(data, list):
             data = numpy.array(data)
         store_manager = self._get_file_storage_mng()
-        store_manager.append_data(data_name, data, grow_dimension, close_file, where)
+        storage_policy = self.get_storage_policy(data_name) or GROW_MAJOR
+        store_manager.append_data(data_name, data, grow_dimension, close_file, where, storage_policy)
 
         ### Start updating array meta-data after new chunk of data stored. 
-        new_metadata = self.__retrieve_array_metadata(data, data_name)
-        previous_meta = dict()
-        if data_name in self._current_metadata:
-            previous_meta = self._current_metadata[data_name]
-        self.__merge_metadata(new_metadata, previous_meta, data)
-        self._current_metadata[data_name] = new_metadata
+        self.__update_array_statistics(data, data_name)
+
+
+    def get_storage_policy(self, data_name):
+        """
+        :param data_name: name of the traited array attribute
+        :returns: the StoragePolicy configured for the attribute, or None for the default H5 layout
+        """
+        if data_name in self.STORAGE_POLICIES:
+            return self.STORAGE_POLICIES[data_name]
+        if data_name in self.trait:
+            storage_policy = self.trait[data_name].trait.inits.kwd.get(KWARG_STORAGE_POLICY)
+            if storage_policy is not None:
+                return storage_policy
+        return get_datatype_storage_policy(self.__class__, data_name)
 
 
     def get_data(self, data_name, data_slice=None, where=ROOT_NODE_PATH, ignore_errors=False, close_file=True):
@@ -364,8 +385,9 @@ class MappedType(model.DataType, mapped.MappedTypeLight):
                     else:
                         meta_dictionary[capitalized_name] = json.dumps(field_value)
 
-        # Now store collected meta data
+        # Now store collected meta data, and the statistics of arrays stored by chunks
         self.set_metadata(meta_dictionary)
+        self._persist_array_metadata()
 
 
     def load_from_metadata(self, meta_dictionary):
@@ -439,11 +461,7 @@ class MappedType(model.DataType, mapped.MappedTypeLight):
         """
         Close file used to store data.
         """
-        for data_name, new_metadata in six.iteritems(self._current_metadata):
-            ## Remove transient metadata, used just for performance issues
-            if self._METADATA_ARRAY_SIZE in new_metadata:
-                del new_metadata[self._METADATA_ARRAY_SIZE]
-            self.set_metadata(new_metadata, data_name)
+        self._persist_array_metadata()
         store_manager = self._get_file_storage_mng()
         store_manager.close_file()
 
@@ -478,70 +496,48 @@ class MappedType(model.DataType, mapped.MappedTypeLight):
     # ---------------------------- ARRAY ATTR METADATA ----------------------------
     # -------- see also store_data, store_data_chunk and close_file----------------
 
+    def __build_array_statistics(self, data_name):
+        """
+        :param data_name: String, representing attribute name.
+        :returns: ArrayStatistics computing the meta-data configured for the attribute,
+                  or None for non traited attributes (e.g. sparse-matrix sub-sections)
+        """
+        if data_name not in self.trait:
+            return None
+        traited_attr = self.trait[data_name].trait.stored_metadata or self.trait[data_name].stored_metadata
+        return ArrayStatistics(traited_attr)
+
+
     def __retrieve_array_metadata(self, data, data_name):
         """
-        :param data: New NumPy array to invoke meta-data methods on.
+        :param data: New NumPy array to compute meta-data on.
         :param data_name: String, representing attribute name.  
         """
-        if data_name not in self.trait:
-            ### Ignore non traited attributes (e.g. sparse-matrix sub-sections).
+        statistics = self.__build_array_statistics(data_name)
+        if statistics is None:
             return dict()
-        traited_attr = self.trait[data_name].trait.stored_metadata or self.trait[data_name].stored_metadata
+        statistics.update(data)
+        return statistics.to_metadata()
 
-        if isinstance(data, list):
-            data = numpy.array(data)
 
-        meta_dictionary = {}
-        for key, value in six.iteritems(self.METADATA_FORMULAS):
-            if key != self.METADATA_ARRAY_SHAPE and key in traited_attr:
-                try:
-                    meta_dictionary[key] = eval(value.replace("$ARRAY$", "data").replace("$MASK$", "data"))
-                except Exception:
-                    self.logger.exception("Could not evaluate %s on %s" % (value, data_name))
-
-        ## Append size only for chunk computing purposes. It will not be stored in H5 in this form
-        ## but we will use H5 native shape support
-        meta_dictionary[self._METADATA_ARRAY_SIZE] = data.size
-        return meta_dictionary
-
-
-    def __merge_metadata(self, result_meta, merge_meta, new_data):
-        """
-        Merge after new chunk added.
-        """
-        if self.METADATA_ARRAY_VAR in result_meta:
-            del result_meta[self.METADATA_ARRAY_VAR]
-        if self.METADATA_ARRAY_VAR_NON_ZERO in result_meta:
-            del result_meta[self.METADATA_ARRAY_VAR_NON_ZERO]
-
-        if (self.METADATA_ARRAY_MIN in merge_meta
-                and merge_meta[self.METADATA_ARRAY_MIN] < result_meta[self.METADATA_ARRAY_MIN]):
-            result_meta[self.METADATA_ARRAY_MIN] = merge_meta[self.METADATA_ARRAY_MIN]
-        if (self.METADATA_ARRAY_MIN_NON_ZERO in merge_meta
-                and merge_meta[self.METADATA_ARRAY_MIN_NON_ZERO] < result_meta[self.METADATA_ARRAY_MIN_NON_ZERO]):
-            result_meta[self.METADATA_ARRAY_MIN_NON_ZERO] = merge_meta[self.METADATA_ARRAY_MIN_NON_ZERO]
-
-        if (self.METADATA_ARRAY_MAX in merge_meta
-                and merge_meta[self.METADATA_ARRAY_MAX] > result_meta[self.METADATA_ARRAY_MAX]):
-            result_meta[self.METADATA_ARRAY_MAX] = merge_meta[self.METADATA_ARRAY_MAX]
-        if (self.METADATA_ARRAY_MAX_NON_ZERO in merge_meta
-                and merge_meta[self.METADATA_ARRAY_MAX_NON_ZERO] > result_meta[self.METADATA_ARRAY_MAX_NON_ZERO]):
-            result_meta[self.METADATA_ARRAY_MAX_NON_ZERO] = merge_meta[self.METADATA_ARRAY_MAX_NON_ZERO]
-
-        if self.METADATA_ARRAY_MEAN in merge_meta and self._METADATA_ARRAY_SIZE in merge_meta:
-            prev_no = merge_meta[self._METADATA_ARRAY_SIZE]
-            curr_no = new_data.size
-            result_meta[self.METADATA_ARRAY_MEAN] = (merge_meta[self.METADATA_ARRAY_MEAN] * prev_no +
-                                                     result_meta[self.METADATA_ARRAY_MEAN] * curr_no) / (prev_no +
-                                                                                                         curr_no)
-            result_meta[self._METADATA_ARRAY_SIZE] = prev_no + curr_no
-        if self.METADATA_ARRAY_MEAN_NON_ZERO in merge_meta and self._METADATA_ARRAY_SIZE_NON_ZERO in merge_meta:
-            prev_no = merge_meta[self._METADATA_ARRAY_SIZE_NON_ZERO]
-            curr_no = new_data.nonzero()[0].shape[0]
-            result_meta[self.METADATA_ARRAY_MEAN_NON_ZERO] = (merge_meta[self.METADATA_ARRAY_MEAN_NON_ZERO] * prev_no +
-                                                              result_meta[self.METADATA_ARRAY_MEAN_NON_ZERO] * curr_no
-                                                              ) / (prev_no + curr_no)
-            result_meta[self._METADATA_ARRAY_SIZE] = prev_no + curr_no
+    def __update_array_statistics(self, data, data_name):
+        """
+        Merge a new chunk into the statistics of the array, kept until the file gets closed.
+        """
+        if data_name not in self._current_metadata:
+            statistics = self.__build_array_statistics(data_name)
+            if statistics is None:
+                return
+            self._current_metadata[data_name] = statistics
+        self._current_metadata[data_name].update(data)
+
+
+    def _persist_array_metadata(self):
+        """
+        Write in H5 the statistics of the arrays stored by chunks so far.
+        """
+        for data_name, statistics in six.iteritems(self._current_metadata):
+            self.set_metadata(statistics.to_metadata(), data_name)
 
     # ---------------------------- END ARRAY ATTR METADATA ------------------------
 
@@ -46,7 +46,6 @@ from tvb.basic.logger.builder import get_logger
 from tvb.core.decorators import user_environment_execution
 
 
-MATLAB = "matlab"
 OCTAVE = "octave"
 
 CHAR_SEPARATOR = "__"
@@ -79,6 +78,16 @@ def url2path(encoded_path):
     return encoded_path.replace(CHAR_SEPARATOR, os.sep).replace(CHAR_SPACE, " ").replace(CHAR_DRIVE, DRIVE_SEP)
 
 
+def build_process_environment():
+    """
+    :returns: environment for a child Python process, able to import everything we can import in here
+    """
+    env = os.environ.copy()
+    env['PYTHONPATH'] = os.pathsep.join(sys.path)
+    # anything that was already in $PYTHONPATH should have been reproduced in sys.path
+    return env
+
+
 def get_unique_file_name(storage_folder, file_name, try_number=0):
     """
     Compute non-existent file name, in storage_folder.
@@ -320,11 +329,11 @@ def get_matlab_executable():
     if sys.platform.startswith('win'):
         split_char = ";"
         octave_exec = OCTAVE + ".exe"
-        matlab_exec = MATLAB + ".exe"
+        matlab_exec = "matlab.exe"
     else:
         split_char = ":"
         octave_exec = OCTAVE
-        matlab_exec = MATLAB
+        matlab_exec = "matlab"
     logger = get_logger(__name__)
     logger.debug("Searching Matlab in path: " + str(os.environ["PATH"]))
     for path in os.environ["PATH"].split(split_char):
@@ -345,60 +354,22 @@ def check_matlab_version(matlab_path):
     """
     Try to get the current version of matlab from a given path.
     """
+    from tvb.adapters.analyzers.matlab_worker import MatlabSession
+
     version = None
     logger = get_logger(__name__)
-    matlab_test_file_name = os.path.join(TvbProfile.current.TVB_STORAGE, 'test_mat_version')
-    matlab_test_file = matlab_test_file_name + '.m'
-    matlab_log_file = os.path.join(TvbProfile.current.TVB_STORAGE, 'version_log.txt')
-
+    session = MatlabSession(matlab_path, timeout=120)
     try:
-        matlab_version_txt = """tvb_checking_version = version
-        quit()
-        """
-        with open(matlab_test_file, 'w') as file_p:
-            file_p.write(matlab_version_txt)
-
-        matlab_cmd(matlab_path, matlab_test_file_name, matlab_log_file)
-
-        with open(matlab_log_file) as log_file:
-            result_data = log_file.read()
-        version = result_data.strip().split('tvb_checking_version')[1]
-        version = version.replace('\n', '').strip()
-
-        logger.debug("Response in TVB from: %s\n Version: %s \nOriginal %s" % (matlab_path, version, result_data))
-        os.remove(matlab_test_file)
-        os.remove(matlab_log_file)
-
+        _, log_text, result = session.execute("tvb_checking_version = version;")
+        version = str(result['tvb_checking_version']).strip()
+        logger.debug("Response in TVB from: %s\n Version: %s \nOriginal %s" % (matlab_path, version, log_text))
     except Exception:
         logger.exception('Could not parse Matlab Version!')
-        try:
-            os.remove(matlab_test_file)
-            os.remove(matlab_log_file)
-        except Exception:
-            logger.exception('Could not remove files in the second try...')
-
+    finally:
+        session.close()
     return version
 
 
-@user_environment_execution
-def matlab_cmd(matlab_path, script_name, log_file):
-    """
-    Called in order to obtain the command for calling MATLAB
-    """
-    folder_path, exe_name = os.path.split(matlab_path)
-    if folder_path not in os.environ['PATH']:
-        os.environ['PATH'] = os.environ.get('PATH', '') + os.pathsep + folder_path
-    if MATLAB in exe_name:
-        base = exe_name + ' '
-        opts = ' -nodesktop -nojvm -nosplash -logfile %s -r "%s;"' % (log_file, script_name)
-        if os.name == 'nt':
-            opts = '-minimize ' + opts
-        command = base + opts
-    else:  # if OCTAVE in exe_name:
-        command = exe_name + ' %s.m >> %s' % (script_name, log_file)
-    return os.system(command)
-
-
 def extract_matlab_doc_string(file_n):
     """
     Extract the first doc entry from a matlab file.
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Measure how the per state variable analyzers (PCA, ICA, NodeCoherence, NodeCovariance, CrossCorrelate)
+scale with the number of SlicePipeline workers. The input is a random 4D array held in memory,
+thus only the analyzers computation (and not the H5 reads and writes) is measured. Run with:
+
+    python -m tvb.interfaces.command.benchmark_analyzer_slices [time_points] [state_variables] [nodes]
+"""
+
+if __name__ == "__main__":
+    from tvb.basic.profile import TvbProfile
+    TvbProfile.set_profile(TvbProfile.COMMAND_PROFILE)
+
+import sys
+import numpy
+from time import time
+from tvb.analyzers.ica import fastICA
+from tvb.analyzers.node_coherence import NodeCoherence
+from tvb.core.adapters.block_pipeline import SlicePipeline
+from tvb.adapters.analyzers.cross_correlation_adapter import CrossCorrelateAdapter
+from tvb.adapters.analyzers.ica_adapter import ICAAdapter
+from tvb.adapters.analyzers.node_coherence_adapter import NodeCoherenceAdapter
+from tvb.adapters.analyzers.node_covariance_adapter import NodeCovarianceAdapter
+from tvb.adapters.analyzers.pca_adapter import PCAAdapter
+
+
+WORKERS = (1, 2, 4, 8)
+SAMPLE_RATE = 1000.0
+
+
+
+class InMemoryTimeSeries(object):
+    """
+    Expose the TimeSeries slice reading, over a NumPy array.
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+
+    def read_data_slice(self, data_slice):
+        return self.data[data_slice]
+
+
+
+def _analyzers(data):
+    """
+    :returns: list of tuples (label, compute_slice function, split_modes)
+    """
+    ica = ICAAdapter()
+    ica.algorithm = fastICA()
+    ica.algorithm.n_components = data.shape[2]
+    coherence = NodeCoherenceAdapter()
+    coherence.algorithm = NodeCoherence()
+    return [("PCA", PCAAdapter._compute_slice, False),
+            ("ICA", ica._compute_slice, False),
+            ("NodeCoherence", lambda slice_data: coherence._compute_slice(slice_data, SAMPLE_RATE), False),
+            ("NodeCovariance", NodeCovarianceAdapter._compute_slice, True),
+            ("CrossCorrelate", lambda slice_data: CrossCorrelateAdapter._compute_slice(slice_data, 1.0), False)]
+
+
+def main(time_points=4096, state_variables=8, nodes=76):
+    """
+    Report, for every analyzer, the duration and the speed-up with 1, 2, 4 and 8 workers.
+    """
+    data = numpy.random.random((time_points, state_variables, nodes, 1))
+    time_series = InMemoryTimeSeries(data)
+    print("Input shape %s" % str(data.shape))
+
+    for label, compute_slice, split_modes in _analyzers(data):
+        reference = None
+        for workers in WORKERS:
+            pipeline = SlicePipeline(data.shape, 0, workers, split_modes)
+            start = time()
+            pipeline.run_slices(time_series, compute_slice, lambda _: None)
+            duration = time() - start
+            reference = reference or duration
+            print("%-16s %d workers %10.2f s    speed-up %5.2f" % (label, workers, duration, reference / duration))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:4]])
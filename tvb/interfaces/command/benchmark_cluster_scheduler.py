@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Measure the cluster mode of TVB on a single machine, with the local stand-in scheduler (tvb.core.local_scheduler):
+the throughput and queueing latency of the jobs of a PSE (by default 10 x 10 short simulations, on 4 slots),
+and how long it takes to cancel a second PSE of the same size. Run with:
+
+    python -m tvb.interfaces.command.benchmark_cluster_scheduler [values_per_range] [slots]
+"""
+
+if __name__ == "__main__":
+    from tvb.basic.profile import TvbProfile
+    TvbProfile.set_profile(TvbProfile.COMMAND_PROFILE)
+    # Before the backend client gets imported, for it to submit jobs to the "cluster"
+    TvbProfile.current.cluster.IS_DEPLOY = True
+
+import sys
+import json
+import shutil
+import tempfile
+import tvb_data
+from os import path
+from time import time, sleep
+from datetime import datetime
+from subprocess import Popen
+from tvb.basic.profile import TvbProfile
+from tvb.core.entities.storage import dao
+from tvb.core.local_scheduler import JobStore, configure_cluster_settings, STATE_QUEUED, STATE_RUNNING
+from tvb.core.services.operation_service import OperationService, RANGE_PARAMETER_1, RANGE_PARAMETER_2
+from tvb.core.utils import build_process_environment
+from tvb.datatypes.connectivity import Connectivity
+from tvb.interfaces.command import lab
+
+
+def _create_bench_project():
+    project = lab.new_project("benchmark_cluster_scheduler %s" % datetime.now())
+    zip_path = path.join(path.abspath(path.dirname(tvb_data.__file__)), 'connectivity', 'connectivity_68.zip')
+    lab.import_conn_zip(project.id, zip_path)
+    connectivity = dao.get_generic_entity(Connectivity, 68, "_number_of_regions")[0]
+    return project, connectivity
+
+
+def _fire_pse(project, connectivity, values_per_range):
+    launch_args = {"connectivity": connectivity.gid,
+                   "simulation_length": "10",
+                   RANGE_PARAMETER_1: "conduction_speed",
+                   "conduction_speed": json.dumps([1.0 + idx for idx in range(values_per_range)]),
+                   RANGE_PARAMETER_2: "coupling_parameters_option_Linear_a",
+                   "coupling_parameters_option_Linear_a": json.dumps([0.01 * idx for idx in range(values_per_range)])}
+    first_operation = lab.fire_simulation(project.id, **launch_args)
+    return dao.get_operations_in_group(first_operation.fk_operation_group)
+
+
+def _wait_for_jobs(store, first_job_id, count, condition):
+    """
+    :returns: the jobs with ids from first_job_id on, once `count` of them exist and all meet `condition`
+    """
+    while True:
+        jobs = [store.read(job_id) for job_id in range(first_job_id, store.last_job_id() + 1)]
+        if len(jobs) >= count and all(job is not None and condition(job) for job in jobs):
+            return jobs
+        sleep(0.2)
+
+
+def _has_ended(job):
+    return job['state'] not in (STATE_QUEUED, STATE_RUNNING)
+
+
+def main(values_per_range=10, slots=4):
+    """
+    Run a PSE through the local scheduler and print its timings, then launch and cancel a second one.
+    """
+    state_folder = tempfile.mkdtemp(prefix="tvb_local_scheduler_")
+    configure_cluster_settings(TvbProfile.current.cluster, state_folder, TvbProfile.current.PYTHON_INTERPRETER_PATH)
+    store = JobStore(state_folder)
+    scheduler = Popen([TvbProfile.current.PYTHON_INTERPRETER_PATH, '-m', 'tvb.core.local_scheduler', 'serve',
+                       state_folder, TvbProfile.CURRENT_PROFILE_NAME, str(slots)], env=build_process_environment())
+    try:
+        project, connectivity = _create_bench_project()
+        count = values_per_range ** 2
+        TvbProfile.current.MAX_RANGE_NUMBER = max(TvbProfile.current.MAX_RANGE_NUMBER, count)
+
+        start = time()
+        _fire_pse(project, connectivity, values_per_range)
+        submitted = _wait_for_jobs(store, 1, count, lambda job: True)
+        all_submitted = time() - start
+        jobs = _wait_for_jobs(store, 1, count, _has_ended)
+        all_ended = time() - start
+
+        latencies = [job['start_time'] - job['submit_time'] for job in jobs if job['start_time'] is not None]
+        first_start = min(job['start_time'] for job in jobs if job['start_time'] is not None)
+        last_end = max(job['end_time'] for job in jobs)
+        print("PSE with %d jobs, on %d slots" % (len(submitted), slots))
+        print("%-36s %8.2f s" % ("Time until all jobs submitted", all_submitted))
+        print("%-36s %8.2f s" % ("Time until all jobs ended", all_ended))
+        print("%-36s %8.2f jobs/min" % ("Throughput", 60.0 * len(jobs) / max(last_end - first_start, 1e-3)))
+        print("%-36s %8.2f s" % ("Mean queueing latency", sum(latencies) / max(len(latencies), 1)))
+        print("%-36s %8.2f s" % ("Max queueing latency", max(latencies or [0])))
+        print("%-36s %s" % ("Job states", sorted(set(job['state'] for job in jobs))))
+
+        first_job_id = store.last_job_id() + 1
+        operations = _fire_pse(project, connectivity, values_per_range)
+        _wait_for_jobs(store, first_job_id, count, lambda job: True)
+        start = time()
+        operation_service = OperationService()
+        for operation in operations:
+            operation_service.stop_operation(operation.id)
+        _wait_for_jobs(store, first_job_id, count, _has_ended)
+        print("%-36s %8.2f s" % ("Time to cancel a PSE", time() - start))
+    finally:
+        scheduler.terminate()
+        scheduler.wait()
+        shutil.rmtree(state_folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Measure the throughput of appending many small slices into an H5 file, as done by
+TimeSeries.write_data_slice during a simulation.
+
+The current HDF5StorageManager.append_data is compared with the previous buffering strategy,
+which concatenated the whole buffer on every append. Run with:
+
+    python -m tvb.interfaces.command.benchmark_h5_append [number_of_slices]
+"""
+
+if __name__ == "__main__":
+    from tvb.basic.profile import TvbProfile
+    TvbProfile.set_profile(TvbProfile.COMMAND_PROFILE)
+
+import sys
+import shutil
+import tempfile
+import numpy
+import h5py
+from time import time
+from tvb.core.entities.file.hdf5_storage_manager import HDF5StorageManager
+from tvb.core.entities.file.hdf5_storage_policy import GROW_MAJOR
+
+
+DATASET_NAME = "data"
+SLICE_SHAPE = (1, 2, 76, 1)
+BUFFER_SIZE = 600000
+
+
+def _append_with_storage_manager(folder, slices):
+    storage = HDF5StorageManager(folder, "current.h5", buffer_size=BUFFER_SIZE)
+    for data_slice in slices:
+        storage.append_data(DATASET_NAME, data_slice, grow_dimension=0, close_file=False, storage_policy=GROW_MAJOR)
+    storage.close_file()
+
+
+def _append_with_concatenation(folder, slices):
+    """
+    Previous H5pyStorageBuffer behaviour: the buffer is re-allocated and copied on every append,
+    and the dataset gets resized on every flush.
+    """
+    with h5py.File(folder + "/previous.h5", 'w', libver='latest') as h5_file:
+        first = slices[0]
+        dataset = h5_file.create_dataset(DATASET_NAME, data=first, maxshape=(None,) + first.shape[1:])
+        buffered = None
+        for data_slice in slices[1:]:
+            buffered = data_slice if buffered is None else numpy.concatenate((buffered, data_slice), axis=0)
+            if buffered.nbytes > BUFFER_SIZE:
+                length = dataset.shape[0]
+                dataset.resize((length + buffered.shape[0],) + dataset.shape[1:])
+                dataset[length:] = buffered
+                buffered = None
+        if buffered is not None:
+            length = dataset.shape[0]
+            dataset.resize((length + buffered.shape[0],) + dataset.shape[1:])
+            dataset[length:] = buffered
+
+
+def _measure(label, function, slices):
+    folder = tempfile.mkdtemp()
+    try:
+        start = time()
+        function(folder, slices)
+        duration = time() - start
+    finally:
+        shutil.rmtree(folder)
+    mega_bytes = sum(data_slice.nbytes for data_slice in slices) / 1024.0 / 1024.0
+    print("%-28s %10.2f s %12.2f MB/s" % (label, duration, mega_bytes / duration))
+
+
+def main(number_of_slices=100000):
+    """
+    Append `number_of_slices` slices of TimeSeries data (76 regions, 2 state variables) and report MB/s.
+    """
+    slices = [numpy.random.random(SLICE_SHAPE) for _ in range(number_of_slices)]
+    print("Appending %d slices of shape %s" % (number_of_slices, str(SLICE_SHAPE)))
+    _measure("HDF5StorageManager", _append_with_storage_manager, slices)
+    _measure("Concatenating buffer", _append_with_concatenation, slices)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Measure how long a large PSE (by default 50 x 50 = 2500 simulations) takes from the launch request until its
+first operation is running, and until all its operations are queued in the backend.
+The operations are canceled afterwards, as only the launch overhead is measured. Run with:
+
+    python -m tvb.interfaces.command.benchmark_pse_launch [values_per_range]
+"""
+
+if __name__ == "__main__":
+    from tvb.basic.profile import TvbProfile
+    TvbProfile.set_profile(TvbProfile.COMMAND_PROFILE)
+
+import sys
+import json
+import tvb_data
+from os import path
+from time import time, sleep
+from datetime import datetime
+from tvb.basic.profile import TvbProfile
+from tvb.core.entities import model
+from tvb.core.entities.storage import dao
+from tvb.core.services.operation_service import OperationService, RANGE_PARAMETER_1, RANGE_PARAMETER_2
+from tvb.datatypes.connectivity import Connectivity
+from tvb.interfaces.command import lab
+
+
+def _create_bench_project():
+    project = lab.new_project("benchmark_pse_launch %s" % datetime.now())
+    zip_path = path.join(path.abspath(path.dirname(tvb_data.__file__)), 'connectivity', 'connectivity_68.zip')
+    lab.import_conn_zip(project.id, zip_path)
+    connectivity = dao.get_generic_entity(Connectivity, 68, "_number_of_regions")[0]
+    return project, connectivity
+
+
+def _count_not_pending(operation_group_id):
+    operations = dao.get_operations_in_group(operation_group_id)
+    return len([op for op in operations if op.status != model.STATUS_PENDING])
+
+
+def main(values_per_range=50):
+    """
+    Launch a PSE over conduction speed and coupling strength, and print the timings of its launch.
+    """
+    project, connectivity = _create_bench_project()
+    TvbProfile.current.MAX_RANGE_NUMBER = max(TvbProfile.current.MAX_RANGE_NUMBER, values_per_range ** 2)
+    launch_args = {"connectivity": connectivity.gid,
+                   "simulation_length": "10",
+                   RANGE_PARAMETER_1: "conduction_speed",
+                   "conduction_speed": json.dumps([1.0 + idx for idx in range(values_per_range)]),
+                   RANGE_PARAMETER_2: "coupling_parameters_option_Linear_a",
+                   "coupling_parameters_option_Linear_a": json.dumps([0.01 * idx for idx in range(values_per_range)])}
+
+    start = time()
+    first_operation = lab.fire_simulation(project.id, **launch_args)
+    queued = time() - start
+    while _count_not_pending(first_operation.fk_operation_group) == 0:
+        sleep(0.1)
+    first_running = time() - start
+
+    operations = dao.get_operations_in_group(first_operation.fk_operation_group)
+    print("PSE with %d operations" % len(operations))
+    print("%-36s %8.2f s" % ("Time until all operations queued", queued))
+    print("%-36s %8.2f s" % ("Time until first operation running", first_running))
+
+    operation_service = OperationService()
+    for operation in operations:
+        operation_service.stop_operation(operation.id)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Measure simulation throughput (integration steps per second) on the default 76 regions connectivity,
+when the Raw monitor output is written into the result TimeSeries:
+
+    * one sample at a time (as SimulatorAdapter.launch used to do)
+    * in batches, with TimeSeriesWriter
+    * in batches, stored by a BackgroundWriter thread (as SimulatorAdapter.launch does now)
+
+Run with:
+
+    python -m tvb.interfaces.command.benchmark_simulation_writes [simulation_length_ms]
+"""
+
+if __name__ == "__main__":
+    from tvb.basic.profile import TvbProfile
+    TvbProfile.set_profile(TvbProfile.COMMAND_PROFILE)
+
+import sys
+import shutil
+import tempfile
+from time import time
+from tvb.simulator.simulator import Simulator
+from tvb.simulator.models import Generic2dOscillator
+from tvb.simulator.coupling import Linear
+from tvb.simulator.integrators import HeunDeterministic
+from tvb.simulator.monitors import Raw
+from tvb.datatypes.connectivity import Connectivity
+from tvb.adapters.simulator.simulator_adapter import SimulatorAdapter
+from tvb.adapters.simulator.time_series_writer import BackgroundWriter, TimeSeriesWriter
+
+
+INTEGRATION_STEP = 0.1
+
+
+
+def _write_per_sample(simulator, time_series, simulation_length):
+    for result in simulator(simulation_length=simulation_length):
+        if result[0] is not None:
+            time_series.write_time_slice([result[0][0]])
+            time_series.write_data_slice([result[0][1]])
+
+
+def _write_batched(simulator, time_series, simulation_length):
+    writer = TimeSeriesWriter(time_series, SimulatorAdapter.WRITE_BUFFER_SIZE)
+    for result in simulator(simulation_length=simulation_length):
+        if result[0] is not None:
+            writer.write(result[0][0], result[0][1])
+    writer.flush()
+
+
+def _write_in_background(simulator, time_series, simulation_length):
+    background_writer = BackgroundWriter()
+    background_writer.start()
+    writer = TimeSeriesWriter(time_series, SimulatorAdapter.WRITE_BUFFER_SIZE, background_writer)
+    try:
+        for result in simulator(simulation_length=simulation_length):
+            if result[0] is not None:
+                writer.write(result[0][0], result[0][1])
+        writer.flush()
+    finally:
+        background_writer.close()
+
+
+def _measure(label, write_function, connectivity, simulation_length):
+    storage_path = tempfile.mkdtemp()
+    try:
+        simulator = Simulator(model=Generic2dOscillator(), connectivity=connectivity, coupling=Linear(),
+                              integrator=HeunDeterministic(dt=INTEGRATION_STEP), monitors=[Raw()])
+        simulator.configure()
+        time_series = simulator.monitors[0].create_time_series(storage_path, connectivity)
+
+        start = time()
+        write_function(simulator, time_series, simulation_length)
+        time_series.close_file()
+        duration = time() - start
+    finally:
+        shutil.rmtree(storage_path)
+
+    steps = simulation_length / INTEGRATION_STEP
+    print("%-24s %10.2f s %12.1f steps/s" % (label, duration, steps / duration))
+
+
+def main(simulation_length=10000.0):
+    """
+    Simulate `simulation_length` ms with each writing strategy, and report the integration steps per second.
+    """
+    connectivity = Connectivity.from_file()
+    connectivity.configure()
+    print("Simulating %.1f ms on %d regions" % (simulation_length, connectivity.number_of_regions))
+    _measure("Write per sample", _write_per_sample, connectivity, simulation_length)
+    _measure("Write batched", _write_batched, connectivity, simulation_length)
+    _measure("Write in background", _write_in_background, connectivity, simulation_length)
+
+
+if __name__ == "__main__":
+    main(*[float(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Measure the application start time (tvb.core.services.initializer.initialize), with and without
+a valid introspection registry. Every start is done in a fresh Python process, so that module imports
+are counted as well. Run with:
+
+    python -m tvb.interfaces.command.benchmark_startup [number_of_starts]
+"""
+
+import sys
+import subprocess
+from time import time
+
+
+STARTUP_SCRIPT = """
+from time import time
+from tvb.basic.profile import TvbProfile
+TvbProfile.set_profile(TvbProfile.COMMAND_PROFILE)
+from tvb.core.services.initializer import initialize
+from tvb.core.adapters.introspection_registry import IntrospectionRegistry
+if %(clear_registry)s:
+    IntrospectionRegistry().clear()
+start = time()
+initialize(["tvb.config"], skip_import=True)
+print(time() - start)
+"""
+
+
+def _start(clear_registry):
+    """
+    :returns: tuple (duration of the whole process, duration of initialize) in seconds
+    """
+    start = time()
+    output = subprocess.check_output([sys.executable, "-c", STARTUP_SCRIPT % {'clear_registry': clear_registry}])
+    process_duration = time() - start
+    return process_duration, float(output.strip().splitlines()[-1])
+
+
+def _measure(label, clear_registry, number_of_starts):
+    durations = [_start(clear_registry) for _ in range(number_of_starts)]
+    process_duration = min(duration[0] for duration in durations)
+    initialize_duration = min(duration[1] for duration in durations)
+    print("%-28s process %8.2f s    initialize %8.2f s" % (label, process_duration, initialize_duration))
+
+
+def main(number_of_starts=3):
+    """
+    Report the best of `number_of_starts` starts, for a full introspection and for a reused registry.
+    """
+    _measure("Full introspection", True, number_of_starts)
+    # The last start above left a valid registry behind
+    _measure("Introspection registry", False, number_of_starts)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Binary transport of stored arrays (or N-d slices of them) over HTTP.
+
+The selected array is read from its H5 file in blocks of rows (along the first dimension), and every
+block is encoded and sent before the next one is read, so the full array is never materialized.
+Values are sent in C order and little-endian byte order, with optional compression negotiated through
+the Accept-Encoding header. The uncompressed representation can also be requested by byte ranges.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import hashlib
+import zlib
+import numpy
+
+# Amount of (uncompressed) data read from H5 and encoded at once
+BLOCK_SIZE = 4 * 1024 ** 2
+
+ENCODING_IDENTITY = 'identity'
+ENCODING_GZIP = 'gzip'
+ENCODING_DEFLATE = 'deflate'
+# Bytes of each block are grouped by their position in the values (all first bytes, then all second bytes, ...),
+# then the block is deflated. Blocks have X-Array-Shuffle-Block values, except the last one, which can be shorter.
+ENCODING_SHUFFLE = 'x-shuffle'
+
+# In order of preference, for encodings accepted with the same quality
+SUPPORTED_ENCODINGS = [ENCODING_SHUFFLE, ENCODING_GZIP, ENCODING_DEFLATE, ENCODING_IDENTITY]
+
+
+
+class UnsatisfiableRange(Exception):
+    """
+    Raised when the requested byte range is outside of the array data.
+    """
+
+
+
+def parse_slices(slices_spec, shape):
+    """
+    Parse a slice specification like "0:100, :, 2, ::4" (one element per dimension, trailing dimensions
+    can be omitted) for an array of the given shape.
+
+    :returns: a tuple of positive-step slices (one per dimension), and the shape of the result.
+        Dimensions selected with an index are not part of the result shape.
+    """
+    parts = slices_spec.split(',') if slices_spec and slices_spec.strip() else []
+    if len(parts) > len(shape):
+        raise ValueError("Too many slices %s for an array of shape %s" % (slices_spec, shape))
+    parts += [':'] * (len(shape) - len(parts))
+
+    selection = []
+    result_shape = []
+    for part, dimension in zip(parts, shape):
+        part = part.strip()
+        if ':' not in part:
+            index = int(part)
+            if index < 0:
+                index += dimension
+            if not 0 <= index < dimension:
+                raise ValueError("Index %s is out of bounds for a dimension of size %d" % (part, dimension))
+            selection.append(slice(index, index + 1, 1))
+            continue
+
+        bounds = [int(bound) if bound.strip() else None for bound in part.split(':')]
+        if len(bounds) > 3:
+            raise ValueError("Invalid slice %s" % part)
+        start, stop, step = slice(*bounds).indices(dimension)
+        if step <= 0:
+            raise ValueError("Only positive steps are supported, not %s" % part)
+        stop = max(start, stop)
+        selection.append(slice(start, stop, step))
+        result_shape.append(len(range(start, stop, step)))
+    return tuple(selection), tuple(result_shape)
+
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Choose the response encoding, from the value of an Accept-Encoding header.
+    """
+    qualities = {}
+    for item in (accept_encoding or '').split(','):
+        params = item.strip().split(';')
+        coding = params[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    best_encoding, best_quality = ENCODING_IDENTITY, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        default_quality = 1.0 if encoding == ENCODING_IDENTITY else 0.0
+        quality = qualities.get(encoding, qualities.get('*', default_quality))
+        if quality > best_quality:
+            best_encoding, best_quality = encoding, quality
+    return best_encoding
+
+
+
+def parse_range(range_header, total_size):
+    """
+    Parse a Range header with a single byte range.
+
+    :returns: the (first, last) byte positions, inclusive, or None when the header should be ignored.
+    :raises UnsatisfiableRange: when the range starts after the end of the data
+    """
+    if not range_header:
+        return None
+    unit, _, ranges = range_header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in ranges:
+        return None
+    first, _, last = ranges.strip().partition('-')
+    try:
+        if not first:
+            suffix_length = int(last)
+            if suffix_length == 0:
+                raise UnsatisfiableRange()
+            return max(0, total_size - suffix_length), total_size - 1
+        first = int(first)
+        last = int(last) if last else total_size - 1
+    except ValueError:
+        return None
+    if first >= total_size:
+        raise UnsatisfiableRange()
+    if last < first:
+        return None
+    return first, min(last, total_size - 1)
+
+
+
+def make_etag(*parts):
+    """
+    Build a strong entity tag from the given parts (GID, file version, selection, encoding ...).
+    """
+    return '"%s"' % hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+
+class ArrayStream(object):
+    """
+    Read a slice of an array in blocks of rows, and serialize them.
+    """
+
+    def __init__(self, read_slice, shape, slices_spec=None, block_size=BLOCK_SIZE):
+        """
+        :param read_slice: callable reading a tuple of slices from the stored array (e.g. MappedType.get_data)
+        :param shape: shape of the stored array
+        :param slices_spec: the selection, as accepted by `parse_slices`
+        """
+        if not shape:
+            raise ValueError("Only arrays with at least one dimension can be streamed")
+        self.read_slice = read_slice
+        self.selection, self.shape = parse_slices(slices_spec, shape)
+
+        # An empty read, only to get the stored type
+        first = self.selection[0]
+        dtype = numpy.dtype(read_slice((slice(first.start, first.start, 1),) + self.selection[1:]).dtype)
+        if not (numpy.issubdtype(dtype, numpy.number) or numpy.issubdtype(dtype, numpy.bool_)):
+            raise ValueError("Datatype not supported by binary transport %s" % dtype)
+        self.dtype = dtype.newbyteorder('<') if dtype.itemsize > 1 else dtype
+
+        self.nr_rows = len(range(first.start, first.stop, first.step))
+        row_values = int(numpy.prod([len(range(s.start, s.stop, s.step)) for s in self.selection[1:]]))
+        self.row_size = row_values * self.dtype.itemsize
+        self.rows_per_block = max(1, block_size // max(self.row_size, 1))
+        self.block_values = self.rows_per_block * row_values
+
+
+    @property
+    def nbytes(self):
+        return self.nr_rows * self.row_size
+
+
+    def iter_blocks(self, first_row=0, end_row=None):
+        """
+        Read the selected rows from storage, one block at a time.
+        """
+        first = self.selection[0]
+        end_row = self.nr_rows if end_row is None else end_row
+        for block_start in range(first_row, end_row, self.rows_per_block):
+            block_end = min(block_start + self.rows_per_block, end_row)
+            rows = slice(first.start + block_start * first.step,
+                         min(first.start + block_end * first.step, first.stop), first.step)
+            block = self.read_slice((rows,) + self.selection[1:])
+            yield numpy.ascontiguousarray(block, dtype=self.dtype)
+
+
+    def iter_bytes(self, first=0, last=None):
+        """
+        Yield the uncompressed representation, between the `first` and `last` byte positions (inclusive).
+        Only the rows covering that range are read.
+        """
+        last = self.nbytes - 1 if last is None else last
+        if self.row_size == 0 or last < first:
+            return
+        first_row, end_row = first // self.row_size, last // self.row_size + 1
+        position = first_row * self.row_size
+        for block in self.iter_blocks(first_row, end_row):
+            data = block.tobytes()
+            block_first = max(first - position, 0)
+            block_end = min(last + 1 - position, len(data))
+            position += len(data)
+            yield data[block_first:block_end]
+
+
+    def iter_encoded(self, encoding):
+        """
+        Yield the full selection, with the given content encoding.
+        """
+        if encoding == ENCODING_IDENTITY:
+            for data in self.iter_bytes():
+                yield data
+            return
+
+        window_bits = 16 + zlib.MAX_WBITS if encoding == ENCODING_GZIP else zlib.MAX_WBITS
+        compressor = zlib.compressobj(6, zlib.DEFLATED, window_bits)
+        for block in self.iter_blocks():
+            if encoding == ENCODING_SHUFFLE:
+                data = block.reshape(-1).view(numpy.uint8).reshape(-1, self.dtype.itemsize).T.tobytes()
+            else:
+                data = block.tobytes()
+            compressed = compressor.compress(data)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+
+
+def unshuffle_bytes(data, itemsize, block_values):
+    """
+    Reverse the byte shuffling applied by the x-shuffle encoding, on the inflated data.
+    """
+    block_size = block_values * itemsize
+    result = []
+    for block_start in range(0, len(data), block_size):
+        block = numpy.frombuffer(data[block_start:block_start + block_size], dtype=numpy.uint8)
+        result.append(block.reshape(itemsize, -1).T.tobytes())
+    return b''.join(result)
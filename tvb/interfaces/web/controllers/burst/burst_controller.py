@@ -54,6 +54,7 @@ from tvb.adapters.exporters.export_manager import ExportManager
 from tvb.core.services.exceptions import BurstServiceException
 from tvb.core.services.burst_service import BurstService, LAUNCH_NEW
 from tvb.core.services.workflow_service import WorkflowService
+from tvb.core.services.status_events import STATUS_EVENTS
 from tvb.core.services.operation_service import RANGE_PARAMETER_1, RANGE_PARAMETER_2
 from tvb.interfaces.web.controllers import common
 from tvb.interfaces.web.controllers.burst.base_controller import BurstBaseController
@@ -71,6 +72,9 @@ class BurstController(BurstBaseController):
     Controller class for Burst-Pages.
     """
 
+    # Seconds a long-poll request for status events is held, when nothing changes
+    STATUS_EVENTS_TIMEOUT = 25
+
 
     def __init__(self):
         BurstBaseController.__init__(self)
@@ -416,6 +420,18 @@ class BurstController(BurstBaseController):
         return self.burst_service.update_history_status(json.loads(data['burst_ids']))
 
 
+    @expose_json
+    def get_status_events(self, after_seq=-1):
+        """
+        Long-poll for status changes of the bursts in the current project, published after `after_seq`.
+        When 'reset' is returned as true, the client should reload the full history instead.
+        """
+        project = common.get_current_project()
+        project_id = project.id if project is not None else -1
+        last_seq, events = STATUS_EVENTS.wait(int(after_seq), self.STATUS_EVENTS_TIMEOUT, project_id)
+        return {'seq': last_seq, 'events': events or [], 'reset': events is None}
+
+
     @cherrypy.expose
     @handle_error(redirect=False)
     @check_user
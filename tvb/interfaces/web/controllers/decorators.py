@@ -44,7 +44,11 @@ from genshi.template import TemplateLoader
 from tvb.basic.profile import TvbProfile
 from tvb.basic.logger.builder import get_logger
 from tvb.core.utils import TVBJSONEncoder
+from tvb.core.entities import model
+from tvb.core.entities.storage import dao
+from tvb.core.services.payload_cache import PAYLOAD_CACHE
 from tvb.interfaces.web.controllers import common
+from tvb.interfaces.web.controllers import array_transport
 
 # some of these decorators could be cherrypy tools
 
@@ -116,6 +120,97 @@ def ndarray_to_http_binary(func):
     return deco
 
 
+def cache_datatype_payload(func):
+    """
+    Decorator for calls serializing an attribute of a DataType, with the signature
+    (self, entity_gid, dataset_name, ...). Once the operation which created the DataType has finished,
+    the serialized result is kept in PAYLOAD_CACHE and sent with a strong ETag, derived from the GID,
+    attribute name and the rest of the parameters (e.g. slices). If-None-Match is answered with 304.
+    """
+    cached_headers = ["Content-Type", "Content-Length", "X-Array-Shape", "X-Array-Type"]
+
+    @wraps(func)
+    def deco(self, entity_gid, dataset_name, *a, **b):
+        etag = PAYLOAD_CACHE.make_key(func.__name__, entity_gid, dataset_name, a, sorted(b.items()))
+        if_none_match = [tag.strip() for tag in cherrypy.request.headers.get("If-None-Match", "").split(",")]
+
+        cached = PAYLOAD_CACHE.get(etag)
+        if cached is not None:
+            payload, headers = cached
+            cherrypy.response.headers.update(headers)
+        else:
+            payload = func(self, entity_gid, dataset_name, *a, **b)
+            if dao.get_datatype_operation_status(entity_gid) != model.STATUS_FINISHED:
+                return payload
+            ## Payloads computed with other DataTypes as parameters are invalidated when any of them is removed
+            gids = [entity_gid] + list((json.loads(b.get("datatype_kwargs") or "null") or {}).values())
+            headers = dict((name, cherrypy.response.headers[name])
+                           for name in cached_headers if name in cherrypy.response.headers)
+            PAYLOAD_CACHE.put(etag, gids, payload, headers)
+
+        cherrypy.response.headers["ETag"] = etag
+        cherrypy.response.headers["Cache-Control"] = "private, no-cache"
+        if etag in if_none_match:
+            cherrypy.response.status = 304
+            cherrypy.response.headers.pop("Content-Length", None)
+            return ""
+        return payload
+
+    return deco
+
+
+def array_stream_to_http(func):
+    """
+    Decorator to wrap calls that return an `array_transport.ArrayStream` and the version of its storage.
+    The array is sent as a binary http response, compressed as negotiated with the client, and streamed from
+    storage. ETag and single byte Range requests (on the uncompressed representation) are supported.
+    """
+    @wraps(func)
+    def deco(*a, **b):
+        array_stream, version = func(*a, **b)
+        request_headers = cherrypy.request.headers
+        response_headers = cherrypy.response.headers
+
+        encoding = array_transport.negotiate_encoding(request_headers.get("Accept-Encoding"))
+        etag = array_transport.make_etag(version, array_stream.selection, encoding)
+        response_headers["ETag"] = etag
+        response_headers["Vary"] = "Accept-Encoding"
+        response_headers["Accept-Ranges"] = "bytes"
+        response_headers["Content-Type"] = "application/x.ndarray"
+        response_headers["X-Array-Shape"] = str(array_stream.shape)
+        response_headers["X-Array-Type"] = array_stream.dtype.str
+
+        if etag in [tag.strip() for tag in request_headers.get("If-None-Match", "").split(",")]:
+            cherrypy.response.status = 304
+            return []
+
+        if encoding != array_transport.ENCODING_IDENTITY:
+            response_headers["Content-Encoding"] = encoding
+            if encoding == array_transport.ENCODING_SHUFFLE:
+                response_headers["X-Array-Shuffle-Block"] = array_stream.block_values
+            return array_stream.iter_encoded(encoding)
+
+        byte_range = None
+        if request_headers.get("If-Range", etag) == etag:
+            try:
+                byte_range = array_transport.parse_range(request_headers.get("Range"), array_stream.nbytes)
+            except array_transport.UnsatisfiableRange:
+                response_headers["Content-Range"] = "bytes */%d" % array_stream.nbytes
+                raise cherrypy.HTTPError(416)
+
+        if byte_range is None:
+            response_headers["Content-Length"] = array_stream.nbytes
+            return array_stream.iter_bytes()
+
+        first, last = byte_range
+        cherrypy.response.status = 206
+        response_headers["Content-Range"] = "bytes %d-%d/%d" % (first, last, array_stream.nbytes)
+        response_headers["Content-Length"] = last - first + 1
+        return array_stream.iter_bytes(first, last)
+
+    return deco
+
+
 def handle_error(redirect):
     """
     If `redirect` is true(default) all errors will generate redirects.
@@ -286,6 +381,57 @@ def expose_numpy_array(func):
     return func
 
 
+def expose_cached_json(func):
+    """
+    Equivalent to
+    @cherrypy.expose
+    @handle_error(redirect=False)
+    @check_user
+    @cache_datatype_payload
+    @jsonify
+    """
+    func = jsonify(func)
+    func = cache_datatype_payload(func)
+    func = check_user(func)
+    func = handle_error(redirect=False)(func)
+    func = cherrypy.expose(func)
+    return func
+
+
+def expose_cached_numpy_array(func):
+    """
+    Equivalent to
+    @cherrypy.expose
+    @handle_error(redirect=False)
+    @check_user
+    @cache_datatype_payload
+    @ndarray_to_http_binary
+    """
+    func = ndarray_to_http_binary(func)
+    func = cache_datatype_payload(func)
+    func = check_user(func)
+    func = handle_error(redirect=False)(func)
+    func = cherrypy.expose(func)
+    return func
+
+
+def expose_array_stream(func):
+    """
+    Equivalent to
+    @cherrypy.expose
+    @handle_error(redirect=False)
+    @array_stream_to_http
+    @check_user
+    with the response body streamed, as it is produced.
+    """
+    func = check_user(func)
+    func = array_stream_to_http(func)
+    func = handle_error(redirect=False)(func)
+    func = cherrypy.expose(func)
+    func._cp_config = {'response.stream': True}
+    return func
+
+
 def profile_func(func):
     def wrapper(*args, **kwargs):
         log = get_logger(_LOGGER_NAME)
@@ -35,6 +35,7 @@ given action are described here.
 .. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
 """
 
+import os
 import copy
 import json
 import cherrypy
@@ -53,10 +54,13 @@ from tvb.core.services.exceptions import OperationException
 from tvb.core.services.operation_service import OperationService, RANGE_PARAMETER_1, RANGE_PARAMETER_2
 from tvb.core.services.project_service import ProjectService
 from tvb.core.services.burst_service import BurstService
+from tvb.interfaces.web.controllers.array_transport import ArrayStream
 from tvb.interfaces.web.controllers import common
 from tvb.interfaces.web.controllers.base_controller import BaseController
-from tvb.interfaces.web.controllers.decorators import expose_page, settings, context_selected, expose_numpy_array
+from tvb.interfaces.web.controllers.decorators import expose_page, settings, context_selected
 from tvb.interfaces.web.controllers.decorators import expose_fragment, handle_error, check_user, expose_json
+from tvb.interfaces.web.controllers.decorators import expose_array_stream, expose_cached_json
+from tvb.interfaces.web.controllers.decorators import expose_cached_numpy_array
 from tvb.interfaces.web.entities.context_selected_adapter import SelectedAdapterContext
 
 
@@ -564,7 +568,7 @@ class FlowController(BaseController):
         return result
 
 
-    @expose_json
+    @expose_cached_json
     def read_datatype_attribute(self, entity_gid, dataset_name, flatten=False, datatype_kwargs='null', **kwargs):
         """
         Retrieve from a given DataType a property or a method result.
@@ -590,11 +594,30 @@ class FlowController(BaseController):
             return result
 
 
-    @expose_numpy_array
+    @expose_cached_numpy_array
     def read_binary_datatype_attribute(self, entity_gid, dataset_name, datatype_kwargs='null', **kwargs):
         return self._read_datatype_attribute(entity_gid, dataset_name, datatype_kwargs, **kwargs)
 
 
+    @expose_array_stream
+    def read_array(self, entity_gid, dataset_name, slices=None):
+        """
+        Stream a stored array of a DataType, or a slice of it, in binary form.
+        Unlike `read_binary_datatype_attribute`, the array is read from its H5 file in blocks,
+        and never loaded entirely in memory.
+
+        :param entity_gid: GID for DataType entity
+        :param dataset_name: name of the H5 dataset (e.g. "data" for a TimeSeries)
+        :param slices: optional selection, one slice or index per dimension, e.g. "0:100,:,2,::4"
+        :returns: the ArrayStream, and the version of the H5 file, used for the ETag
+        """
+        entity = ABCAdapter.load_entity_by_gid(entity_gid)
+        shape = entity.get_data_shape(dataset_name)
+        array_stream = ArrayStream(lambda data_slice: entity.get_data(dataset_name, data_slice), shape, slices)
+        version = (entity_gid, dataset_name, os.path.getmtime(entity.get_storage_file_path()))
+        return array_stream, version
+
+
     @expose_fragment("flow/genericAdapterFormFields")
     def get_simple_adapter_interface(self, algorithm_id, parent_div='', is_uploader=False):
         """
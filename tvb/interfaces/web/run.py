@@ -43,6 +43,7 @@ import sys
 import cherrypy
 import webbrowser
 from cherrypy import Tool
+from cherrypy.process.plugins import Monitor
 from tvb.basic.profile import TvbProfile
 
 if __name__ == '__main__':
@@ -51,7 +52,9 @@ if __name__ == '__main__':
 from tvb.basic.logger.builder import get_logger
 from tvb.core.adapters.abcdisplayer import ABCDisplayer
 from tvb.core.decorators import user_environment_execution
+from tvb.core.entities.storage import dao
 from tvb.core.services.initializer import initialize, reset
+from tvb.core.services.status_events import BURST_STATUS_WATCHER
 from tvb.core.services.exceptions import InvalidSettingsException
 from tvb.interfaces.web.request_handler import RequestHandler
 from tvb.interfaces.web.controllers.base_controller import BaseController
@@ -118,6 +121,12 @@ def init_cherrypy(arguments=None):
     cherrypy.tools.cleanup = Tool('on_end_request', RequestHandler.clean_files_on_disk)
     # ----------------- End register additional request handlers ----------------
 
+    # Periodically correct the per-user disk usage counters (used for the disk quota), for eventual drift
+    Monitor(cherrypy.engine, dao.reconcile_users_disk_size,
+            frequency=TvbProfile.current.DISK_USAGE_RECONCILE_INTERVAL, name="DiskUsageReconcile").subscribe()
+    Monitor(cherrypy.engine, BURST_STATUS_WATCHER.check,
+            frequency=TvbProfile.current.BURST_STATUS_CHECK_INTERVAL, name="BurstStatusWatcher").subscribe()
+
     #### HTTP Server is fired now ######  
     cherrypy.engine.start()
 
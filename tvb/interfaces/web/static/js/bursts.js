@@ -47,6 +47,9 @@ var indexInTab = -1;
 var portletConfigurationActive = false;
 //Keep track of all the timeouts that are set for portlet updating
 var refreshTimeouts = [];
+// Sequence number of the last status event received from the server (-1 before the first request)
+var lastStatusSeq = -1;
+var statusEventsListening = false;
 // Class mapping to the active burst entry
 var ACTIVE_BURST_CLASS = 'burst-active';
 // Class mapping to a workflow from a group launch
@@ -128,7 +131,8 @@ function loadBurstHistory() {
 }
 
 /*
- * Periodically look for updates in burst history status and update their classes accordingly.
+ * Look for updates in burst history status and update their classes accordingly.
+ * Status changes are pushed through waitForStatusEvents, this only refreshes the elapsed times of running bursts.
  */
 function updateBurstHistoryStatus() {
     let burst_ids = [];
@@ -183,8 +187,8 @@ function _updateBurstHistoryElapsedTime(result) {
 }
 
 /**
- * Schedule burst-history section update, in the next 5 seconds.
- * If "withFullUpdate" is true, then a full history section replacement happens before the periodical update.
+ * Make sure burst-history section gets updated, when status events are pushed from the server.
+ * If "withFullUpdate" is true, then a full history section replacement happens first.
  */
 function scheduleNewUpdate(withFullUpdate, refreshCurrent) {
     if ($('#burst-history').length !== 0) {
@@ -193,12 +197,64 @@ function scheduleNewUpdate(withFullUpdate, refreshCurrent) {
             if (refreshCurrent) {
                 loadBurst(sessionStoredBurst.id);
             }
-        } else {
-            setTimeout(updateBurstHistoryStatus, 5000);
+        } else if (!statusEventsListening) {
+            statusEventsListening = true;
+            waitForStatusEvents();
         }
     }
 }
 
+/**
+ * Long-poll the server for burst status changes. The request is held by the server until a change
+ * happens, or for a while when nothing changes (and then the elapsed times of running bursts are refreshed).
+ */
+function waitForStatusEvents() {
+    if ($('#burst-history').length === 0) {
+        statusEventsListening = false;
+        return;
+    }
+    const requestTime = new Date().getTime();
+    doAjaxCall({
+        type: "POST",
+        url: '/burst/get_status_events/' + lastStatusSeq,
+        success: function (r) {
+            const result = $.parseJSON(r);
+            // On the first request the history was just loaded, no need to reload it again
+            let fullUpdate = result.reset && lastStatusSeq >= 0;
+            let changedStatusOnCurrentBurst = fullUpdate;
+            lastStatusSeq = result.seq;
+
+            // Events are only about bursts in the current project. Reload the history for a burst which
+            // ended and is displayed, or for one which started and is not displayed yet.
+            for (let i = 0; i < result.events.length; i++) {
+                const event = result.events[i];
+                const isDisplayed = document.getElementById("burst_id_" + event.id) !== null;
+                if (event.status !== 'running' ? isDisplayed : !isDisplayed) {
+                    fullUpdate = true;
+                    if (String(event.id) === String(sessionStoredBurst.id) && event.status !== 'running') {
+                        changedStatusOnCurrentBurst = true;
+                    }
+                }
+            }
+            if (fullUpdate) {
+                // History reload starts listening again
+                statusEventsListening = false;
+                scheduleNewUpdate(true, changedStatusOnCurrentBurst);
+                return;
+            }
+            if (result.events.length === 0) {
+                updateBurstHistoryStatus();
+            }
+            // Server answers right away when too many pages are waiting already, so do not insist then
+            const answeredAfter = new Date().getTime() - requestTime;
+            setTimeout(waitForStatusEvents, result.events.length === 0 && answeredAfter < 1000 ? 5000 : 0);
+        },
+        error: function () {
+            setTimeout(waitForStatusEvents, 5000);
+        }
+    });
+}
+
 /*
  * Cancel or Remove the burst entity given by burst_id. Also update the history column accordingly.
  */
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Test the analyzers computing blocks of nodes at once give the same results as the per node evaluation.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import numpy
+import psutil
+from tvb.adapters.analyzers.fourier_adapter import FourierAdapter
+from tvb.adapters.analyzers.wavelet_adapter import ContinuousWaveletTransformAdapter
+from tvb.analyzers.fmri_balloon import BalloonModel
+from tvb.analyzers.wavelet import ContinuousWaveletTransform
+from tvb.datatypes.time_series import TimeSeries
+from tvb.core.adapters.block_pipeline import BlockPipeline, MAX_MEMORY_RATIO
+from tvb.simulator.common import iround
+
+
+
+class _FakeTimeSeries(object):
+    sample_period = 1.0
+
+    def __init__(self, input_shape):
+        self.input_shape = input_shape
+
+    def read_data_shape(self):
+        return self.input_shape
+
+
+
+class _FakeFFT(object):
+    """ Only what FourierAdapter.get_required_memory_size reads from the algorithm. """
+    segment_length = 1000.0
+
+    def __init__(self, input_shape, output_size):
+        self.output_size = output_size
+        self.time_series = _FakeTimeSeries(input_shape)
+
+    def result_size(self, input_shape, segment_length, sample_period):
+        return self.output_size
+
+
+
+class TestNodeBlocks(object):
+    """
+    Compare the node blocks results with the previous node by node evaluation.
+    """
+    SAMPLE_PERIOD = 1.0
+
+
+    def setup_method(self):
+        self.data = numpy.random.random((1000, 2, 7, 1))
+
+
+    def _node_time_series(self, node):
+        time_series = TimeSeries(use_storage=False, sample_period=self.SAMPLE_PERIOD,
+                                 time=numpy.arange(self.data.shape[0]) * self.SAMPLE_PERIOD)
+        time_series.sample_rate = 1.0 / self.SAMPLE_PERIOD
+        time_series.data = self.data[:, :, node:node + 1]
+        return time_series
+
+
+    def test_wavelet_blocks(self):
+        adapter = ContinuousWaveletTransformAdapter()
+        adapter.algorithm = ContinuousWaveletTransform()
+        wavelets = adapter._build_wavelets(1.0 / self.SAMPLE_PERIOD)
+        fft_length = adapter._get_fft_length(self.data.shape[0], wavelets)
+        temporal_step = max((1, iround(adapter.algorithm.sample_period / self.SAMPLE_PERIOD)))
+
+        coefficients = adapter._transform_block(self.data, wavelets, fft_length, temporal_step)
+
+        for node in range(self.data.shape[2]):
+            algorithm = ContinuousWaveletTransform()
+            algorithm.time_series = self._node_time_series(node)
+            expected = algorithm.evaluate().array_data
+            assert expected.shape == coefficients[:, :, :, node:node + 1].shape
+            assert numpy.allclose(expected, coefficients[:, :, :, node:node + 1])
+
+
+    def test_balloon_blocks(self):
+        block_ts = self._node_time_series(0)
+        block_ts.data = self.data
+        algorithm = BalloonModel(dt=self.SAMPLE_PERIOD / 1000.)
+        algorithm.time_series = block_ts
+        bold_block = algorithm.evaluate().data
+
+        for node in range(self.data.shape[2]):
+            algorithm = BalloonModel(dt=self.SAMPLE_PERIOD / 1000.)
+            algorithm.time_series = self._node_time_series(node)
+            assert numpy.allclose(algorithm.evaluate().data, bold_block[:, :, node:node + 1])
+
+
+    def test_fourier_blocks(self):
+        adapter = FourierAdapter()
+        adapter.pipeline = BlockPipeline(workers=4)
+        adapter.algorithm = _FakeFFT((1000, 2, 76, 1), 1024)
+        adapter.get_required_memory_size()
+        assert 4 == adapter.memory_factor, "Enough memory, there should be one block per worker"
+
+        free_memory = psutil.virtual_memory().free + psutil.swap_memory().free
+        adapter.algorithm = _FakeFFT((1000, 2, 76, 1), free_memory)
+        required_memory = adapter.get_required_memory_size()
+        assert adapter.memory_factor > adapter.pipeline.max_in_flight
+        assert required_memory <= free_memory * MAX_MEMORY_RATIO
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Tests for the batched writing of monitor samples.
+"""
+
+import numpy
+import pytest
+from tvb.adapters.simulator.time_series_writer import BackgroundWriter, TimeSeriesWriter
+
+
+
+class DummyTimeSeries(object):
+    """
+    Keep in memory the chunks written, instead of storing them in H5.
+    """
+
+    def __init__(self, fail=False):
+        self.times = []
+        self.data = []
+        self.fail = fail
+
+
+    def write_time_slice(self, partial_result):
+        self.times.append(numpy.array(partial_result))
+
+
+    def write_data_slice(self, partial_result):
+        if self.fail:
+            raise IOError("Disk full")
+        self.data.append(numpy.array(partial_result))
+
+
+
+class TestTimeSeriesWriter(object):
+    """
+    Test samples are written in batches, in order, both directly and through a BackgroundWriter.
+    """
+
+    SAMPLE_SHAPE = (2, 76, 1)
+
+
+    def _write_samples(self, writer, nr_of_samples):
+        samples = numpy.random.random((nr_of_samples,) + self.SAMPLE_SHAPE)
+        for i in range(nr_of_samples):
+            writer.write(i * 0.1, samples[i])
+        writer.flush()
+        return samples
+
+
+    def test_write_in_batches(self):
+        time_series = DummyTimeSeries()
+        sample_bytes = numpy.zeros(self.SAMPLE_SHAPE).nbytes
+        writer = TimeSeriesWriter(time_series, 10 * sample_bytes)
+        samples = self._write_samples(writer, 25)
+
+        assert [10, 10, 5] == [chunk.shape[0] for chunk in time_series.data]
+        numpy.testing.assert_array_equal(samples, numpy.concatenate(time_series.data))
+        numpy.testing.assert_allclose(numpy.arange(25) * 0.1, numpy.concatenate(time_series.times))
+
+
+    def test_write_in_background(self):
+        time_series = DummyTimeSeries()
+        background_writer = BackgroundWriter()
+        background_writer.start()
+        writer = TimeSeriesWriter(time_series, 1, background_writer)
+        samples = self._write_samples(writer, 50)
+        background_writer.close()
+
+        assert 50 == len(time_series.data)
+        numpy.testing.assert_array_equal(samples, numpy.concatenate(time_series.data))
+
+
+    def test_background_error_is_raised(self):
+        background_writer = BackgroundWriter()
+        background_writer.start()
+        writer = TimeSeriesWriter(DummyTimeSeries(fail=True), 1, background_writer)
+        with pytest.raises(IOError):
+            try:
+                self._write_samples(writer, 10)
+            finally:
+                background_writer.close()
+
+
+    def test_loop_error_not_masked_on_close(self):
+        with pytest.raises(ValueError):
+            with BackgroundWriter() as background_writer:
+                background_writer.submit(DummyTimeSeries(fail=True).write_data_slice, [1])
+                raise ValueError("Simulation diverged")
+
+
+    def test_close_error_raised_on_exit(self):
+        with pytest.raises(IOError):
+            with BackgroundWriter() as background_writer:
+                background_writer.submit(DummyTimeSeries(fail=True).write_data_slice, [1])
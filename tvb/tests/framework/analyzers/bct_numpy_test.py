@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Check the NumPy implementation of BCT functions against reference values, computed by hand
+from the BCT definitions on small graphs.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import numpy
+import pytest
+from tvb.adapters.analyzers import bct_numpy
+from tvb.adapters.analyzers.bct_degree_adapters import Degree, JointDegree
+from tvb.basic.profile import TvbProfile
+from tvb.core.adapters.exceptions import LaunchException
+from tvb.datatypes.connectivity import Connectivity
+
+# Triangle (nodes 0, 1, 2) with node 3 hanging from node 2
+TRIANGLE = numpy.array([[0, 1, 1, 0],
+                        [1, 0, 1, 0],
+                        [1, 1, 0, 1],
+                        [0, 0, 1, 0]], dtype=float)
+# Directed cycle 0 -> 1 -> 2 -> 0, with different weights
+CYCLE = numpy.array([[0, 2, 0],
+                     [0, 0, 3],
+                     [1, 0, 0]], dtype=float)
+# Star with center in node 0
+STAR = numpy.array([[0, 1, 1, 1],
+                    [1, 0, 0, 0],
+                    [1, 0, 0, 0],
+                    [1, 0, 0, 0]], dtype=float)
+
+
+def _two_cliques():
+    """
+    Two 4-cliques, connected by one edge between nodes 3 and 4.
+    """
+    matrix = numpy.zeros((8, 8))
+    matrix[:4, :4] = 1
+    matrix[4:, 4:] = 1
+    numpy.fill_diagonal(matrix, 0)
+    matrix[3, 4] = matrix[4, 3] = 1
+    return matrix
+
+
+
+class TestBCTNumpy(object):
+    """
+    Test BCT functions computed without MATLAB.
+    """
+
+
+    def test_degrees_and_strengths(self):
+        in_degree, out_degree, degree = bct_numpy.degrees_dir(CYCLE)
+        assert numpy.array_equal([1, 1, 1], in_degree)
+        assert numpy.array_equal([1, 1, 1], out_degree)
+        assert numpy.array_equal([2, 2, 2], degree)
+
+        in_strength, out_strength, strength = bct_numpy.strengths_dir(CYCLE)
+        assert numpy.array_equal([1, 2, 3], in_strength)
+        assert numpy.array_equal([2, 3, 1], out_strength)
+        assert numpy.array_equal([3, 5, 4], strength)
+        assert numpy.array_equal([2, 2, 3, 1], bct_numpy.degrees_und(TRIANGLE)[0])
+
+        positive, negative, total_positive, total_negative = bct_numpy.strengths_und_sign(TRIANGLE - 2 * STAR)
+        assert numpy.array_equal([0, 1, 2, 1], positive)
+        assert numpy.array_equal([4, 1, 1, 2], negative)
+        assert (4, 8) == (total_positive, total_negative)
+
+
+    def test_density(self):
+        density, nodes, edges = bct_numpy.density_dir(CYCLE)
+        assert (0.5, 3, 3) == (density, nodes, edges)
+        density, nodes, edges = bct_numpy.density_und(TRIANGLE)
+        assert (4 / 6.0, 4, 4) == (density, nodes, edges)
+
+
+    def test_clustering_and_transitivity(self):
+        assert numpy.allclose([1, 1, 1 / 3.0, 0], bct_numpy.clustering_coef_bu(TRIANGLE)[0])
+        assert numpy.allclose([1, 1, 1 / 3.0, 0], bct_numpy.clustering_coef_wu(TRIANGLE)[0])
+        assert numpy.allclose(0.6, bct_numpy.transitivity_bu(TRIANGLE)[0])
+        assert numpy.allclose(0.6, bct_numpy.transitivity_wu(TRIANGLE)[0])
+        # On a directed cycle, each node is in one cycle out of two possible ones
+        assert numpy.allclose([0.5, 0.5, 0.5], bct_numpy.clustering_coef_bd(CYCLE != 0)[0])
+        assert numpy.allclose(0.5, bct_numpy.transitivity_bd(CYCLE != 0)[0])
+
+
+    def test_distance_and_centrality(self):
+        path = numpy.zeros((4, 4))
+        path[0, 1] = path[1, 0] = path[1, 2] = path[2, 1] = 1
+        distance = bct_numpy.distance_bin(path)[0]
+        assert numpy.array_equal([0, 1, 2, numpy.inf], distance[0])
+        assert numpy.array_equal([numpy.inf, numpy.inf, numpy.inf, 0], distance[3])
+
+        # Shortest paths between each ordered pair of leaves go through the center
+        assert numpy.array_equal([6, 0, 0, 0], bct_numpy.betweenness_bin(STAR)[0])
+        complete = numpy.ones((4, 4)) - numpy.eye(4)
+        assert numpy.allclose([0.5] * 4, bct_numpy.eigenvector_centrality_und(complete)[0])
+        edge = numpy.array([[0, 1], [1, 0]], dtype=float)
+        assert numpy.allclose([numpy.cosh(1)] * 2, bct_numpy.subgraph_centrality(edge)[0])
+
+
+    def test_modularity(self):
+        cliques = _two_cliques()
+        for communities, modularity in [bct_numpy.modularity_und(cliques), bct_numpy.modularity_dir(cliques)]:
+            assert len(set(communities[:4])) == 1
+            assert len(set(communities[4:])) == 1
+            assert communities[0] != communities[4]
+            assert numpy.allclose(11 / 26.0, modularity)
+
+        result = bct_numpy.evaluate("[Ci, Q]=modularity_dir(W); P = participation_coef(W, Ci);", {'W': cliques})
+        assert numpy.allclose([0, 0, 0, 0.375, 0.375, 0, 0, 0], result['P'])
+
+
+    def test_batch_equals_single(self):
+        random_state = numpy.random.RandomState(42)
+        matrices = random_state.rand(5, 10, 10) * (random_state.rand(5, 10, 10) > 0.6)
+        matrices = matrices + numpy.swapaxes(matrices, -1, -2)
+        for function in bct_numpy.FUNCTIONS.values():
+            if function is bct_numpy.participation_coef:
+                continue
+            batch_results = function(matrices)
+            for idx, matrix in enumerate(matrices):
+                for batch_result, single_result in zip(batch_results, function(matrix)):
+                    assert numpy.allclose(single_result, batch_result[idx])
+
+
+    def test_evaluate(self):
+        assert bct_numpy.supports("[id,od,deg] = degrees_dir(CIJ);")
+        assert bct_numpy.supports("v = eigenvector_centrality_und(CIJ)")
+        assert not bct_numpy.supports("[J,J_od,J_id,J_bl] = jdegree(CIJ);")
+        assert not bct_numpy.supports("deg = degrees_und(CIJ) + 1;")
+        with pytest.raises(ValueError):
+            bct_numpy.evaluate("[J,J_od,J_id,J_bl] = jdegree(CIJ);", {'CIJ': CYCLE})
+
+        result = bct_numpy.evaluate("[id,od,deg] = degrees_dir(CIJ);", {'CIJ': CYCLE})
+        assert numpy.array_equal([2, 2, 2], result['deg'])
+
+
+    def test_adapter_backends(self, monkeypatch):
+        assert Degree.has_numpy_backend()
+        assert not JointDegree.has_numpy_backend()
+        result = Degree().execute_bct(Degree._matlab_code, CIJ=TRIANGLE)
+        assert numpy.array_equal([2, 2, 3, 1], result['deg'])
+
+        monkeypatch.setattr(TvbProfile.current, "MATLAB_EXECUTABLE", "")
+        assert 1 == len(Degree().get_input_tree()[1]['options'])
+        adapter = JointDegree()
+        assert 1 == len(adapter.get_input_tree())
+        with pytest.raises(LaunchException):
+            adapter.execute_bct(JointDegree._matlab_code, CIJ=TRIANGLE)
+
+
+    def test_launch_batch(self, monkeypatch):
+        evaluate = bct_numpy.evaluate
+        evaluated_stacks = []
+
+        def _evaluate(code, workspace):
+            evaluated_stacks.append(workspace['CIJ'].shape)
+            return evaluate(code, workspace)
+
+        monkeypatch.setattr(bct_numpy, "evaluate", _evaluate)
+        connectivities = [Connectivity(weights=TRIANGLE), Connectivity(weights=CYCLE), Connectivity(weights=STAR)]
+        measures = Degree().launch_batch(connectivities)
+
+        assert sorted([(1, 3, 3), (2, 4, 4)]) == sorted(evaluated_stacks)
+        assert 3 == len(measures)
+        for connectivity, measure in zip(connectivities, measures):
+            assert measure.connectivity is connectivity
+            assert numpy.array_equal(bct_numpy.degrees_und(connectivity.weights)[0], measure.array_data)
+
+        with pytest.raises(LaunchException):
+            JointDegree().launch_batch(connectivities)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Check the vectorized FCD computation against the window by window loops of FcdCalculator.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import numpy
+from numpy import linalg
+from tvb.adapters.analyzers import fcd_numpy
+
+
+
+class TestFcdNumpy(object):
+    """
+    Reference results are computed as tvb.analyzers.fcd_matrix.FcdCalculator does.
+    """
+    SP = 2.5
+    SW = 20.0
+
+
+    def setup_method(self):
+        self.data = numpy.random.random((200, 6))
+        self.nr_windows = int((self.data.shape[0] - self.SW) / self.SP)
+
+
+    def _reference_fc_stream(self):
+        fc_stream = []
+        start = -self.SP
+        for _ in range(self.nr_windows):
+            start += self.SP
+            fc = numpy.corrcoef(self.data[int(start):int(start + self.SW) + 1].T)
+            fc_stream.append(fc[numpy.triu_indices(len(fc), 1)])
+        return fc_stream
+
+
+    def test_sliding_window_fc(self):
+        starts, ends = fcd_numpy.window_bounds(self.nr_windows, self.SP, self.SW)
+        fc_stack = fcd_numpy.sliding_window_fc(self.data, starts, ends)
+        assert (self.nr_windows, 6, 6) == fc_stack.shape
+
+        triangular = numpy.triu_indices(6, 1)
+        for fc, expected in zip(fc_stack, self._reference_fc_stream()):
+            assert numpy.allclose(expected, fc[triangular])
+            assert numpy.allclose(fc, fc.T)
+
+
+    def test_fcd_matrix(self):
+        starts, ends = fcd_numpy.window_bounds(self.nr_windows, self.SP, self.SW)
+        fcd = fcd_numpy.fcd_matrix(fcd_numpy.sliding_window_fc(self.data, starts, ends))
+
+        fc_stream = self._reference_fc_stream()
+        for i in range(self.nr_windows):
+            for j in range(i, self.nr_windows):
+                expected = numpy.corrcoef(fc_stream[i], fc_stream[j])[0, 1]
+                assert numpy.allclose(expected, fcd[i, j])
+                assert numpy.allclose(expected, fcd[j, i])
+
+
+    def _reference_eigen(self, fc, nr_eigenvectors):
+        eigval_matrix, eigvect_matrix = linalg.eig(fc)
+        eigval_matrix = numpy.real(eigval_matrix)
+        eigvect_matrix = numpy.real(eigvect_matrix)
+        eigval_matrix = eigval_matrix / numpy.sum(numpy.abs(eigval_matrix))
+        values, vectors = [], []
+        for _ in range(nr_eigenvectors):
+            index = numpy.argmax(eigval_matrix)
+            vectors.append(abs(eigvect_matrix[:, index]))
+            values.append(eigval_matrix[index])
+            eigval_matrix[index] = 0
+        return numpy.array(values), numpy.array(vectors).T
+
+
+    def test_largest_eigenvectors(self):
+        fc_stack = numpy.array([numpy.corrcoef(self.data[start:start + 50].T) for start in (0, 50, 100)])
+
+        for solver in (fcd_numpy.SOLVER_FULL, fcd_numpy.SOLVER_LANCZOS):
+            eigenvalues, eigenvectors = fcd_numpy.largest_eigenvectors(fc_stack, 3, solver)
+            assert (3, 3) == eigenvalues.shape
+            assert (3, 6, 3) == eigenvectors.shape
+            for fc, values, vectors in zip(fc_stack, eigenvalues, eigenvectors):
+                expected_values, expected_vectors = self._reference_eigen(fc, 3)
+                assert numpy.allclose(expected_values, values)
+                assert numpy.allclose(expected_vectors, vectors)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Tests for the resident MATLAB/Octave session, using a small fake interpreter as stand-in for Octave.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import os
+import sys
+import stat
+import numpy
+import pytest
+from tvb.adapters.analyzers.matlab_worker import MatlabSession
+from tvb.core.adapters.exceptions import LaunchException
+
+
+FAKE_INTERPRETER = """#!%s
+# Executes simple assignments (valid in both MATLAB and Python) and the statements written by MatlabSession.
+# Like MATLAB, it can print a prompt (without end of line) in front of each statement it reads.
+import sys
+import time
+from scipy.io import loadmat, savemat
+
+PROMPT = %r
+workspace = {}
+for line in iter(sys.stdin.readline, ''):
+    sys.stdout.write(PROMPT)
+    line = line.strip()
+    if line == "exit":
+        break
+    elif line == "crash;":
+        sys.exit(1)
+    elif line == "clear;":
+        workspace = {}
+    elif line.startswith("pause("):
+        time.sleep(float(line[6:-2]))
+    elif line.startswith("load('"):
+        loaded = loadmat(line.split("'")[1], squeeze_me=True)
+        workspace.update(dict((key, value) for key, value in loaded.items() if not key.startswith('__')))
+    elif line.startswith("save('"):
+        savemat(line.split("'")[1], workspace)
+    elif line.startswith("disp('"):
+        sys.stdout.write(line.split("'")[1] + "\\n")
+        sys.stdout.flush()
+    else:
+        try:
+            exec(line, {}, workspace)
+        except Exception:
+            pass
+"""
+
+
+
+class TestMatlabSession(object):
+    """
+    Test the interpreter stays resident between calls, and gets restarted after a crash or a timeout.
+    """
+
+
+    def setup_method(self):
+        self.session = None
+
+
+    def teardown_method(self):
+        if self.session is not None:
+            self.session.close()
+
+
+    def _build_session(self, folder, timeout=MatlabSession.DEFAULT_TIMEOUT, prompt=""):
+        executable = os.path.join(folder, "fake_octave")
+        with open(executable, "w") as interpreter:
+            interpreter.write(FAKE_INTERPRETER % (sys.executable, prompt))
+        os.chmod(executable, os.stat(executable).st_mode | stat.S_IEXEC)
+        self.session = MatlabSession(executable, timeout)
+        return self.session
+
+
+    def test_session_reused(self, tmpdir):
+        session = self._build_session(str(tmpdir))
+        _, _, result = session.execute("B = A * 2;", {'A': numpy.arange(4.0)})
+        assert numpy.array_equal(numpy.arange(4.0) * 2, result['B'].flatten())
+        process_id = session._process.pid
+
+        _, _, result = session.execute("C = A + 1;", {'A': numpy.ones(3)})
+        assert numpy.array_equal(numpy.ones(3) + 1, result['C'].flatten())
+        assert 'B' not in result
+        assert process_id == session._process.pid
+        assert [] == os.listdir(session.work_folder)
+
+
+    def test_marker_after_prompt(self, tmpdir):
+        session = self._build_session(str(tmpdir), timeout=10, prompt=">> ")
+        _, log_text, result = session.execute("B = 5;")
+        assert 5 == result['B']
+        assert "done" not in log_text
+        process_id = session._process.pid
+
+        _, _, result = session.execute("B = 6;")
+        assert 6 == result['B']
+        assert process_id == session._process.pid
+
+
+    def test_restart_after_crash(self, tmpdir):
+        session = self._build_session(str(tmpdir))
+        session.execute("B = 1;")
+        process_id = session._process.pid
+
+        with pytest.raises(LaunchException):
+            session.execute("crash;")
+        assert not session.is_alive()
+
+        _, _, result = session.execute("B = 2;")
+        assert 2 == result['B']
+        assert process_id != session._process.pid
+
+
+    def test_restart_after_timeout(self, tmpdir):
+        session = self._build_session(str(tmpdir), timeout=1)
+        with pytest.raises(LaunchException):
+            session.execute("pause(30);")
+        assert not session.is_alive()
+
+        _, _, result = session.execute("B = 3;")
+        assert 3 == result['B']
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import time
+import random
+import threading
+import numpy
+import pytest
+from tvb.core.adapters.block_pipeline import BlockPipeline, SlicePipeline
+
+
+
+class TestBlockPipeline(object):
+    """
+    Test blocks are computed in parallel, written in order, and the memory (blocks in flight) stays bounded.
+    """
+
+
+    def setup_method(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.written = []
+
+
+    def _read(self, block):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return numpy.arange(block * 10, (block + 1) * 10)
+
+
+    @staticmethod
+    def _compute(data):
+        time.sleep(random.random() / 100)
+        return data * 2
+
+
+    def _write(self, block, result):
+        self.written.append((block, result))
+        with self.lock:
+            self.in_flight -= 1
+
+
+    def test_results_written_in_order(self):
+        pipeline = BlockPipeline(workers=4)
+        pipeline.run(list(range(30)), self._read, self._compute, self._write)
+
+        assert list(range(30)) == [block for block, _ in self.written]
+        for block, result in self.written:
+            assert numpy.array_equal(numpy.arange(block * 10, (block + 1) * 10) * 2, result)
+        assert self.max_in_flight <= pipeline.max_in_flight
+
+
+    def test_single_worker(self):
+        pipeline = BlockPipeline(workers=1)
+        pipeline.run(list(range(5)), self._read, self._compute, self._write)
+        assert list(range(5)) == [block for block, _ in self.written]
+        assert 1 == self.max_in_flight
+
+
+    def test_compute_error(self):
+        def compute(data):
+            if data[0] == 50:
+                raise ValueError("Invalid block")
+            return data
+
+        with pytest.raises(ValueError):
+            BlockPipeline(workers=3).run(list(range(20)), self._read, compute, self._write)
+        assert list(range(5)) == [block for block, _ in self.written]
+
+
+    def test_read_error(self):
+        def read(block):
+            if block == 3:
+                raise IOError("Could not read block")
+            return self._read(block)
+
+        with pytest.raises(IOError):
+            BlockPipeline(workers=3).run(list(range(20)), read, self._compute, self._write)
+        assert list(range(3)) == [block for block, _ in self.written]
+
+
+
+class _InMemoryTimeSeries(object):
+    """
+    Expose the TimeSeries slice reading, over a NumPy array.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.read_slices = []
+
+
+    def read_data_slice(self, data_slice):
+        self.read_slices.append(data_slice)
+        return self.data[data_slice]
+
+
+
+class TestSlicePipeline(object):
+    """
+    Test the (state variable, mode) slices of a 4D TimeSeries are computed independently, and written in order.
+    """
+
+
+    def test_slices_per_state_variable(self):
+        slices = SlicePipeline.get_slices((10, 3, 5, 2))
+        assert 3 == len(slices)
+        assert [slice(var, var + 1) for var in range(3)] == [current[1] for current in slices]
+        assert all(current[3] == slice(2) for current in slices)
+
+
+    def test_slices_per_mode(self):
+        slices = SlicePipeline.get_slices((10, 3, 5, 2), split_modes=True)
+        expected = [(slice(mode, mode + 1), slice(var, var + 1)) for mode in range(2) for var in range(3)]
+        assert expected == [(current[3], current[1]) for current in slices]
+
+
+    def test_workers_bounded(self):
+        assert 3 == SlicePipeline((10, 3, 5, 1), 1, workers=8).workers
+        # When not even two slices fit in memory, they are computed one by one
+        pipeline = SlicePipeline((10, 3, 5, 1), 2 ** 60, workers=8)
+        assert 1 == pipeline.workers
+        assert 2 ** 60 == pipeline.required_memory
+
+
+    def test_required_memory(self):
+        pipeline = SlicePipeline((10, 6, 5, 1), 100, workers=2)
+        assert 2 == pipeline.workers
+        assert 300 == pipeline.required_memory
+
+
+    def test_run_slices(self):
+        data = numpy.random.random((20, 4, 5, 3))
+        time_series = _InMemoryTimeSeries(data)
+        written = []
+
+        def compute(slice_data):
+            time.sleep(random.random() / 100)
+            return slice_data.mean(axis=0)
+
+        pipeline = SlicePipeline(data.shape, data[:, :1].nbytes, workers=4, split_modes=True)
+        pipeline.run_slices(time_series, compute, written.append)
+
+        assert 12 == len(written)
+        assert pipeline.slices == time_series.read_slices
+        for current_slice, result in zip(pipeline.slices, written):
+            assert numpy.allclose(data[current_slice].mean(axis=0), result)
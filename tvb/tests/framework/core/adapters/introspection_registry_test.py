@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import os
+import sys
+from tvb.tests.framework.core.base_testcase import BaseTestCase
+from tvb.core import removers_factory
+from tvb.core.adapters.abcremover import ABCRemover
+from tvb.core.adapters.introspection_registry import IntrospectionRegistry
+from tvb.core.services.initializer import introspect_modules
+
+TESTED_MODULES = ["tvb.config", "tvb.tests.framework"]
+
+
+
+class TestIntrospectionRegistry(BaseTestCase):
+    """
+    Test the introspection result is reused only on an unchanged tree.
+    """
+
+
+    def _build_package(self, folder):
+        """
+        Create on disk a package declaring one adapters sub-package, to be introspected.
+        """
+        package_folder = os.path.join(folder, "registry_test_package")
+        adapters_folder = os.path.join(package_folder, "adapters")
+        os.makedirs(adapters_folder)
+        with open(os.path.join(package_folder, "__init__.py"), "w") as init_file:
+            init_file.write("ADAPTERS = {'Test': {'modules': ['registry_test_package.adapters']}}\n")
+        with open(os.path.join(adapters_folder, "__init__.py"), "w") as init_file:
+            init_file.write("__all__ = ['adapter']\n")
+        adapter_file = os.path.join(adapters_folder, "adapter.py")
+        with open(adapter_file, "w") as adapter:
+            adapter.write("VALUE = 1\n")
+        return adapter_file
+
+
+    def test_fingerprint_changes_with_files(self, tmpdir):
+        adapter_file = self._build_package(str(tmpdir))
+        sys.path.insert(0, str(tmpdir))
+        try:
+            registry = IntrospectionRegistry(os.path.join(str(tmpdir), "registry.json"))
+            fingerprint = registry.compute_fingerprint(["registry_test_package"])
+            assert fingerprint == registry.compute_fingerprint(["registry_test_package"])
+
+            registry.store(fingerprint, {'Connectivity': 'tvb.core.adapters.abcremover.ABCRemover'})
+            assert {'Connectivity': 'tvb.core.adapters.abcremover.ABCRemover'} == registry.get_removers(fingerprint)
+
+            with open(adapter_file, "a") as adapter:
+                adapter.write("OTHER_VALUE = 2\n")
+            new_fingerprint = registry.compute_fingerprint(["registry_test_package"])
+            assert fingerprint != new_fingerprint
+            assert registry.get_removers(new_fingerprint) is None
+        finally:
+            sys.path.remove(str(tmpdir))
+            sys.modules.pop("registry_test_package", None)
+
+
+    def test_missing_or_corrupt_registry(self, tmpdir):
+        registry_file = os.path.join(str(tmpdir), "registry.json")
+        registry = IntrospectionRegistry(registry_file)
+        assert registry.get_removers("fingerprint") is None
+        with open(registry_file, "w") as registry_content:
+            registry_content.write("not json")
+        assert registry.get_removers("fingerprint") is None
+
+
+    def test_removers_loaded_lazily(self):
+        removers_factory.update_dictionary({'LazyRemovedType': 'tvb.core.adapters.abcremover.ABCRemover'})
+        try:
+            assert ABCRemover is removers_factory.get_remover('LazyRemovedType')
+            assert ABCRemover is removers_factory.FACTORY_DICTIONARY['LazyRemovedType']
+        finally:
+            del removers_factory.FACTORY_DICTIONARY['LazyRemovedType']
+
+
+    def test_introspection_skipped_on_unchanged_tree(self):
+        """
+        Modules were introspected when the test environment got initialized.
+        """
+        assert introspect_modules(TESTED_MODULES, force=True)
+        assert not introspect_modules(TESTED_MODULES)
+        assert 'default' in removers_factory.FACTORY_DICTIONARY
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Check the single-pass metrics give the same results as the in-memory algorithms.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import numpy
+from tvb.adapters.analyzers.metric_accumulators import get_accumulator
+from tvb.adapters.analyzers.node_complex_coherence_adapter import ComplexCoherenceAccumulator
+from tvb.analyzers.metric_kuramoto_index import KuramotoIndex
+from tvb.analyzers.metric_proxy_metastability import ProxyMetastabilitySynchrony
+from tvb.analyzers.metric_variance_global import GlobalVariance
+from tvb.analyzers.metric_variance_of_node_variance import VarianceNodeVariance
+from tvb.analyzers.node_complex_coherence import NodeComplexCoherence
+from tvb.core.adapters.time_series_stream import MomentsAccumulator, TimeSeriesStream
+from tvb.datatypes.time_series import TimeSeries
+
+
+
+class _InMemoryTimeSeries(object):
+    """
+    Expose an array through the TimeSeries reading methods used by the stream.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.reads = 0
+
+
+    def read_data_shape(self):
+        return self.data.shape
+
+
+    def read_data_slice(self, data_slice):
+        self.reads += 1
+        return self.data[data_slice]
+
+
+
+class TestTimeSeriesStream(object):
+    """
+    Stream an array in small chunks, and compare with the results computed on the full array.
+    """
+
+
+    def setup_method(self):
+        self.data = numpy.random.random((3000, 2, 10, 3)) * 3 + 100
+        self.time_series = _InMemoryTimeSeries(self.data)
+
+
+    def _stream(self, chunk_length, chunk_alignment=1):
+        stream = TimeSeriesStream(self.time_series, workers=4, chunk_alignment=chunk_alignment)
+        stream.chunk_length = chunk_length
+        return stream
+
+
+    def test_moments_merge(self):
+        moments = MomentsAccumulator()
+        for chunk in numpy.array_split(self.data[:, 0, 0, 0], 7):
+            moments.merge(MomentsAccumulator.compute(chunk))
+        assert numpy.allclose(self.data[:, 0, 0, 0].mean(), moments.mean)
+        assert numpy.allclose(self.data[:, 0, 0, 0].var(), moments.variance)
+
+
+    def test_data_read_once(self):
+        stream = self._stream(137)
+        algorithms = [GlobalVariance(start_point=500.0), VarianceNodeVariance(start_point=500.0)]
+        for algorithm in algorithms:
+            algorithm.time_series = TimeSeries(use_storage=False)
+        stream.run([get_accumulator(algorithm, self.data.shape) for algorithm in algorithms])
+        assert numpy.ceil(3000 / 137.0) == self.time_series.reads
+
+
+    def test_metrics(self):
+        reference_series = TimeSeries(data=self.data, sample_period=1.0, use_storage=False)
+        algorithms = [GlobalVariance(start_point=500.0), VarianceNodeVariance(start_point=500.0),
+                      ProxyMetastabilitySynchrony(start_point=500.0), KuramotoIndex()]
+        accumulators = []
+        for algorithm in algorithms:
+            algorithm.time_series = reference_series
+            accumulators.append(get_accumulator(algorithm, self.data.shape))
+
+        results = self._stream(137).run(accumulators)
+        for algorithm, result in zip(algorithms, results):
+            expected = algorithm.evaluate()
+            if isinstance(expected, dict):
+                for key in expected:
+                    assert numpy.allclose(expected[key], result[key])
+            else:
+                assert numpy.allclose(expected, result)
+
+
+    def test_complex_coherence(self):
+        data = numpy.random.random((5300, 2, 6, 2))
+        self.time_series = _InMemoryTimeSeries(data)
+        algorithm = NodeComplexCoherence()
+        algorithm.time_series = TimeSeries(data=data, sample_period=1.0, use_storage=False)
+        expected = algorithm.evaluate()
+
+        accumulator = ComplexCoherenceAccumulator(algorithm, data.shape, 1.0)
+        stream = self._stream(accumulator.epoch_tpts, accumulator.epoch_tpts)
+        [(coherence, cross_spectrum)] = stream.run([accumulator], end=accumulator.used_time_points)
+        assert numpy.allclose(expected.array_data, coherence)
+        assert numpy.allclose(expected.cross_spectrum, cross_spectrum)
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Tests for the parallel H5 files upgrade: progress reporting and batched recording of results in DB.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import tvb.core.entities.file.files_update_manager as files_update_manager
+from tvb.core.entities.file import files_update_worker
+from tvb.core.entities.file.files_update_manager import FilesUpgradeProgress, FilesUpgradeRunner
+
+
+DATA_VERSION = 3
+
+
+
+class _FakeWorker(object):
+    """
+    Stand-in for the worker process: fails on GIDs starting with 'bad', dies on GIDs starting with 'crash'.
+    """
+    started = 0
+
+
+    def __init__(self):
+        _FakeWorker.started += 1
+
+
+    def upgrade(self, gid):
+        if gid.startswith("crash"):
+            return None
+        if gid.startswith("bad"):
+            return dict(status=files_update_worker.STATUS_ERROR, gid=gid)
+        return dict(status=files_update_worker.STATUS_UPGRADED, data_version=DATA_VERSION, disk_size=10, gid=gid)
+
+
+    def close(self):
+        return 0
+
+
+
+class _FakeDao(object):
+    """
+    Keep DataTypes to upgrade in memory, and record the batches committed.
+    """
+
+    def __init__(self, gids):
+        self.rows = [(idx + 1, gid) for idx, gid in enumerate(gids)]
+        self.batches = []
+
+
+    def get_datatypes_to_upgrade(self, data_version, after_id=0, page_size=500):
+        return [row for row in self.rows if row[0] > after_id][:page_size]
+
+
+    def update_datatypes_after_upgrade(self, checked, failed):
+        self.batches.append((list(checked), list(failed)))
+
+
+
+class TestFilesUpgradeRunner(object):
+    """
+    Test the FilesUpgradeRunner with fake workers and DAO.
+    """
+
+
+    def setup_method(self):
+        self.original_dao = files_update_manager.dao
+        self.original_worker = files_update_manager.FilesUpgradeWorker
+        files_update_manager.FilesUpgradeWorker = _FakeWorker
+        _FakeWorker.started = 0
+
+
+    def teardown_method(self):
+        files_update_manager.dao = self.original_dao
+        files_update_manager.FilesUpgradeWorker = self.original_worker
+
+
+    def _run(self, gids, workers=3):
+        fake_dao = _FakeDao(gids)
+        files_update_manager.dao = fake_dao
+        progress = FilesUpgradeProgress(len(gids))
+        runner = FilesUpgradeRunner(workers, progress)
+        runner.PAGE_SIZE = 7
+        runner.DB_BATCH_SIZE = 10
+        runner.run(DATA_VERSION)
+        return progress, fake_dao
+
+
+    def test_all_datatypes_recorded_in_batches(self):
+        gids = ["gid%d" % idx for idx in range(45)] + ["bad1", "bad2"]
+        progress, fake_dao = self._run(gids)
+
+        assert 47 == progress.done
+        assert (45, 2) == (progress.upgraded, progress.error)
+        assert len(fake_dao.batches) >= 4
+        assert all(len(checked) + len(failed) <= 10 for checked, failed in fake_dao.batches)
+
+        checked = [row for batch in fake_dao.batches for row in batch[0]]
+        failed = [row for batch in fake_dao.batches for row in batch[1]]
+        assert list(range(1, 46)) == sorted(row[0] for row in checked)
+        assert all((DATA_VERSION, 10) == row[1:] for row in checked)
+        assert [46, 47] == sorted(failed)
+
+
+    def test_crashed_worker_is_replaced(self):
+        gids = ["gid1", "crash1", "gid2", "gid3"]
+        progress, fake_dao = self._run(gids, workers=1)
+
+        assert (3, 1) == (progress.upgraded, progress.error)
+        assert 2 == _FakeWorker.started
+        assert [2] == [row for batch in fake_dao.batches for row in batch[1]]
+
+
+    def test_progress_eta(self):
+        progress = FilesUpgradeProgress(10)
+        assert progress.eta is None
+        assert "ETA: -" in progress.message
+
+        progress.start_time -= 60
+        for status in [files_update_worker.STATUS_UPGRADED, files_update_worker.STATUS_UP_TO_DATE,
+                       files_update_worker.STATUS_ERROR, files_update_worker.STATUS_IGNORED]:
+            progress.add(status)
+        assert (1, 2, 1, 4) == (progress.upgraded, progress.ignored, progress.error, progress.done)
+        assert 85 < progress.eta < 95
+        assert "ETA: 1 min" in progress.message
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Tests for the pool of open H5 files, including concurrent access from multiple threads.
+"""
+
+import os
+import time
+import numpy
+import pytest
+import shutil
+import threading
+import tvb.core.entities.file.hdf5_storage_manager as hdf5
+from tvb.basic.profile import TvbProfile
+from tvb.core.entities.file.exceptions import FileStructureException
+from tvb.core.entities.file.hdf5_file_pool import H5FilePool, H5_FILE_POOL
+
+
+DATASET_NAME = "dataset1"
+META_KEY = "meta_key"
+
+
+
+class TestH5FilePool(object):
+    """
+    Test reference counting and promotion/demotion of pooled H5 files.
+    """
+
+
+    def setup_method(self):
+        self.storage_folder = os.path.join(TvbProfile.current.TVB_TEMP_FOLDER, "test_hdf5_pool")
+        if os.path.exists(self.storage_folder):
+            shutil.rmtree(self.storage_folder)
+        os.makedirs(self.storage_folder)
+        self.pool = H5FilePool()
+        self.test_array = numpy.random.random((20, 10))
+
+
+    def teardown_method(self):
+        self.pool.close_all()
+        H5_FILE_POOL.close_files_in_folder(self.storage_folder)
+        if os.path.exists(self.storage_folder):
+            shutil.rmtree(self.storage_folder)
+
+
+    def _create_file(self, file_name):
+        path = os.path.join(self.storage_folder, file_name)
+        h5_file = self.pool.acquire(path, 'a')
+        h5_file.create_dataset(DATASET_NAME, data=self.test_array)
+        self.pool.release(path, h5_file)
+        return path
+
+
+    def test_read_handle_is_shared(self):
+        path = self._create_file("file1.h5")
+        assert 0 == self.pool.open_files_count, "Write handles should be closed after the last release"
+
+        first = self.pool.acquire(path, 'r')
+        second = self.pool.acquire(path, 'r')
+        assert first is second
+        numpy.testing.assert_array_equal(self.test_array, second[DATASET_NAME][()])
+        self.pool.release(path, first)
+        assert second.id.valid
+        self.pool.release(path, second)
+
+        assert not second.id.valid, "Read handles should be closed after the last release, not to lock the file"
+        assert 0 == self.pool.open_files_count
+
+
+    def test_promote_waits_for_readers(self):
+        path = self._create_file("file1.h5")
+        reader = self.pool.acquire(path, 'r')
+        events = []
+
+        def _write():
+            writer = self.pool.acquire(path, 'a')
+            events.append("write")
+            writer[DATASET_NAME][0, 0] = -1
+            self.pool.release(path, writer)
+
+        thread = threading.Thread(target=_write)
+        thread.start()
+        time.sleep(0.2)
+        events.append("read done")
+        self.pool.release(path, reader)
+        thread.join(5)
+
+        assert ["read done", "write"] == events
+        assert not reader.id.valid
+        reader = self.pool.acquire(path, 'r')
+        assert -1 == reader[DATASET_NAME][0, 0]
+        self.pool.release(path, reader)
+
+
+    def test_promote_fails_while_read(self):
+        path = self._create_file("file1.h5")
+        self.pool.PROMOTION_TIMEOUT = 0.1
+        reader = self.pool.acquire(path, 'r')
+
+        with pytest.raises(FileStructureException):
+            self.pool.acquire(path, 'a')
+        assert reader.id.valid, "A handle still in use should never be closed for a writer"
+        numpy.testing.assert_array_equal(self.test_array, reader[DATASET_NAME][()])
+
+        ## Readers are no longer held back after the failed promotion
+        assert reader is self.pool.acquire(path, 'r')
+        self.pool.release(path, reader)
+        self.pool.release(path, reader)
+        assert 0 == self.pool.open_files_count
+
+
+    def test_close_files_in_folder(self):
+        path = self._create_file("file1.h5")
+        handle = self.pool.acquire(path, 'r')
+        self.pool.close_files_in_folder(self.storage_folder)
+        assert not handle.id.valid
+        assert 0 == self.pool.open_files_count
+        ## Releasing a forcibly closed handle is ignored
+        self.pool.release(path, handle)
+
+
+    def test_concurrent_storage_managers(self):
+        """
+        Simulate multiple web threads reading data and metadata from the same file, while others write metadata.
+        """
+        file_name = "concurrent.h5"
+        hdf5.HDF5StorageManager(self.storage_folder, file_name).store_data(DATASET_NAME, self.test_array)
+        errors = []
+
+        def _read():
+            try:
+                for _ in range(30):
+                    storage = hdf5.HDF5StorageManager(self.storage_folder, file_name)
+                    numpy.testing.assert_array_equal(self.test_array, storage.get_data(DATASET_NAME))
+                    numpy.testing.assert_array_equal(self.test_array[2:5], storage.get_data(DATASET_NAME,
+                                                                                            slice(2, 5)))
+                    storage.get_metadata(DATASET_NAME)
+            except Exception as excep:
+                errors.append(excep)
+
+        def _write(idx):
+            try:
+                for step in range(10):
+                    storage = hdf5.HDF5StorageManager(self.storage_folder, file_name)
+                    storage.set_metadata({META_KEY + str(idx): step}, DATASET_NAME)
+            except Exception as excep:
+                errors.append(excep)
+
+        threads = [threading.Thread(target=_read) for _ in range(8)]
+        threads += [threading.Thread(target=_write, args=(idx,)) for idx in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(60)
+
+        assert [] == errors
+        metadata = hdf5.HDF5StorageManager(self.storage_folder, file_name).get_metadata(DATASET_NAME)
+        assert 9 == metadata[META_KEY + "0"]
+        assert 9 == metadata[META_KEY + "1"]
@@ -34,10 +34,13 @@
 """
 
 import os
+import h5py
 import numpy
 import shutil
 import pytest
 import tvb.core.entities.file.hdf5_storage_manager as hdf5
+from tvb.core.entities.file.hdf5_storage_policy import StoragePolicy, TIME_MAJOR, VERTEX_MAJOR, GZIP, LZF
+from tvb.core.entities.file.hdf5_storage_policy import get_datatype_storage_policy
 from tvb.basic.profile import TvbProfile
 from tvb.core.entities.file.exceptions import FileStructureException, MissingDataSetException
 from tvb.core.entities.file.exceptions import IncompatibleFileManagerException
@@ -486,3 +489,92 @@ class TestHDF5Storage():
         self.assertArrayEqual(TvbProfile.current.version.DATA_VERSION,
                               read_data[TvbProfile.current.version.DATA_VERSION_ATTRIBUTE])
 
+
+    def test_chunk_shape_computation(self):
+        """
+        Test chunk shapes computed for time-major and grow-dimension policies.
+        """
+        policy = StoragePolicy(major_dimension=0, chunk_bytes=8 * 1024, minor_extent=16)
+        ## Time series like (time, state-variables, nodes, modes) with float64: nodes are capped to 16
+        assert (32, 2, 16, 1) == policy.compute_chunk_shape((1000, 2, 16000, 1), 8)
+        ## Not more than the full extent on a fixed size major dimension
+        assert (10, 2, 16, 1) == policy.compute_chunk_shape((10, 2, 16000, 1), 8)
+        ## But unlimited when the major dimension is also the one growing
+        assert (32, 2, 16, 1) == policy.compute_chunk_shape((1, 2, 16000, 1), 8, grow_dimension=0)
+        ## Small fixed size arrays are kept contiguous
+        assert policy.compute_chunk_shape((10, 3), 8) is None
+        assert policy.compute_chunk_shape((), 8) is None
+
+        grow_policy = StoragePolicy(major_dimension=None, chunk_bytes=8 * 1024, minor_extent=16)
+        assert (16, 64) == grow_policy.compute_chunk_shape((16, 1), 8, grow_dimension=-1)
+
+
+    def test_datatype_storage_policy(self):
+        """
+        Test that DataType subclasses get the policies registered for their base class name.
+        """
+        TimeSeries = type("TimeSeries", (object,), {})
+        TimeSeriesRegion = type("TimeSeriesRegion", (TimeSeries,), {})
+        Surface = type("Surface", (object,), {})
+
+        assert TIME_MAJOR is get_datatype_storage_policy(TimeSeriesRegion, "data")
+        assert get_datatype_storage_policy(TimeSeriesRegion, "time") is None
+        assert VERTEX_MAJOR is get_datatype_storage_policy(Surface, "triangles")
+        assert get_datatype_storage_policy(object, "data") is None
+
+
+    def test_store_data_with_policy(self):
+        """
+        Test that chunks and filters from the storage policy are applied on the created data set.
+        """
+        policy = StoragePolicy(chunk_bytes=1024, minor_extent=4).with_filters(GZIP, 4, shuffle=True)
+        test_array = numpy.random.random((200, 10))
+        self.storage.store_data(DATASET_NAME_1, test_array, storage_policy=policy)
+
+        with h5py.File(os.path.join(self.storage_folder, STORAGE_FILE_NAME), 'r') as h5_file:
+            dataset = h5_file[DATASET_NAME_1]
+            assert (32, 4) == dataset.chunks
+            assert GZIP == dataset.compression
+            assert dataset.shuffle
+
+        self.assertArrayEqual(test_array, self.storage.get_data(DATASET_NAME_1))
+        self.assertArrayEqual(test_array[5:20, 3], self.storage.get_data(DATASET_NAME_1, (slice(5, 20), 3)))
+
+
+    def test_append_data_with_policy(self):
+        """
+        Test appending in a chunked and compressed data set.
+        """
+        for index in range(self.test_2D_array.shape[0]):
+            slices = (slice(index, index + 1, 1), slice(None, None, 1))
+            self.storage.append_data(DATASET_NAME_1, self.test_2D_array[slices], 0, close_file=False,
+                                     storage_policy=TIME_MAJOR.with_filters(LZF))
+        self.storage.close_file()
+
+        with h5py.File(os.path.join(self.storage_folder, STORAGE_FILE_NAME), 'r') as h5_file:
+            dataset = h5_file[DATASET_NAME_1]
+            assert LZF == dataset.compression
+            assert 10 == dataset.chunks[1]
+
+        self.assertArrayEqual(self.test_2D_array, self.storage.get_data(DATASET_NAME_1))
+
+
+    def test_append_many_slices(self):
+        """
+        Test appending many slices, with multiple buffer grows and flushes, on a chunked data set.
+        """
+        storage = hdf5.HDF5StorageManager(self.storage_folder, STORAGE_FILE_NAME, buffer_size=2000)
+        test_array = numpy.random.random((1000, 3, 2))
+        policy = StoragePolicy(major_dimension=0, chunk_bytes=1024)
+        for index in range(test_array.shape[0]):
+            storage.append_data(DATASET_NAME_1, test_array[index:index + 1], 0, close_file=False,
+                                storage_policy=policy)
+            if index == 500:
+                ## Buffered data should be flushed when the file is closed, even in the middle of the writes.
+                storage.close_file()
+        ## Slices bigger than the buffer should also work.
+        storage.append_data(DATASET_NAME_1, test_array, 0, close_file=False)
+        storage.close_file()
+
+        read_data = storage.get_data(DATASET_NAME_1)
+        self.assertArrayEqual(numpy.concatenate((test_array, test_array)), read_data)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+# Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+# Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+from tvb.basic.profile import TvbProfile
+from tvb.core.entities.load import load_entity_by_gid
+from tvb.core.entities.storage import dao
+from tvb.core.entities.file.hdf5_storage_manager import HDF5StorageManager
+from tvb.tests.framework.core.base_testcase import TransactionalTestCase
+from tvb.tests.framework.datatypes.datatypes_factory import DatatypesFactory
+
+
+NR_LOADS = 10
+
+
+
+class TestLoadEntity(TransactionalTestCase):
+    """
+    The data version of H5 files is recorded in DB, so loading a DataType should not open its file.
+    """
+
+
+    def setUp(self):
+        self.datatype = DatatypesFactory().create_datatype_with_storage()
+        self.version_reads = 0
+        self.original_get_version = HDF5StorageManager.get_file_data_version
+
+        def _counting_get_version(storage_manager):
+            self.version_reads += 1
+            return self.original_get_version(storage_manager)
+
+        HDF5StorageManager.get_file_data_version = _counting_get_version
+
+
+    def tearDown(self):
+        HDF5StorageManager.get_file_data_version = self.original_get_version
+
+
+    def test_load_without_version_check(self):
+        for _ in range(NR_LOADS):
+            loaded = load_entity_by_gid(self.datatype.gid)
+            assert TvbProfile.current.version.DATA_VERSION == loaded._data_version
+        assert 0 == self.version_reads
+
+
+    def test_stale_version_is_checked_once(self):
+        stored = dao.get_datatype_by_gid(self.datatype.gid)
+        stored._data_version = None
+        dao.store_entity(stored)
+
+        for _ in range(NR_LOADS):
+            loaded = load_entity_by_gid(self.datatype.gid)
+            assert not loaded.invalid
+        assert 1 == self.version_reads
+        assert TvbProfile.current.version.DATA_VERSION == dao.get_datatype_by_gid(self.datatype.gid)._data_version
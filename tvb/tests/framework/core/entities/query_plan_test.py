@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+# Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+# Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Query plan regression tests: the main DAO queries on DATA_TYPES and OPERATIONS should use
+index scans, on a synthetic database with a large number of rows.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from tvb.basic.profile import TvbProfile
+from tvb.core.entities import model
+from tvb.core.entities.storage import dao
+from tvb.tests.framework.core.base_testcase import BaseTestCase
+
+
+SYNTHETIC_ROWS = 10 ** 6
+
+INSERT_OPERATIONS = """
+    INSERT INTO "OPERATIONS" (id, fk_launched_by, fk_launched_in, fk_operation_group, gid, status,
+                              estimated_disk_size)
+    WITH RECURSIVE seq(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM seq WHERE x < :rows)
+    SELECT x, x % 100, x % 1000, CASE WHEN x % 10 = 0 THEN x % 5000 END, 'gid-' || x,
+           CASE WHEN x % 1000 = 0 THEN :started ELSE :finished END, x % 100
+    FROM seq"""
+
+INSERT_DATA_TYPES = """
+    INSERT INTO "DATA_TYPES" (id, gid, type, fk_from_operation, fk_datatype_group, fk_parent_burst, disk_size)
+    WITH RECURSIVE seq(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM seq WHERE x < :rows)
+    SELECT x, 'dt-gid-' || x, 'TimeSeriesRegion', x, CASE WHEN x % 10 = 0 THEN x % 5000 END, x % 2000, x % 100
+    FROM seq"""
+
+INSERT_DATA_TYPE_GROUPS = """
+    INSERT INTO "DATA_TYPES_GROUPS" (id, fk_operation_group, count_results)
+    WITH RECURSIVE seq(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM seq WHERE x < :rows)
+    SELECT x, x, 10 FROM seq"""
+
+
+
+@pytest.mark.skipif(TvbProfile.current.db.SELECTED_DB != 'sqlite', reason="Query plans are checked with SQLite")
+class TestQueryPlans(BaseTestCase):
+    """
+    Capture the SQL executed by DAO methods, then check its plan on the synthetic database.
+    """
+
+    synthetic_engine = None
+
+
+    @classmethod
+    def setup_class(cls):
+        cls.synthetic_engine = create_engine("sqlite://")
+        tables = [model.Operation.__table__, model.DataType.__table__, model.DataTypeGroup.__table__]
+        model.Base.metadata.create_all(cls.synthetic_engine, tables=tables)
+        connection = cls.synthetic_engine.connect()
+        try:
+            connection.execute(text(INSERT_OPERATIONS), rows=SYNTHETIC_ROWS,
+                               started=model.STATUS_STARTED, finished=model.STATUS_FINISHED)
+            connection.execute(text(INSERT_DATA_TYPES), rows=SYNTHETIC_ROWS)
+            connection.execute(text(INSERT_DATA_TYPE_GROUPS), rows=SYNTHETIC_ROWS // 200)
+            connection.execute("ANALYZE")
+        finally:
+            connection.close()
+
+
+    @classmethod
+    def teardown_class(cls):
+        cls.synthetic_engine.dispose()
+
+
+    @staticmethod
+    def _capture_select_statements(dao_method, *args):
+        """
+        :returns: list of (SQL, parameters) for the SELECT statements executed by `dao_method(*args)`
+        """
+        statements = []
+
+        def _listener(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append((statement, parameters))
+
+        event.listen(Engine, "before_cursor_execute", _listener)
+        try:
+            dao_method(*args)
+        except Exception:
+            # E.g. no result found in the test DB. The executed statement is what we are interested in.
+            pass
+        finally:
+            event.remove(Engine, "before_cursor_execute", _listener)
+        return statements
+
+
+    def _assert_index_used(self, index_name, dao_method, *args):
+        statements = self._capture_select_statements(dao_method, *args)
+        assert statements, "No query executed by %s" % dao_method.__name__
+
+        connection = self.synthetic_engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            plans = []
+            for statement, parameters in statements:
+                cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+                plans.append(" / ".join(str(row[-1]) for row in cursor.fetchall()))
+        finally:
+            connection.close()
+
+        assert any(("USING INDEX " + index_name in plan or "USING COVERING INDEX " + index_name in plan)
+                   for plan in plans), "%s does not use %s: %s" % (dao_method.__name__, index_name, plans)
+
+
+    def test_datatypes_by_operation(self):
+        self._assert_index_used("ix_DATA_TYPES_fk_from_operation", dao.count_resulted_datatypes, 10)
+        self._assert_index_used("ix_DATA_TYPES_fk_from_operation", dao.get_disk_size_for_operation, 10)
+
+
+    def test_datatypes_by_group(self):
+        self._assert_index_used("ix_DATA_TYPES_fk_datatype_group", dao.count_datatypes_in_group, 10)
+        self._assert_index_used("ix_DATA_TYPES_fk_datatype_group", dao.get_datatype_group_disk_size, 10)
+        self._assert_index_used("ix_DATA_TYPES_GROUPS_fk_operation_group", dao.get_datatypegroup_by_op_group_id, 10)
+
+
+    def test_datatypes_by_burst(self):
+        self._assert_index_used("ix_DATA_TYPES_fk_parent_burst", dao.count_datatypes_in_burst, 10)
+        self._assert_index_used("ix_DATA_TYPES_fk_parent_burst", dao.compute_bursts_disk_size, [10, 11])
+
+
+    def test_operations_by_project(self):
+        self._assert_index_used("ix_OPERATIONS_fk_launched_in", dao.get_operation_numbers, 10)
+
+
+    def test_operations_by_group(self):
+        self._assert_index_used("ix_OPERATIONS_fk_operation_group", dao.get_operations_in_group, 10)
+        self._assert_index_used("ix_OPERATIONS_fk_operation_group", dao.get_operations_in_group, 10, True)
+
+
+    def test_operations_by_gid_and_status(self):
+        self._assert_index_used("ix_OPERATIONS_gid", dao.get_operation_by_gid, "gid-10")
+        self._assert_index_used("ix_OPERATIONS_status", dao.compute_disk_size_for_started_ops, 10)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Tests for the local stand-in of a cluster job scheduler.
+"""
+
+import os
+import time
+import shutil
+from subprocess import Popen, PIPE
+from tvb.basic.profile import TvbProfile
+from tvb.core.local_scheduler import JobStore, LocalScheduler, configure_cluster_settings, parse_walltime
+from tvb.core.local_scheduler import STATE_QUEUED, STATE_RUNNING, STATE_FINISHED, STATE_CANCELED, STATE_TIMEOUT
+
+
+
+class _ClusterSettings(object):
+    """ Only the commands part of the cluster settings. """
+    SCHEDULE_COMMAND = STOP_COMMAND = STATUS_COMMAND = JOB_ID_STRING = None
+
+
+
+class TestLocalScheduler(object):
+    """
+    Test the order, the slots, the walltime and the cancellation of jobs in the local scheduler.
+    """
+
+
+    def setup_method(self):
+        self.state_folder = os.path.join(TvbProfile.current.TVB_TEMP_FOLDER, "test_local_scheduler")
+        self.store = JobStore(self.state_folder)
+        self.commands = []
+        self.scheduler = LocalScheduler(self.store, 1, self._sleep_command)
+
+
+    def teardown_method(self):
+        for job_id in range(1, self.store.last_job_id() + 1):
+            self.store.cancel(job_id)
+        shutil.rmtree(self.state_folder)
+
+
+    def _sleep_command(self, job):
+        self.commands.append(job['operation_id'])
+        return ["sleep", job['operation_id']]
+
+
+    def _states(self):
+        return [self.store.read(job_id)['state'] for job_id in range(1, self.store.last_job_id() + 1)]
+
+
+    def _check_until(self, condition, timeout=10):
+        end_time = time.time() + timeout
+        while not condition() and time.time() < end_time:
+            self.scheduler.check()
+            time.sleep(0.05)
+        assert condition()
+
+
+    def test_parse_walltime(self):
+        assert 5 * 3600 == parse_walltime("05:00:00")
+        assert 12 * 3600 + 7 * 60 + 3 == parse_walltime("12:7:3")
+        assert 90 == parse_walltime("1:30")
+
+
+    def test_jobs_in_order_within_slots(self):
+        self.store.submit("0.2", "user", "05:00:00")
+        self.store.submit("0", "user", "05:00:00")
+        self.scheduler.check()
+        assert [STATE_RUNNING, STATE_QUEUED] == self._states()
+
+        self._check_until(lambda: self._states() == [STATE_FINISHED, STATE_FINISHED])
+        assert ["0.2", "0"] == self.commands
+        assert 0 == self.store.read(1)['exit_code']
+
+
+    def test_walltime_enforced(self):
+        self.store.submit("30", "user", "0")
+        self.scheduler.check()
+        self._check_until(lambda: self.store.read(1)['exit_code'] is not None)
+        assert [STATE_TIMEOUT] == self._states()
+
+
+    def test_cancel(self):
+        self.store.submit("30", "user", "05:00:00")
+        self.store.submit("30", "user", "05:00:00")
+        self.scheduler.check()
+        assert self.store.cancel(2)
+        assert self.store.cancel(1)
+        self._check_until(lambda: self.store.read(1)['exit_code'] is not None)
+
+        assert [STATE_CANCELED, STATE_CANCELED] == self._states()
+        assert ["30"] == self.commands, "Canceled job should not have been started"
+        assert not self.store.cancel(1)
+
+
+    def test_cluster_commands(self):
+        settings = _ClusterSettings()
+        configure_cluster_settings(settings, self.state_folder)
+
+        # As in ClusterSchedulerClient
+        process_ = Popen([settings.SCHEDULE_COMMAND % ("30", "user label", "05:00:00")], stdout=PIPE, shell=True)
+        job_id = process_.stdout.read().replace('\n', '').split(settings.JOB_ID_STRING)[-1]
+        assert "1" == job_id
+        assert "user label" == self.store.read(job_id)['user']
+
+        assert 0 == os.system(settings.STATUS_COMMAND % job_id)
+        assert 0 == os.system(settings.STOP_COMMAND % job_id)
+        assert [STATE_CANCELED] == self._states()
+        assert 0 != os.system(settings.STOP_COMMAND % job_id)
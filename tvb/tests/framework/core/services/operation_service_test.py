@@ -42,6 +42,7 @@ from tvb.core.entities import model
 from tvb.core.entities.storage import dao
 from tvb.core.entities.file.files_helper import FilesHelper
 from tvb.core.entities.transient.structure_entities import DataTypeMetaData
+from tvb.core.services import operation_service as operation_module
 from tvb.core.services.operation_service import OperationService
 from tvb.core.services.project_service import initialize_storage, ProjectService
 from tvb.core.services.flow_service import FlowService
@@ -174,6 +175,47 @@ class TestOperationService(BaseTestCase):
         self._assert_stored_dt2()
 
 
+    def test_user_disk_size_counter(self):
+        """
+        Test the disk usage counter of the user follows stored and removed DataTypes, and gets reconciled.
+        """
+        adapter = TestFactory.create_adapter("tvb.tests.framework.adapters.testadapter3", "TestAdapterHDDRequired")
+        tmp_folder = FilesHelper().get_project_folder(self.test_project, "TEMP")
+        assert 0 == dao.get_user_disk_size(self.test_user.id)
+
+        self.operation_service.initiate_operation(self.test_user, self.test_project.id, adapter, tmp_folder, test=100)
+        datatype = self._assert_stored_dt2()
+        assert datatype.disk_size > 0
+        assert datatype.disk_size == dao.get_user_disk_size(self.test_user.id)
+
+        user = dao.get_user_by_id(self.test_user.id)
+        user.used_disk_size = 1
+        dao.store_entity(user)
+        assert dao.reconcile_users_disk_size() >= 1
+        assert datatype.disk_size == dao.get_user_disk_size(self.test_user.id)
+
+        ProjectService().remove_datatype(self.test_project.id, datatype.gid)
+        assert 0 == dao.get_user_disk_size(self.test_user.id)
+
+
+    def test_user_disk_size_cascade_removals(self):
+        """
+        Test DataTypes removed in cascade, with their Operation or Project, are subtracted from the disk usage.
+        """
+        adapter = TestFactory.create_adapter("tvb.tests.framework.adapters.testadapter3", "TestAdapterHDDRequired")
+        tmp_folder = FilesHelper().get_project_folder(self.test_project, "TEMP")
+        self.operation_service.initiate_operation(self.test_user, self.test_project.id, adapter, tmp_folder, test=100)
+        self.operation_service.initiate_operation(self.test_user, self.test_project.id, adapter, tmp_folder, test=100)
+        datatype = self._assert_stored_dt2(2)
+        assert 2 * datatype.disk_size == dao.get_user_disk_size(self.test_user.id)
+
+        dao.remove_entity(model.Operation, datatype.fk_from_operation)
+        assert datatype.disk_size == dao.get_user_disk_size(self.test_user.id)
+
+        dao.delete_project(self.test_project.id)
+        assert 0 == dao.get_user_disk_size(self.test_user.id)
+
+
     def test_launch_two_ops_HDD_with_space(self):
         """
         Launch two operations and give enough available space for user so that both should finish.
@@ -311,6 +353,31 @@ class TestOperationService(BaseTestCase):
         assert operation.status, model.STATUS_FINISHED == "Operation shouldn't have been canceled!"
 
 
+    def test_range_launched_in_one_batch(self):
+        """
+        Test that the operations of a range are stored in order, and sent to the backend with a single call.
+        """
+        adapter = TestFactory.create_adapter("tvb.tests.framework.adapters.testadapter1", "TestAdapter1")
+        algo = adapter.stored_adapter
+        data = {model.RANGE_PARAMETER_1: 'test1_val1', 'test1_val1': [1, 2, 3, 4], 'test1_val2': 5}
+        batches = []
+        original_backend = operation_module.BACKEND_CLIENT
+        operation_module.BACKEND_CLIENT = type("RecordingBackend", (object,),
+                                               {'execute_batch': staticmethod(lambda *args: batches.append(args))})
+        try:
+            self.operation_service.group_operation_launch(self.test_user.id, self.test_project.id, algo.id,
+                                                          algo.fk_category, **data)
+        finally:
+            operation_module.BACKEND_CLIENT = original_backend
+
+        assert 1 == len(batches)
+        operation_ids, user_name, _ = batches[0]
+        assert self.test_user.username == user_name
+        operations = dao.get_operations_by_ids([int(op_id) for op_id in operation_ids])
+        assert [1, 2, 3, 4] == [json.loads(operation.parameters)['test1_val1'] for operation in operations]
+        assert 1 == len(set(operation.fk_operation_group for operation in operations))
+
+
     def test_array_from_string(self):
         """
         Simple test for parse array on 1d, 2d and 3d array.
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Tests for the loop of the long-lived operation worker process, and for the pool of workers in backend_client.
+"""
+
+import os
+import sys
+import time
+import threading
+from StringIO import StringIO
+import tvb.core.operation_async_launcher as launcher
+from tvb.tests.framework.core.base_testcase import BaseTestCase
+from tvb.tests.framework.core.factory import TestFactory
+from tvb.basic.profile import TvbProfile
+from tvb.adapters.analyzers.matlab_worker import MatlabSession
+from tvb.core.entities import model
+from tvb.core.entities.storage import dao
+from tvb.core.entities.file.hdf5_file_pool import H5_FILE_POOL
+from tvb.core.operation_async_worker import serve, reset_process_state, STATUS_DONE, STATUS_RETIRE
+from tvb.core.services.backend_client import OperationWorker, OperationExecutor, PooledOperationExecutor
+from tvb.core.services.backend_client import WorkerPoolClient, CURRENT_ACTIVE_THREADS
+from tvb.core.services.payload_cache import PAYLOAD_CACHE
+
+
+FAKE_WORKER = """
+# Stand-in for tvb.core.operation_async_worker, arguments: seconds to spend on each operation, max operations
+import sys
+import time
+
+sleep_time, max_operations = float(sys.argv[1]), int(sys.argv[2])
+executed = 0
+for line in iter(sys.stdin.readline, ''):
+    operation_id = line.strip()
+    if operation_id == "crash":
+        sys.exit(3)
+    time.sleep(sleep_time)
+    executed += 1
+    sys.stdout.write("%%s %%s\\n" %% ("%s" if executed >= max_operations else "%s", operation_id))
+    sys.stdout.flush()
+""" % (STATUS_RETIRE, STATUS_DONE)
+
+
+
+class _FakeMatlabSession(object):
+
+    def __init__(self):
+        self.closed = False
+
+
+    def close(self):
+        self.closed = True
+
+
+
+class TestOperationWorker(object):
+    """
+    Test the operation worker executes operations in order and retires when required.
+    """
+
+
+    def setup_method(self):
+        self.launched = []
+        self.original_launch = launcher.do_operation_launch
+        launcher.do_operation_launch = self.launched.append
+
+
+    def teardown_method(self):
+        launcher.do_operation_launch = self.original_launch
+
+
+    def test_serve_until_input_closed(self):
+        output = StringIO()
+        serve(StringIO("1\n\n2\n3\n"), output, 10, float('inf'))
+        assert ["1", "2", "3"] == self.launched
+        assert ["%s %d" % (STATUS_DONE, i) for i in range(1, 4)] == output.getvalue().splitlines()
+
+
+    def test_retire_after_max_operations(self):
+        output = StringIO()
+        serve(StringIO("1\n2\n3\n"), output, 2, float('inf'))
+        assert ["1", "2"] == self.launched
+        assert ["%s 1" % STATUS_DONE, "%s 2" % STATUS_RETIRE] == output.getvalue().splitlines()
+
+
+    def test_retire_on_memory_growth(self):
+        output = StringIO()
+        serve(StringIO("1\n2\n"), output, 10, 0)
+        assert ["1"] == self.launched
+        assert ["%s 1" % STATUS_RETIRE] == output.getvalue().splitlines()
+
+
+    def test_cleanup_after_each_operation(self):
+        events = []
+        launcher.do_operation_launch = lambda operation_id: events.append("launch " + operation_id)
+        serve(StringIO("1\n2\n"), StringIO(), 10, float('inf'), lambda: events.append("cleanup"))
+        assert ["launch 1", "cleanup", "launch 2", "cleanup"] == events
+
+
+    def test_failed_cleanup_keeps_serving(self):
+        output = StringIO()
+
+        def _failing_cleanup():
+            raise IOError("Could not clean")
+
+        serve(StringIO("1\n2\n"), output, 10, float('inf'), _failing_cleanup)
+        assert ["1", "2"] == self.launched
+        assert 2 == len(output.getvalue().splitlines())
+
+
+    def test_reset_process_state(self):
+        path = os.path.join(TvbProfile.current.TVB_TEMP_FOLDER, "test_worker_state.h5")
+        h5_file = H5_FILE_POOL.acquire(path, 'a')
+        h5_file.attrs['test'] = 1
+        H5_FILE_POOL.release(path, h5_file)
+        ## A handle left checked out by the operation
+        h5_file = H5_FILE_POOL.acquire(path, 'r')
+        session = _FakeMatlabSession()
+        MatlabSession._SESSIONS["fake_octave"] = session
+        PAYLOAD_CACHE.put("key", ["gid"], "payload")
+
+        try:
+            reset_process_state()
+            assert not h5_file.id.valid
+            assert 0 == H5_FILE_POOL.open_files_count
+            assert session.closed
+            assert {} == MatlabSession._SESSIONS
+            assert "key" not in PAYLOAD_CACHE
+        finally:
+            os.remove(path)
+
+
+
+class TestOperationWorkerPool(object):
+    """
+    Test pooled worker processes are reused, replaced when they retire or crash, and closed on shutdown.
+    A small script stands in for the worker process.
+    """
+
+
+    def setup_method(self):
+        self.worker_script = os.path.join(TvbProfile.current.TVB_TEMP_FOLDER, "fake_operation_worker.py")
+        with open(self.worker_script, "w") as script:
+            script.write(FAKE_WORKER)
+        self.original_command = OperationWorker.build_command
+        self._use_fake_worker(0, 10)
+
+
+    def teardown_method(self):
+        OperationWorker.build_command = self.original_command
+        OperationWorker.shutdown()
+        os.remove(self.worker_script)
+
+
+    def _use_fake_worker(self, sleep_time, max_operations):
+        command = [sys.executable, self.worker_script, str(sleep_time), str(max_operations)]
+        OperationWorker.build_command = staticmethod(lambda: command)
+
+
+    def test_acquire_release(self):
+        worker = OperationWorker.acquire()
+        assert worker.launch(1)
+        worker.release()
+
+        same_worker = OperationWorker.acquire()
+        assert worker is same_worker
+        assert same_worker.launch(2)
+        same_worker.release()
+
+        assert 1 == OperationWorker.shutdown()
+        assert not worker.is_alive()
+        assert 0 == OperationWorker.shutdown()
+
+
+    def test_retired_worker_is_replaced(self):
+        self._use_fake_worker(0, 1)
+        worker = OperationWorker.acquire()
+        assert worker.launch(1)
+        assert not worker.is_alive()
+        worker.release()
+
+        new_worker = OperationWorker.acquire()
+        assert worker is not new_worker
+        assert worker.pid != new_worker.pid
+        new_worker.release()
+
+
+    def test_crashed_worker_is_respawned(self):
+        worker = OperationWorker.acquire()
+        assert not worker.launch("crash")
+        assert 3 == worker.close()
+        worker.release()
+
+        new_worker = OperationWorker.acquire()
+        assert worker.pid != new_worker.pid
+        assert new_worker.launch(1)
+        new_worker.release()
+
+
+    def test_stopped_worker_is_not_reused(self):
+        self._use_fake_worker(30, 10)
+        worker = OperationWorker.acquire()
+        results = []
+        thread = threading.Thread(target=lambda: results.append(worker.launch(1)))
+        thread.start()
+
+        time.sleep(0.5)
+        assert OperationExecutor.stop_pid(worker.pid)
+        thread.join(10)
+        assert [False] == results
+        worker.release()
+        assert 0 == OperationWorker.shutdown()
+
+
+
+class TestWorkerPoolClient(BaseTestCase):
+    """
+    Test stopping an operation running in a pooled worker.
+    """
+
+
+    def setup_method(self):
+        self.clean_database()
+        self.worker_script = os.path.join(TvbProfile.current.TVB_TEMP_FOLDER, "fake_operation_worker.py")
+        with open(self.worker_script, "w") as script:
+            script.write(FAKE_WORKER)
+        self.original_command = OperationWorker.build_command
+        command = [sys.executable, self.worker_script, "30", "10"]
+        OperationWorker.build_command = staticmethod(lambda: command)
+
+
+    def teardown_method(self):
+        OperationWorker.build_command = self.original_command
+        OperationWorker.shutdown()
+        os.remove(self.worker_script)
+        self.clean_database()
+
+
+    def test_stop_operation(self):
+        operation = TestFactory.create_operation(operation_status=model.STATUS_STARTED)
+        executor = PooledOperationExecutor(operation.id)
+        CURRENT_ACTIVE_THREADS.append(executor)
+        executor.start()
+
+        end_time = time.time() + 10
+        while dao.get_operation_process_for_operation(operation.id) is None and time.time() < end_time:
+            time.sleep(0.1)
+        assert WorkerPoolClient.stop_operation(operation.id)
+        executor.join(10)
+
+        assert not executor.is_alive()
+        assert executor not in CURRENT_ACTIVE_THREADS
+        assert model.STATUS_CANCELED == dao.get_operation_by_id(operation.id).status
+        assert 0 == OperationWorker.shutdown()
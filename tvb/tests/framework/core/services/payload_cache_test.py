@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import os
+import shutil
+from tvb.basic.profile import TvbProfile
+from tvb.core.services.payload_cache import PayloadCache
+
+
+
+class TestPayloadCache(object):
+    """
+    Test the LRU order, the spill on disk and the invalidation of cached payloads.
+    """
+
+
+    def setup_method(self):
+        self.spill_folder = os.path.join(TvbProfile.current.TVB_TEMP_FOLDER, "test_payload_cache")
+        self.cache = PayloadCache(max_memory=100, max_disk=200, spill_folder=self.spill_folder)
+
+
+    def teardown_method(self):
+        self.cache.clear()
+        if os.path.exists(self.spill_folder):
+            shutil.rmtree(self.spill_folder)
+
+
+    def test_get_put(self):
+        key = PayloadCache.make_key("read_datatype_attribute", "gid", "data", (), [("slice", "0:10")])
+        assert key != PayloadCache.make_key("read_datatype_attribute", "gid", "data", (), [("slice", "0:20")])
+        assert self.cache.get(key) is None
+
+        self.cache.put(key, ["gid"], b"x" * 10, {"Content-Type": "application/x.ndarray"})
+        assert key in self.cache
+        assert (b"x" * 10, {"Content-Type": "application/x.ndarray"}) == self.cache.get(key)
+
+
+    def test_spill_and_drop_least_recently_used(self):
+        for idx in range(4):
+            self.cache.put("k%d" % idx, ["gid%d" % idx], str(idx).encode() * 60)
+        # Used recently, so it should be kept on disk
+        self.cache.get("k0")
+        self.cache.put("k4", ["gid4"], b"4" * 60)
+
+        assert self.cache.memory_size <= 100
+        assert self.cache.disk_size <= 200
+        assert "k1" not in self.cache
+        assert "k0" in self.cache
+        assert (b"3" * 60, {}) == self.cache.get("k3")
+        assert len(os.listdir(self.spill_folder)) == self.cache.disk_size // 60
+
+
+    def test_too_large_payload(self):
+        self.cache.put("large", ["gid"], b"x" * 150)
+        assert 0 == self.cache.memory_size
+        assert (b"x" * 150, {}) == self.cache.get("large")
+
+        self.cache.put("huge", ["gid"], b"x" * 250)
+        assert "huge" not in self.cache
+
+
+    def test_invalidate(self):
+        self.cache.put("k1", ["gid1"], b"a")
+        self.cache.put("k2", ["gid1", "gid2"], b"b" * 150)
+        self.cache.put("k3", ["gid3"], b"c")
+
+        self.cache.invalidate("gid1")
+        assert "k1" not in self.cache
+        assert "k2" not in self.cache
+        assert "k3" in self.cache
+        assert 0 == self.cache.disk_size
+        assert [] == os.listdir(self.spill_folder)
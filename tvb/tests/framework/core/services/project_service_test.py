@@ -35,6 +35,8 @@ import os
 import shutil
 import pytest
 import tvb_data
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from tvb.tests.framework.core.base_testcase import TransactionalTestCase
 from tvb.tests.framework.core.factory import TestFactory, ExtremeTestFactory
 from tvb.tests.framework.datatypes import datatypes_factory
@@ -566,4 +568,53 @@ class TestProjectService(TransactionalTestCase):
         for link_gid in expected_links:
             assert link_gid in node_json, "Expected Link not present"
             assert link_gid in dts_in_tree, "Expected Link not present"
+
+
+    @staticmethod
+    def _count_sql_statements(function, *args):
+        """
+        :returns: number of SQL statements sent to the DB while executing `function(*args)`
+        """
+        statements = []
+
+        def _listener(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", _listener)
+        try:
+            function(*args)
+        finally:
+            event.remove(Engine, "before_cursor_execute", _listener)
+        return len(statements)
+
+
+    def test_project_structure_queries_count(self):
+        """
+        The number of queries for building the project tree should not depend on the number of DataTypes.
+        """
+        dt_factory = datatypes_factory.DatatypesFactory()
+        self._create_datatypes(dt_factory, 2)
+        dt_factory.create_datatype_group()
+        project = dt_factory.project
+
+        def _build_tree():
+            return self.project_service.get_project_structure(project, None, DataTypeMetaData.KEY_STATE,
+                                                              DataTypeMetaData.KEY_SUBJECT, None)
+
+        def _load_data():
+            for datatype in dao.get_data_in_project(project.id):
+                datatype.parent_operation.algorithm.algorithm_category
+                datatype.parent_operation.project
+                datatype.parent_operation.operation_group
+                datatype.parent_operation.user
+                datatype._parent_burst
+
+        small_tree_queries = self._count_sql_statements(_build_tree)
+        small_data_queries = self._count_sql_statements(_load_data)
+
+        self._create_datatypes(dt_factory, 20)
+        dt_factory.create_datatype_group()
+
+        assert small_tree_queries == self._count_sql_statements(_build_tree)
+        assert small_data_queries == self._count_sql_statements(_load_data)
             
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import threading
+from tvb.core.entities import model
+from tvb.core.services import status_events
+from tvb.core.services.status_events import StatusEvents, BurstStatusWatcher, KIND_BURST
+
+
+
+class _FakeBurst(object):
+
+    def __init__(self, burst_id, status):
+        self.id = burst_id
+        self.status = status
+        self.fk_project = burst_id * 10
+
+
+
+class _FakeDao(object):
+    """
+    Answers the burst queries of the watcher, from a dictionary {id: status}.
+    """
+
+    def __init__(self):
+        self.statuses = {}
+
+
+    def get_running_burst_ids(self):
+        return [b_id for b_id, status in self.statuses.items()
+                if status == model.BurstConfiguration.BURST_RUNNING]
+
+
+    def get_bursts_by_ids(self, burst_ids):
+        return [_FakeBurst(b_id, self.statuses[b_id]) for b_id in burst_ids if b_id in self.statuses]
+
+
+
+class TestStatusEvents(object):
+    """
+    Test the waiting on status events, and the burst transitions detected from DB.
+    """
+
+
+    def setup_method(self):
+        self.events = StatusEvents(max_events=3, max_listeners=1)
+        self.real_dao = status_events.dao
+        self.fake_dao = _FakeDao()
+        status_events.dao = self.fake_dao
+
+
+    def teardown_method(self):
+        status_events.dao = self.real_dao
+
+
+    def test_publish_and_wait(self):
+        assert (0, None) == self.events.wait(-1, 0)
+        assert (0, []) == self.events.wait(0, 0)
+
+        self.events.publish(KIND_BURST, 7, model.BurstConfiguration.BURST_FINISHED, project_id=1)
+        seq, events = self.events.wait(0, 0)
+        assert 1 == seq
+        assert [(KIND_BURST, 7, model.BurstConfiguration.BURST_FINISHED)] == [(ev['kind'], ev['id'], ev['status'])
+                                                                              for ev in events]
+
+
+    def test_events_of_project(self):
+        self.events.publish(KIND_BURST, 1, model.BurstConfiguration.BURST_FINISHED, project_id=1)
+        self.events.publish(KIND_BURST, 2, model.BurstConfiguration.BURST_FINISHED, project_id=2)
+
+        assert (2, []) == self.events.wait(0, 0, project_id=3)
+        assert [2] == [ev['id'] for ev in self.events.wait(0, 0, project_id=2)[1]]
+        # The events of other projects should not wake up a listener
+        seq, events = self.events.wait(2, 0.2, project_id=1)
+        assert (2, []) == (seq, events)
+
+
+    def test_wait_wakes_up_on_publish(self):
+        timer = threading.Timer(0.1, self.events.publish, (KIND_BURST, 3, model.BurstConfiguration.BURST_FINISHED))
+        timer.start()
+        seq, events = self.events.wait(0, 10)
+        timer.join()
+        assert 1 == seq
+        assert 3 == events[0]['id']
+
+
+    def test_reset_when_events_are_lost(self):
+        for idx in range(5):
+            self.events.publish(KIND_BURST, idx, model.BurstConfiguration.BURST_FINISHED)
+        # Only the last 3 events are retained, and seq 7 comes from before a restart
+        assert (5, None) == self.events.wait(1, 0)
+        assert (5, None) == self.events.wait(7, 0)
+        assert [3, 4, 5] == [ev['seq'] for ev in self.events.wait(2, 0)[1]]
+
+
+    def test_listeners_limit(self):
+        waiting = threading.Thread(target=self.events.wait, args=(0, 0.5))
+        waiting.start()
+        while not self.events._listeners:
+            threading.Event().wait(0.01)
+        # The single listener spot is taken, so the second one is answered right away
+        assert (0, []) == self.events.wait(0, 10)
+        waiting.join()
+        assert self.events.is_listened()
+
+
+    def test_burst_watcher(self):
+        watcher = BurstStatusWatcher(self.events)
+        self.fake_dao.statuses = {1: model.BurstConfiguration.BURST_RUNNING}
+
+        watcher.check()
+        assert 0 == self.events.last_seq, "Nobody listens, nothing should be checked"
+
+        self.events.wait(0, 0)
+        watcher.check()
+        assert 0 == self.events.last_seq, "First check only records the running bursts"
+
+        self.fake_dao.statuses = {1: model.BurstConfiguration.BURST_FINISHED,
+                                  2: model.BurstConfiguration.BURST_RUNNING}
+        watcher.check()
+        events = self.events.wait(0, 0)[1]
+        assert {(1, model.BurstConfiguration.BURST_FINISHED, 10),
+                (2, model.BurstConfiguration.BURST_RUNNING, 20)} == set((ev['id'], ev['status'], ev['project_id'])
+                                                                        for ev in events)
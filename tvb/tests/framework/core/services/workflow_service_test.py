@@ -41,7 +41,9 @@ from tvb.core.services.flow_service import FlowService
 from tvb.core.services.workflow_service import WorkflowService
 from tvb.core.services.burst_service import BurstService
 from tvb.core.services.operation_service import OperationService
+from tvb.datatypes.simulation_state import SimulationState
 from tvb.tests.framework.datatypes.datatype1 import Datatype1
+from tvb.tests.framework.adapters.testadapter1 import TestAdapter1
 from tvb.tests.framework.datatypes import datatypes_factory
 from tvb.tests.framework.core.factory import TestFactory
 
@@ -170,6 +172,70 @@ class TestWorkflow(TransactionalTestCase):
         assert  error == 0, "Some operations finished with error status."
 
 
+    def test_workflow_chain_passes_results(self):
+        """
+        The steps of a workflow are executed one after the other, in the same process, and the
+        DataType resulted from step1 reaches step2 as dynamic parameter, without reading it again from DB.
+        """
+        workflow_step_list = [TestFactory.create_workflow_step("tvb.tests.framework.adapters.testadapter1",
+                                                               "TestAdapter1", step_index=1,
+                                                               static_kwargs={"test1_val1": 1, "test1_val2": 1}),
+                              TestFactory.create_workflow_step("tvb.tests.framework.adapters.testadapter3",
+                                                               "TestAdapter3", step_index=2,
+                                                               dynamic_kwargs={
+                                                                   "test": {wf_cfg.DATATYPE_INDEX_KEY: 0,
+                                                                            wf_cfg.STEP_INDEX_KEY: 1}})]
+        queried_operations = []
+        original_method = dao.get_results_for_operation
+
+        def _get_results_for_operation(operation_id, filters=None):
+            queried_operations.append(operation_id)
+            return original_method(operation_id, filters)
+
+        dao.get_results_for_operation = _get_results_for_operation
+        try:
+            self.__create_complex_workflow(workflow_step_list)
+        finally:
+            del dao.get_results_for_operation
+
+        assert [] == queried_operations, "Results of step1 should have been passed in memory."
+        finished, started, error, _, _ = dao.get_operation_numbers(self.test_project.id)
+        assert  finished == 3, "Didn't start operations for both adapters in workflow."
+        assert  error == 0, "Some operations finished with error status."
+
+
+    def test_workflow_chain_skips_simulation_state(self):
+        """
+        When step1 stores a SimulationState before its real result (as the simulator does), the dynamic
+        parameter with index 0 of step2 should still get the real result (a Datatype1), as when read from DB.
+        """
+        workflow_step_list = [TestFactory.create_workflow_step("tvb.tests.framework.adapters.testadapter1",
+                                                               "TestAdapter1", step_index=1,
+                                                               static_kwargs={"test1_val1": 1, "test1_val2": 1}),
+                              TestFactory.create_workflow_step("tvb.tests.framework.adapters.testadapter3",
+                                                               "TestAdapter3", step_index=2,
+                                                               dynamic_kwargs={
+                                                                   "test": {wf_cfg.DATATYPE_INDEX_KEY: 0,
+                                                                            wf_cfg.STEP_INDEX_KEY: 1}})]
+        original_launch = TestAdapter1.launch
+
+        def _launch_with_state(adapter, test1_val1, test1_val2):
+            adapter._capture_operation_results([SimulationState(storage_path=adapter.storage_path)])
+            return original_launch(adapter, test1_val1, test1_val2)
+
+        TestAdapter1.launch = _launch_with_state
+        try:
+            self.__create_complex_workflow(workflow_step_list)
+        finally:
+            TestAdapter1.launch = original_launch
+
+        stored_types = [dt.type for dt in dao.get_datatypes_in_project(self.test_project.id)]
+        assert 1 == stored_types.count(SimulationState.__name__)
+        finished, started, error, _, _ = dao.get_operation_numbers(self.test_project.id)
+        assert  finished == 3, "Step2 should have received the Datatype1, not the SimulationState."
+        assert  error == 0, "Some operations finished with error status."
+
+
     def test_configuration2workflow(self):
         """
         Test that building a WorkflowStep from a WorkflowStepConfiguration. Make sure all the data is
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Tests for the incremental array statistics, stored as H5 meta-data.
+"""
+
+import numpy
+from tvb.basic.traits.types_mapped_light import MappedTypeLight as Mapped
+from tvb.core.traits.array_statistics import ArrayStatistics, METADATA_ARRAY_STD, METADATA_ARRAY_NAN_COUNT
+from tvb.core.traits.array_statistics import METADATA_ARRAY_HISTOGRAM, METADATA_ARRAY_HISTOGRAM_RANGE
+
+
+ALL_KEYS = [Mapped.METADATA_ARRAY_MIN, Mapped.METADATA_ARRAY_MAX, Mapped.METADATA_ARRAY_MEAN,
+            Mapped.METADATA_ARRAY_VAR, METADATA_ARRAY_STD, METADATA_ARRAY_NAN_COUNT,
+            Mapped.METADATA_ARRAY_MIN_NON_ZERO, Mapped.METADATA_ARRAY_MAX_NON_ZERO,
+            Mapped.METADATA_ARRAY_MEAN_NON_ZERO, Mapped.METADATA_ARRAY_VAR_NON_ZERO, METADATA_ARRAY_HISTOGRAM]
+
+
+
+class TestArrayStatistics(object):
+    """
+    Test statistics merged over chunks match the ones computed on the full array.
+    """
+
+
+    def _compute_by_chunks(self, data, chunk_length, keys=ALL_KEYS):
+        statistics = ArrayStatistics(keys)
+        for start in range(0, data.shape[0], chunk_length):
+            statistics.update(data[start:start + chunk_length])
+        return statistics.to_metadata()
+
+
+    def test_merged_chunks(self):
+        data = numpy.random.normal(5, 3, (1000, 4))
+        data[data < 2] = 0
+        metadata = self._compute_by_chunks(data, 7)
+
+        non_zero = data[data != 0]
+        assert data.min() == metadata[Mapped.METADATA_ARRAY_MIN]
+        assert data.max() == metadata[Mapped.METADATA_ARRAY_MAX]
+        assert non_zero.min() == metadata[Mapped.METADATA_ARRAY_MIN_NON_ZERO]
+        assert non_zero.max() == metadata[Mapped.METADATA_ARRAY_MAX_NON_ZERO]
+        numpy.testing.assert_allclose(data.mean(), metadata[Mapped.METADATA_ARRAY_MEAN])
+        numpy.testing.assert_allclose(data.var(), metadata[Mapped.METADATA_ARRAY_VAR])
+        numpy.testing.assert_allclose(data.std(), metadata[METADATA_ARRAY_STD])
+        numpy.testing.assert_allclose(non_zero.mean(), metadata[Mapped.METADATA_ARRAY_MEAN_NON_ZERO])
+        numpy.testing.assert_allclose(non_zero.var(), metadata[Mapped.METADATA_ARRAY_VAR_NON_ZERO])
+        assert 0 == metadata[METADATA_ARRAY_NAN_COUNT]
+
+
+    def test_histogram(self):
+        data = numpy.arange(1000.0)
+        metadata = self._compute_by_chunks(data, 10)
+
+        assert data.size == metadata[METADATA_ARRAY_HISTOGRAM].sum()
+        low, high = metadata[METADATA_ARRAY_HISTOGRAM_RANGE]
+        assert low <= data.min() and high >= data.max()
+
+
+    def test_nan_values(self):
+        data = numpy.array([[1.0, numpy.nan], [3.0, 4.0], [numpy.nan, numpy.nan]])
+        metadata = self._compute_by_chunks(data, 1)
+
+        assert 3 == metadata[METADATA_ARRAY_NAN_COUNT]
+        assert numpy.isnan(metadata[Mapped.METADATA_ARRAY_MIN])
+        assert numpy.isnan(metadata[Mapped.METADATA_ARRAY_MAX])
+        assert numpy.isnan(metadata[Mapped.METADATA_ARRAY_MEAN])
+        assert 3 == metadata[METADATA_ARRAY_HISTOGRAM].sum()
+
+
+    def test_nan_in_last_chunk(self):
+        data = numpy.array([1.0, 2.0, numpy.nan])
+        metadata = self._compute_by_chunks(data, 2, [Mapped.METADATA_ARRAY_MIN, Mapped.METADATA_ARRAY_MAX])
+        assert numpy.isnan(metadata[Mapped.METADATA_ARRAY_MIN])
+        assert numpy.isnan(metadata[Mapped.METADATA_ARRAY_MAX])
+
+
+    def test_only_requested_keys(self):
+        metadata = self._compute_by_chunks(numpy.arange(10), 3, [Mapped.METADATA_ARRAY_MAX])
+        assert {Mapped.METADATA_ARRAY_MAX: 9} == metadata
+
+
+    def test_complex_values(self):
+        data = numpy.array([1 + 2j, 3 - 1j, -2 + 0.5j])
+        metadata = self._compute_by_chunks(data, 2, [Mapped.METADATA_ARRAY_MEAN, Mapped.METADATA_ARRAY_VAR])
+        numpy.testing.assert_allclose(data.mean(), metadata[Mapped.METADATA_ARRAY_MEAN])
+        numpy.testing.assert_allclose(data.var(), metadata[Mapped.METADATA_ARRAY_VAR])
+
+
+    def test_non_numeric_array(self):
+        data = numpy.array(["a", "b"])
+        metadata = self._compute_by_chunks(data, 1, [Mapped.METADATA_ARRAY_MAX, Mapped.METADATA_ARRAY_MEAN,
+                                                     METADATA_ARRAY_NAN_COUNT])
+        assert {} == metadata
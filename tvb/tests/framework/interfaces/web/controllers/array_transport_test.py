@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import zlib
+import numpy
+import pytest
+from tvb.interfaces.web.controllers import array_transport
+from tvb.interfaces.web.controllers.array_transport import ArrayStream
+
+
+
+class TestArrayTransport(object):
+    """
+    Test the selection, encoding and byte ranges of the binary array transport.
+    """
+
+
+    def setup_method(self):
+        self.array = numpy.arange(10 * 6 * 4, dtype=numpy.float32).reshape((10, 6, 4))
+        self.reads = []
+
+
+    def _read_slice(self, data_slice):
+        self.reads.append(data_slice)
+        return self.array[data_slice]
+
+
+    def _stream(self, slices_spec=None, block_size=100):
+        return ArrayStream(self._read_slice, self.array.shape, slices_spec, block_size=block_size)
+
+
+    def test_parse_slices(self):
+        selection, shape = array_transport.parse_slices("1:8:2, -1", (10, 6, 4))
+        assert (slice(1, 8, 2), slice(5, 6, 1), slice(0, 4, 1)) == selection
+        assert (4, 4) == shape
+        assert (10, 6, 4) == array_transport.parse_slices("", (10, 6, 4))[1]
+        for invalid in ["::-1", "10", "1,2,3,4", "1:2:3:4"]:
+            with pytest.raises(ValueError):
+                array_transport.parse_slices(invalid, (10, 6, 4))
+
+
+    def test_negotiate_encoding(self):
+        assert array_transport.ENCODING_IDENTITY == array_transport.negotiate_encoding(None)
+        assert array_transport.ENCODING_GZIP == array_transport.negotiate_encoding("gzip, deflate, br")
+        assert array_transport.ENCODING_DEFLATE == array_transport.negotiate_encoding("gzip;q=0.5, deflate")
+        assert array_transport.ENCODING_SHUFFLE == array_transport.negotiate_encoding("x-shuffle, gzip")
+        assert array_transport.ENCODING_IDENTITY == array_transport.negotiate_encoding("br")
+
+
+    def test_parse_range(self):
+        assert array_transport.parse_range(None, 100) is None
+        assert (10, 19) == array_transport.parse_range("bytes=10-19", 100)
+        assert (90, 99) == array_transport.parse_range("bytes=-10", 100)
+        assert (50, 99) == array_transport.parse_range("bytes=50-500", 100)
+        assert array_transport.parse_range("bytes=0-1,5-6", 100) is None
+        with pytest.raises(array_transport.UnsatisfiableRange):
+            array_transport.parse_range("bytes=100-", 100)
+
+
+    def test_stream_selection_in_blocks(self):
+        array_stream = self._stream("2:9:3, 1:5, 3", block_size=32)
+        expected = self.array[2:9:3, 1:5, 3]
+        assert expected.shape == array_stream.shape
+        assert expected.nbytes == array_stream.nbytes
+        result = b''.join(array_stream.iter_bytes())
+        assert numpy.array_equal(expected, numpy.frombuffer(result, dtype=array_stream.dtype).reshape(expected.shape))
+
+        # One empty read for the type, then blocks of rows
+        assert [slice(2, 8, 3), slice(8, 9, 3)] == [data_slice[0] for data_slice in self.reads[1:]]
+
+
+    def test_byte_range_reads_needed_rows(self):
+        array_stream = self._stream(block_size=200)
+        row_size = 6 * 4 * 4
+        result = b''.join(array_stream.iter_bytes(3 * row_size + 5, 4 * row_size + 10))
+        assert self.array.tobytes()[3 * row_size + 5: 4 * row_size + 11] == result
+        assert [slice(3, 5, 1)] == [data_slice[0] for data_slice in self.reads[1:]]
+
+
+    def test_encodings(self):
+        self.array = self.array.astype('>i8')
+        for encoding in [array_transport.ENCODING_GZIP, array_transport.ENCODING_DEFLATE]:
+            array_stream = self._stream()
+            window_bits = 16 + zlib.MAX_WBITS if encoding == array_transport.ENCODING_GZIP else zlib.MAX_WBITS
+            result = zlib.decompress(b''.join(array_stream.iter_encoded(encoding)), window_bits)
+            assert '<i8' == array_stream.dtype.str
+            assert self.array.astype('<i8').tobytes() == result
+
+        array_stream = self._stream()
+        shuffled = zlib.decompress(b''.join(array_stream.iter_encoded(array_transport.ENCODING_SHUFFLE)))
+        result = array_transport.unshuffle_bytes(shuffled, array_stream.dtype.itemsize, array_stream.block_values)
+        assert self.array.astype('<i8').tobytes() == result
+
+
+    def test_unsupported_type(self):
+        self.array = numpy.array(["a", "b"])
+        with pytest.raises(ValueError):
+            self._stream()